@@ -0,0 +1,148 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+# Summary: Helpers of the benchmark scripts: measuring the speed and the memory
+# allocations of a function, saving the results as JSON with the details of the
+# environment, and comparing the results with an earlier run to spot regressions.
+
+import datetime
+import json
+import numbers
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+# call function repeatedly for at least minTime seconds, after warming up.
+# Returns the speed and the allocation statistics as a dictionary.
+def measure(name, function, minTime = 0.5, warmUp = 3, allocationRuns = 20):
+
+    if not isinstance(name, str):
+        raise TypeError("name must be formatted as a string.")
+    if not callable(function):
+        raise TypeError("function should be a callable object.")
+    if not isinstance(minTime, numbers.Number):
+        raise TypeError("minTime should be a number.")
+    if minTime <= 0:
+        raise ValueError("minTime should be positive.")
+
+    for i in range(warmUp):
+        function()
+
+    # run in growing batches, so the timer overhead is small for fast functions
+    iterations = 0
+    batch = 1
+    startTime = time.perf_counter()
+    startCpuTime = time.process_time()
+    while True:
+        for i in range(batch):
+            function()
+        iterations += batch
+        elapsed = time.perf_counter() - startTime
+        if elapsed >= minTime:
+            break
+        batch *= 2
+    cpuTime = time.process_time() - startCpuTime
+
+    # allocations are measured separately, tracing slows the code down
+    peakSizes = []
+    retainedSizes = []
+    for i in range(allocationRuns):
+        tracemalloc.start()
+        try:
+            function()
+            currentSize, peakSize = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        peakSizes.append(peakSize)
+        retainedSizes.append(currentSize)
+
+    result = {'name' : name,
+              'iterations' : iterations,
+              'ops_per_sec' : iterations / elapsed,
+              'time_per_op_us' : elapsed / iterations * 1000000.0,
+              'cpu_per_op_us' : cpuTime / iterations * 1000000.0,
+              # memory allocated during one call at most
+              'alloc_peak_bytes' : int(np.median(peakSizes)) if len(peakSizes) > 0 else None,
+              # memory still allocated after one call (caches, leaks)
+              'alloc_retained_bytes' : int(np.median(retainedSizes)) if len(retainedSizes) > 0 else None}
+    return result
+
+
+# version of the code being measured
+def getCodeVersion():
+    try:
+        output = subprocess.check_output(['git', 'describe', '--always', '--dirty'],
+                                         cwd = os.path.dirname(os.path.abspath(__file__)),
+                                         stderr = subprocess.DEVNULL)
+        return output.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def getEnvironment():
+    return {'created' : datetime.datetime.now().isoformat(),
+            'code_version' : getCodeVersion(),
+            'python' : sys.version.split()[0],
+            'numpy' : np.__version__,
+            'platform' : platform.platform(),
+            'processor' : platform.processor()}
+
+
+def writeResults(filePath, suite, results):
+    with open(filePath, 'w') as resultFile:
+        json.dump({'suite' : suite, 'environment' : getEnvironment(), 'results' : results}, resultFile, indent = 2)
+
+
+def readResults(filePath):
+    with open(filePath, 'r') as resultFile:
+        return json.load(resultFile)
+
+
+# compare the results with the baseline results by name, value is the key used for the
+# comparison and higherIsBetter tells its direction. Returns (name, baseline value,
+# current value, change ratio, regression) tuples, tolerance is the allowed relative change.
+def compareResults(baseline, current, value = 'ops_per_sec', higherIsBetter = True, tolerance = 0.1):
+
+    baselineValues = {result['name'] : result[value] for result in baseline['results']}
+    comparison = []
+    for result in current['results']:
+        if result['name'] not in baselineValues:
+            continue
+        baselineValue = baselineValues[result['name']]
+        currentValue = result[value]
+        if not baselineValue:
+            continue
+        ratio = currentValue / baselineValue
+        if higherIsBetter:
+            regression = ratio < 1.0 - tolerance
+        else:
+            regression = ratio > 1.0 + tolerance
+        comparison.append((result['name'], baselineValue, currentValue, ratio, regression))
+    return comparison
+
+
+def printResults(results, columns):
+    nameWidth = max([len('name')] + [len(result['name']) for result in results])
+    print ("name".ljust(nameWidth) + "".join(column.rjust(24) for column in columns))
+    for result in results:
+        line = result['name'].ljust(nameWidth)
+        for column in columns:
+            value = result.get(column)
+            if isinstance(value, float):
+                value = "{0:.2f}".format(value)
+            line += str(value).rjust(24)
+        print (line)
+
+
+def printComparison(comparison):
+    for name, baselineValue, currentValue, ratio, regression in comparison:
+        print ("{0}: {1:.2f} -> {2:.2f} ({3:+.1f}%){4}".format(name, baselineValue, currentValue,
+                                                               (ratio - 1.0) * 100.0,
+                                                               " REGRESSION" if regression else ""))
@@ -0,0 +1,183 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+# Summary: Micro-benchmarks of the numeric hot paths of TobiiHelper: coordinate conversions,
+# smoothing, gaze / eye position averaging, calculating the calibration results of growing
+# size and the per-frame updates of the trackbox screen. They run offline, using the
+# SyntheticEyeTracker and the PsychoPy mock. Prints ops/sec and allocations and saves the
+# results as JSON, which can be compared with the results of an earlier version:
+#
+#   python micro_benchmarks.py --output new.json --compare old.json
+
+import argparse
+import math
+import os
+import sys
+
+import numpy as np
+
+# Add the local path of the calibrator module and the PsychoPy mock,
+# use that instead of the system installed one.
+benchmarkDir = os.path.dirname(os.path.abspath(__file__))
+sys.path = [os.path.join(benchmarkDir, "..", "tobii_calibration"),
+            os.path.join(benchmarkDir, "..", "externals", "psychopy_mock"),
+            benchmarkDir] + sys.path
+
+import tobii_calibration as tc
+import analysis
+import synthetic_tracker as st
+import tobii_research as tobii
+import benchmark_utils as bu
+
+# sizes of the synthetic calibration results (number of points)
+CALIBRATION_SIZES = [5, 9, 16, 50]
+# number of samples at a calibration point
+CALIBRATION_SAMPLES = 30
+
+RESULT_COLUMNS = ['ops_per_sec', 'time_per_op_us', 'alloc_peak_bytes', 'alloc_retained_bytes']
+
+# calibration result with the given number of points and samples at every point
+def createCalibrationResult(pointCount, sampleCount, seed = 0):
+    random = np.random.RandomState(seed)
+    # the SDK adds an extra point at (0.0, 0.0)
+    points = [tobii.CalibrationPoint((0.0, 0.0), (tobii.CalibrationSample(
+                  tobii.CalibrationEyeData((0.0, 0.0), tobii.VALIDITY_VALID_AND_USED),
+                  tobii.CalibrationEyeData((0.0, 0.0), tobii.VALIDITY_VALID_AND_USED)),))]
+    for position in random.uniform(0.1, 0.9, (pointCount, 2)):
+        samples = []
+        for i in range(sampleCount):
+            left = np.clip(position + random.normal(0.0, 0.01, 2), 0.0, 1.0)
+            right = np.clip(position + random.normal(0.0, 0.01, 2), 0.0, 1.0)
+            samples.append(tobii.CalibrationSample(
+                tobii.CalibrationEyeData((float(left[0]), float(left[1])), tobii.VALIDITY_VALID_AND_USED),
+                tobii.CalibrationEyeData((float(right[0]), float(right[1])), tobii.VALIDITY_VALID_AND_USED)))
+        points.append(tobii.CalibrationPoint((float(position[0]), float(position[1])), tuple(samples)))
+    return tobii.CalibrationResult(tobii.CALIBRATION_STATUS_SUCCESS, tuple(points))
+
+
+# TobiiHelper with a monitor, a synthetic eyetracker and a gaze sample, like during the trackbox screen
+def createHelper():
+    tobii_helper = tc.TobiiHelper()
+    tobii_helper.disableLogging()
+    tobii_helper.setMonitor(dimensions = (1366, 768))
+    eyetracker = st.SyntheticEyeTracker(noise = 0.01, seed = 0)
+    tobii_helper.useEyeTracker(eyetracker)
+    tobii_helper.virtual_trackbox_width = 512.25
+    tobii_helper.virtual_trackbox_height = 413.214
+    tobii_helper.tracking = True
+    tobii_helper.gazeData = eyetracker.createGazeData(0.0, 0)
+    return tobii_helper, eyetracker
+
+
+# PsychoPy window of the mock, None if the mock is not available
+def createWindow(tobii_helper):
+    try:
+        from psychopy import visual
+        return visual.Window(size = [1366, 768], pos = [0, 0], units = 'pix', fullscr = True,
+                             allowGUI = True, monitor = tobii_helper.win, winType = 'pyglet',
+                             color = [0.4, 0.4, 0.4])
+    except Exception as error:
+        print ("PsychoPy mock is not available, skipping the drawing benchmarks: " + str(error))
+        return None
+
+
+# name and function of all benchmarks
+def createBenchmarks():
+    tobii_helper, eyetracker = createHelper()
+    benchmarks = []
+
+    benchmarks.append(('ada2PsychoPix', lambda : tobii_helper._TobiiHelper__ada2PsychoPix((0.3, 0.7))))
+    points = np.random.RandomState(0).random_sample((1000, 2))
+    benchmarks.append(('analysis.ada2PsychoPix[1000]', lambda : analysis.ada2PsychoPix(points, (1366, 768))))
+
+    benchmarks.append(('trackBox2VirtualTrackBox',
+                       lambda : tobii_helper._TobiiHelper__trackBox2VirtualTrackBox((0.3, 0.7))))
+    benchmarks.append(('analysis.trackBox2VirtualTrackBox[1000]',
+                       lambda : analysis.trackBox2VirtualTrackBox(points, (512.25, 413.214))))
+
+    # one step of the streaming smoothing, the list is kept full like during the trackbox screen
+    pointList = []
+    samples = [tuple(point) for point in np.random.RandomState(1).random_sample((64, 2))]
+    sampleIndex = [0]
+    def smoothingStep():
+        sampleIndex[0] = (sampleIndex[0] + 1) % len(samples)
+        return tobii_helper._TobiiHelper__smoothing(samples[sampleIndex[0]], pointList, (math.nan, math.nan),
+                                                    tobii_helper._TobiiHelper__calcMeanOfPointList)
+    benchmarks.append(('smoothing+calcMeanOfPointList', smoothingStep))
+    sampleArray = np.random.RandomState(1).random_sample((1000, 2))
+    benchmarks.append(('analysis.smoothing[1000]', lambda : analysis.smoothing(sampleArray)))
+
+    benchmarks.append(('getAvgGazePos', tobii_helper._TobiiHelper__getAvgGazePos))
+    benchmarks.append(('getAvgEyePos', tobii_helper._TobiiHelper__getAvgEyePos))
+    leftPoints = np.random.RandomState(2).random_sample((1000, 2))
+    rightPoints = np.random.RandomState(3).random_sample((1000, 2))
+    benchmarks.append(('analysis.avgGazePos[1000]', lambda : analysis.avgGazePos(leftPoints, rightPoints)))
+
+    for pointCount in CALIBRATION_SIZES:
+        calibResult = createCalibrationResult(pointCount, CALIBRATION_SAMPLES)
+        benchmarks.append(('calculateCalibration[' + str(pointCount) + ']',
+                           lambda calibResult = calibResult : tobii_helper._TobiiHelper__calculateCalibration(calibResult)))
+
+    # numeric part of the per-frame update of the trackbox screen
+    eyeDistances = []
+    leftPositions = []
+    rightPositions = []
+    def eyePositionUpdate():
+        leftEyePos, rightEyePos = tobii_helper._TobiiHelper__virtualTrackboxEyePos()
+        eyeDist = tobii_helper._TobiiHelper__getAvgEyeDist()
+        eyeDist = tobii_helper._TobiiHelper__smoothing(eyeDist, eyeDistances, 0.0, lambda list : sum(list) / len(list))
+        leftPos = tobii_helper._TobiiHelper__smoothing(leftEyePos, leftPositions, (math.nan, math.nan),
+                                                       tobii_helper._TobiiHelper__calcMeanOfPointList)
+        rightPos = tobii_helper._TobiiHelper__smoothing(rightEyePos, rightPositions, (math.nan, math.nan),
+                                                        tobii_helper._TobiiHelper__calcMeanOfPointList)
+        return eyeDist, leftPos, rightPos
+    benchmarks.append(('eyePositionUpdate', eyePositionUpdate))
+
+    window = createWindow(tobii_helper)
+    if window is not None:
+        from psychopy import visual
+        leftStim = visual.Circle(window, units = 'pix', radius = 30)
+        rightStim = visual.Circle(window, units = 'pix', radius = 30)
+        def eyeStimUpdate():
+            eyeDist, leftStim.pos, rightStim.pos = eyePositionUpdate()
+            leftStim.fillColor, leftStim.lineColor = [-1.0, 1.0, -1.0], [-1.0, 1.0, -1.0]
+            rightStim.fillColor, rightStim.lineColor = [-1.0, 1.0, -1.0], [-1.0, 1.0, -1.0]
+        benchmarks.append(('eyeStimUpdate', eyeStimUpdate))
+        benchmarks.append(('drawDistanceSlider', lambda : tobii_helper._TobiiHelper__drawDistanceSlider(window, 650.0)))
+
+    return benchmarks
+
+
+def main(arguments):
+
+    parser = argparse.ArgumentParser(description = "Micro-benchmarks of tobii_calibration.")
+    parser.add_argument('--output', default = 'micro_benchmarks.json', help = "JSON file of the results")
+    parser.add_argument('--compare', default = None, help = "JSON file of earlier results to compare with")
+    parser.add_argument('--tolerance', type = float, default = 0.1,
+                        help = "allowed relative slowdown before reporting a regression")
+    parser.add_argument('--min-time', type = float, default = 0.5, help = "minimum running time of a benchmark (s)")
+    parser.add_argument('--filter', default = None, help = "run only the benchmarks containing this string")
+    options = parser.parse_args(arguments)
+
+    results = []
+    for name, function in createBenchmarks():
+        if options.filter is not None and options.filter not in name:
+            continue
+        results.append(bu.measure(name, function, minTime = options.min_time))
+
+    bu.printResults(results, RESULT_COLUMNS)
+    bu.writeResults(options.output, 'micro', results)
+
+    if options.compare is not None:
+        comparison = bu.compareResults(bu.readResults(options.compare), bu.readResults(options.output),
+                                       tolerance = options.tolerance)
+        print ("")
+        bu.printComparison(comparison)
+        if any(regression for name, baselineValue, currentValue, ratio, regression in comparison):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
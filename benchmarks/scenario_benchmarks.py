@@ -0,0 +1,296 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+# Summary: End-to-end scenario benchmarks of the calibration flows: runTrackBox,
+# runFullCalibration with 5, 9 and custom points, with and without recalibration rounds,
+# and runValidation. The flows run on the SyntheticEyeTracker with scripted key presses
+# and a VirtualClock instead of PsychoPy's clock, so the delays of the flow cost no real time.
+# Every scenario reports the wall time, the CPU time, the virtual time (the time the
+# participant would spend with the flow), the number of drawn frames and SDK calls:
+#
+#   python scenario_benchmarks.py --output new.json --compare old.json
+
+import argparse
+import collections
+import math
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+# Add the local path of the calibrator module and the PsychoPy mock,
+# use that instead of the system installed one.
+benchmarkDir = os.path.dirname(os.path.abspath(__file__))
+sys.path = [os.path.join(benchmarkDir, "..", "tobii_calibration"),
+            os.path.join(benchmarkDir, "..", "externals", "psychopy_mock"),
+            benchmarkDir] + sys.path
+
+import tobii_calibration as tc
+import synthetic_tracker as st
+import benchmark_utils as bu
+
+# a scenario is aborted if the participant would spend more time with it (s)
+MAX_VIRTUAL_TIME = 3600.0
+
+RESULT_COLUMNS = ['wall_time_s', 'cpu_time_s', 'virtual_time_s', 'frames', 'sdk_calls', 'key_presses']
+
+# methods of the synthetic tracker which are not part of the SDK
+NOT_SDK_METHODS = ['createCalibration', 'createGazeData', 'isRunning']
+
+
+# Replaces psychopy.event: the keys of the script are pressed one after the other. A key
+# is pressed delay seconds (virtual time) after the flow started to wait for it.
+class ScriptedKeyboard:
+
+    def __init__(self, clock, script):
+        self.clock = clock
+        self.script = collections.deque(script)
+        # virtual time when the next key of the script is pressed
+        self.pressTime = None
+        self.pressCount = 0
+
+    def __nextKey(self, keyList):
+        if len(self.script) == 0:
+            return None
+        delay, key = self.script[0]
+        if keyList is not None and key not in keyList:
+            return None
+        if self.pressTime is None:
+            self.pressTime = self.clock.getTime() + delay
+        return key
+
+    def __press(self):
+        self.script.popleft()
+        self.pressTime = None
+        self.pressCount += 1
+
+    def getKeys(self, keyList = None, modifiers = False, timeStamped = False):
+        key = self.__nextKey(keyList)
+        if key is None or self.clock.getTime() < self.pressTime:
+            return []
+        self.__press()
+        return [key]
+
+    def waitKeys(self, maxWait = float('inf'), keyList = None, modifiers = False, timeStamped = False):
+        key = self.__nextKey(keyList)
+        if key is None or self.pressTime - self.clock.getTime() > maxWait:
+            if math.isinf(maxWait):
+                raise RuntimeError("The script has no key for waitKeys(): " + str(keyList))
+            self.clock.advance(maxWait)
+            return None
+        self.clock.advance(max(self.pressTime - self.clock.getTime(), 0.0))
+        self.__press()
+        return [key]
+
+    def clearEvents(self, eventType = None):
+        # keys of the script are pressed when the flow is waiting for them
+        pass
+
+    def isFinished(self):
+        return len(self.script) == 0
+
+
+# Forwards the calls to the target object and counts the method calls by name
+class CallCounter:
+
+    def __init__(self, target, counts):
+        self.__dict__['_target'] = target
+        self.__dict__['_counts'] = counts
+
+    def __getattr__(self, name):
+        attribute = getattr(self._target, name)
+        if not callable(attribute) or name in NOT_SDK_METHODS:
+            if name == 'createCalibration':
+                return lambda *args : CallCounter(attribute(*args), self._counts)
+            return attribute
+
+        def countedCall(*args, **kwargs):
+            self._counts[name] += 1
+            return attribute(*args, **kwargs)
+        return countedCall
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+
+# key presses of the operator / participant, as (delay, key) pairs
+def trackBoxScript():
+    return [(2.0, 'c'), (5.0, 'c')]
+
+
+def calibrationScript(recalibratedPoints):
+    script = [(2.0, 'c')]
+    # select the points for recalibration on the results screen and continue
+    for pointKeys in recalibratedPoints:
+        script += [(1.0, key) for key in pointKeys] + [(1.0, 'c')]
+    script.append((3.0, 'c'))
+    return script
+
+
+def validationScript():
+    return [(5.0, 'c')]
+
+
+def abortScenario():
+    raise RuntimeError("The scenario did not finish in " + str(MAX_VIRTUAL_TIME) + " virtual seconds.")
+
+
+# Runs one scenario with the given key script. flow(tobii_helper, window) runs the flow,
+# it's profiled by phases if profileDir is given and traced into traceFile if it's given.
+def runScenario(flow, script, profileDir = None, traceFile = None):
+
+    clock = tc.VirtualClock()
+    clock.callAt(MAX_VIRTUAL_TIME, abortScenario)
+    keyboard = ScriptedKeyboard(clock, script)
+    counts = collections.Counter()
+    originalEvent = tc.event
+    tc.event = keyboard
+    try:
+        tobii_helper = tc.TobiiHelper()
+        tobii_helper.disableLogging()
+        tobii_helper.setClock(clock)
+        tobii_helper.setMonitor(dimensions = (1366, 768))
+        tobii_helper.useEyeTracker(CallCounter(st.SyntheticEyeTracker(noise = 0.01, seed = 0), counts))
+        # get_track_box() and get_display_area() of the setup are not part of the flow
+        counts.clear()
+
+        from psychopy import visual
+        window = visual.Window(size = [1366, 768], pos = [0, 0], units = 'pix', fullscr = True,
+                               allowGUI = True, monitor = tobii_helper.win, winType = 'pyglet',
+                               color = [0.4, 0.4, 0.4])
+
+        # the points of the full calibration are shuffled
+        np.random.seed(0)
+        startTime = time.perf_counter()
+        startCpuTime = time.process_time()
+        try:
+            if profileDir is not None:
+                tobii_helper.startProfiling(profileDir, useCProfile = True)
+            if traceFile is not None:
+                tobii_helper.startTracing()
+            try:
+                flow(tobii_helper, window)
+            finally:
+                tobii_helper.stopProfiling()
+                tobii_helper.stopTracing(traceFile)
+        finally:
+            wallTime = time.perf_counter() - startTime
+            cpuTime = time.process_time() - startCpuTime
+            sdkCallCounts = dict(counts)
+            tobii_helper.eyetracker.unsubscribe_all()
+    finally:
+        tc.event = originalEvent
+
+    if not keyboard.isFinished():
+        raise RuntimeError("The scenario finished before using all the keys of the script.")
+
+    return {'wall_time_s' : wallTime,
+            'cpu_time_s' : cpuTime,
+            'virtual_time_s' : clock.getTime(),
+            'waited_time_s' : clock.waitedTime,
+            'frames' : clock.frameCount,
+            'sdk_calls' : sum(sdkCallCounts.values()),
+            'sdk_call_counts' : sdkCallCounts,
+            'key_presses' : keyboard.pressCount}
+
+
+# Runs the scenario repeatedly, times are the medians of the runs. With profileDir the
+# scenario runs once more with profiling, into a subfolder named by the scenario, with
+# traceDir once more with tracing, into a JSON file named by the scenario.
+def measureScenario(name, flow, script, repeats, profileDir = None, traceDir = None):
+    runs = [runScenario(flow, script) for i in range(repeats)]
+    fileName = re.sub(r'[^\w\-]+', '_', name)
+    if profileDir is not None:
+        runScenario(flow, script, profileDir = os.path.join(profileDir, fileName))
+    if traceDir is not None:
+        if not os.path.isdir(traceDir):
+            os.makedirs(traceDir)
+        runScenario(flow, script, traceFile = os.path.join(traceDir, fileName + ".json"))
+    result = dict(runs[-1])
+    result['name'] = name
+    result['repeats'] = repeats
+    for key in ['wall_time_s', 'cpu_time_s']:
+        result[key] = float(np.median([run[key] for run in runs]))
+    return result
+
+
+# calibration with custom points, the same steps what runFullCalibration does with 5 or 9 points
+def customCalibration(pointDict):
+    def flow(tobii_helper, window):
+        tobii_helper.runTrackBox(window)
+        tobii_helper._TobiiHelper__drawCalibrationScreen(pointDict, window)
+        tobii_helper.runValidation(pointDict, window)
+    return flow
+
+
+# name, flow and key script of all scenarios
+def createScenarios():
+    scenarios = []
+
+    scenarios.append(('runTrackBox', lambda tobii_helper, window : tobii_helper.runTrackBox(window),
+                      trackBoxScript()))
+    scenarios.append(('runValidation', lambda tobii_helper, window : tobii_helper.runValidation(None, window),
+                      validationScript()))
+
+    for pointCount in [5, 9]:
+        flow = lambda tobii_helper, window, pointCount = pointCount : \
+            tobii_helper.runFullCalibration(pointCount, window)
+        scenarios.append(('runFullCalibration[' + str(pointCount) + ']', flow,
+                          trackBoxScript() + calibrationScript([]) + validationScript()))
+        # recalibrating two points, then one of them again
+        scenarios.append(('runFullCalibration[' + str(pointCount) + ',recalibration]', flow,
+                          trackBoxScript() + calibrationScript([['1', '2'], ['2']]) + validationScript()))
+
+    # runFullCalibration() supports only 5 and 9 points
+    pointDict = collections.OrderedDict((str(i + 1), (float(x), float(y)))
+                                        for i, (x, y) in enumerate(np.random.RandomState(0).uniform(0.1, 0.9, (13, 2))))
+    scenarios.append(('customCalibration[13]', customCalibration(pointDict),
+                      trackBoxScript() + calibrationScript([]) + validationScript()))
+    scenarios.append(('customCalibration[13,recalibration]', customCalibration(pointDict),
+                      trackBoxScript() + calibrationScript([['3', '7', '11']]) + validationScript()))
+
+    return scenarios
+
+
+def main(arguments):
+
+    parser = argparse.ArgumentParser(description = "End-to-end scenario benchmarks of tobii_calibration.")
+    parser.add_argument('--output', default = 'scenario_benchmarks.json', help = "JSON file of the results")
+    parser.add_argument('--compare', default = None, help = "JSON file of earlier results to compare with")
+    parser.add_argument('--tolerance', type = float, default = 0.1,
+                        help = "allowed relative increase of the CPU and virtual time before reporting a regression")
+    parser.add_argument('--repeats', type = int, default = 3, help = "number of runs of a scenario")
+    parser.add_argument('--filter', default = None, help = "run only the scenarios containing this string")
+    parser.add_argument('--profile', default = None,
+                        help = "folder of the phase profiles (summary and .pstats files) of the scenarios")
+    parser.add_argument('--trace', default = None, help = "folder of the Chrome traces of the scenarios")
+    options = parser.parse_args(arguments)
+
+    results = []
+    for name, flow, script in createScenarios():
+        if options.filter is not None and options.filter not in name:
+            continue
+        results.append(measureScenario(name, flow, script, options.repeats, options.profile, options.trace))
+
+    bu.printResults(results, RESULT_COLUMNS)
+    bu.writeResults(options.output, 'scenario', results)
+
+    if options.compare is not None:
+        regression = False
+        for value in ['cpu_time_s', 'virtual_time_s']:
+            comparison = bu.compareResults(bu.readResults(options.compare), bu.readResults(options.output),
+                                           value = value, higherIsBetter = False, tolerance = options.tolerance)
+            print ("")
+            print (value + ":")
+            bu.printComparison(comparison)
+            regression = regression or any(item[4] for item in comparison)
+        if regression:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,24 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import sys
+# Add the local path of the calibrator module,
+# use that instead of the system installed one.
+sys.path = ["../tobii_calibration"] + sys.path
+
+import tobii_calibration as tc
+import synthetic_tracker as st
+
+# gaze data is emitted at 1200 Hz, following a circle
+eyetracker = st.SyntheticEyeTracker(frequency = 1200,
+                                    trajectory = st.circleTrajectory((0.5, 0.5), 0.3, 4.0),
+                                    calibrationError = (0.01, -0.01),
+                                    noise = 0.005)
+
+tobii_helper = tc.TobiiHelper()
+tobii_helper.setMonitor()
+tobii_helper.useEyeTracker(eyetracker)
+
+tobii_helper.runFullCalibration(numCalibPoints = 9)
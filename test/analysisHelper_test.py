@@ -0,0 +1,57 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import sys
+# Add the local path of the calibrator module,
+# test that instead of the system installed one.
+sys.path = ["../tobii_calibration"] + sys.path
+
+import tobii_calibration as calibrator
+import analysis
+import numpy as np
+import math
+
+# the analysis functions give the same results as the methods of TobiiHelper
+class analysisHelperTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+
+    def testAda2PsychoPixSameAsHelper(self):
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+        tobii_helper.setMonitor()
+        windowSize = tuple(tobii_helper.win.getSizePix())
+
+        points = np.random.RandomState(0).random_sample((100, 2))
+        result = analysis.ada2PsychoPix(points, windowSize)
+        for i in range(len(points)):
+            self.assertEqual(tobii_helper._TobiiHelper__ada2PsychoPix(tuple(points[i])), tuple(result[i]))
+
+    def testSmoothingSameAsHelper(self):
+        tobii_helper = calibrator.TobiiHelper()
+        random = np.random.RandomState(1)
+        samples = random.random_sample((50, 2))
+        # some invalid samples, also consecutive ones
+        samples[[3, 10, 11, 12, 13, 14, 15, 16, 30]] = math.nan
+
+        result = analysis.smoothing(samples)
+
+        point_list = []
+        invalid = (math.nan, math.nan)
+        for i in range(len(samples)):
+            current = invalid if np.isnan(samples[i]).any() else tuple(samples[i])
+            expected = tobii_helper._TobiiHelper__smoothing(current, point_list, invalid,
+                                                            tobii_helper._TobiiHelper__calcMeanOfPointList)
+            if expected is invalid:
+                self.assertTrue(np.isnan(result[i]).all())
+            else:
+                self.assertAlmostEqual(expected[0], result[i][0], delta = 0.000001)
+                self.assertAlmostEqual(expected[1], result[i][1], delta = 0.000001)
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
@@ -0,0 +1,126 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import sys
+# Add the local path of the calibrator module,
+# test that instead of the system installed one.
+sys.path = ["../tobii_calibration"] + sys.path
+
+import analysis
+import numpy as np
+import collections
+import math
+
+# stand-ins of the calibration result classes of the SDK, analysis only needs their fields
+CalibrationEyeData = collections.namedtuple('CalibrationEyeData', ['position_on_display_area', 'validity'])
+CalibrationSample = collections.namedtuple('CalibrationSample', ['left_eye', 'right_eye'])
+CalibrationPoint = collections.namedtuple('CalibrationPoint', ['position_on_display_area', 'calibration_samples'])
+CalibrationResult = collections.namedtuple('CalibrationResult', ['status', 'calibration_points'])
+
+class analysisTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+
+    def initCalibResult(self):
+        calibration_point0 = CalibrationPoint((0.0, 0.0),(
+                                    CalibrationSample(CalibrationEyeData((0.0, 0.0), True),
+                                                            CalibrationEyeData((0.0, 0.0), True)),))
+        calibration_point = CalibrationPoint((0.1, 0.1),(
+                                    CalibrationSample(CalibrationEyeData((0.08, 0.08), True),
+                                                            CalibrationEyeData((0.09, 0.08), True)),
+                                    CalibrationSample(CalibrationEyeData((0.12, 0.11), True),
+                                                            CalibrationEyeData((0.18, 0.12), True)),
+                                    CalibrationSample(CalibrationEyeData((0.11, 0.12), True),
+                                                            CalibrationEyeData((0.10, 0.10), True))))
+        calibration_point2 = CalibrationPoint((0.9, 0.9),(
+                                    CalibrationSample(CalibrationEyeData((0.98, 0.98), True),
+                                                            CalibrationEyeData((0.99, 0.98), True)),
+                                    CalibrationSample(CalibrationEyeData((0.91, 0.90), True),
+                                                            CalibrationEyeData((0.90, 0.97), True)),
+                                    CalibrationSample(CalibrationEyeData((0.89, 0.87), True),
+                                                            CalibrationEyeData((0.98, 0.99), True))))
+        calibration_points = (calibration_point0, calibration_point, calibration_point2)
+        return CalibrationResult('calibration_status_success', calibration_points)
+
+    def testAda2PsychoPix(self):
+        result = analysis.ada2PsychoPix([(0.0, 0.0), (0.5, 0.5), (1.0, 1.0), (0.1, 0.9)], (1366, 768))
+        self.assertEqual([[-683, 384], [0, 0], [683, -384], [-546, -307]], result.tolist())
+
+    def testAda2PsychoPixSinglePoint(self):
+        result = analysis.ada2PsychoPix((0.25, 0.75), (1366, 768))
+        self.assertEqual((1, 2), result.shape)
+        self.assertEqual([[-341, -192]], result.tolist())
+
+    def testAda2PsychoPixWrongParam(self):
+        with self.assertRaises(ValueError):
+            analysis.ada2PsychoPix([(1.1, 0.5)], (1366, 768))
+        with self.assertRaises(ValueError):
+            analysis.ada2PsychoPix([(0.5, -0.1)], (1366, 768))
+        with self.assertRaises(ValueError):
+            analysis.ada2PsychoPix([(math.nan, 0.5)], (1366, 768))
+        with self.assertRaises(ValueError):
+            analysis.ada2PsychoPix([(0.5, 0.5, 0.5)], (1366, 768))
+        with self.assertRaises(TypeError):
+            analysis.ada2PsychoPix([("a", 0.5)], (1366, 768))
+        with self.assertRaises(TypeError):
+            analysis.ada2PsychoPix([(0.5, 0.5)], 1366)
+        with self.assertRaises(ValueError):
+            analysis.ada2PsychoPix([(0.5, 0.5)], (0, 768))
+
+    def testTrackBox2VirtualTrackBox(self):
+        result = analysis.trackBox2VirtualTrackBox([(0.0, 0.0), (0.5, 0.5), (1.0, 0.25)], (300, 200))
+        self.assertEqual([[150.0, 100.0], [0.0, 0.0], [-150.0, 50.0]], result.tolist())
+
+    def testAvgGazePos(self):
+        left = [(0.2, 0.4), (math.nan, math.nan), (0.3, 0.3), (math.nan, math.nan)]
+        right = [(0.4, 0.6), (0.5, 0.5), (math.nan, math.nan), (math.nan, math.nan)]
+        result = analysis.avgGazePos(left, right)
+        self.assertAlmostEqual(0.3, result[0][0], delta = 0.001)
+        self.assertAlmostEqual(0.5, result[0][1], delta = 0.001)
+        self.assertEqual([0.5, 0.5], result[1].tolist())
+        self.assertEqual([0.3, 0.3], result[2].tolist())
+        self.assertTrue(np.isnan(result[3]).all())
+
+    def testAvgGazePosWrongShape(self):
+        with self.assertRaises(ValueError):
+            analysis.avgGazePos([(0.2, 0.4), (0.2, 0.4)], [(0.2, 0.4)])
+
+    def testSmoothingOneDimensional(self):
+        result = analysis.smoothing([1.0, 2.0, math.nan, 3.0, 4.0, 5.0], maxLength = 2)
+        self.assertEqual([1.0, 1.5, 3.0, 3.5, 4.5], result[[0, 1, 3, 4, 5]].tolist())
+        # the window was emptied by the invalid sample
+        self.assertTrue(math.isnan(result[2]))
+
+    def testSmoothingWrongParam(self):
+        with self.assertRaises(TypeError):
+            analysis.smoothing([1.0, 2.0], maxLength = 1.5)
+        with self.assertRaises(ValueError):
+            analysis.smoothing([1.0, 2.0], maxLength = 0)
+
+    def testCalibrationResultToArrays(self):
+        positions, leftMeans, rightMeans = analysis.calibrationResultToArrays(self.initCalibResult())
+        self.assertEqual([[0.1, 0.1], [0.9, 0.9]], positions.tolist())
+        self.assertAlmostEqual(0.1033, leftMeans[0][0], delta = 0.001)
+        self.assertAlmostEqual(0.1033, leftMeans[0][1], delta = 0.001)
+        self.assertAlmostEqual(0.9566, rightMeans[1][0], delta = 0.001)
+        self.assertAlmostEqual(0.98, rightMeans[1][1], delta = 0.001)
+
+    def testCalculateCalibration(self):
+        points, left, right = analysis.calculateCalibration(self.initCalibResult(), (1366, 768))
+        self.assertEqual([[-546, 307], [546, -307]], points.tolist())
+        self.assertEqual([[-541, 304], [582, -320]], left.tolist())
+        self.assertEqual([[-514, 307], [623, -368]], right.tolist())
+
+    def testCalculateCalibrationEmpty(self):
+        calibResult = CalibrationResult('calibration_status_failure', ())
+        points, left, right = analysis.calculateCalibration(calibResult, (1366, 768))
+        self.assertEqual((0, 2), points.shape)
+        self.assertEqual((0, 2), left.shape)
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
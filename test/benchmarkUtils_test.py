@@ -0,0 +1,70 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import sys
+# Add the local path of the benchmark helpers.
+sys.path = ["../benchmarks"] + sys.path
+
+import benchmark_utils as bu
+import tempfile
+import os
+
+class benchmarkUtilsTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+
+    def testMeasure(self):
+        calls = []
+        result = bu.measure('append', lambda : calls.append(1), minTime = 0.01, warmUp = 2, allocationRuns = 5)
+        self.assertEqual('append', result['name'])
+        self.assertEqual(2 + result['iterations'] + 5, len(calls))
+        self.assertTrue(result['ops_per_sec'] > 0)
+        self.assertAlmostEqual(1000000.0 / result['ops_per_sec'], result['time_per_op_us'], delta = 0.001)
+        self.assertTrue(result['alloc_peak_bytes'] >= 0)
+        self.assertTrue(result['alloc_retained_bytes'] >= 0)
+
+    def testMeasureAllocations(self):
+        result = bu.measure('list', lambda : [0] * 100000, minTime = 0.01)
+        self.assertTrue(result['alloc_peak_bytes'] >= 100000 * 8)
+        self.assertTrue(result['alloc_retained_bytes'] < 100000)
+
+    def testWrongParam(self):
+        with self.assertRaises(TypeError):
+            bu.measure(None, lambda : None)
+        with self.assertRaises(TypeError):
+            bu.measure('name', None)
+        with self.assertRaises(TypeError):
+            bu.measure('name', lambda : None, minTime = '1')
+        with self.assertRaises(ValueError):
+            bu.measure('name', lambda : None, minTime = 0)
+
+    def testWriteAndCompare(self):
+        filePath = os.path.join(tempfile.mkdtemp(), "results.json")
+        bu.writeResults(filePath, 'micro', [{'name' : 'a', 'ops_per_sec' : 100.0},
+                                            {'name' : 'b', 'ops_per_sec' : 100.0},
+                                            {'name' : 'c', 'ops_per_sec' : 100.0}])
+        baseline = bu.readResults(filePath)
+        self.assertEqual('micro', baseline['suite'])
+        self.assertIn('python', baseline['environment'])
+
+        current = {'results' : [{'name' : 'a', 'ops_per_sec' : 95.0},
+                                {'name' : 'b', 'ops_per_sec' : 50.0},
+                                {'name' : 'new', 'ops_per_sec' : 10.0}]}
+        comparison = bu.compareResults(baseline, current, tolerance = 0.1)
+        self.assertEqual(['a', 'b'], [item[0] for item in comparison])
+        self.assertFalse(comparison[0][4])
+        self.assertTrue(comparison[1][4])
+        self.assertAlmostEqual(0.5, comparison[1][3], delta = 0.001)
+
+        # e.g. wall time, where lower is better
+        comparison = bu.compareResults(baseline, current, higherIsBetter = False, tolerance = 0.1)
+        self.assertFalse(comparison[0][4])
+        self.assertFalse(comparison[1][4])
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
@@ -0,0 +1,180 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import sys
+# Add the local path of the calibrator module,
+# test that instead of the system installed one.
+sys.path = ["../tobii_calibration"] + sys.path
+
+import clock
+import tobii_calibration as calibrator
+import tobii_research as tobii
+import time
+
+class DummyWindow:
+
+    def __init__(self):
+        self.flipCount = 0
+
+    def flip(self):
+        self.flipCount += 1
+
+# Replaces psychopy.event, the keys are pressed by the callbacks of the clock
+class ClockKeyboard:
+
+    def __init__(self):
+        self.keys = []
+
+    def getKeys(self, keyList = None, modifiers = False, timeStamped = False):
+        pressed = [key for key in self.keys if keyList is None or key in keyList]
+        self.keys = []
+        return pressed
+
+    def clearEvents(self, eventType = None):
+        self.keys = []
+
+class clockTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+
+    def testVirtualWait(self):
+        virtualClock = clock.VirtualClock(startTime = 10.0)
+        startTime = time.perf_counter()
+        virtualClock.wait(3600.0)
+        virtualClock.wait(0.5)
+        self.assertTrue(time.perf_counter() - startTime < 1.0)
+        self.assertEqual(3610.5, virtualClock.getTime())
+        self.assertEqual(2, virtualClock.waitCount)
+        self.assertEqual(3600.5, virtualClock.waitedTime)
+
+    def testVirtualFlip(self):
+        virtualClock = clock.VirtualClock(frameDuration = 0.01)
+        window = DummyWindow()
+        for i in range(50):
+            virtualClock.flip(window)
+        self.assertEqual(50, window.flipCount)
+        self.assertEqual(50, virtualClock.frameCount)
+        self.assertAlmostEqual(0.5, virtualClock.getTime(), delta = 0.0001)
+
+    def testScheduledOrder(self):
+        virtualClock = clock.VirtualClock()
+        calls = []
+        virtualClock.callAt(2.0, lambda : calls.append(('b', virtualClock.getTime())))
+        virtualClock.callAt(1.0, lambda : calls.append(('a', virtualClock.getTime())))
+        # same time, called in the order of scheduling
+        virtualClock.callAt(2.0, lambda : calls.append(('c', virtualClock.getTime())))
+
+        virtualClock.wait(1.5)
+        self.assertEqual([('a', 1.0)], calls)
+        self.assertEqual(1.5, virtualClock.getTime())
+        self.assertEqual(2.0, virtualClock.getNextScheduledTime())
+
+        virtualClock.wait(10.0)
+        self.assertEqual([('a', 1.0), ('b', 2.0), ('c', 2.0)], calls)
+        self.assertEqual(11.5, virtualClock.getTime())
+        self.assertIsNone(virtualClock.getNextScheduledTime())
+
+    def testScheduleFromCallback(self):
+        virtualClock = clock.VirtualClock()
+        calls = []
+
+        def tick():
+            calls.append(virtualClock.getTime())
+            if len(calls) < 5:
+                virtualClock.callLater(1.0, tick)
+
+        virtualClock.callLater(1.0, tick)
+        virtualClock.wait(100.0)
+        self.assertEqual([1.0, 2.0, 3.0, 4.0, 5.0], calls)
+        self.assertEqual(100.0, virtualClock.getTime())
+
+    def testPsychoPyClock(self):
+        realClock = clock.PsychoPyClock()
+        calls = []
+        realClock.callLater(0.02, lambda : calls.append(realClock.getTime()))
+        startTime = realClock.getTime()
+        realClock.wait(0.05)
+        self.assertEqual(1, len(calls))
+        self.assertTrue(calls[0] - startTime >= 0.015)
+        self.assertTrue(realClock.getTime() - startTime >= 0.045)
+
+        window = DummyWindow()
+        realClock.callLater(0.0, lambda : calls.append(realClock.getTime()))
+        realClock.flip(window)
+        self.assertEqual(1, window.flipCount)
+        self.assertEqual(2, len(calls))
+
+    def testWrongParam(self):
+        virtualClock = clock.VirtualClock()
+        with self.assertRaises(TypeError):
+            clock.VirtualClock(startTime = '0')
+        with self.assertRaises(ValueError):
+            clock.VirtualClock(frameDuration = -1.0)
+        with self.assertRaises(TypeError):
+            virtualClock.wait('1')
+        with self.assertRaises(ValueError):
+            virtualClock.wait(-1.0)
+        with self.assertRaises(TypeError):
+            virtualClock.callAt(1.0, None)
+        with self.assertRaises(ValueError):
+            virtualClock.callLater(-1.0, lambda : None)
+
+    def testTobiiHelperClock(self):
+        tobii_helper = calibrator.TobiiHelper()
+        self.assertTrue(isinstance(tobii_helper.getClock(), clock.PsychoPyClock))
+
+        virtualClock = calibrator.VirtualClock()
+        tobii_helper.setClock(virtualClock)
+        self.assertIs(virtualClock, tobii_helper.getClock())
+
+        with self.assertRaises(TypeError):
+            tobii_helper.setClock(time)
+
+    def testWaitKeysThroughClock(self):
+        tobii_helper = calibrator.TobiiHelper()
+        virtualClock = calibrator.VirtualClock()
+        tobii_helper.setClock(virtualClock)
+        keyboard = ClockKeyboard()
+        originalEvent = calibrator.event
+        calibrator.event = keyboard
+        try:
+            startTime = time.perf_counter()
+            # timeout in virtual time
+            self.assertIsNone(tobii_helper._TobiiHelper__waitKeys(10, ['c']))
+            self.assertAlmostEqual(10.0, virtualClock.getTime(), delta = 0.0001)
+
+            virtualClock.callLater(2.0, lambda : keyboard.keys.append('c'))
+            self.assertEqual(['c'], tobii_helper._TobiiHelper__waitKeys(10, ['c']))
+            self.assertAlmostEqual(12.0, virtualClock.getTime(), delta = 0.02)
+            self.assertLess(time.perf_counter() - startTime, 2.0)
+        finally:
+            calibrator.event = originalEvent
+
+    def testDiscoveryNotThroughClock(self):
+        originalFindAll = tobii.find_all_eyetrackers
+        tobii.find_all_eyetrackers = lambda : []
+        try:
+            tobii_helper = calibrator.TobiiHelper()
+            tobii_helper.disableLogging()
+            tobii_helper.setEyeTrackerCache(None)
+            virtualClock = calibrator.VirtualClock()
+            tobii_helper.setClock(virtualClock)
+            calledTimes = []
+            virtualClock.callAt(0.5, lambda : calledTimes.append(virtualClock.getTime()))
+
+            with self.assertRaises(RuntimeError):
+                tobii_helper.setEyeTracker()
+            # the retries of the searching thread don't move the virtual time
+            # and don't run the scheduled callbacks
+            self.assertEqual(0.0, virtualClock.getTime())
+            self.assertEqual([], calledTimes)
+        finally:
+            tobii.find_all_eyetrackers = originalFindAll
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
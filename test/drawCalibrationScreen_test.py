@@ -223,6 +223,40 @@ class drawCalibrationScreenTest(unittest.TestCase):
         self.assertEqual(str("Calibration was successful.\n\n" + \
                              "Moving on to validation."), message.text)
 
+    def testPursuitMode(self):
+        tobii_helper = calibrator.TobiiHelper()
+        self.initAll(tobii_helper)
+
+        tobii_helper.setCalibrationMode('pursuit')
+
+        def pursuitCalibrationData(*args):
+            return tobii.CalibrationResult(tobii.CALIBRATION_STATUS_SUCCESS, ())
+        tobii_helper._TobiiHelper__getPursuitCalibrationData = pursuitCalibrationData
+
+        def drawCalibrationResultsFail(*args):
+            self.fail("No calibration points can be selected in pursuit mode.")
+        calibrator.TobiiHelper._TobiiHelper__drawCalibrationResults = drawCalibrationResultsFail
+
+        visual_mock = pvm.PsychoPyVisualMock()
+        visual_mock.setReturnKeyList(['c', 'c'])
+        tobii_helper._TobiiHelper__drawCalibrationScreen(self.calibDict, self.calibWin)
+        drawing_list = visual_mock.getListOfDrawings()
+
+        self.assertEqual(2, len(drawing_list))
+
+        # calibration message
+        message = drawing_list[0]
+        self.assertTrue(isinstance(message, pvm.TextStim))
+        self.assertEqual(str("Please focus your eyes on the red dot " + \
+                             "and follow it with your eyes as closely as " + \
+                             "possible.\n\nPress 'c' to continue."), message.text)
+
+        # no recalibration, calibration is finished after the pursuit
+        message = drawing_list[1]
+        self.assertTrue(isinstance(message, pvm.TextStim))
+        self.assertEqual(str("Calibration was successful.\n\n" + \
+                             "Moving on to validation."), message.text)
+
     def testFailedCalibration(self):
         tobii_helper = calibrator.TobiiHelper()
         self.initAll(tobii_helper)
@@ -239,7 +273,7 @@ class drawCalibrationScreenTest(unittest.TestCase):
         tobii_helper._TobiiHelper__drawCalibrationScreen(self.calibDict, self.calibWin)
         drawing_list = visual_mock.getListOfDrawings()
 
-        self.assertEqual(5 * 150 + 2, len(drawing_list))
+        self.assertEqual(5 * 150 + 3, len(drawing_list))
         # 5 * 150 is drawn by __getCalibrationData() (tested in another test)
 
         # calibration message
@@ -251,9 +285,14 @@ class drawCalibrationScreenTest(unittest.TestCase):
 
         # doing __getCalibrationData()
 
-        # then message about the failure
+        # message while the calibration is computed
         message = drawing_list[751]
         self.assertTrue(isinstance(message, pvm.TextStim))
+        self.assertEqual(str("Applying calibration..."), message.text)
+
+        # then message about the failure
+        message = drawing_list[752]
+        self.assertTrue(isinstance(message, pvm.TextStim))
         self.assertEqual(str("Calibration was not successful.\n\n" + \
                              "Closing the calibration window."), message.text)
 
@@ -272,7 +311,7 @@ class drawCalibrationScreenTest(unittest.TestCase):
         tobii_helper._TobiiHelper__drawCalibrationScreen(self.calibDict, self.calibWin)
         drawing_list = visual_mock.getListOfDrawings()
 
-        self.assertEqual(5 * 150 + 2, len(drawing_list))
+        self.assertEqual(5 * 150 + 3, len(drawing_list))
         # 5 * 150 is drawn by __getCalibrationData() (tested in another test)
 
         # calibration message
@@ -284,9 +323,14 @@ class drawCalibrationScreenTest(unittest.TestCase):
 
         # doing __getCalibrationData()
 
-        # then message about the failure
+        # message while the calibration is computed
         message = drawing_list[751]
         self.assertTrue(isinstance(message, pvm.TextStim))
+        self.assertEqual(str("Applying calibration..."), message.text)
+
+        # then message about the failure
+        message = drawing_list[752]
+        self.assertTrue(isinstance(message, pvm.TextStim))
         self.assertEqual(str("Calibration was not successful.\n\n" + \
                              "Closing the calibration window."), message.text)
 
@@ -304,7 +348,7 @@ class drawCalibrationScreenTest(unittest.TestCase):
         tobii_helper._TobiiHelper__drawCalibrationScreen(self.calibDict, self.calibWin)
         drawing_list = visual_mock.getListOfDrawings()
 
-        self.assertEqual(5 * 150 + 2, len(drawing_list))
+        self.assertEqual(5 * 150 + 3, len(drawing_list))
         # 5 * 150 is drawn by __getCalibrationData() (tested in another test)
 
         # calibration message
@@ -316,9 +360,14 @@ class drawCalibrationScreenTest(unittest.TestCase):
 
         # doing __getCalibrationData()
 
-        # then message about the failure
+        # message while the calibration is computed
         message = drawing_list[751]
         self.assertTrue(isinstance(message, pvm.TextStim))
+        self.assertEqual(str("Applying calibration..."), message.text)
+
+        # then message about the failure
+        message = drawing_list[752]
+        self.assertTrue(isinstance(message, pvm.TextStim))
         self.assertEqual(str("Calibration was not successful.\n\n" + \
                              "Closing the calibration window."), message.text)
 
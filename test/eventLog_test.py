@@ -0,0 +1,181 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import sys
+# Add the local path of the calibrator module,
+# test that instead of the system installed one.
+sys.path = ["../tobii_calibration"] + sys.path
+
+import tobii_calibration as calibrator
+import event_log
+import logging
+import threading
+import tempfile
+import json
+import os
+
+# collects the handled records and the threads handling them
+class CollectingHandler(logging.Handler):
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.records = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.records.append(record)
+        self.threads.add(threading.current_thread())
+
+class eventLogTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+
+    def tearDown(self):
+        event_log.stopLogQueue()
+
+    def createRecord(self, message, **fields):
+        return event_log.logger.makeRecord(event_log.LOGGER_NAME, logging.INFO, __file__, 0, message, None, None,
+                                           extra = {'fields' : fields})
+
+    def testConsoleFormatter(self):
+        formatter = event_log.ConsoleFormatter()
+        self.assertEqual("Collecting data at 1.", formatter.format(self.createRecord("Collecting data at 1.")))
+        self.assertEqual("Collecting data at 1. [phase=calibration, point=1]",
+                         formatter.format(self.createRecord("Collecting data at 1.", point = 1, phase = 'calibration')))
+
+    def testStructuredFormatter(self):
+        formatter = event_log.StructuredFormatter()
+        entry = json.loads(formatter.format(self.createRecord("Calibration computed.", phase = 'calibration',
+                                                              status = 'calibration_status_success',
+                                                              duration = 0.25)))
+        self.assertEqual("Calibration computed.", entry['message'])
+        self.assertEqual("INFO", entry['level'])
+        self.assertEqual("tobii_calibration", entry['logger'])
+        self.assertEqual("calibration", entry['phase'])
+        self.assertEqual("calibration_status_success", entry['status'])
+        self.assertEqual(0.25, entry['duration'])
+
+    def testReservedFields(self):
+        with self.assertRaises(ValueError):
+            event_log.logEvent(logging.INFO, "Calibration computed.", time = 0.25)
+        with self.assertRaises(ValueError):
+            event_log.logEvent(logging.INFO, "Calibration computed.", thread = 'render')
+
+        # records of other loggers can't override the keys of the entry either
+        formatter = event_log.StructuredFormatter()
+        entry = json.loads(formatter.format(self.createRecord("Calibration computed.", time = 'late', point = 1)))
+        self.assertNotEqual('late', entry['time'])
+        self.assertEqual(1, entry['point'])
+
+    def testHandledOnListenerThread(self):
+        handler = CollectingHandler()
+        event_log.startLogQueue([handler], level = logging.DEBUG)
+        event_log.logEvent(logging.INFO, "Collecting data at {0}.".format(2), phase = 'calibration', point = 2)
+        event_log.stopLogQueue()
+
+        self.assertEqual(1, len(handler.records))
+        self.assertEqual("Collecting data at 2.", handler.records[0].getMessage())
+        self.assertEqual({'phase' : 'calibration', 'point' : 2}, handler.records[0].fields)
+        self.assertNotIn(threading.current_thread(), handler.threads)
+        self.assertIsNone(event_log.getLogQueue())
+
+    def testLevel(self):
+        handler = CollectingHandler()
+        event_log.startLogQueue([handler], level = logging.WARNING)
+        event_log.logEvent(logging.INFO, "Subscribing to eyetracker.")
+        event_log.logEvent(logging.WARNING, "Can't write the eyetracker cache.")
+        event_log.stopLogQueue()
+
+        self.assertEqual(["Can't write the eyetracker cache."], [record.getMessage() for record in handler.records])
+
+    def testRootHandlers(self):
+        # the application configured the root logger only (e.g. logging.basicConfig())
+        handler = CollectingHandler()
+        rootLogger = logging.getLogger()
+        rootLogger.addHandler(handler)
+        try:
+            event_log.ensureLogQueue()
+            self.assertIsNotNone(event_log.getLogQueue())
+            # the level of the root logger is kept too
+            event_log.logEvent(logging.DEBUG, "Subscribing to eyetracker.")
+            event_log.logEvent(logging.WARNING, "Can't write the eyetracker cache.")
+            event_log.stopLogQueue()
+        finally:
+            rootLogger.removeHandler(handler)
+
+        self.assertEqual(["Can't write the eyetracker cache."], [record.getMessage() for record in handler.records])
+        self.assertNotIn(threading.current_thread(), handler.threads)
+
+    def testOwnHandlers(self):
+        # the application configured the package's logger, the queue is not started
+        handler = CollectingHandler()
+        event_log.logger.addHandler(handler)
+        try:
+            event_log.ensureLogQueue()
+            self.assertIsNone(event_log.getLogQueue())
+            event_log.logEvent(logging.WARNING, "Can't write the eyetracker cache.")
+        finally:
+            event_log.logger.removeHandler(handler)
+
+        self.assertEqual(["Can't write the eyetracker cache."], [record.getMessage() for record in handler.records])
+
+    def testFullQueueDropsRecords(self):
+        logQueue = event_log.LogQueue([CollectingHandler()], maxSize = 1)
+        logQueue.queueHandler.handle(self.createRecord("first"))
+        logQueue.queueHandler.handle(self.createRecord("second"))
+        self.assertEqual(1, logQueue.getDroppedCount())
+        self.assertEqual("first", logQueue.queue.get_nowait().getMessage())
+
+    def testWrongParam(self):
+        with self.assertRaises(TypeError):
+            event_log.LogQueue(CollectingHandler())
+        with self.assertRaises(TypeError):
+            event_log.LogQueue(maxSize = 1.5)
+        with self.assertRaises(ValueError):
+            event_log.LogQueue(maxSize = 0)
+        with self.assertRaises(TypeError):
+            event_log.createJsonFileHandler(None)
+
+    def testJsonFile(self):
+        filePath = os.path.join(tempfile.mkdtemp(), "calibration_log.json")
+        handler = event_log.createJsonFileHandler(filePath)
+        event_log.startLogQueue([handler], level = logging.DEBUG)
+        event_log.logEvent(logging.INFO, "first", phase = 'monitor')
+        event_log.logEvent(logging.DEBUG, "second", phase = 'calibration', point = 3)
+        event_log.stopLogQueue()
+        handler.close()
+
+        with open(filePath, 'r') as logFile:
+            entries = [json.loads(line) for line in logFile]
+        self.assertEqual(2, len(entries))
+        self.assertEqual("monitor", entries[0]['phase'])
+        self.assertEqual(3, entries[1]['point'])
+        self.assertEqual("DEBUG", entries[1]['level'])
+
+    def testHelperLogging(self):
+        handler = CollectingHandler()
+        event_log.startLogQueue([handler], level = logging.DEBUG)
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.setMonitor(dimensions = (1366, 768))
+        event_log.stopLogQueue()
+
+        self.assertTrue(len(handler.records) > 0)
+        self.assertEqual('monitor', handler.records[0].fields['phase'])
+
+    def testHelperLoggingDisabled(self):
+        handler = CollectingHandler()
+        event_log.startLogQueue([handler], level = logging.DEBUG)
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+        tobii_helper.setMonitor(dimensions = (1366, 768))
+        event_log.stopLogQueue()
+
+        self.assertEqual([], handler.records)
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
@@ -0,0 +1,185 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import sys
+# Add the local path of the calibrator module,
+# test that instead of the system installed one.
+sys.path = ["../tobii_calibration"] + sys.path
+
+import tobii_calibration as calibrator
+import tobii_research as tobii
+import tempfile
+import shutil
+import json
+import os
+
+class DummyEyeTracker:
+    def __init__(self, address, serial_number):
+        self.address = address
+        self.serial_number = serial_number
+        self.model = "dummy model"
+        self.device_name = "dummy"
+
+    def get_track_box(self):
+        track_box_dict = {}
+        track_box_dict['front_lower_left'] = (-150.0, -121.0, 500.0)
+        track_box_dict['front_lower_right'] = (150.0, -121.0, 500.0)
+        track_box_dict['front_upper_left'] = (-150.0, 121.0, 500.0)
+        track_box_dict['front_upper_right'] = (150.0, 121.0, 500.0)
+        track_box_dict['back_lower_left'] = (-150.0, -121.0, 800.0)
+        track_box_dict['back_lower_right'] = (150.0, -121.0, 800.0)
+        track_box_dict['back_upper_left'] = (-150.0, 121.0, 800.0)
+        track_box_dict['back_upper_right'] = (150.0, 121.0, 800.0)
+        return tobii.TrackBox(track_box_dict)
+
+# eyetrackers reachable by address and the ones found by searching
+reachableTrackers = {}
+foundTrackers = []
+searchCount = []
+
+def connectEyeTracker(address):
+    if address not in reachableTrackers:
+        raise RuntimeError("Connection failed.")
+    return reachableTrackers[address]
+
+def findAllEyeTrackers():
+    searchCount.append(1)
+    return list(foundTrackers)
+
+class eyeTrackerCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+        self.originalEyeTracker = tobii.EyeTracker
+        self.originalFindAll = tobii.find_all_eyetrackers
+        tobii.EyeTracker = connectEyeTracker
+        tobii.find_all_eyetrackers = findAllEyeTrackers
+        reachableTrackers.clear()
+        foundTrackers.clear()
+        searchCount.clear()
+        self.cacheDir = tempfile.mkdtemp()
+        self.cachePath = os.path.join(self.cacheDir, "cache", "eyetracker.json")
+
+    def tearDown(self):
+        tobii.EyeTracker = self.originalEyeTracker
+        tobii.find_all_eyetrackers = self.originalFindAll
+        shutil.rmtree(self.cacheDir)
+
+    def writeCache(self, address, serial):
+        os.makedirs(os.path.dirname(self.cachePath))
+        with open(self.cachePath, 'w') as cacheFile:
+            json.dump({'address' : address, 'serial_number' : serial}, cacheFile)
+
+    def readCache(self):
+        with open(self.cachePath, 'r') as cacheFile:
+            return json.load(cacheFile)
+
+    def testWrongParam(self):
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+
+        with self.assertRaises(TypeError):
+            tobii_helper.setEyeTrackerCache(12)
+
+        with self.assertRaises(TypeError):
+            tobii_helper.setEyeTracker(progressCallback = 12)
+
+        with self.assertRaises(TypeError):
+            tobii_helper.setEyeTracker(blocking = None)
+
+        with self.assertRaises(TypeError):
+            tobii_helper.waitForEyeTracker("12")
+
+        with self.assertRaises(ValueError):
+            tobii_helper.waitForEyeTracker(-1)
+
+    def testConnectCachedAddress(self):
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+        tobii_helper.setEyeTrackerCache(self.cachePath)
+
+        eyetracker = DummyEyeTracker("tet-tcp://169.254.1.2", "TX300-1")
+        reachableTrackers[eyetracker.address] = eyetracker
+        self.writeCache(eyetracker.address, eyetracker.serial_number)
+
+        progress = []
+        tobii_helper.setEyeTracker(progressCallback = lambda status, details : progress.append((status, details)))
+
+        # no searching was needed
+        self.assertEqual(eyetracker, tobii_helper.eyetracker)
+        self.assertEqual(0, len(searchCount))
+        self.assertEqual([('cached', "tet-tcp://169.254.1.2"), ('connected', "TX300-1")], progress)
+        self.assertEqual(500.0, tobii_helper.tbCoordinates['frontDistance'])
+
+    def testCachedAddressFails(self):
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+        tobii_helper.setEyeTrackerCache(self.cachePath)
+
+        self.writeCache("tet-tcp://169.254.1.2", "TX300-1")
+        eyetracker = DummyEyeTracker("tet-tcp://169.254.1.3", "TX300-1")
+        foundTrackers.append(eyetracker)
+
+        progress = []
+        tobii_helper.setEyeTracker(progressCallback = lambda status, details : progress.append((status, details)))
+
+        self.assertEqual(eyetracker, tobii_helper.eyetracker)
+        self.assertEqual(1, len(searchCount))
+        self.assertEqual([('cached', "tet-tcp://169.254.1.2"), ('searching', 1), ('connected', "TX300-1")], progress)
+
+        # the new address is cached
+        self.assertEqual({'address' : "tet-tcp://169.254.1.3", 'serial_number' : "TX300-1"}, self.readCache())
+
+    def testOtherSerialRequested(self):
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+        tobii_helper.setEyeTrackerCache(self.cachePath)
+
+        cachedTracker = DummyEyeTracker("tet-tcp://169.254.1.2", "TX300-1")
+        reachableTrackers[cachedTracker.address] = cachedTracker
+        self.writeCache(cachedTracker.address, cachedTracker.serial_number)
+        otherTracker = DummyEyeTracker("tet-tcp://169.254.1.3", "TX300-2")
+        foundTrackers.append(cachedTracker)
+        foundTrackers.append(otherTracker)
+
+        tobii_helper.setEyeTracker("TX300-2")
+
+        self.assertEqual(otherTracker, tobii_helper.eyetracker)
+        self.assertEqual({'address' : "tet-tcp://169.254.1.3", 'serial_number' : "TX300-2"}, self.readCache())
+
+    def testBackgroundDiscovery(self):
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+        tobii_helper.setEyeTrackerCache(None)
+
+        eyetracker = DummyEyeTracker("tet-tcp://169.254.1.3", "TX300-1")
+        foundTrackers.append(eyetracker)
+
+        progress = []
+        tobii_helper.setEyeTracker(progressCallback = lambda status, details : progress.append((status, details)),
+                                   blocking = False)
+        self.assertEqual(eyetracker, tobii_helper.waitForEyeTracker(5))
+        self.assertEqual([('searching', 1), ('connected', "TX300-1")], progress)
+        self.assertFalse(os.path.isfile(self.cachePath))
+
+    def testNoEyeTracker(self):
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+        tobii_helper.setEyeTrackerCache(self.cachePath)
+
+        progress = []
+        tobii_helper.setEyeTracker(progressCallback = lambda status, details : progress.append((status, details)),
+                                   blocking = False)
+        with self.assertRaises(RuntimeError):
+            tobii_helper.waitForEyeTracker(5)
+
+        self.assertEqual(50, len(searchCount))
+        self.assertEqual(('failed', "Cannot find any eyetrackers."), progress[-1])
+        self.assertIsNone(tobii_helper.eyetracker)
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
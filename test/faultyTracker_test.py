@@ -0,0 +1,152 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import sys
+# Add the local path of the calibrator module,
+# test that instead of the system installed one.
+sys.path = ["../tobii_calibration"] + sys.path
+
+import faulty_tracker as ft
+import tobii_calibration as calibrator
+import tobii_research as tobii
+import math
+import time
+
+class faultyTrackerTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+
+    def testWrongParameters(self):
+        with self.assertRaises(ValueError):
+            ft.FaultInjectingEyeTracker(dropRate = 1.5)
+        with self.assertRaises(TypeError):
+            ft.FaultInjectingEyeTracker(validityFlickerRate = '0.1')
+        with self.assertRaises(ValueError):
+            ft.FaultInjectingEyeTracker(timeStampJitter = -1.0)
+        with self.assertRaises(ValueError):
+            ft.FaultInjectingEyeTracker(frequency = 5000)
+
+    def testNoFaults(self):
+        eyetracker = ft.FaultInjectingEyeTracker(seed = 1)
+        received = []
+        eyetracker.callbacks[tobii.EYETRACKER_GAZE_DATA] = [received.append]
+        for i in range(100):
+            eyetracker.sendData(tobii.EYETRACKER_GAZE_DATA, eyetracker.createGazeData(i / 600, 1000 + i))
+        self.assertEqual(len(received), 100)
+        self.assertEqual(sum(eyetracker.getFaultCounts().values()), 0)
+
+    def testDroppedSamples(self):
+        eyetracker = ft.FaultInjectingEyeTracker(dropRate = 0.2, seed = 1)
+        received = []
+        eyetracker.callbacks[tobii.EYETRACKER_GAZE_DATA] = [received.append]
+        for i in range(1000):
+            eyetracker.sendData(tobii.EYETRACKER_GAZE_DATA, eyetracker.createGazeData(i / 600, 1000 + i))
+        dropped = eyetracker.getFaultCounts()['dropped_sample']
+        self.assertEqual(len(received), 1000 - dropped)
+        self.assertAlmostEqual(dropped, 200, delta = 50)
+
+    def testValidityFlicker(self):
+        eyetracker = ft.FaultInjectingEyeTracker(validityFlickerRate = 0.5, seed = 1)
+        invalidEyes = 0
+        for i in range(200):
+            gazeData = eyetracker.createGazeData(i / 600, 1000 + i)
+            for eye in ['left', 'right']:
+                if not gazeData[eye + '_gaze_origin_validity']:
+                    invalidEyes += 1
+                    self.assertTrue(math.isnan(gazeData[eye + '_gaze_point_on_display_area'][0]))
+        self.assertEqual(invalidEyes, eyetracker.getFaultCounts()['invalid_eye'])
+        self.assertAlmostEqual(invalidEyes, 200, delta = 40)
+
+    def testTimeStampJitter(self):
+        eyetracker = ft.FaultInjectingEyeTracker(timeStampJitter = 100.0, seed = 1)
+        differences = [eyetracker.createGazeData(0.0, 1000000)['system_time_stamp'] - 1000000 for i in range(200)]
+        self.assertTrue(any([difference != 0 for difference in differences]))
+        self.assertLess(max([abs(difference) for difference in differences]), 1000)
+
+    def testDelayedCallbacks(self):
+        eyetracker = ft.FaultInjectingEyeTracker(callbackDelayRate = 1.0, callbackDelay = 0.02, seed = 1)
+        received = []
+        eyetracker.callbacks[tobii.EYETRACKER_GAZE_DATA] = [received.append]
+        startTime = time.perf_counter()
+        for i in range(3):
+            eyetracker.sendData(tobii.EYETRACKER_GAZE_DATA, eyetracker.createGazeData(i / 600, 1000 + i))
+        self.assertGreater(time.perf_counter() - startTime, 0.05)
+        self.assertEqual(len(received), 3)
+        self.assertEqual(eyetracker.getFaultCounts()['delayed_callback'], 3)
+
+    def testCalibrationFaults(self):
+        eyetracker = ft.FaultInjectingEyeTracker(collectDataFailureRate = 0.5, seed = 1)
+        calibration = eyetracker.createCalibration()
+        calibration.enter_calibration_mode()
+        statuses = [calibration.collect_data(0.1, 0.1) for i in range(100)]
+        failures = statuses.count(tobii.CALIBRATION_STATUS_FAILURE)
+        self.assertEqual(failures, eyetracker.getFaultCounts()['collect_data_failure'])
+        self.assertGreater(failures, 0)
+        self.assertLess(failures, 100)
+
+        eyetracker.computeAndApplyFailureRate = 1.0
+        self.assertEqual(calibration.compute_and_apply().status, tobii.CALIBRATION_STATUS_FAILURE)
+        eyetracker.computeAndApplyErrorRate = 1.0
+        with self.assertRaises(RuntimeError):
+            calibration.compute_and_apply()
+        counts = eyetracker.getFaultCounts()
+        self.assertEqual(counts['compute_and_apply_failure'], 1)
+        self.assertEqual(counts['compute_and_apply_error'], 1)
+
+    def testFailedCollectAddsNoData(self):
+        eyetracker = ft.FaultInjectingEyeTracker(collectDataFailureRate = 1.0, seed = 1)
+        calibration = eyetracker.createCalibration()
+        calibration.enter_calibration_mode()
+        self.assertEqual(calibration.collect_data(0.1, 0.1), tobii.CALIBRATION_STATUS_FAILURE)
+        self.assertEqual(calibration.collectedPoints, [])
+        self.assertEqual(len(calibration.compute_and_apply().calibration_points), 0)
+
+        # the retry collects the point once
+        eyetracker.collectDataFailureRate = 0.0
+        self.assertEqual(calibration.collect_data(0.1, 0.1), tobii.CALIBRATION_STATUS_SUCCESS)
+        self.assertEqual(calibration.collectedPoints, [(0.1, 0.1)])
+        self.assertEqual(len(calibration.compute_and_apply().calibration_points), 1)
+
+    def testMonocularCollectStatus(self):
+        eyetracker = ft.FaultInjectingEyeTracker(seed = 1)
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+        tobii_helper.useEyeTracker(eyetracker)
+        tobii_helper.enableMonocularRecalibration()
+        tobii_helper.calibration = tobii_helper._TobiiHelper__createCalibration()
+        tobii_helper.calibration.enter_calibration_mode()
+
+        # per eye success statuses are handled as success
+        status = tobii_helper._TobiiHelper__collectCalibrationData(0.1, 0.1, tobii.SELECTED_EYE_LEFT)
+        self.assertEqual(status, tobii.CALIBRATION_STATUS_SUCCESS)
+        status = tobii_helper._TobiiHelper__collectCalibrationData(0.1, 0.1, tobii.SELECTED_EYE_RIGHT)
+        self.assertEqual(status, tobii.CALIBRATION_STATUS_SUCCESS)
+
+    def testSmoothingWithFlicker(self):
+        eyetracker = ft.FaultInjectingEyeTracker(validityFlickerRate = 0.3, seed = 2)
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+        tobii_helper.useEyeTracker(eyetracker)
+        tobii_helper.tracking = True
+        tobii_helper.virtual_trackbox_width = 512.25
+        tobii_helper.virtual_trackbox_height = 413.215
+
+        # the smoothed position stays valid while one of the last samples is valid
+        leftPositions = []
+        invalidResults = 0
+        for i in range(200):
+            tobii_helper.gazeData = eyetracker.createGazeData(i / 600, 1000 + i)
+            leftEyePos = tobii_helper._TobiiHelper__virtualTrackboxEyePos()[0]
+            smoothed = tobii_helper._TobiiHelper__smoothing(leftEyePos, leftPositions, (math.nan, math.nan),
+                                                            tobii_helper._TobiiHelper__calcMeanOfPointList)
+            if math.isnan(smoothed[0]):
+                invalidResults += 1
+        self.assertLess(invalidResults, eyetracker.getFaultCounts()['invalid_eye'])
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
@@ -99,5 +99,33 @@ class getAvgEyeDistTest(unittest.TestCase):
         avgResult = tobii_helper._TobiiHelper__getAvgEyeDist()
         self.assertAlmostEqual(710.0, avgResult, delta = 0.001)
 
+    def testUserPositionData(self):
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.eyetracker = "dummy"
+        tobii_helper.userPositionTracking = True
+        tobii_helper.tbCoordinates = {'frontDistance' : 500.0, 'backDistance' : 800.0}
+        tobii_helper.userPositionData = {}
+        tobii_helper.userPositionData['left_user_position'] = (0.34, 0.56, 0.5)
+        tobii_helper.userPositionData['right_user_position'] = (0.32, 0.61, 0.52)
+        tobii_helper.userPositionData['left_user_position_validity'] = True
+        tobii_helper.userPositionData['right_user_position_validity'] = True
+        avgResult = tobii_helper._TobiiHelper__getAvgEyeDist()
+        self.assertAlmostEqual(653.0, avgResult, delta = 0.001)
+
+        tobii_helper.userPositionData['left_user_position_validity'] = False
+        avgResult = tobii_helper._TobiiHelper__getAvgEyeDist()
+        self.assertAlmostEqual(656.0, avgResult, delta = 0.001)
+
+        tobii_helper.userPositionData['right_user_position_validity'] = False
+        avgResult = tobii_helper._TobiiHelper__getAvgEyeDist()
+        self.assertAlmostEqual(0.0, avgResult, delta = 0.001)
+
+    def testNoUserPositionData(self):
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.eyetracker = "dummy"
+        tobii_helper.userPositionTracking = True
+        with self.assertRaises(RuntimeError):
+            tobii_helper._TobiiHelper__getAvgEyeDist()
+
 if __name__ == "__main__":
     unittest.main() # run all tests
\ No newline at end of file
@@ -16,6 +16,7 @@ from psychopy import visual, event, logging
 import psychopy_visual_mock as pvm
 from psychopy import core as pcore
 import collections
+import time
 
 # ignore warnings comming from psychopy
 logging.console.setLevel(logging.ERROR)
@@ -46,6 +47,11 @@ class getCalibrationDataTest(unittest.TestCase):
             self.calibWin.close()
 
     def initAll(self, tobii_helper):
+
+        def returnEmpty():
+            return []
+        DummyCalibration.compute_and_apply = returnEmpty
+
         tobii_helper.calibration = DummyCalibration
         tobii_helper.disableLogging()
         tobii_helper.setMonitor(dimensions = (1366, 768))
@@ -117,7 +123,7 @@ class getCalibrationDataTest(unittest.TestCase):
         tobii_helper._TobiiHelper__getCalibrationData(self.calibWin, self.pointList)
         drawing_list = visual_mock.getListOfDrawings()
 
-        self.assertEqual(2 * 150, len(drawing_list))
+        self.assertEqual(2 * 150 + 1, len(drawing_list))
 
         # first 50 frames is about moving the circle to the next calib point
         for i in range(0, 50):
@@ -216,7 +222,7 @@ class getCalibrationDataTest(unittest.TestCase):
         tobii_helper._TobiiHelper__getCalibrationData(self.calibWin, self.pointList)
         drawing_list = visual_mock.getListOfDrawings()
 
-        self.assertEqual(5 * 150, len(drawing_list))
+        self.assertEqual(5 * 150 + 1, len(drawing_list))
 
         for j in range(5):
             # first 50 frames are about moving the circle to the next calib point
@@ -295,7 +301,7 @@ class getCalibrationDataTest(unittest.TestCase):
         tobii_helper._TobiiHelper__getCalibrationData(self.calibWin, self.pointList)
         drawing_list = visual_mock.getListOfDrawings()
 
-        self.assertEqual(5 * 150, len(drawing_list))
+        self.assertEqual(5 * 150 + 1, len(drawing_list))
 
         # first 50 frames are about moving the circle to the next calib point
         for i in range(0, 50):
@@ -320,7 +326,7 @@ class getCalibrationDataTest(unittest.TestCase):
         tobii_helper._TobiiHelper__getCalibrationData(self.calibWin, self.pointList)
         drawing_list = visual_mock.getListOfDrawings()
 
-        self.assertEqual(5 * 150, len(drawing_list))
+        self.assertEqual(5 * 150 + 1, len(drawing_list))
 
         # first 50 frames are about moving the circle to the next calib point
         for i in range(0, 50):
@@ -345,7 +351,7 @@ class getCalibrationDataTest(unittest.TestCase):
         tobii_helper._TobiiHelper__getCalibrationData(self.calibWin, self.pointList)
         drawing_list = visual_mock.getListOfDrawings()
 
-        self.assertEqual(5 * 150, len(drawing_list))
+        self.assertEqual(5 * 150 + 1, len(drawing_list))
 
         # first 50 frames are about moving the circle to the next calib point
         for i in range(0, 50):
@@ -370,7 +376,7 @@ class getCalibrationDataTest(unittest.TestCase):
         tobii_helper._TobiiHelper__getCalibrationData(self.calibWin, self.pointList)
         drawing_list = visual_mock.getListOfDrawings()
 
-        self.assertEqual(5 * 150, len(drawing_list))
+        self.assertEqual(5 * 150 + 1, len(drawing_list))
 
         # first 50 frames are about moving the circle to the next calib point
         for i in range(0, 50):
@@ -396,7 +402,7 @@ class getCalibrationDataTest(unittest.TestCase):
         tobii_helper._TobiiHelper__getCalibrationData(self.calibWin, self.pointList)
         drawing_list = visual_mock.getListOfDrawings()
 
-        self.assertEqual(150, len(drawing_list))
+        self.assertEqual(150 + 1, len(drawing_list))
 
         # first 50 frames are about moving the circle to the next calib point
         for i in range(0, 50):
@@ -425,6 +431,45 @@ class getCalibrationDataTest(unittest.TestCase):
         result = tobii_helper._TobiiHelper__getCalibrationData(self.calibWin, self.pointList)
         self.assertEqual(0, len(result))
 
+    def testSlowComputeAndApply(self):
+        tobii_helper = calibrator.TobiiHelper()
+        self.initAll(tobii_helper)
+
+        def slowComputeAndApply():
+            time.sleep(0.3)
+            return []
+
+        DummyCalibration.compute_and_apply = slowComputeAndApply
+
+        visual_mock = pvm.PsychoPyVisualMock()
+        visual_mock.setReturnKeyList(['x'])
+        result = tobii_helper._TobiiHelper__getCalibrationData(self.calibWin, self.pointList)
+        drawing_list = visual_mock.getListOfDrawings()
+
+        self.assertEqual(0, len(result))
+        # the message is animated while the calibration is computed
+        self.assertTrue(len(drawing_list) > 5 * 150 + 1)
+        message = drawing_list[5 * 150]
+        self.assertTrue(isinstance(message, pvm.TextStim))
+        self.assertEqual(str("Applying calibration..."), message.text)
+        self.assertTrue(isinstance(drawing_list[-1], pvm.Circle))
+
+    def testComputeAndApplyError(self):
+        tobii_helper = calibrator.TobiiHelper()
+        self.initAll(tobii_helper)
+
+        def failingComputeAndApply():
+            raise RuntimeError("Dummy SDK error.")
+
+        DummyCalibration.compute_and_apply = failingComputeAndApply
+
+        visual_mock = pvm.PsychoPyVisualMock()
+        visual_mock.setReturnKeyList(['x'])
+
+        # the error of the worker thread is raised on the caller's thread
+        with self.assertRaises(RuntimeError):
+            tobii_helper._TobiiHelper__getCalibrationData(self.calibWin, self.pointList)
+
     def testQuitByQ(self):
         tobii_helper = calibrator.TobiiHelper()
         self.initAll(tobii_helper)
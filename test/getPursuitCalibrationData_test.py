@@ -0,0 +1,139 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import sys
+# Add the local path of the calibrator module,
+# test that instead of the system installed one.
+sys.path = ["../tobii_calibration"] + ["../externals/psychopy_mock"] + sys.path
+
+import tobii_calibration as calibrator
+import tobii_research as tobii
+from psychopy import visual, event, logging
+import psychopy_visual_mock as pvm
+from psychopy import core as pcore
+
+# ignore warnings comming from psychopy
+logging.console.setLevel(logging.ERROR)
+
+def DummyFunction(*args):
+    pass
+
+pcore.wait = DummyFunction
+
+collectedPositions = []
+
+class DummyCalibration:
+    def collect_data(posx, posy):
+        collectedPositions.append((posx, posy))
+        return tobii.CALIBRATION_STATUS_SUCCESS
+
+    def leave_calibration_mode():
+        pass
+
+    def compute_and_apply():
+        return []
+
+class getPursuitCalibrationDataTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+        self.calibWin = None
+        collectedPositions.clear()
+
+    def tearDown(self):
+        if self.calibWin is not None:
+            self.calibWin.close()
+
+    def initAll(self, tobii_helper):
+        tobii_helper.calibration = DummyCalibration
+        tobii_helper.disableLogging()
+        tobii_helper.setMonitor(dimensions = (1366, 768))
+        tobii_helper.setCalibrationMode('pursuit')
+        tobii_helper.setTimingProfile(calibrator.TimingProfile(pursuitSegmentDuration = 0.1))
+
+        self.calibWin = visual.Window(size = [1366, 768],
+                         pos = [0, 0],
+                         units = 'pix',
+                         fullscr = True,
+                         allowGUI = True,
+                         monitor = tobii_helper.win,
+                         winType = 'pyglet',
+                         color = [0.4, 0.4, 0.4])
+
+        self.pointList = [(0.1, 0.1), (0.9, 0.1), (0.5, 0.5), (0.1, 0.9), (0.9, 0.9)]
+
+        tobii_helper._TobiiHelper__clearScreen = DummyFunction
+
+    def testCalibrationMode(self):
+        tobii_helper = calibrator.TobiiHelper()
+        self.assertEqual('points', tobii_helper.getCalibrationMode())
+
+        tobii_helper.setCalibrationMode('pursuit')
+        self.assertEqual('pursuit', tobii_helper.getCalibrationMode())
+
+        with self.assertRaises(TypeError):
+            tobii_helper.setCalibrationMode(1)
+
+        with self.assertRaises(ValueError):
+            tobii_helper.setCalibrationMode('saccade')
+
+    def testNotInitedThingOrWrongParam(self):
+        tobii_helper = calibrator.TobiiHelper()
+
+        # no calibration
+        with self.assertRaises(RuntimeError):
+            tobii_helper._TobiiHelper__getPursuitCalibrationData(None, None)
+
+        tobii_helper.calibration = DummyCalibration
+
+        # no window
+        with self.assertRaises(TypeError):
+            tobii_helper._TobiiHelper__getPursuitCalibrationData(None, None)
+
+    def testContinuousCollection(self):
+        tobii_helper = calibrator.TobiiHelper()
+        self.initAll(tobii_helper)
+
+        visual_mock = pvm.PsychoPyVisualMock()
+        visual_mock.setReturnKeyList(['x'])
+        result = tobii_helper._TobiiHelper__getPursuitCalibrationData(self.calibWin, self.pointList)
+        drawing_list = visual_mock.getListOfDrawings()
+
+        self.assertEqual(0, len(result))
+
+        # the target is moving, the last drawing is the message of computing
+        for calibPoint in drawing_list[:-1]:
+            self.assertTrue(isinstance(calibPoint, pvm.Circle))
+            self.assertEqual(15, calibPoint.radius)
+        message = drawing_list[-1]
+        self.assertTrue(isinstance(message, pvm.TextStim))
+        self.assertEqual(str("Applying calibration..."), message.text)
+
+        # the target starts on the bottom right and finishes at the last point
+        self.assertEqual(546, drawing_list[0].pos[0])
+        self.assertEqual(-307, drawing_list[0].pos[1])
+        self.assertEqual(546, drawing_list[-2].pos[0])
+        self.assertEqual(-307, drawing_list[-2].pos[1])
+
+        # data is collected at more positions than the calibration points
+        self.assertTrue(len(collectedPositions) > len(self.pointList))
+        for position in collectedPositions:
+            self.assertTrue(0.1 <= position[0] <= 0.9)
+            self.assertTrue(0.1 <= position[1] <= 0.9)
+
+    def testQuitByQ(self):
+        tobii_helper = calibrator.TobiiHelper()
+        self.initAll(tobii_helper)
+
+        visual_mock = pvm.PsychoPyVisualMock()
+        visual_mock.setReturnKeyList(['q'])
+
+        with self.assertRaises(SystemExit):
+            tobii_helper._TobiiHelper__getPursuitCalibrationData(self.calibWin, self.pointList)
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
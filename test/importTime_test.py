@@ -0,0 +1,57 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import os
+import subprocess
+import sys
+import json
+
+# maximum time of importing the module in seconds (PsychoPy and the SDK are not loaded then)
+IMPORT_TIME_BUDGET = 1.5
+
+HEAVY_MODULES = ['psychopy', 'pyglet', 'tobii_research']
+
+MEASURE_SCRIPT = """
+import sys, time, json
+sys.path = [{path!r}] + sys.path
+startTime = time.perf_counter()
+import tobii_calibration
+importTime = time.perf_counter() - startTime
+print(json.dumps({{'time' : importTime,
+                   'loaded' : [name for name in {modules!r} if name in sys.modules]}}))
+"""
+
+class importTimeTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+
+    def measureImport(self, path):
+        script = MEASURE_SCRIPT.format(path = os.path.abspath(path), modules = HEAVY_MODULES)
+        output = subprocess.check_output([sys.executable, "-W", "ignore", "-c", script])
+        return json.loads(output.decode().strip().splitlines()[-1])
+
+    def testModuleImport(self):
+        result = self.measureImport("../tobii_calibration")
+        self.assertEqual(result['loaded'], [])
+        self.assertLess(result['time'], IMPORT_TIME_BUDGET)
+
+    def testPackageImport(self):
+        result = self.measureImport("..")
+        self.assertEqual(result['loaded'], [])
+        self.assertLess(result['time'], IMPORT_TIME_BUDGET)
+
+    def testLoadedOnFirstUse(self):
+        sys.path = ["../tobii_calibration"] + sys.path
+        import lazy_import
+        lazyModule = lazy_import.LazyModule('json')
+        self.assertFalse(lazyModule.isLoaded())
+        self.assertEqual(lazyModule.dumps([1]), '[1]')
+        self.assertTrue(lazyModule.isLoaded())
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
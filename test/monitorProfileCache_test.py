@@ -0,0 +1,95 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import sys
+# Add the local path of the calibrator module,
+# test that instead of the system installed one.
+sys.path = ["../tobii_calibration"] + sys.path
+
+import tobii_calibration as calibrator
+from psychopy import monitors
+
+savedSizes = {}
+calls = {'getAllMonitors' : 0, 'saveMon' : 0}
+
+class DummyMonitor:
+    def __init__(self, name):
+        self.name = name
+        self.size = savedSizes.get(name)
+
+    def setSizePix(self, dimensions):
+        self.size = list(dimensions)
+
+    def getSizePix(self):
+        return self.size
+
+    def saveMon(self):
+        calls['saveMon'] += 1
+        savedSizes[self.name] = list(self.size)
+
+def getAllMonitors():
+    calls['getAllMonitors'] += 1
+    return ['testMonitor']
+
+class monitorProfileCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+        self.originalMonitor = monitors.Monitor
+        self.originalGetAllMonitors = monitors.getAllMonitors
+        monitors.Monitor = DummyMonitor
+        monitors.getAllMonitors = getAllMonitors
+        savedSizes.clear()
+        calls['getAllMonitors'] = 0
+        calls['saveMon'] = 0
+        calibrator.monitorProfileCache.clear()
+
+    def tearDown(self):
+        monitors.Monitor = self.originalMonitor
+        monitors.getAllMonitors = self.originalGetAllMonitors
+        calibrator.monitorProfileCache.clear()
+
+    def testMonitorsListedOnce(self):
+        for i in range(3):
+            tobii_helper = calibrator.TobiiHelper()
+            tobii_helper.disableLogging()
+            tobii_helper.setMonitor(dimensions = (1366, 768))
+            self.assertEqual('testMonitor', tobii_helper.getMonitorName())
+            self.assertEqual((1366, 768), tobii_helper.getMonitorDimensions())
+        self.assertEqual(calls['getAllMonitors'], 1)
+        self.assertEqual(calls['saveMon'], 1)
+
+    def testSavedOnlyIfChanged(self):
+        # the profile on the disk has the same geometry
+        savedSizes['testMonitor'] = [1366, 768]
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+        tobii_helper.setMonitor(dimensions = (1366, 768))
+        self.assertEqual(calls['saveMon'], 0)
+
+        tobii_helper.setMonitor(dimensions = (1920, 1080))
+        self.assertEqual(calls['saveMon'], 1)
+        self.assertEqual(savedSizes['testMonitor'], [1920, 1080])
+        self.assertEqual((1920, 1080), tobii_helper.getMonitorDimensions())
+
+        # switching back to a cached profile saves it again
+        tobii_helper.setMonitor(dimensions = (1366, 768))
+        self.assertEqual(calls['saveMon'], 2)
+        self.assertEqual(savedSizes['testMonitor'], [1366, 768])
+        tobii_helper.setMonitor(dimensions = (1366, 768))
+        self.assertEqual(calls['saveMon'], 2)
+
+    def testNewMonitorName(self):
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+        tobii_helper.setMonitor('otherMonitor', (800, 600))
+        self.assertEqual('otherMonitor', tobii_helper.getMonitorName())
+        self.assertEqual(calibrator.monitorProfileCache.getMonitorNames(), ['testMonitor', 'otherMonitor'])
+        self.assertEqual(calls['saveMon'], 1)
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
@@ -0,0 +1,147 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import sys
+# Add the local path of the calibrator module,
+# test that instead of the system installed one.
+sys.path = ["../tobii_calibration"] + sys.path
+
+import monitor_server as ms
+import synthetic_tracker as st
+import tobii_calibration as calibrator
+import collections
+import http.client
+import json
+import time
+
+# reads the server-sent events of the monitoring page
+class EventReader:
+
+    def __init__(self, address):
+        self.connection = http.client.HTTPConnection(address[0], address[1], timeout = 5.0)
+        self.connection.request('GET', '/events')
+        self.response = self.connection.getresponse()
+
+    # next (event type, data) pair
+    def next(self):
+        eventType = None
+        data = None
+        while True:
+            line = self.response.fp.readline().decode('utf-8').rstrip('\n')
+            if line.startswith('event: '):
+                eventType = line[len('event: '):]
+            elif line.startswith('data: '):
+                data = json.loads(line[len('data: '):])
+            elif line == '' and eventType is not None:
+                return eventType, data
+
+    # data of the next event of the given type
+    def nextOf(self, eventType):
+        while True:
+            nextType, data = self.next()
+            if nextType == eventType:
+                return data
+
+    def close(self):
+        self.connection.close()
+
+def get(address, path):
+    connection = http.client.HTTPConnection(address[0], address[1], timeout = 5.0)
+    try:
+        connection.request('GET', path)
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+def waitFor(condition, timeout = 5.0):
+    endTime = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < endTime:
+        time.sleep(0.01)
+
+class monitorServerTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+        self.tobii_helper = calibrator.TobiiHelper()
+        self.tobii_helper.disableLogging()
+        self.eyetracker = st.SyntheticEyeTracker(frequency = 300, trajectory = st.fixationTrajectory((0.25, 0.75)))
+        self.tobii_helper.useEyeTracker(self.eyetracker)
+
+    def tearDown(self):
+        self.tobii_helper.stopMonitor()
+
+    def testPage(self):
+        monitor = self.tobii_helper.startMonitor()
+        self.assertTrue(monitor.getUrl().startswith("http://127.0.0.1:"))
+        status, content = get(monitor.getAddress(), '/')
+        self.assertEqual(200, status)
+        self.assertIn(b'EventSource', content)
+        status, content = get(monitor.getAddress(), '/missing')
+        self.assertEqual(404, status)
+
+    def testEvents(self):
+        monitor = self.tobii_helper.startMonitor(gazeRate = 50.0)
+        reader = EventReader(monitor.getAddress())
+        try:
+            gaze = reader.nextOf('gaze')
+            self.assertAlmostEqual(0.25, gaze['point'][0])
+            self.assertAlmostEqual(0.75, gaze['point'][1])
+            self.assertEqual(3, len(gaze['trackbox']['left']))
+            health = reader.nextOf('health')
+            self.assertEqual('gaze', health['stream'])
+
+            self.tobii_helper.calibrationAccuracy = collections.OrderedDict([(1, (10.0, 80.0)), (2, (5.0, float('nan')))])
+            calibration = reader.nextOf('calibration')
+            self.assertEqual(50, calibration['threshold'])
+            self.assertEqual({'point' : '1', 'left' : 10.0, 'right' : 80.0}, calibration['points'][0])
+            self.assertIsNone(calibration['points'][1]['right'])
+
+            self.tobii_helper._TobiiHelper__log(20, "Proceeding to calibration.", phase = 'trackbox')
+            self.assertEqual({'message' : "Proceeding to calibration.", 'phase' : 'trackbox'}, reader.nextOf('status'))
+
+            status, content = get(monitor.getAddress(), '/state')
+            self.assertEqual('trackbox', json.loads(content.decode('utf-8'))['status']['phase'])
+        finally:
+            reader.close()
+
+    def testBoundedCost(self):
+        monitor = self.tobii_helper.startMonitor(gazeRate = 20.0, maxClients = 1)
+        reader = EventReader(monitor.getAddress())
+        try:
+            waitFor(lambda : monitor.getClientCount() == 1)
+            # only one page is served
+            status, content = get(monitor.getAddress(), '/events')
+            self.assertEqual(503, status)
+
+            tickCount = monitor.tickCount
+            time.sleep(0.5)
+            # the updates are built with the given rate, independently of the 300 Hz stream
+            self.assertLess(monitor.tickCount - tickCount, 15)
+            self.assertLess(monitor.getSamplerTime(), 0.01)
+        finally:
+            reader.close()
+
+    def testWrongParam(self):
+        with self.assertRaises(TypeError):
+            ms.MonitorServer(None)
+        with self.assertRaises(TypeError):
+            ms.MonitorServer(self.tobii_helper, address = 8080)
+        with self.assertRaises(ValueError):
+            ms.MonitorServer(self.tobii_helper, gazeRate = 0)
+        with self.assertRaises(ValueError):
+            ms.MonitorServer(self.tobii_helper, maxClients = 0)
+
+        self.tobii_helper.startMonitor()
+        with self.assertRaises(RuntimeError):
+            self.tobii_helper.startMonitor()
+        self.assertIsNotNone(self.tobii_helper.stopMonitor())
+        self.assertFalse(self.eyetracker.isRunning())
+        self.assertIsNone(self.tobii_helper.stopMonitor())
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
@@ -0,0 +1,169 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import sys
+# Add the local path of the calibrator module,
+# test that instead of the system installed one.
+sys.path = ["../tobii_calibration"] + ["../externals/psychopy_mock"] + sys.path
+
+import tobii_calibration as calibrator
+import tobii_research as tobii
+
+from psychopy import visual, event, logging
+import psychopy_visual_mock as pvm
+from psychopy import core as pcore
+import collections
+
+# ignore warnings comming from psychopy
+logging.console.setLevel(logging.ERROR)
+
+def DummyFunction(*argv):
+    pass
+
+pcore.wait = DummyFunction
+
+calibrationCalls = []
+
+class DummyMonocularCalibration:
+    def collect_data(self, *args):
+        calibrationCalls.append(('collect',) + args)
+        # the SDK reports the success of one eye with its own status
+        if args[2] == tobii.SELECTED_EYE_LEFT:
+            return tobii.CALIBRATION_STATUS_SUCCESS_LEFT_EYE
+        if args[2] == tobii.SELECTED_EYE_RIGHT:
+            return tobii.CALIBRATION_STATUS_SUCCESS_RIGHT_EYE
+        return tobii.CALIBRATION_STATUS_SUCCESS
+
+    def discard_data(self, *args):
+        calibrationCalls.append(('discard',) + args)
+
+    def enter_calibration_mode(self):
+        pass
+
+    def leave_calibration_mode(self):
+        pass
+
+    def compute_and_apply(self):
+        return tobii.CalibrationResult(tobii.CALIBRATION_STATUS_SUCCESS, ())
+
+def createDummyMonocularCalibration(eyetracker):
+    return DummyMonocularCalibration()
+
+tobii.ScreenBasedMonocularCalibration = createDummyMonocularCalibration
+
+class monocularRecalibrationTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+        calibrationCalls.clear()
+
+    def initCalibPoints(self):
+        calibration_point0 = tobii.CalibrationPoint((0.0, 0.0),(
+                                    tobii.CalibrationSample(tobii.CalibrationEyeData((0.0, 0.0), True),
+                                                            tobii.CalibrationEyeData((0.0, 0.0), True)),))
+        calibration_point = tobii.CalibrationPoint((0.1, 0.1),(
+                                    tobii.CalibrationSample(tobii.CalibrationEyeData((0.08, 0.08), True),
+                                                            tobii.CalibrationEyeData((0.09, 0.08), True)),
+                                    tobii.CalibrationSample(tobii.CalibrationEyeData((0.12, 0.11), True),
+                                                            tobii.CalibrationEyeData((0.18, 0.12), True)),
+                                    tobii.CalibrationSample(tobii.CalibrationEyeData((0.11, 0.12), True),
+                                                            tobii.CalibrationEyeData((0.10, 0.10), True))))
+        calibration_point2 = tobii.CalibrationPoint((0.9, 0.9),(
+                                    tobii.CalibrationSample(tobii.CalibrationEyeData((0.98, 0.98), True),
+                                                            tobii.CalibrationEyeData((0.99, 0.98), True)),
+                                    tobii.CalibrationSample(tobii.CalibrationEyeData((0.91, 0.90), True),
+                                                            tobii.CalibrationEyeData((0.90, 0.97), True)),
+                                    tobii.CalibrationSample(tobii.CalibrationEyeData((0.89, 0.87), True),
+                                                            tobii.CalibrationEyeData((0.98, 0.99), True))))
+        calibration_points = (calibration_point0, calibration_point, calibration_point2)
+        return tobii.CalibrationResult(tobii.CALIBRATION_STATUS_SUCCESS, calibration_points)
+
+    def testEyeAccuracy(self):
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+        tobii_helper.setMonitor(dimensions = (1366, 768))
+
+        calibDict = collections.OrderedDict([('1', (0.1, 0.1)), ('2', (0.9, 0.9))])
+
+        with self.assertRaises(TypeError):
+            tobii_helper._TobiiHelper__calculateEyeAccuracy(self.initCalibPoints(), None)
+
+        eyeAccuracy = tobii_helper._TobiiHelper__calculateEyeAccuracy(self.initCalibPoints(), calibDict)
+        self.assertEqual(2, len(eyeAccuracy))
+        # left eye is accurate, right eye is less accurate on both points
+        self.assertAlmostEqual(5.83, eyeAccuracy['1'][0], delta = 0.01)
+        self.assertAlmostEqual(32.0, eyeAccuracy['1'][1], delta = 0.01)
+        self.assertAlmostEqual(38.28, eyeAccuracy['2'][0], delta = 0.01)
+        self.assertAlmostEqual(98.23, eyeAccuracy['2'][1], delta = 0.01)
+
+    def testSelectEye(self):
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+
+        # no statistics, redo both
+        self.assertEqual(tobii.SELECTED_EYE_BOTH, tobii_helper._TobiiHelper__selectEyeToRecalibrate('1'))
+
+        tobii_helper.setAccuracy(50)
+        tobii_helper.calibrationAccuracy = collections.OrderedDict([('1', (5.0, 30.0)),
+                                                                    ('2', (38.0, 98.0)),
+                                                                    ('3', (70.0, 10.0)),
+                                                                    ('4', (70.0, 80.0))])
+        self.assertEqual(tobii.SELECTED_EYE_BOTH, tobii_helper._TobiiHelper__selectEyeToRecalibrate('1'))
+        self.assertEqual(tobii.SELECTED_EYE_RIGHT, tobii_helper._TobiiHelper__selectEyeToRecalibrate('2'))
+        self.assertEqual(tobii.SELECTED_EYE_LEFT, tobii_helper._TobiiHelper__selectEyeToRecalibrate('3'))
+        self.assertEqual(tobii.SELECTED_EYE_BOTH, tobii_helper._TobiiHelper__selectEyeToRecalibrate('4'))
+        self.assertEqual(tobii.SELECTED_EYE_BOTH, tobii_helper._TobiiHelper__selectEyeToRecalibrate('5'))
+
+    def testRecalibrateOneEye(self):
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+        tobii_helper.setMonitor(dimensions = (1366, 768))
+        tobii_helper.eyetracker = "dummy"
+        tobii_helper.enableMonocularRecalibration()
+        tobii_helper._TobiiHelper__clearScreen = DummyFunction
+
+        calibDict = collections.OrderedDict([('1', (0.1, 0.1)), ('2', (0.9, 0.9))])
+        calibResult = self.initCalibPoints()
+
+        def getCalibrationData(calibWin, pointList, eyeList = None):
+            for i in range(len(pointList)):
+                if eyeList is None:
+                    tobii_helper._TobiiHelper__collectCalibrationData(pointList[i][0], pointList[i][1])
+                else:
+                    tobii_helper._TobiiHelper__collectCalibrationData(pointList[i][0], pointList[i][1], eyeList[i])
+            return calibResult
+        tobii_helper._TobiiHelper__getCalibrationData = getCalibrationData
+
+        # point 2 is selected for recalibration in the first round
+        redoList = [('2', (0.9, 0.9))]
+        def drawCalibrationResultsRedo(*args):
+            result = collections.OrderedDict(redoList)
+            redoList.clear()
+            return result
+        tobii_helper._TobiiHelper__drawCalibrationResults = drawCalibrationResultsRedo
+
+        with visual.Window(size = [1366, 768],
+                           pos = [0, 0],
+                           units = 'pix',
+                           fullscr = True,
+                           allowGUI = True,
+                           monitor = tobii_helper.win,
+                           winType = 'pyglet',
+                           color = [0.4, 0.4, 0.4]) as calibWin:
+
+            visual_mock = pvm.PsychoPyVisualMock()
+            visual_mock.setReturnKeyList(['c', 'c'])
+            tobii_helper._TobiiHelper__drawCalibrationScreen(calibDict, calibWin)
+
+        # first round collects both eyes, then only the right eye is redone on point 2
+        self.assertEqual([('collect', 0.1, 0.1, tobii.SELECTED_EYE_BOTH),
+                          ('collect', 0.9, 0.9, tobii.SELECTED_EYE_BOTH),
+                          ('discard', 0.9, 0.9, tobii.SELECTED_EYE_RIGHT),
+                          ('collect', 0.9, 0.9, tobii.SELECTED_EYE_RIGHT)], calibrationCalls)
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
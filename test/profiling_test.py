@@ -0,0 +1,113 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import sys
+# Add the local path of the calibrator module,
+# test that instead of the system installed one.
+sys.path = ["../tobii_calibration"] + sys.path
+
+import profiling
+import tobii_calibration as calibrator
+import json
+import os
+import pstats
+import tempfile
+import time
+
+class profilingTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+
+    def testNestedSpans(self):
+        profiler = profiling.PhaseProfiler()
+        with profiler.phase('full_calibration'):
+            with profiler.phase('trackbox'):
+                time.sleep(0.02)
+            for i in range(2):
+                with profiler.phase('compute_and_apply', round = i + 1):
+                    pass
+
+        spans = profiler.getSpans()
+        self.assertEqual(['full_calibration', 'trackbox', 'compute_and_apply', 'compute_and_apply'],
+                         [span['name'] for span in spans])
+        self.assertEqual([0, 1, 1, 1], [span['depth'] for span in spans])
+        self.assertEqual([None, 0, 0, 0], [span['parent'] for span in spans])
+        self.assertEqual({'round' : 2}, spans[3]['fields'])
+        self.assertTrue(spans[1]['wall_time'] >= 0.015)
+        # sleeping is not CPU time
+        self.assertTrue(spans[1]['idle_time'] >= 0.01)
+        self.assertTrue(spans[0]['wall_time'] >= spans[1]['wall_time'])
+
+        summary = profiler.getSummary()
+        self.assertEqual(['full_calibration', 'trackbox', 'compute_and_apply'], list(summary.keys()))
+        self.assertEqual(2, summary['compute_and_apply']['count'])
+        self.assertIn('trackbox', profiler.formatSummary())
+
+    def testFailedSpan(self):
+        profiler = profiling.PhaseProfiler()
+        with self.assertRaises(ValueError):
+            with profiler.phase('validation'):
+                raise ValueError()
+        self.assertTrue(profiler.getSpans()[0]['fields']['failed'])
+
+    def testCProfile(self):
+        outputDir = os.path.join(tempfile.mkdtemp(), "profile")
+        profiler = profiling.PhaseProfiler(outputDir, useCProfile = True)
+        with profiler.phase('calibration_round_1'):
+            time.sleep(0.02)
+            with profiler.phase('compute_and_apply'):
+                sum(i * i for i in range(10000))
+
+        spans = profiler.getSpans()
+        self.assertTrue(spans[0]['sleep_time'] >= 0.015)
+        # the time of the nested phase is profiled separately
+        self.assertTrue(spans[1]['sleep_time'] < 0.01)
+        self.assertTrue(spans[1]['python_time'] > 0.0)
+
+        writtenFiles = profiler.write()
+        self.assertEqual(['00_calibration_round_1.pstats', '01_compute_and_apply.pstats', 'summary.txt', 'summary.json'],
+                         [os.path.basename(filePath) for filePath in writtenFiles])
+        stats = pstats.Stats(os.path.join(outputDir, '00_calibration_round_1.pstats'))
+        self.assertTrue(stats.total_tt > 0.0)
+        with open(os.path.join(outputDir, 'summary.json')) as jsonFile:
+            self.assertEqual(2, len(json.load(jsonFile)['spans']))
+
+    def testFunctionName(self):
+        self.assertEqual('sleep', profiling.getFunctionName("<built-in method time.sleep>"))
+        self.assertEqual('acquire', profiling.getFunctionName("<method 'acquire' of '_thread.lock' objects>"))
+        self.assertEqual('flip', profiling.getFunctionName("flip"))
+
+    def testTobiiHelperProfiling(self):
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+        self.assertIsNone(tobii_helper.stopProfiling())
+
+        profiler = tobii_helper.startProfiling()
+        with self.assertRaises(RuntimeError):
+            tobii_helper.startProfiling()
+        self.assertIs(profiler, tobii_helper.stopProfiling())
+        self.assertIsNone(tobii_helper.profiler)
+
+        outputDir = tempfile.mkdtemp()
+        with tobii_helper.profiling(outputDir) as profiler:
+            self.assertIs(profiler, tobii_helper.profiler)
+        self.assertIsNone(tobii_helper.profiler)
+        self.assertTrue(os.path.isfile(os.path.join(outputDir, 'summary.txt')))
+
+    def testWrongParam(self):
+        with self.assertRaises(TypeError):
+            profiling.PhaseProfiler(outputDir = 1)
+        with self.assertRaises(TypeError):
+            profiling.PhaseProfiler(useCProfile = 1)
+        with self.assertRaises(TypeError):
+            profiling.PhaseProfiler().phase(None)
+        with self.assertRaises(RuntimeError):
+            profiling.PhaseProfiler().write()
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
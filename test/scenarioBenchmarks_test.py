@@ -0,0 +1,57 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import sys
+# Add the local path of the benchmark helpers.
+sys.path = ["../benchmarks"] + sys.path
+
+import scenario_benchmarks as sb
+import collections
+
+class scenarioBenchmarksTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+
+    def testScriptedKeyboard(self):
+        clock = sb.tc.VirtualClock()
+        keyboard = sb.ScriptedKeyboard(clock, [(1.0, 'c'), (2.0, '1'), (0.5, 'c')])
+
+        # the key is pressed one second after starting to wait for it
+        self.assertEqual(['c'], keyboard.waitKeys(maxWait = 10, keyList = ['c']))
+        self.assertEqual(1.0, clock.getTime())
+
+        # polling a screen, other keys are not pressed
+        self.assertEqual([], keyboard.getKeys(['q']))
+        self.assertEqual([], keyboard.getKeys(['1', 'c']))
+        clock.advance(1.0)
+        self.assertEqual([], keyboard.getKeys(['1', 'c']))
+        clock.advance(1.0)
+        self.assertEqual([], keyboard.getKeys(['q']))
+        self.assertEqual(['1'], keyboard.getKeys(['1', 'c']))
+        self.assertFalse(keyboard.isFinished())
+
+        # timeout
+        self.assertIsNone(keyboard.waitKeys(maxWait = 0.1, keyList = ['c']))
+        self.assertAlmostEqual(3.1, clock.getTime(), delta = 0.0001)
+        self.assertEqual(['c'], keyboard.waitKeys(maxWait = 10, keyList = ['c']))
+        self.assertTrue(keyboard.isFinished())
+        self.assertEqual(3, keyboard.pressCount)
+
+        with self.assertRaises(RuntimeError):
+            keyboard.waitKeys(keyList = ['c'])
+
+    def testCallCounter(self):
+        counts = collections.Counter()
+        counter = sb.CallCounter(collections.OrderedDict(), counts)
+        counter.update({'a' : 1})
+        counter.keys()
+        counter.keys()
+        self.assertEqual({'update' : 1, 'keys' : 2}, dict(counts))
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
@@ -0,0 +1,150 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import sys
+# Add the local path of the calibrator module,
+# test that instead of the system installed one.
+sys.path = ["../tobii_calibration"] + sys.path
+
+import session_replay as sr
+import synthetic_tracker as st
+import tobii_calibration as calibrator
+import tobii_research as tobii
+import tempfile
+import shutil
+import os
+import time
+import json
+
+class sessionReplayTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+        self.tempDir = tempfile.mkdtemp()
+        self.sessionPath = os.path.join(self.tempDir, "session.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def recordSession(self, frequency = 300):
+        eyetracker = st.SyntheticEyeTracker(frequency = frequency,
+                                            trajectory = st.saccadeTrajectory([(0.2, 0.2), (0.8, 0.8)], 0.05),
+                                            calibrationError = (0.01, 0.0),
+                                            noise = 0.001,
+                                            seed = 1)
+        gazeSamples = []
+        with sr.SessionRecorder(eyetracker, self.sessionPath) as recorder:
+            tobii_helper = calibrator.TobiiHelper()
+            tobii_helper.disableLogging()
+            tobii_helper.useEyeTracker(recorder)
+            self.assertEqual(tobii_helper.eyetracker.serial_number, 'SYNTHETIC-0001')
+
+            tobii_helper.getSubscriptions().subscribe('gaze', gazeSamples.append)
+            time.sleep(0.2)
+            tobii_helper.getSubscriptions().unsubscribe('gaze', gazeSamples.append)
+
+            calibration = tobii_helper._TobiiHelper__createCalibration()
+            calibration.enter_calibration_mode()
+            calibration.collect_data(0.1, 0.1)
+            calibration.collect_data(0.9, 0.9)
+            calibResult = calibration.compute_and_apply()
+            calibration.leave_calibration_mode()
+        return gazeSamples, calibResult
+
+    def testRecordedFile(self):
+        gazeSamples, calibResult = self.recordSession()
+
+        with open(self.sessionPath, 'r') as sessionFile:
+            events = [json.loads(line) for line in sessionFile]
+        self.assertEqual(events[0]['kind'], 'header')
+        self.assertEqual(events[0]['serial_number'], 'SYNTHETIC-0001')
+        dataEvents = [event for event in events if event['kind'] == 'data']
+        callEvents = [event for event in events if event['kind'] == 'call']
+        self.assertEqual(len(dataEvents), len(gazeSamples))
+        self.assertEqual([event['method'] for event in callEvents],
+                         ['enter_calibration_mode', 'collect_data', 'collect_data',
+                          'compute_and_apply', 'leave_calibration_mode'])
+
+    def testReplay(self):
+        gazeSamples, calibResult = self.recordSession()
+
+        eyetracker = sr.ReplayEyeTracker(self.sessionPath, speed = None)
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+        tobii_helper.useEyeTracker(eyetracker)
+        self.assertEqual(tobii_helper.tbCoordinates['backDistance'], 800.0)
+
+        replayedSamples = []
+        tobii_helper.getSubscriptions().subscribe('gaze', replayedSamples.append)
+        self.assertTrue(eyetracker.waitUntilFinished(5.0))
+        tobii_helper.getSubscriptions().unsubscribe('gaze', replayedSamples.append)
+        self.assertEqual(replayedSamples, gazeSamples)
+
+        calibration = tobii_helper._TobiiHelper__createCalibration()
+        calibration.enter_calibration_mode()
+        self.assertEqual(calibration.collect_data(0.1, 0.1), tobii.CALIBRATION_STATUS_SUCCESS)
+        self.assertEqual(calibration.collect_data(0.9, 0.9), tobii.CALIBRATION_STATUS_SUCCESS)
+        replayedResult = calibration.compute_and_apply()
+        calibration.leave_calibration_mode()
+        self.assertEqual(replayedResult.status, calibResult.status)
+        self.assertEqual(len(replayedResult.calibration_points), 2)
+        self.assertEqual(replayedResult.calibration_points[1].calibration_samples[3].left_eye.position_on_display_area,
+                         calibResult.calibration_points[1].calibration_samples[3].left_eye.position_on_display_area)
+
+        # there are no more recorded results
+        with self.assertRaises(RuntimeError):
+            calibration.compute_and_apply()
+
+    def testReplayFrequency(self):
+        gazeSamples, calibResult = self.recordSession(frequency = 120)
+
+        eyetracker = sr.ReplayEyeTracker(self.sessionPath, speed = None)
+        self.assertEqual(eyetracker.get_gaze_output_frequency(), 120)
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+        tobii_helper.useEyeTracker(eyetracker)
+
+        replayedSamples = []
+        tobii_helper.getSubscriptions().subscribe('gaze', replayedSamples.append)
+        self.assertTrue(eyetracker.waitUntilFinished(5.0))
+        tobii_helper.getSubscriptions().unsubscribe('gaze', replayedSamples.append)
+        self.assertEqual(len(replayedSamples), len(gazeSamples))
+
+        # the recorded stream has no gaps with its own frequency
+        health = tobii_helper.getSubscriptions().getHealth('gaze')
+        self.assertEqual(health['nominal_rate'], 120)
+        self.assertEqual(health['gaps'], 0)
+        self.assertEqual(health['missed_samples'], 0)
+
+    def testReplayTiming(self):
+        self.recordSession()
+
+        # recording is ~0.2 seconds long, played four times faster
+        eyetracker = sr.ReplayEyeTracker(self.sessionPath, speed = 4.0)
+        replayedSamples = []
+        startTime = time.perf_counter()
+        eyetracker.subscribe_to(tobii.EYETRACKER_GAZE_DATA, replayedSamples.append, as_dictionary = True)
+        self.assertTrue(eyetracker.waitUntilFinished(5.0))
+        duration = time.perf_counter() - startTime
+        eyetracker.unsubscribe_from(tobii.EYETRACKER_GAZE_DATA, replayedSamples.append)
+        self.assertGreater(duration, 0.03)
+        self.assertLess(duration, 0.15)
+
+    def testWrongParameters(self):
+        with self.assertRaises(TypeError):
+            sr.ReplayEyeTracker(1)
+        with open(self.sessionPath, 'w') as sessionFile:
+            sessionFile.write("")
+        with self.assertRaises(ValueError):
+            sr.ReplayEyeTracker(self.sessionPath)
+        with self.assertRaises(ValueError):
+            sr.ReplayEyeTracker(self.sessionPath, speed = 0)
+        with self.assertRaises(RuntimeError):
+            sr.SessionRecorder(None, self.sessionPath)
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
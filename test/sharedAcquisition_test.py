@@ -0,0 +1,209 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import sys
+# Add the local path of the calibrator module,
+# test that instead of the system installed one.
+sys.path = ["../tobii_calibration"] + sys.path
+
+import shared_acquisition as sa
+import synthetic_tracker as st
+import tobii_calibration as calibrator
+import functools
+import math
+import numpy as np
+import time
+
+def createGazeData(index):
+    eyetracker = st.SyntheticEyeTracker(trajectory = st.fixationTrajectory((0.1 * index, 0.5)))
+    return eyetracker.createGazeData(0.0, 1000000 + index)
+
+# picklable factory of the eyetracker created in the acquisition process
+def createEyeTracker():
+    return st.SyntheticEyeTracker(frequency = 600)
+
+def createFailingEyeTracker():
+    raise ValueError("no eyetracker")
+
+def waitForSamples(ring, count, timeout = 5.0):
+    endTime = time.perf_counter() + timeout
+    while ring.getWriteCount() < count and time.perf_counter() < endTime:
+        time.sleep(0.01)
+
+class sharedGazeRingTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+        self.ring = sa.SharedGazeRing.create(4)
+
+    def tearDown(self):
+        self.ring.close()
+        self.ring.unlink()
+
+    def testLatest(self):
+        self.assertIsNone(self.ring.latest())
+        gazeData = createGazeData(3)
+        self.ring.append(gazeData)
+
+        latest = self.ring.latest()
+        self.assertEqual(gazeData, latest)
+        self.assertIsInstance(latest['system_time_stamp'], int)
+        self.assertIsInstance(latest['left_gaze_origin_validity'], int)
+        self.assertIsInstance(latest['right_gaze_point_on_display_area'], tuple)
+
+    def testInvalidSample(self):
+        gazeData = st.SyntheticEyeTracker(trajectory = lambda elapsed : None).createGazeData(0.0, 1000)
+        self.ring.append(gazeData)
+        latest = self.ring.latest()
+        self.assertTrue(math.isnan(latest['left_pupil_diameter']))
+        self.assertEqual(0, latest['left_gaze_point_validity'])
+
+    def testRead(self):
+        for i in range(3):
+            self.ring.append(createGazeData(i))
+        records, position, lost = self.ring.read()
+        self.assertEqual(3, len(records))
+        self.assertEqual(3, position)
+        self.assertEqual(0, lost)
+        self.assertEqual([1000000, 1000001, 1000002], list(self.ring.getColumn('system_time_stamp', records)[:, 0]))
+
+        # the oldest records are overwritten
+        for i in range(3, 9):
+            self.ring.append(createGazeData(i))
+        records, position, lost = self.ring.read(position)
+        self.assertEqual(4, len(records))
+        self.assertEqual(9, position)
+        self.assertEqual(2, lost)
+        self.assertAlmostEqual(0.8, sa.recordToDict(records[-1])['left_gaze_point_on_display_area'][0])
+
+    def testReadViews(self):
+        for i in range(3):
+            self.ring.append(createGazeData(i))
+        views, start, position = self.ring.readViews()
+        self.assertEqual(1, len(views))
+        self.assertEqual((0, 3), (start, position))
+        # views of the shared memory, not copies
+        self.assertTrue(np.shares_memory(views[0], self.ring.records))
+
+        # the new records wrap around the end of the ring
+        for i in range(3, 6):
+            self.ring.append(createGazeData(i))
+        views, start, position = self.ring.readViews(position)
+        self.assertEqual([1, 2], [len(view) for view in views])
+        self.assertEqual((3, 6), (start, position))
+        self.assertEqual([1000003, 1000004, 1000005],
+                         list(self.ring.getColumn('system_time_stamp', np.concatenate(views))[:, 0]))
+        self.assertEqual(0, self.ring.getOverwrittenCount(start, position))
+
+        # the writer overwrote the oldest records of the views meanwhile
+        for i in range(6, 8):
+            self.ring.append(createGazeData(i))
+        self.assertEqual(1, self.ring.getOverwrittenCount(start, position))
+        self.assertEqual(1000007, self.ring.getColumn('system_time_stamp', views[0])[0, 0])
+
+    def testAttach(self):
+        other = sa.SharedGazeRing.attach(self.ring.name, untrack = False)
+        try:
+            self.assertEqual(4, other.capacity)
+            self.ring.append(createGazeData(1))
+            # the same memory is seen without copying
+            self.assertEqual(1, other.getWriteCount())
+            self.assertEqual(self.ring.latest(), other.latest())
+            self.assertEqual({'stream' : 'gaze', 'records' : None}, dict(list(other.getHealth().items())[:2]))
+        finally:
+            other.close()
+        # only the owner removes the shared memory
+        other.unlink()
+        self.assertEqual(1, self.ring.getWriteCount())
+
+    def testWrongParam(self):
+        with self.assertRaises(TypeError):
+            sa.SharedGazeRing.create(1.5)
+        with self.assertRaises(ValueError):
+            sa.SharedGazeRing.create(0)
+        with self.assertRaises(TypeError):
+            sa.SharedGazeRing.attach(1)
+        with self.assertRaises(ValueError):
+            self.ring.getColumn('pupil')
+        with self.assertRaises(TypeError):
+            self.ring.read(None)
+
+class acquisitionProcessTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+
+    def testAcquisition(self):
+        with sa.AcquisitionProcess(eyeTrackerFactory = createEyeTracker, healthInterval = 0.1) as acquisition:
+            self.assertTrue(acquisition.isRunning())
+            ring = acquisition.getRing()
+            waitForSamples(ring, 60)
+            self.assertNotEqual(0, ring.getWriterPid())
+            records, position, lost = ring.read()
+            self.assertTrue(len(records) >= 60)
+            self.assertEqual(1, ring.latest()['left_gaze_point_validity'])
+
+            time.sleep(0.2)
+            health = ring.getHealth()
+            self.assertTrue(health['records'] > 0)
+            self.assertEqual(600.0, health['nominal_rate'])
+        self.assertFalse(acquisition.isRunning())
+        self.assertIsNone(acquisition.getName())
+
+    def testFailingEyeTracker(self):
+        acquisition = sa.AcquisitionProcess(eyeTrackerFactory = createFailingEyeTracker)
+        with self.assertRaises(RuntimeError):
+            acquisition.start()
+        self.assertFalse(acquisition.isRunning())
+        self.assertIsNone(acquisition.getRing())
+
+    def testWrongParam(self):
+        with self.assertRaises(RuntimeError):
+            sa.AcquisitionProcess()
+        with self.assertRaises(TypeError):
+            sa.AcquisitionProcess(address = 1)
+        with self.assertRaises(TypeError):
+            sa.AcquisitionProcess(eyeTrackerFactory = 1)
+        with self.assertRaises(ValueError):
+            sa.AcquisitionProcess('tobii-synthetic://1', capacity = 0)
+        with self.assertRaises(ValueError):
+            sa.AcquisitionProcess('tobii-synthetic://1', healthInterval = 0)
+
+class tobiiHelperAcquisitionTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+
+    def testSharedAcquisition(self):
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+        with self.assertRaises(RuntimeError):
+            tobii_helper.startSharedAcquisition()
+
+        eyetracker = st.SyntheticEyeTracker()
+        tobii_helper.useEyeTracker(eyetracker)
+        acquisition = tobii_helper.startSharedAcquisition(eyeTrackerFactory = functools.partial(st.SyntheticEyeTracker,
+                                                                                                frequency = 300))
+        try:
+            with self.assertRaises(RuntimeError):
+                tobii_helper.startSharedAcquisition()
+            waitForSamples(acquisition.getRing(), 10)
+
+            tobii_helper._TobiiHelper__startGazeData()
+            # nothing is subscribed in this process
+            self.assertFalse(eyetracker.isRunning())
+            self.assertEqual((0.5, 0.5), tobii_helper.gazeData['left_gaze_point_on_display_area'])
+            with self.assertRaises(RuntimeError):
+                tobii_helper.stopSharedAcquisition()
+            tobii_helper._TobiiHelper__stopGazeData()
+        finally:
+            self.assertIs(acquisition, tobii_helper.stopSharedAcquisition())
+        self.assertIsNone(tobii_helper.gazeData)
+        self.assertIsNone(tobii_helper.stopSharedAcquisition())
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
@@ -0,0 +1,164 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import sys
+# Add the local path of the calibrator module,
+# test that instead of the system installed one.
+sys.path = ["../tobii_calibration"] + sys.path
+
+import stream_health
+import subscriptions
+import synthetic_tracker
+import faulty_tracker
+import tobii_research as tobii
+import threading
+import time
+
+def createGazeData(timeStamp, leftValid = True, rightValid = True):
+    return {'device_time_stamp' : timeStamp,
+            'system_time_stamp' : timeStamp,
+            'left_gaze_point_validity' : int(leftValid),
+            'right_gaze_point_validity' : int(rightValid)}
+
+class streamHealthTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+
+    def testRateAndGaps(self):
+        health = stream_health.StreamHealth('gaze', nominalFrequency = 100)
+        # 10 ms sampling, two samples are missing after the 5th one
+        timeStamps = [i * 10000 for i in range(5)] + [i * 10000 for i in range(7, 12)]
+        for timeStamp in timeStamps:
+            health.update(createGazeData(timeStamp), timeStamp, timeStamp + 2000, 0.0001)
+
+        snapshot = health.snapshot()
+        self.assertEqual(10, snapshot['records'])
+        self.assertEqual(1, snapshot['gaps'])
+        self.assertEqual(2, snapshot['missed_samples'])
+        self.assertAlmostEqual(9 * 1000000.0 / 110000, snapshot['rate'], delta = 0.001)
+        self.assertAlmostEqual(2.0, snapshot['latency_mean_ms'], delta = 0.001)
+        self.assertAlmostEqual(2.0, snapshot['latency_max_ms'], delta = 0.001)
+        self.assertAlmostEqual(0.1, snapshot['callback_time_mean_ms'], delta = 0.001)
+
+    def testEstimatedInterval(self):
+        health = stream_health.StreamHealth('gaze')
+        timeStamps = [i * 1000 for i in range(30)] + [i * 1000 for i in range(35, 40)]
+        for timeStamp in timeStamps:
+            health.update(createGazeData(timeStamp), timeStamp, timeStamp, 0.0)
+
+        snapshot = health.snapshot()
+        self.assertIsNone(snapshot['nominal_rate'])
+        self.assertEqual(1, snapshot['gaps'])
+        self.assertEqual(5, snapshot['missed_samples'])
+
+    def testNotPeriodic(self):
+        health = stream_health.StreamHealth('notification', periodic = False, nominalFrequency = 100)
+        for timeStamp in [0, 10000, 500000, 500000]:
+            health.update({'system_time_stamp' : timeStamp}, timeStamp, timeStamp, 0.0)
+        snapshot = health.snapshot()
+        self.assertEqual(0, snapshot['gaps'])
+        self.assertEqual(1, snapshot['disordered'])
+        self.assertIsNone(snapshot['left_validity'])
+
+    def testValidity(self):
+        health = stream_health.StreamHealth('gaze', nominalFrequency = 100)
+        for i in range(10):
+            health.update(createGazeData(i * 10000, leftValid = i % 2 == 0, rightValid = i != 0),
+                          i * 10000, i * 10000, 0.0)
+        snapshot = health.snapshot()
+        self.assertEqual(5, snapshot['left_invalid'])
+        self.assertEqual(1, snapshot['right_invalid'])
+        self.assertAlmostEqual(0.5, snapshot['left_validity'], delta = 0.001)
+        self.assertAlmostEqual(0.9, snapshot['right_validity'], delta = 0.001)
+
+    def testRestartAndReset(self):
+        health = stream_health.StreamHealth('gaze', nominalFrequency = 100)
+        health.update(createGazeData(0), 0, 0, 0.0)
+        health.restart()
+        # new subscription, the pause is not a gap
+        health.update(createGazeData(1000000), 1000000, 1000000, 0.0)
+        self.assertEqual(0, health.snapshot()['gaps'])
+        self.assertEqual(2, health.snapshot()['records'])
+        health.reset()
+        self.assertEqual(0, health.snapshot()['records'])
+
+    def testWrongParam(self):
+        with self.assertRaises(TypeError):
+            stream_health.StreamHealth('gaze', windowSize = 1.5)
+        with self.assertRaises(ValueError):
+            stream_health.StreamHealth('gaze', windowSize = 1)
+        with self.assertRaises(TypeError):
+            stream_health.StreamHealth('gaze', nominalFrequency = '600')
+        with self.assertRaises(ValueError):
+            stream_health.StreamHealth('gaze', nominalFrequency = 0)
+        with self.assertRaises(TypeError):
+            stream_health.HealthDump(None, interval = '1')
+        with self.assertRaises(ValueError):
+            stream_health.HealthDump(None, interval = 0)
+        with self.assertRaises(TypeError):
+            stream_health.HealthDump(None, callback = 1)
+
+    def testSyntheticTracker(self):
+        eyetracker = synthetic_tracker.SyntheticEyeTracker(frequency = 300, seed = 0)
+        manager = subscriptions.SubscriptionManager(eyetracker)
+        manager.subscribe('gaze')
+        time.sleep(0.3)
+        manager.unsubscribe('gaze')
+
+        snapshot = manager.getHealth('gaze')
+        self.assertEqual(300, snapshot['nominal_rate'])
+        self.assertTrue(snapshot['records'] > 0)
+        self.assertAlmostEqual(300.0, snapshot['rate'], delta = 1.0)
+        self.assertEqual(0, snapshot['gaps'])
+        self.assertEqual(1.0, snapshot['left_validity'])
+        self.assertEqual(0, snapshot['buffer_dropped'])
+        self.assertTrue(snapshot['latency_mean_ms'] is not None)
+
+        self.assertEqual(list(subscriptions.STREAM_TYPES.keys()), list(manager.getHealth().keys()))
+        manager.resetHealth()
+        self.assertEqual(0, manager.getHealth('gaze')['records'])
+
+    def testDroppedSamples(self):
+        eyetracker = faulty_tracker.FaultInjectingEyeTracker(frequency = 300, dropRate = 0.2,
+                                                            validityFlickerRate = 0.1, seed = 0)
+        manager = subscriptions.SubscriptionManager(eyetracker)
+        manager.subscribe('gaze')
+        time.sleep(0.3)
+        manager.unsubscribe('gaze')
+
+        snapshot = manager.getHealth('gaze')
+        faultCounts = eyetracker.getFaultCounts()
+        # consecutive drops make one gap
+        self.assertTrue(0 < snapshot['gaps'] <= faultCounts['dropped_sample'])
+        # samples dropped after the last received one are not seen
+        self.assertTrue(0 < snapshot['missed_samples'] <= faultCounts['dropped_sample'])
+        self.assertTrue(snapshot['left_validity'] < 1.0)
+
+    def testHealthDump(self):
+        eyetracker = synthetic_tracker.SyntheticEyeTracker(frequency = 300, seed = 0)
+        manager = subscriptions.SubscriptionManager(eyetracker)
+        snapshots = []
+        dumped = threading.Event()
+
+        def callback(snapshot):
+            snapshots.append(snapshot)
+            dumped.set()
+
+        manager.subscribe('gaze')
+        healthDump = manager.startHealthDump(interval = 0.05, callback = callback)
+        self.assertTrue(healthDump.isRunning())
+        self.assertTrue(dumped.wait(2.0))
+        manager.stopHealthDump()
+        manager.unsubscribe('gaze')
+
+        self.assertFalse(healthDump.isRunning())
+        # only the subscribed streams are dumped
+        self.assertEqual(set(['gaze']), set(snapshot['stream'] for snapshot in snapshots))
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
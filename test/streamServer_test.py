@@ -0,0 +1,242 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import sys
+# Add the local path of the calibrator module,
+# test that instead of the system installed one.
+sys.path = ["../tobii_calibration"] + sys.path
+
+import stream_server as ss
+import shared_acquisition as sa
+import synthetic_tracker as st
+import tobii_calibration as calibrator
+import os
+import socket
+import tempfile
+import time
+
+def createGazeData(index, timeStampStep = 1000):
+    eyetracker = st.SyntheticEyeTracker()
+    return eyetracker.createGazeData(0.0, 1000000 + index * timeStampStep)
+
+def waitFor(condition, timeout = 5.0):
+    endTime = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < endTime:
+        time.sleep(0.01)
+
+# gaze records received until count records arrived
+def receiveRecords(client, count):
+    records = []
+    while sum(len(item) for item in records) < count:
+        message = client.receive()
+        if message[0] == 'gaze':
+            records.append(message[1])
+    return [record for item in records for record in item]
+
+class streamServerTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+        self.server = ss.GazeStreamServer()
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def testGazeStream(self):
+        with ss.GazeStreamClient(self.server.getAddress()) as client:
+            self.assertEqual(sa.RECORD_SIZE, client.hello['record_size'])
+            waitFor(lambda : self.server.getClientCount() == 1)
+
+            for i in range(5):
+                self.server.publishGaze(createGazeData(i))
+            records = receiveRecords(client, 5)
+            self.assertEqual(5, len(records))
+            self.assertEqual(createGazeData(4), sa.recordToDict(records[4]))
+            self.assertEqual(0, client.droppedCount)
+        waitFor(lambda : self.server.getClientCount() == 0)
+        self.assertEqual(0, self.server.getClientCount())
+
+    def testDownsampling(self):
+        # 1000 Hz stream, the client asks for 100 Hz
+        with ss.GazeStreamClient(self.server.getAddress(), maxRate = 100) as client:
+            waitFor(lambda : len(self.server.getClientStats()) == 1 and
+                             self.server.getClientStats()[0]['max_rate'] == 100)
+            for i in range(100):
+                self.server.publishGaze(createGazeData(i))
+            waitFor(lambda : self.server.getClientStats()[0]['sent'] == 10)
+            records = receiveRecords(client, 10)
+            timeStamps = [record[0] for record in records]
+            self.assertEqual([1000000 + i * 10000 for i in range(10)], timeStamps)
+
+    def testServerDefaultRate(self):
+        self.server.stop()
+        self.server = ss.GazeStreamServer(maxRate = 10)
+        self.server.start()
+        # the client keeps the default rate of the server
+        with ss.GazeStreamClient(self.server.getAddress()) as client:
+            waitFor(lambda : self.server.getClientCount() == 1)
+            self.assertEqual(10, self.server.getClientStats()[0]['max_rate'])
+            client.subscribe(gaze = False)
+            waitFor(lambda : self.server.getClientStats()[0]['streams'] == ss.STREAM_EVENTS)
+            self.assertEqual(10, self.server.getClientStats()[0]['max_rate'])
+
+            # 0 asks for all samples
+            client.subscribe(maxRate = 0)
+            waitFor(lambda : self.server.getClientStats()[0]['max_rate'] is None)
+            self.assertIsNone(self.server.getClientStats()[0]['max_rate'])
+
+            with self.assertRaises(ValueError):
+                client.subscribe(maxRate = -1)
+
+    def testDropOldest(self):
+        self.server.stop()
+        self.server = ss.GazeStreamServer(queueSize = 3)
+        self.server.start()
+        with ss.GazeStreamClient(self.server.getAddress()) as client:
+            waitFor(lambda : self.server.getClientCount() == 1)
+            clientConnection = self.server.getClients()[0]
+            # the sender thread is held back, the queue overflows
+            with clientConnection.condition:
+                for i in range(10):
+                    self.server.publishGaze(createGazeData(i))
+            records = receiveRecords(client, 3)
+            self.assertEqual(7, client.droppedCount)
+            self.assertEqual([1007000, 1008000, 1009000], [record[0] for record in records])
+
+    def testEvents(self):
+        with ss.GazeStreamClient(self.server.getAddress(), gaze = False) as client:
+            waitFor(lambda : len(self.server.getClientStats()) == 1 and
+                             self.server.getClientStats()[0]['streams'] == ss.STREAM_EVENTS)
+            self.server.publishGaze(createGazeData(0))
+            self.server.publishEvent("Collecting data at 1.", {'phase' : 'calibration', 'point' : 1})
+            message = client.receive()
+            self.assertEqual('event', message[0])
+            self.assertEqual("Collecting data at 1.", message[1]['message'])
+            self.assertEqual({'phase' : 'calibration', 'point' : 1}, message[1]['fields'])
+            self.assertEqual(0, self.server.getClientStats()[0]['sent'])
+
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX'), "Unix sockets are not supported.")
+    def testUnixSocket(self):
+        path = os.path.join(tempfile.mkdtemp(), "gaze.sock")
+        with ss.GazeStreamServer(path) as server:
+            with ss.GazeStreamClient(path) as client:
+                waitFor(lambda : server.getClientCount() == 1)
+                server.publishGaze(createGazeData(0))
+                self.assertEqual(1, len(receiveRecords(client, 1)))
+        self.assertFalse(os.path.exists(path))
+
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX'), "Unix sockets are not supported.")
+    def testUnixSocketKeepsOtherFiles(self):
+        path = os.path.join(tempfile.mkdtemp(), "gaze.sock")
+        with open(path, "w") as file:
+            file.write("data")
+        server = ss.GazeStreamServer(path)
+        with self.assertRaises(ValueError):
+            server.start()
+        self.assertFalse(server.isRunning())
+        with open(path) as file:
+            self.assertEqual("data", file.read())
+
+        # the file replaced the socket while the server was running
+        os.unlink(path)
+        server.start()
+        os.unlink(path)
+        with open(path, "w") as file:
+            file.write("data")
+        with self.assertRaises(ValueError):
+            server.stop()
+        self.assertFalse(server.isRunning())
+        self.assertTrue(os.path.exists(path))
+
+    def testRingForwarding(self):
+        ring = sa.SharedGazeRing.create(100)
+        try:
+            with ss.GazeStreamClient(self.server.getAddress()) as client:
+                waitFor(lambda : self.server.getClientCount() == 1)
+                ring.append(createGazeData(0))
+                self.server.startRingForwarding(ring)
+                # only the new samples are sent
+                for i in range(1, 4):
+                    ring.append(createGazeData(i))
+                records = receiveRecords(client, 3)
+                self.assertEqual([1001000, 1002000, 1003000], [record[0] for record in records])
+                self.server.stopRingForwarding()
+        finally:
+            ring.close()
+            ring.unlink()
+
+    def testRingForwardingLost(self):
+        ring = sa.SharedGazeRing.create(4)
+        try:
+            with ss.GazeStreamClient(self.server.getAddress()) as client:
+                waitFor(lambda : self.server.getClientCount() == 1)
+                # the ring overflows before the first forwarding
+                self.server.startRingForwarding(ring, interval = 0.5)
+                for i in range(10):
+                    ring.append(createGazeData(i))
+                records = receiveRecords(client, 4)
+                self.assertEqual([1006000, 1007000, 1008000, 1009000], [record[0] for record in records])
+                self.assertEqual(6, client.droppedCount)
+                self.assertEqual(6, self.server.getClientStats()[0]['dropped'])
+                self.server.stopRingForwarding()
+        finally:
+            ring.close()
+            ring.unlink()
+
+    def testWrongParam(self):
+        with self.assertRaises(TypeError):
+            ss.GazeStreamServer(address = 1)
+        with self.assertRaises(ValueError):
+            ss.GazeStreamServer(queueSize = 0)
+        with self.assertRaises(ValueError):
+            ss.GazeStreamServer(maxRate = 0)
+        with self.assertRaises(RuntimeError):
+            self.server.start()
+        with self.assertRaises(ValueError):
+            self.server.startRingForwarding(None, 0)
+
+class tobiiHelperStreamTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+
+    def testStreamServer(self):
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+        with self.assertRaises(RuntimeError):
+            tobii_helper.startStreamServer()
+
+        eyetracker = st.SyntheticEyeTracker(frequency = 300)
+        tobii_helper.useEyeTracker(eyetracker)
+        server = tobii_helper.startStreamServer()
+        try:
+            with self.assertRaises(RuntimeError):
+                tobii_helper.startStreamServer()
+            self.assertTrue(eyetracker.isRunning())
+            with ss.GazeStreamClient(server.getAddress(), maxRate = 60) as client:
+                records = receiveRecords(client, 5)
+                self.assertEqual(5, len(records))
+                # 60 Hz of the 300 Hz stream
+                self.assertAlmostEqual(1000000.0 / 60, records[4][0] - records[3][0], delta = 3500)
+
+                events = []
+                tobii_helper.addEventListener(lambda message, fields : events.append(message))
+                tobii_helper.setAccuracy(40)
+                tobii_helper._TobiiHelper__log(20, "Proceeding to calibration.", phase = 'trackbox')
+                self.assertEqual(["Proceeding to calibration."], events)
+                message = client.receive()
+                while message[0] != 'event':
+                    message = client.receive()
+                self.assertEqual('trackbox', message[1]['fields']['phase'])
+        finally:
+            self.assertIs(server, tobii_helper.stopStreamServer())
+        self.assertFalse(eyetracker.isRunning())
+        self.assertIsNone(tobii_helper.stopStreamServer())
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
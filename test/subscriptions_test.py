@@ -0,0 +1,228 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import sys
+# Add the local path of the calibrator module,
+# test that instead of the system installed one.
+sys.path = ["../tobii_calibration"] + sys.path
+
+import subscriptions
+import tobii_research as tobii
+import threading
+
+class DummyEyeTracker:
+    def __init__(self):
+        self.callbacks = {}
+
+    def subscribe_to(self, subscription_type, callback, as_dictionary = False):
+        self.callbacks.setdefault(subscription_type, []).append(callback)
+
+    def unsubscribe_from(self, subscription_type, callback = None):
+        self.callbacks[subscription_type].remove(callback)
+        if len(self.callbacks[subscription_type]) == 0:
+            del self.callbacks[subscription_type]
+
+    def send(self, subscription_type, data):
+        for callback in self.callbacks.get(subscription_type, []):
+            callback(data)
+
+# the SDK subscription returns only when it is released
+class BlockingEyeTracker(DummyEyeTracker):
+    def __init__(self):
+        DummyEyeTracker.__init__(self)
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def subscribe_to(self, subscription_type, callback, as_dictionary = False):
+        self.entered.set()
+        self.release.wait(5.0)
+        DummyEyeTracker.subscribe_to(self, subscription_type, callback, as_dictionary)
+
+class ringBufferTest(unittest.TestCase):
+
+    def testAppendAndRead(self):
+        buffer = subscriptions.RingBuffer('gaze', 3)
+        buffer.append(10, 'a')
+        buffer.append(20, 'b')
+        self.assertEqual(len(buffer), 2)
+        self.assertEqual(buffer.latest(), subscriptions.StreamRecord(20, 'gaze', 'b'))
+        self.assertEqual(len(buffer.peek()), 2)
+        records = buffer.read()
+        self.assertEqual([record.data for record in records], ['a', 'b'])
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(buffer.latest(), None)
+
+    def testDropOldest(self):
+        buffer = subscriptions.RingBuffer('gaze', 3)
+        for i in range(5):
+            buffer.append(i, i)
+        self.assertEqual([record.data for record in buffer.read()], [2, 3, 4])
+        self.assertEqual(buffer.dropped, 2)
+
+    def testWrongCapacity(self):
+        with self.assertRaises(TypeError):
+            subscriptions.RingBuffer('gaze', 1.5)
+        with self.assertRaises(ValueError):
+            subscriptions.RingBuffer('gaze', 0)
+
+class subscriptionManagerTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+        self.eyetracker = DummyEyeTracker()
+        self.manager = subscriptions.SubscriptionManager(self.eyetracker)
+
+    def testNoEyeTracker(self):
+        with self.assertRaises(RuntimeError):
+            subscriptions.SubscriptionManager(None)
+
+    def testWrongCapacities(self):
+        with self.assertRaises(TypeError):
+            subscriptions.SubscriptionManager(self.eyetracker, [])
+        with self.assertRaises(ValueError):
+            subscriptions.SubscriptionManager(self.eyetracker, {'something' : 10})
+
+    def testUnknownStream(self):
+        with self.assertRaises(ValueError):
+            self.manager.subscribe('something')
+        with self.assertRaises(TypeError):
+            self.manager.subscribe(1)
+        with self.assertRaises(TypeError):
+            self.manager.subscribe('gaze', 'not callable')
+
+    def testGazeStream(self):
+        received = []
+        self.manager.subscribe('gaze', received.append)
+        self.assertTrue(self.manager.isSubscribed('gaze'))
+        self.eyetracker.send(tobii.EYETRACKER_GAZE_DATA, {'system_time_stamp' : 100})
+        self.eyetracker.send(tobii.EYETRACKER_GAZE_DATA, {'system_time_stamp' : 200})
+
+        self.assertEqual(len(received), 2)
+        self.assertEqual(self.manager.latest('gaze').timeStamp, 200)
+        records = self.manager.read('gaze')
+        self.assertEqual([record.timeStamp for record in records], [100, 200])
+        self.assertEqual(records[0].stream, 'gaze')
+        self.assertEqual(len(self.manager.read('gaze')), 0)
+
+    def testSharedSubscription(self):
+        first = []
+        second = []
+        self.manager.subscribe('gaze', first.append)
+        self.manager.subscribe('gaze', second.append)
+        self.assertEqual(len(self.eyetracker.callbacks[tobii.EYETRACKER_GAZE_DATA]), 1)
+
+        self.eyetracker.send(tobii.EYETRACKER_GAZE_DATA, {'system_time_stamp' : 100})
+        self.assertEqual(len(first), 1)
+        self.assertEqual(len(second), 1)
+        self.assertEqual(len(self.manager.getBuffer('gaze')), 1)
+
+        self.manager.unsubscribe('gaze', first.append)
+        self.assertTrue(self.manager.isSubscribed('gaze'))
+        self.eyetracker.send(tobii.EYETRACKER_GAZE_DATA, {'system_time_stamp' : 200})
+        self.assertEqual(len(first), 1)
+        self.assertEqual(len(second), 2)
+
+        self.manager.unsubscribe('gaze', second.append)
+        self.assertFalse(self.manager.isSubscribed('gaze'))
+        self.assertFalse(tobii.EYETRACKER_GAZE_DATA in self.eyetracker.callbacks)
+
+        # no error for unsubscribing a stream without subscription
+        self.manager.unsubscribe('gaze')
+
+    def testUnsubscribeTwice(self):
+        first = []
+        second = []
+        self.manager.subscribe('gaze', first.append)
+        self.manager.subscribe('gaze', second.append)
+
+        # removed listeners and anonymous unsubscriptions don't drop the other subscribers
+        self.manager.unsubscribe('gaze', first.append)
+        self.manager.unsubscribe('gaze', first.append)
+        self.manager.unsubscribe('gaze')
+        self.assertTrue(self.manager.isSubscribed('gaze'))
+        self.eyetracker.send(tobii.EYETRACKER_GAZE_DATA, {'system_time_stamp' : 100})
+        self.assertEqual(len(first), 0)
+        self.assertEqual(len(second), 1)
+
+        self.manager.unsubscribe('gaze', second.append)
+        self.assertFalse(self.manager.isSubscribed('gaze'))
+        self.assertFalse(tobii.EYETRACKER_GAZE_DATA in self.eyetracker.callbacks)
+
+    def testSubscribeWaitsForSdk(self):
+        eyetracker = BlockingEyeTracker()
+        manager = subscriptions.SubscriptionManager(eyetracker)
+        first = threading.Thread(target = manager.subscribe, args = ('gaze',))
+        second = threading.Thread(target = manager.subscribe, args = ('gaze',))
+        first.start()
+        self.assertTrue(eyetracker.entered.wait(5.0))
+
+        # the second subscriber returns after the SDK subscription is made
+        second.start()
+        second.join(0.1)
+        self.assertTrue(second.is_alive())
+        eyetracker.release.set()
+        first.join(5.0)
+        second.join(5.0)
+        self.assertFalse(second.is_alive())
+        self.assertEqual(len(eyetracker.callbacks[tobii.EYETRACKER_GAZE_DATA]), 1)
+
+        manager.unsubscribe('gaze')
+        self.assertTrue(manager.isSubscribed('gaze'))
+        manager.unsubscribe('gaze')
+        self.assertFalse(manager.isSubscribed('gaze'))
+
+    def testTimeSyncStream(self):
+        self.manager.subscribe('time_sync')
+        self.eyetracker.send(tobii.EYETRACKER_TIME_SYNCHRONIZATION_DATA, {'system_request_time_stamp' : 50,
+                                                                          'device_time_stamp' : 60,
+                                                                          'system_response_time_stamp' : 70})
+        self.assertEqual(self.manager.latest('time_sync').timeStamp, 50)
+
+    def testNotificationStream(self):
+        self.manager.subscribe('notification')
+        self.eyetracker.send(tobii.EYETRACKER_NOTIFICATION_CONNECTION_LOST, {'system_time_stamp' : 10})
+        self.eyetracker.send(tobii.EYETRACKER_NOTIFICATION_CONNECTION_RESTORED, {'system_time_stamp' : 20})
+
+        records = self.manager.read('notification')
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0].data['notification_type'], tobii.EYETRACKER_NOTIFICATION_CONNECTION_LOST)
+        self.assertEqual(records[1].data['notification_type'], tobii.EYETRACKER_NOTIFICATION_CONNECTION_RESTORED)
+
+        self.manager.unsubscribe('notification')
+        self.assertEqual(len(self.eyetracker.callbacks), 0)
+
+    def testReadMerged(self):
+        self.manager.subscribe('gaze')
+        self.manager.subscribe('external_signal')
+        self.eyetracker.send(tobii.EYETRACKER_GAZE_DATA, {'system_time_stamp' : 100})
+        self.eyetracker.send(tobii.EYETRACKER_EXTERNAL_SIGNAL, {'system_time_stamp' : 150})
+        self.eyetracker.send(tobii.EYETRACKER_GAZE_DATA, {'system_time_stamp' : 200})
+        self.eyetracker.send(tobii.EYETRACKER_EXTERNAL_SIGNAL, {'system_time_stamp' : 50})
+
+        records = self.manager.readMerged()
+        self.assertEqual([(record.timeStamp, record.stream) for record in records],
+                         [(50, 'external_signal'), (100, 'gaze'), (150, 'external_signal'), (200, 'gaze')])
+
+        with self.assertRaises(TypeError):
+            self.manager.readMerged('gaze')
+
+    def testUnsubscribeAll(self):
+        self.manager.subscribe('gaze')
+        self.manager.subscribe('gaze')
+        self.manager.subscribe('user_position')
+        self.manager.unsubscribeAll()
+        self.assertFalse(self.manager.isSubscribed('gaze'))
+        self.assertFalse(self.manager.isSubscribed('user_position'))
+        self.assertEqual(len(self.eyetracker.callbacks), 0)
+
+    def testCapacities(self):
+        manager = subscriptions.SubscriptionManager(self.eyetracker, {'gaze' : 2})
+        self.assertEqual(manager.getBuffer('gaze').capacity, 2)
+        self.assertEqual(manager.getBuffer('user_position').capacity, subscriptions.DEFAULT_CAPACITIES['user_position'])
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
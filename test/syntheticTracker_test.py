@@ -0,0 +1,199 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import sys
+# Add the local path of the calibrator module,
+# test that instead of the system installed one.
+sys.path = ["../tobii_calibration"] + sys.path
+
+import synthetic_tracker as st
+import tobii_calibration as calibrator
+import tobii_research as tobii
+import threading
+import time
+import math
+
+class Collector:
+    def __init__(self):
+        self.samples = []
+        self.lock = threading.Lock()
+
+    def __call__(self, data):
+        with self.lock:
+            self.samples.append(data)
+
+class trajectoryTest(unittest.TestCase):
+
+    def testFixation(self):
+        trajectory = st.fixationTrajectory((0.2, 0.3))
+        self.assertEqual(trajectory(0.0), (0.2, 0.3))
+        self.assertEqual(trajectory(10.0), (0.2, 0.3))
+
+        with self.assertRaises(TypeError):
+            st.fixationTrajectory([0.2, 0.3])
+
+    def testSaccades(self):
+        trajectory = st.saccadeTrajectory([(0.1, 0.1), (0.9, 0.9)], 0.5)
+        self.assertEqual(trajectory(0.2), (0.1, 0.1))
+        self.assertEqual(trajectory(0.7), (0.9, 0.9))
+        self.assertEqual(trajectory(1.2), (0.1, 0.1))
+
+        trajectory = st.saccadeTrajectory([(0.1, 0.1), (0.9, 0.9)], 0.5, loop = False)
+        self.assertEqual(trajectory(1.2), (0.9, 0.9))
+
+        with self.assertRaises(TypeError):
+            st.saccadeTrajectory([])
+        with self.assertRaises(ValueError):
+            st.saccadeTrajectory([(0.1, 0.1)], 0.0)
+
+    def testCircle(self):
+        trajectory = st.circleTrajectory((0.5, 0.5), 0.25, 4.0)
+        self.assertAlmostEqual(trajectory(0.0)[0], 0.75, delta = 0.0001)
+        self.assertAlmostEqual(trajectory(1.0)[1], 0.75, delta = 0.0001)
+
+        with self.assertRaises(ValueError):
+            st.circleTrajectory(period = 0)
+
+class syntheticEyeTrackerTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+
+    def testWrongParameters(self):
+        with self.assertRaises(ValueError):
+            st.SyntheticEyeTracker(frequency = 30)
+        with self.assertRaises(ValueError):
+            st.SyntheticEyeTracker(frequency = 2000)
+        with self.assertRaises(TypeError):
+            st.SyntheticEyeTracker(frequency = '600')
+        with self.assertRaises(TypeError):
+            st.SyntheticEyeTracker(trajectory = (0.5, 0.5))
+        with self.assertRaises(ValueError):
+            st.SyntheticEyeTracker(noise = -1)
+
+        eyetracker = st.SyntheticEyeTracker()
+        with self.assertRaises(ValueError):
+            eyetracker.set_gaze_output_frequency(1500)
+        eyetracker.set_gaze_output_frequency(1200)
+        self.assertEqual(eyetracker.get_gaze_output_frequency(), 1200)
+
+    def testGazeDataRate(self):
+        eyetracker = st.SyntheticEyeTracker(frequency = 1200, trajectory = st.fixationTrajectory((0.3, 0.6)))
+        collector = Collector()
+        eyetracker.subscribe_to(tobii.EYETRACKER_GAZE_DATA, collector, as_dictionary = True)
+        self.assertTrue(eyetracker.isRunning())
+        time.sleep(0.5)
+        eyetracker.unsubscribe_from(tobii.EYETRACKER_GAZE_DATA, collector)
+        self.assertFalse(eyetracker.isRunning())
+
+        sampleCount = len(collector.samples)
+        self.assertGreater(sampleCount, 300)
+        self.assertLess(sampleCount, 700)
+        self.assertEqual(sampleCount, eyetracker.sampleCount)
+
+        # no more samples after unsubscribing
+        time.sleep(0.05)
+        self.assertEqual(len(collector.samples), sampleCount)
+
+        sample = collector.samples[0]
+        self.assertEqual(sample['left_gaze_point_on_display_area'], (0.3, 0.6))
+        self.assertEqual(sample['right_gaze_point_on_display_area'], (0.3, 0.6))
+        self.assertTrue(sample['left_gaze_origin_validity'])
+        self.assertAlmostEqual(sample['left_gaze_origin_in_trackbox_coordinate_system'][0], 0.6067, delta = 0.0001)
+        self.assertAlmostEqual(sample['right_gaze_origin_in_trackbox_coordinate_system'][0], 0.3933, delta = 0.0001)
+        self.assertAlmostEqual(sample['left_gaze_origin_in_trackbox_coordinate_system'][2], 0.5, delta = 0.0001)
+        self.assertEqual(sample['device_time_stamp'] - sample['system_time_stamp'], eyetracker.deviceClockOffset)
+
+        # time stamps follow the frequency
+        timeStamps = [sample['system_time_stamp'] for sample in collector.samples]
+        self.assertAlmostEqual(timeStamps[1] - timeStamps[0], 833, delta = 1)
+        self.assertAlmostEqual(timeStamps[-1] - timeStamps[0], (sampleCount - 1) * 833.33, delta = sampleCount)
+
+    def testInvalidSamples(self):
+        eyetracker = st.SyntheticEyeTracker(trajectory = lambda elapsed : None)
+        gazeData = eyetracker.createGazeData(0.0, 1000)
+        self.assertFalse(gazeData['left_gaze_origin_validity'])
+        self.assertTrue(math.isnan(gazeData['right_gaze_point_on_display_area'][0]))
+
+    def testUserPositionGuide(self):
+        eyetracker = st.SyntheticEyeTracker(frequency = 600)
+        collector = Collector()
+        eyetracker.subscribe_to(tobii.EYETRACKER_USER_POSITION_GUIDE, collector, as_dictionary = True)
+        time.sleep(0.1)
+        eyetracker.unsubscribe_all()
+        self.assertFalse(eyetracker.isRunning())
+
+        self.assertGreater(len(collector.samples), 0)
+        sample = collector.samples[0]
+        self.assertEqual(set(sample.keys()), {'left_user_position', 'left_user_position_validity',
+                                              'right_user_position', 'right_user_position_validity'})
+
+    def testTimeSync(self):
+        eyetracker = st.SyntheticEyeTracker(frequency = 600)
+        collector = Collector()
+        eyetracker.subscribe_to(tobii.EYETRACKER_TIME_SYNCHRONIZATION_DATA, collector, as_dictionary = True)
+        time.sleep(0.1)
+        eyetracker.unsubscribe_all()
+
+        self.assertEqual(len(collector.samples), 1)
+        data = collector.samples[0]
+        self.assertLess(data['system_request_time_stamp'], data['system_response_time_stamp'])
+
+    def testCalibration(self):
+        eyetracker = st.SyntheticEyeTracker(calibrationError = (0.01, 0.0))
+        calibration = eyetracker.createCalibration()
+        with self.assertRaises(RuntimeError):
+            calibration.collect_data(0.1, 0.1)
+
+        calibration.enter_calibration_mode()
+        self.assertEqual(calibration.compute_and_apply().status, tobii.CALIBRATION_STATUS_FAILURE)
+        self.assertEqual(calibration.collect_data(0.1, 0.1), tobii.CALIBRATION_STATUS_SUCCESS)
+        self.assertEqual(calibration.collect_data(0.9, 0.9), tobii.CALIBRATION_STATUS_SUCCESS)
+        calibration.discard_data(0.9, 0.9)
+        result = calibration.compute_and_apply()
+        calibration.leave_calibration_mode()
+
+        self.assertEqual(result.status, tobii.CALIBRATION_STATUS_SUCCESS)
+        self.assertEqual(len(result.calibration_points), 1)
+        point = result.calibration_points[0]
+        self.assertEqual(point.position_on_display_area, (0.1, 0.1))
+        self.assertEqual(len(point.calibration_samples), eyetracker.calibrationSampleCount)
+        self.assertAlmostEqual(point.calibration_samples[0].left_eye.position_on_display_area[0], 0.11, delta = 0.0001)
+        self.assertEqual(eyetracker.sdkCallCount, 4)
+
+    def testMonocularCalibration(self):
+        eyetracker = st.SyntheticEyeTracker()
+        calibration = eyetracker.createCalibration(monocular = True)
+        calibration.enter_calibration_mode()
+        self.assertEqual(calibration.collect_data(0.1, 0.1, tobii.SELECTED_EYE_BOTH), tobii.CALIBRATION_STATUS_SUCCESS)
+        calibration.discard_data(0.1, 0.1, tobii.SELECTED_EYE_RIGHT)
+        result = calibration.compute_and_apply()
+        sample = result.calibration_points[0].calibration_samples[0]
+        self.assertEqual(sample.left_eye.validity, tobii.VALIDITY_VALID_AND_USED)
+        self.assertEqual(sample.right_eye.validity, tobii.VALIDITY_INVALID_AND_NOT_USED)
+
+        self.assertEqual(calibration.collect_data(0.1, 0.1, tobii.SELECTED_EYE_RIGHT), tobii.CALIBRATION_STATUS_SUCCESS_RIGHT_EYE)
+
+    def testWithTobiiHelper(self):
+        eyetracker = st.SyntheticEyeTracker(frequency = 300, trajectory = st.fixationTrajectory((0.25, 0.75)))
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+        tobii_helper.useEyeTracker(eyetracker)
+        self.assertEqual(tobii_helper.tbCoordinates['frontDistance'], 500.0)
+        self.assertTrue(isinstance(tobii_helper._TobiiHelper__createCalibration(), st.SyntheticCalibration))
+
+        tobii_helper._TobiiHelper__startGazeData()
+        time.sleep(0.05)
+        gazePos = tobii_helper._TobiiHelper__getAvgGazePos()
+        self.assertAlmostEqual(gazePos[0], 0.25, delta = 0.0001)
+        self.assertAlmostEqual(gazePos[1], 0.75, delta = 0.0001)
+        self.assertAlmostEqual(tobii_helper._TobiiHelper__getAvgEyeDist(), 650.0, delta = 0.0001)
+        tobii_helper._TobiiHelper__stopGazeData()
+        self.assertFalse(eyetracker.isRunning())
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
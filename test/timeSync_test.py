@@ -0,0 +1,138 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import sys
+# Add the local path of the calibrator module,
+# test that instead of the system installed one.
+sys.path = ["../tobii_calibration"] + sys.path
+
+import time_sync
+import tobii_research as tobii
+
+# fake system clock in microseconds
+systemTime = [1000000000.0]
+
+def getSystemTimeStamp():
+    return systemTime[0]
+
+class DummyEyeTracker:
+    def __init__(self):
+        self.callbacks = []
+
+    def subscribe_to(self, subscription_type, callback, as_dictionary = False):
+        self.callbacks.append((subscription_type, callback))
+
+    def unsubscribe_from(self, subscription_type, callback = None):
+        self.callbacks.remove((subscription_type, callback))
+
+class timeSyncTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+        self.originalGetSystemTimeStamp = tobii.get_system_time_stamp
+        tobii.get_system_time_stamp = getSystemTimeStamp
+        systemTime[0] = 1000000000.0
+
+    def tearDown(self):
+        tobii.get_system_time_stamp = self.originalGetSystemTimeStamp
+
+    def testLinearRegression(self):
+        with self.assertRaises(TypeError):
+            time_sync.StreamingLinearRegression(windowSize = 2.5)
+
+        with self.assertRaises(ValueError):
+            time_sync.StreamingLinearRegression(windowSize = 1)
+
+        regression = time_sync.StreamingLinearRegression(windowSize = 10, nominalSlope = 1.0)
+
+        # no data
+        with self.assertRaises(RuntimeError):
+            regression.estimate(1.0)
+
+        # one point, nominal slope is used
+        regression.add(100.0, 300.0)
+        self.assertAlmostEqual(310.0, regression.estimate(110.0))
+
+        # y = 2x + 100, with huge time stamp like values
+        for i in range(1, 30):
+            x = 1e12 + i * 1000.0
+            regression.add(x, 2.0 * x + 100.0)
+        self.assertEqual(10, regression.count())
+        self.assertAlmostEqual(2.0, regression.slope())
+        self.assertAlmostEqual(2.0 * (1e12 + 50000.0) + 100.0, regression.estimate(1e12 + 50000.0), delta = 0.01)
+        self.assertAlmostEqual(1e6, regression.drift())
+
+    def testDeviceToSystem(self):
+        synchronizer = time_sync.TimeSynchronizer(experimentClock = lambda : 0.0)
+
+        # device clock runs 10 ppm faster and is 5 s behind
+        for i in range(100):
+            requestTime = 1e9 + i * 1e5
+            deviceTime = (requestTime + 50.0 - 5e6) * (1.0 + 10e-6)
+            synchronizer.addTimeSyncData({'system_request_time_stamp' : requestTime,
+                                          'device_time_stamp' : deviceTime,
+                                          'system_response_time_stamp' : requestTime + 100.0})
+
+        deviceTime = (1e9 + 5e6 - 5e6) * (1.0 + 10e-6)
+        self.assertAlmostEqual(1e9 + 5e6, synchronizer.deviceToSystem(deviceTime), delta = 1.0)
+        self.assertAlmostEqual(-10.0, synchronizer.getDeviceDrift(), delta = 0.1)
+
+    def testDelayedResponseIsSkipped(self):
+        synchronizer = time_sync.TimeSynchronizer(experimentClock = lambda : 0.0)
+
+        for i in range(10):
+            requestTime = 1e9 + i * 1e5
+            synchronizer.addTimeSyncData({'system_request_time_stamp' : requestTime,
+                                          'device_time_stamp' : requestTime + 50.0,
+                                          'system_response_time_stamp' : requestTime + 100.0})
+        # a delayed response would move the estimate by 5 ms
+        synchronizer.addTimeSyncData({'system_request_time_stamp' : 1e9 + 1e6,
+                                      'device_time_stamp' : 1e9 + 1e6 + 50.0,
+                                      'system_response_time_stamp' : 1e9 + 1e6 + 10000.0})
+        self.assertAlmostEqual(1e9 + 2e6 + 50.0, synchronizer.deviceToSystem(1e9 + 2e6 + 50.0), delta = 1.0)
+
+    def testSystemToExperiment(self):
+        experimentTime = [10.0]
+        synchronizer = time_sync.TimeSynchronizer(experimentClock = lambda : experimentTime[0])
+
+        for i in range(50):
+            systemTime[0] = 1e9 + i * 1e5
+            experimentTime[0] = 10.0 + i * 0.1
+            synchronizer.sampleExperimentClock()
+
+        self.assertAlmostEqual(11.0, synchronizer.systemToExperiment(1e9 + 1e6), delta = 1e-6)
+        self.assertAlmostEqual(0.0, synchronizer.getExperimentDrift(), delta = 0.01)
+
+        # system time stamp is used without device time sync data
+        self.assertAlmostEqual(12.0, synchronizer.getSampleTime({'system_time_stamp' : 1e9 + 2e6}), delta = 1e-6)
+
+        # device time stamp is mapped to the system clock first
+        synchronizer.addTimeSyncData({'system_request_time_stamp' : 1e9,
+                                      'device_time_stamp' : 5e8,
+                                      'system_response_time_stamp' : 1e9})
+        self.assertAlmostEqual(12.0, synchronizer.getSampleTime({'system_time_stamp' : 0,
+                                                                 'device_time_stamp' : 5e8 + 2e6}), delta = 1e-6)
+        self.assertAlmostEqual(12.0, synchronizer.deviceToExperiment(5e8 + 2e6), delta = 1e-6)
+
+        with self.assertRaises(ValueError):
+            synchronizer.getSampleTime({})
+
+    def testSubscription(self):
+        eyetracker = DummyEyeTracker()
+        synchronizer = time_sync.TimeSynchronizer(eyetracker, experimentClock = lambda : 0.0)
+
+        synchronizer.start()
+        self.assertEqual([(tobii.EYETRACKER_TIME_SYNCHRONIZATION_DATA, synchronizer.addTimeSyncData)],
+                         eyetracker.callbacks)
+        synchronizer.stop()
+        self.assertEqual([], eyetracker.callbacks)
+
+        with self.assertRaises(RuntimeError):
+            time_sync.TimeSynchronizer(experimentClock = lambda : 0.0).start()
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
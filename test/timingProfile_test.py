@@ -0,0 +1,85 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import sys
+# Add the local path of the calibrator module,
+# test that instead of the system installed one.
+sys.path = ["../tobii_calibration"] + sys.path
+
+import tobii_calibration as calibrator
+
+class timingProfileTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+
+    def testDefaultProfile(self):
+        tobii_helper = calibrator.TobiiHelper()
+        timing = tobii_helper.getTimingProfile()
+
+        # default values are the original hard-coded delays
+        self.assertEqual(0.5, timing.warmUpDelay)
+        self.assertEqual(10, timing.instructionTimeout)
+        self.assertEqual(3, timing.instructionDelay)
+        self.assertEqual(2, timing.trackBoxExitDelay)
+        self.assertEqual(50, timing.pointMoveFrames)
+        self.assertEqual(0.5, timing.pointSettleDelay)
+        self.assertEqual(0.5, timing.pointFocusDelay)
+        self.assertEqual(0.3, timing.pointCollectedDelay)
+        self.assertEqual(0.2, timing.pointLeaveDelay)
+        self.assertEqual(3, timing.recalibrationDelay)
+        self.assertEqual(3, timing.calibrationResultDelay)
+        self.assertEqual(3, timing.validationDelay)
+        self.assertEqual(3, timing.finishDelay)
+
+    def testNamedProfiles(self):
+        tobii_helper = calibrator.TobiiHelper()
+
+        tobii_helper.setTimingProfile('fast')
+        fast = tobii_helper.getTimingProfile()
+        default = calibrator.TimingProfile.named('default')
+        self.assertTrue(fast.instructionDelay < default.instructionDelay)
+        self.assertTrue(fast.recalibrationDelay < default.recalibrationDelay)
+        self.assertTrue(fast.pointMoveFrames < default.pointMoveFrames)
+
+        tobii_helper.setTimingProfile('accessibility')
+        accessibility = tobii_helper.getTimingProfile()
+        self.assertTrue(accessibility.instructionTimeout > default.instructionTimeout)
+        self.assertTrue(accessibility.pointMoveFrames > default.pointMoveFrames)
+
+    def testCustomProfile(self):
+        tobii_helper = calibrator.TobiiHelper()
+        timing = calibrator.TimingProfile(instructionDelay = 1, finishDelay = 0)
+        tobii_helper.setTimingProfile(timing)
+        self.assertEqual(timing, tobii_helper.getTimingProfile())
+        self.assertEqual(1, tobii_helper.getTimingProfile().instructionDelay)
+        self.assertEqual(0, tobii_helper.getTimingProfile().finishDelay)
+        self.assertEqual(0.5, tobii_helper.getTimingProfile().warmUpDelay)
+
+    def testWrongParam(self):
+        tobii_helper = calibrator.TobiiHelper()
+
+        with self.assertRaises(TypeError):
+            tobii_helper.setTimingProfile(12)
+
+        with self.assertRaises(ValueError):
+            tobii_helper.setTimingProfile('slow')
+
+        with self.assertRaises(TypeError):
+            calibrator.TimingProfile(instructionDelay = "3")
+
+        with self.assertRaises(ValueError):
+            calibrator.TimingProfile(validationDelay = -1)
+
+        with self.assertRaises(TypeError):
+            calibrator.TimingProfile(pointMoveFrames = 2.5)
+
+        with self.assertRaises(ValueError):
+            calibrator.TimingProfile(pointMoveFrames = 0)
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
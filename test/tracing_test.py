@@ -0,0 +1,130 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import sys
+# Add the local path of the calibrator module,
+# test that instead of the system installed one.
+sys.path = ["../tobii_calibration"] + sys.path
+
+import tracing
+import clock
+import tobii_calibration as calibrator
+import synthetic_tracker
+import json
+import os
+import tempfile
+import threading
+import time
+
+class DummyWindow:
+
+    def flip(self):
+        pass
+
+class tracingTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+
+    def testEvents(self):
+        recorder = tracing.TraceRecorder()
+        with recorder.span('frame', 'clock', index = 1):
+            time.sleep(0.01)
+        recorder.instant('key_press', 'input', key = 'c')
+        recorder.counter('buffer', size = 10)
+
+        events = recorder.getEvents()
+        self.assertEqual(['M', 'X', 'i', 'C'], [item['ph'] for item in events])
+        self.assertEqual('MainThread', events[0]['args']['name'])
+        self.assertEqual({'index' : 1}, events[1]['args'])
+        self.assertTrue(events[1]['dur'] >= 5000)
+        self.assertEqual('c', events[2]['args']['key'])
+        self.assertEqual(events[0]['tid'], events[1]['tid'])
+
+    def testFlowBetweenThreads(self):
+        recorder = tracing.TraceRecorder()
+        flowIds = []
+
+        def callback():
+            with recorder.span('gaze_sample', 'gaze'):
+                flowIds.append(recorder.flowStart('gaze_handoff', 'gaze'))
+
+        thread = threading.Thread(target = callback, name = 'callback')
+        thread.start()
+        thread.join()
+        with recorder.span('gaze_read', 'gaze'):
+            recorder.flowEnd('gaze_handoff', 'gaze', flowIds[0])
+
+        events = recorder.getEvents()
+        threadNames = dict((item['tid'], item['args']['name']) for item in events if item['ph'] == 'M')
+        flowEvents = [item for item in events if item['ph'] in ['s', 'f']]
+        self.assertEqual(2, len(flowEvents))
+        self.assertEqual(flowEvents[0]['id'], flowEvents[1]['id'])
+        self.assertEqual('callback', threadNames[flowEvents[0]['tid']])
+        self.assertEqual('MainThread', threadNames[flowEvents[1]['tid']])
+
+    def testMaxEvents(self):
+        recorder = tracing.TraceRecorder(maxEvents = 2)
+        for i in range(5):
+            recorder.instant('key_press', 'input')
+        self.assertEqual(2, len([item for item in recorder.getEvents() if item['ph'] == 'i']))
+        self.assertEqual(3, recorder.getDroppedCount())
+
+    def testWrite(self):
+        recorder = tracing.TraceRecorder()
+        with self.assertRaises(ValueError):
+            with recorder.span('collect_data', 'sdk'):
+                raise ValueError()
+        filePath = os.path.join(tempfile.mkdtemp(), "trace.json")
+        recorder.write(filePath)
+        with open(filePath) as traceFile:
+            data = json.load(traceFile)
+        self.assertEqual('ms', data['displayTimeUnit'])
+        self.assertEqual('ValueError', data['traceEvents'][1]['args']['error'])
+
+    def testTracingProxy(self):
+        recorder = tracing.TraceRecorder()
+        eyetracker = synthetic_tracker.SyntheticEyeTracker()
+        calibration = tracing.TracingProxy(eyetracker.createCalibration(), recorder, 'sdk',
+                                         ['enter_calibration_mode', 'collect_data'])
+        calibration.enter_calibration_mode()
+        calibration.collect_data(0.5, 0.5)
+        calibration.leave_calibration_mode()
+        self.assertFalse(calibration.inCalibrationMode)
+        self.assertEqual(['enter_calibration_mode', 'collect_data'],
+                         [item['name'] for item in recorder.getEvents() if item['ph'] == 'X'])
+
+    def testClockTracing(self):
+        recorder = tracing.TraceRecorder()
+        virtualClock = clock.VirtualClock()
+        virtualClock.tracer = recorder
+        virtualClock.wait(1.0)
+        virtualClock.flip(DummyWindow())
+        self.assertEqual(['wait', 'frame'], [item['name'] for item in recorder.getEvents() if item['ph'] == 'X'])
+
+    def testTobiiHelperTracing(self):
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+        self.assertIsNone(tobii_helper.stopTracing())
+
+        virtualClock = calibrator.VirtualClock()
+        tobii_helper.setClock(virtualClock)
+        filePath = os.path.join(tempfile.mkdtemp(), "trace.json")
+        with tobii_helper.tracing(filePath) as recorder:
+            self.assertIs(recorder, virtualClock.tracer)
+            with self.assertRaises(RuntimeError):
+                tobii_helper.startTracing()
+            # the new clock is traced too
+            otherClock = calibrator.VirtualClock()
+            tobii_helper.setClock(otherClock)
+            self.assertIsNone(virtualClock.tracer)
+            self.assertIs(recorder, otherClock.tracer)
+        self.assertIsNone(otherClock.tracer)
+        self.assertTrue(os.path.isfile(filePath))
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
@@ -0,0 +1,286 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import sys
+# Add the local path of the calibrator module,
+# test that instead of the system installed one.
+sys.path = ["../tobii_calibration"] + sys.path
+
+import tracker_manager
+import tobii_research as tobii
+import tempfile
+import shutil
+import os
+import time
+
+class DummyEyeTracker:
+    def __init__(self, address, serial_number):
+        self.address = address
+        self.serial_number = serial_number
+        self.model = "dummy model"
+        self.device_name = "dummy"
+        self.callbacks = []
+
+    def get_track_box(self):
+        track_box_dict = {}
+        track_box_dict['front_lower_left'] = (-150.0, -121.0, 500.0)
+        track_box_dict['front_lower_right'] = (150.0, -121.0, 500.0)
+        track_box_dict['front_upper_left'] = (-150.0, 121.0, 500.0)
+        track_box_dict['front_upper_right'] = (150.0, 121.0, 500.0)
+        track_box_dict['back_lower_left'] = (-150.0, -121.0, 800.0)
+        track_box_dict['back_lower_right'] = (150.0, -121.0, 800.0)
+        track_box_dict['back_upper_left'] = (-150.0, 121.0, 800.0)
+        track_box_dict['back_upper_right'] = (150.0, 121.0, 800.0)
+        return tobii.TrackBox(track_box_dict)
+
+    def subscribe_to(self, subscription_type, callback, as_dictionary = False):
+        self.callbacks.append(callback)
+
+    def unsubscribe_from(self, subscription_type, callback = None):
+        self.callbacks.remove(callback)
+
+    def sendSample(self, timeStamp):
+        for callback in self.callbacks:
+            callback({'system_time_stamp' : timeStamp, 'serial' : self.serial_number})
+
+foundTrackers = []
+
+def findAllEyeTrackers():
+    return list(foundTrackers)
+
+class trackerManagerTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+        self.originalFindAll = tobii.find_all_eyetrackers
+        tobii.find_all_eyetrackers = findAllEyeTrackers
+        foundTrackers.clear()
+        self.firstTracker = DummyEyeTracker("tet-tcp://169.254.1.2", "TX300-1")
+        self.secondTracker = DummyEyeTracker("tet-tcp://169.254.1.3", "TX300-2")
+        foundTrackers.append(self.firstTracker)
+        foundTrackers.append(self.secondTracker)
+        self.cacheDir = tempfile.mkdtemp()
+        self.originalExpandUser = os.path.expanduser
+        os.path.expanduser = lambda path : self.cacheDir
+
+    def tearDown(self):
+        tobii.find_all_eyetrackers = self.originalFindAll
+        os.path.expanduser = self.originalExpandUser
+        shutil.rmtree(self.cacheDir)
+
+    def createManager(self):
+        manager = tracker_manager.TobiiTrackerManager()
+        manager.disableLogging()
+        manager.connect(["TX300-1", "TX300-2"])
+        return manager
+
+    def testWrongParam(self):
+        with self.assertRaises(TypeError):
+            tracker_manager.TobiiTrackerManager(bufferSize = 1.5)
+
+        with self.assertRaises(ValueError):
+            tracker_manager.TobiiTrackerManager(bufferSize = 0)
+
+        with self.assertRaises(TypeError):
+            tracker_manager.TobiiTrackerManager(staleTimeout = "1")
+
+        with self.assertRaises(ValueError):
+            tracker_manager.TobiiTrackerManager(staleTimeout = 0)
+
+        manager = tracker_manager.TobiiTrackerManager()
+        manager.disableLogging()
+
+        with self.assertRaises(TypeError):
+            manager.connect("TX300-1")
+
+        with self.assertRaises(TypeError):
+            manager.connect([1])
+
+        with self.assertRaises(ValueError):
+            manager.connect(["TX300-1", "TX300-1"])
+
+        with self.assertRaises(RuntimeError):
+            manager.connect(["TX300-5"])
+
+        with self.assertRaises(ValueError):
+            manager.getHelper("TX300-1")
+
+        with self.assertRaises(ValueError):
+            manager.readSamples("TX300-1")
+
+    def testConnect(self):
+        manager = self.createManager()
+
+        self.assertEqual(["TX300-1", "TX300-2"], manager.getSerialNumbers())
+        # independent helpers
+        self.assertEqual(self.firstTracker, manager.getHelper("TX300-1").eyetracker)
+        self.assertEqual(self.secondTracker, manager.getHelper("TX300-2").eyetracker)
+        self.assertNotEqual(manager.getHelper("TX300-1"), manager.getHelper("TX300-2"))
+
+        # every eyetracker is cached in its own file
+        self.assertTrue(os.path.isfile(os.path.join(self.cacheDir, ".tobii_calibration", "eyetracker_TX300-1.json")))
+        self.assertTrue(os.path.isfile(os.path.join(self.cacheDir, ".tobii_calibration", "eyetracker_TX300-2.json")))
+
+        with self.assertRaises(ValueError):
+            manager.connect(["TX300-1"])
+
+    def testPerTrackerBuffers(self):
+        manager = self.createManager()
+        manager.subscribe()
+
+        self.firstTracker.sendSample(10)
+        self.firstTracker.sendSample(20)
+        self.secondTracker.sendSample(15)
+
+        self.assertEqual(20, manager.getLatestSample("TX300-1")['system_time_stamp'])
+        # the helper gets the samples through its own gaze data path
+        self.assertEqual(20, manager.getHelper("TX300-1").gazeData['system_time_stamp'])
+        # one SDK subscription for the manager and the helper
+        self.assertEqual(1, len(self.firstTracker.callbacks))
+        self.assertEqual([10, 20], [sample['system_time_stamp'] for sample in manager.readSamples("TX300-1")])
+        self.assertEqual([15], [sample['system_time_stamp'] for sample in manager.readSamples("TX300-2")])
+        self.assertEqual([], manager.readSamples("TX300-1"))
+
+        manager.unsubscribe("TX300-1")
+        self.assertEqual(0, len(self.firstTracker.callbacks))
+        self.assertEqual(1, len(self.secondTracker.callbacks))
+
+        manager.disconnect()
+        self.assertEqual(0, len(self.secondTracker.callbacks))
+        self.assertEqual([], manager.getSerialNumbers())
+
+    def testHelperScreenWhileSubscribed(self):
+        manager = self.createManager()
+        manager.subscribe("TX300-1")
+        helper = manager.getHelper("TX300-1")
+
+        # a screen of the helper starts and stops its own gaze data
+        helper._TobiiHelper__startGazeData()
+        self.assertTrue(helper.tracking)
+        self.firstTracker.sendSample(10)
+        self.assertEqual(10, helper.gazeData['system_time_stamp'])
+        helper._TobiiHelper__stopGazeData()
+        self.assertFalse(helper.tracking)
+
+        # the manager's subscription is kept
+        self.assertEqual(1, len(self.firstTracker.callbacks))
+        self.firstTracker.sendSample(20)
+        self.assertEqual(20, helper.gazeData['system_time_stamp'])
+        self.assertEqual([10, 20], [sample['system_time_stamp'] for sample in manager.readSamples("TX300-1")])
+
+        manager.unsubscribe("TX300-1")
+        subscriptions = helper.getSubscriptions()
+        self.assertEqual([], subscriptions.listeners['gaze'])
+        self.assertEqual(0, subscriptions.subscriptionCounts['gaze'])
+        self.assertEqual(0, len(self.firstTracker.callbacks))
+
+    def testFailedConnect(self):
+        createdHelpers = []
+        originalHelper = tracker_manager.TobiiHelper
+
+        # helper subscribing to the gaze data when its eyetracker is connected
+        class SubscribingHelper(originalHelper):
+            def __init__(self):
+                originalHelper.__init__(self)
+                createdHelpers.append(self)
+
+            def waitForEyeTracker(self, timeout = None):
+                eyetracker = originalHelper.waitForEyeTracker(self, timeout)
+                if not self.tracking:
+                    self.startGazeData()
+                return eyetracker
+
+        tracker_manager.TobiiHelper = SubscribingHelper
+        try:
+            manager = tracker_manager.TobiiTrackerManager()
+            manager.disableLogging()
+            with self.assertRaises(RuntimeError):
+                manager.connect(["TX300-1", "TX300-5", "TX300-2"])
+        finally:
+            tracker_manager.TobiiHelper = originalHelper
+
+        # the connected helpers are stopped, none of them is kept
+        self.assertEqual(3, len(createdHelpers))
+        self.assertEqual([], manager.getSerialNumbers())
+        self.assertEqual(0, len(self.firstTracker.callbacks))
+        self.assertEqual(0, len(self.secondTracker.callbacks))
+        for helper in createdHelpers:
+            self.assertFalse(helper.tracking)
+            self.assertFalse(helper.discoveryThread.is_alive())
+
+        manager.connect(["TX300-1"])
+        self.assertEqual(["TX300-1"], manager.getSerialNumbers())
+
+    def testBoundedBuffers(self):
+        manager = tracker_manager.TobiiTrackerManager(bufferSize = 3)
+        manager.disableLogging()
+        manager.connect(["TX300-1"])
+        manager.subscribe("TX300-1")
+
+        for timeStamp in range(10):
+            self.firstTracker.sendSample(timeStamp)
+
+        # the oldest samples are dropped and counted
+        self.assertEqual([7, 8, 9], [sample['system_time_stamp'] for sample in manager.readSamples("TX300-1")])
+        self.assertEqual(7, manager.getDroppedCount("TX300-1"))
+
+        with self.assertRaises(ValueError):
+            manager.getDroppedCount("TX300-2")
+
+    def testAlignedSamples(self):
+        manager = self.createManager()
+        manager.subscribe()
+
+        # nothing is returned until all eyetrackers sent a sample
+        self.firstTracker.sendSample(10)
+        self.firstTracker.sendSample(30)
+        self.assertEqual([], manager.readAlignedSamples())
+
+        self.secondTracker.sendSample(20)
+        aligned = manager.readAlignedSamples()
+        self.assertEqual([("TX300-1", 10), ("TX300-2", 20)],
+                         [(serial, sample['system_time_stamp']) for serial, sample in aligned])
+
+        # the sample at 30 waits for the second eyetracker
+        self.secondTracker.sendSample(25)
+        self.secondTracker.sendSample(40)
+        aligned = manager.readAlignedSamples()
+        self.assertEqual([("TX300-2", 25), ("TX300-1", 30)],
+                         [(serial, sample['system_time_stamp']) for serial, sample in aligned])
+
+        aligned = manager.readAlignedSamples(flush = True)
+        self.assertEqual([("TX300-2", 40)],
+                         [(serial, sample['system_time_stamp']) for serial, sample in aligned])
+
+    def testStaleTracker(self):
+        manager = tracker_manager.TobiiTrackerManager(staleTimeout = 0.1)
+        manager.disableLogging()
+        manager.connect(["TX300-1", "TX300-2"])
+        manager.subscribe()
+
+        self.firstTracker.sendSample(10)
+        self.secondTracker.sendSample(20)
+        self.assertEqual([("TX300-1", 10)],
+                         [(serial, sample['system_time_stamp']) for serial, sample in manager.readAlignedSamples()])
+
+        # the second eyetracker stops sending, the first one is held back until it gets stale
+        time.sleep(0.15)
+        self.firstTracker.sendSample(30)
+        self.firstTracker.sendSample(40)
+        aligned = manager.readAlignedSamples()
+        self.assertEqual([("TX300-2", 20), ("TX300-1", 30), ("TX300-1", 40)],
+                         [(serial, sample['system_time_stamp']) for serial, sample in aligned])
+
+        # it's aligned again after sending
+        self.secondTracker.sendSample(45)
+        self.firstTracker.sendSample(50)
+        aligned = manager.readAlignedSamples()
+        self.assertEqual([("TX300-2", 45)],
+                         [(serial, sample['system_time_stamp']) for serial, sample in aligned])
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
@@ -0,0 +1,79 @@
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+import unittest
+
+import sys
+# Add the local path of the calibrator module,
+# test that instead of the system installed one.
+sys.path = ["../tobii_calibration"] + sys.path
+
+import tobii_calibration as calibrator
+import tobii_research as tobii
+
+class DummyEyeTracker:
+    def __init__(self, supportsUserPosition = True):
+        self.supportsUserPosition = supportsUserPosition
+        self.subscriptions = []
+
+    def subscribe_to(self, subscription_type, callback, as_dictionary = False):
+        if subscription_type == tobii.EYETRACKER_USER_POSITION_GUIDE and not self.supportsUserPosition:
+            raise RuntimeError("Not supported.")
+        self.subscriptions.append(subscription_type)
+
+    def unsubscribe_from(self, subscription_type, callback = None):
+        self.subscriptions.remove(subscription_type)
+
+class userPositionGuideTest(unittest.TestCase):
+
+    def setUp(self):
+        print ("Current test: ", self.id())
+
+    def testDisabledByDefault(self):
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+        tobii_helper.eyetracker = DummyEyeTracker()
+
+        tobii_helper._TobiiHelper__startTrackBoxData()
+        self.assertEqual(tobii_helper.eyetracker.subscriptions, [tobii.EYETRACKER_GAZE_DATA])
+        self.assertTrue(tobii_helper.tracking)
+        self.assertFalse(tobii_helper.userPositionTracking)
+
+        tobii_helper._TobiiHelper__stopTrackBoxData()
+        self.assertEqual(tobii_helper.eyetracker.subscriptions, [])
+        self.assertFalse(tobii_helper.tracking)
+
+    def testUserPositionGuide(self):
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+        tobii_helper.eyetracker = DummyEyeTracker()
+        tobii_helper.enableUserPositionGuide()
+
+        tobii_helper._TobiiHelper__startTrackBoxData()
+        self.assertEqual(tobii_helper.eyetracker.subscriptions, [tobii.EYETRACKER_USER_POSITION_GUIDE])
+        self.assertFalse(tobii_helper.tracking)
+        self.assertTrue(tobii_helper.userPositionTracking)
+
+        tobii_helper._TobiiHelper__stopTrackBoxData()
+        self.assertEqual(tobii_helper.eyetracker.subscriptions, [])
+        self.assertFalse(tobii_helper.userPositionTracking)
+
+    def testFallbackToGazeData(self):
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.disableLogging()
+        tobii_helper.eyetracker = DummyEyeTracker(supportsUserPosition = False)
+        tobii_helper.enableUserPositionGuide()
+
+        tobii_helper._TobiiHelper__startTrackBoxData()
+        self.assertEqual(tobii_helper.eyetracker.subscriptions, [tobii.EYETRACKER_GAZE_DATA])
+        self.assertTrue(tobii_helper.tracking)
+        self.assertFalse(tobii_helper.userPositionTracking)
+        self.assertFalse(tobii_helper.getSubscriptions().isSubscribed('user_position'))
+
+        tobii_helper._TobiiHelper__stopTrackBoxData()
+        self.assertEqual(tobii_helper.eyetracker.subscriptions, [])
+
+if __name__ == "__main__":
+    unittest.main() # run all tests
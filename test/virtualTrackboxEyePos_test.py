@@ -115,5 +115,29 @@ class virtualTrackboxEyePosTest(unittest.TestCase):
         self.assertTrue(math.isnan(rightPos[0]))
         self.assertTrue(math.isnan(rightPos[1]))
 
+    def testUserPositionData(self):
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.eyetracker = "dummy"
+        # gaze data is not needed
+        tobii_helper.userPositionTracking = True
+        tobii_helper.userPositionData = {}
+        tobii_helper.userPositionData['left_user_position'] = (0.34, 0.56, 0.11)
+        tobii_helper.userPositionData['right_user_position'] = (0.32, 0.61, 0.12)
+        tobii_helper.userPositionData['left_user_position_validity'] = True
+        tobii_helper.userPositionData['right_user_position_validity'] = False
+        self.initTrackBox(tobii_helper)
+        leftPos, rightPos = tobii_helper._TobiiHelper__virtualTrackboxEyePos()
+        self.assertAlmostEqual(81.959, leftPos[0], delta = 0.001)
+        self.assertAlmostEqual(-24.792, leftPos[1], delta = 0.001)
+        self.assertTrue(math.isnan(rightPos[0]))
+        self.assertTrue(math.isnan(rightPos[1]))
+
+    def testNoUserPositionData(self):
+        tobii_helper = calibrator.TobiiHelper()
+        tobii_helper.eyetracker = "dummy"
+        tobii_helper.userPositionTracking = True
+        with self.assertRaises(RuntimeError):
+            tobii_helper._TobiiHelper__virtualTrackboxEyePos()
+
 if __name__ == "__main__":
     unittest.main() # run all tests
\ No newline at end of file
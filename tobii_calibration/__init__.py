@@ -1 +1,16 @@
 from .tobii_calibration import *
+from .tracker_manager import TobiiTrackerManager
+from .time_sync import TimeSynchronizer, StreamingLinearRegression
+from .subscriptions import SubscriptionManager, RingBuffer, StreamRecord
+from .stream_health import StreamHealth, HealthDump
+from .clock import Clock, PsychoPyClock, VirtualClock
+from .profiling import PhaseProfiler
+from .tracing import TraceRecorder
+from .shared_acquisition import SharedGazeRing, AcquisitionProcess
+from .stream_server import GazeStreamServer, GazeStreamClient
+from .monitor_server import MonitorServer
+from .synthetic_tracker import SyntheticEyeTracker, SyntheticCalibration, fixationTrajectory, saccadeTrajectory, circleTrajectory
+from .session_replay import SessionRecorder, ReplayEyeTracker
+from .faulty_tracker import FaultInjectingEyeTracker
+from . import analysis
+from . import event_log
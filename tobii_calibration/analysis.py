@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+# Offline analysis of eyetracker data
+
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+# Summary: The coordinate conversions, averaging, smoothing and calibration result math
+# of TobiiHelper on NumPy arrays. Points are given as arrays of shape (N, 2) (a single
+# point as a tuple is accepted too). Only NumPy is needed, so recorded sessions can be
+# processed on machines without PsychoPy, pyglet, the Tobii SDK or a display.
+
+import numbers
+import warnings
+
+import numpy as np
+
+# array of points with shape (N, 2)
+def toPointArray(points, dimensions = 2):
+    try:
+        pointArray = np.array(points, dtype = float)
+    except (TypeError, ValueError):
+        raise TypeError("Points should be given as numbers.")
+    if pointArray.ndim == 1:
+        pointArray = pointArray.reshape((1, -1))
+    if pointArray.ndim != 2 or pointArray.shape[1] != dimensions:
+        raise ValueError("Points should have " + str(dimensions) + " coordinates.")
+    return pointArray
+
+
+def checkSize(size, name):
+    if not isinstance(size, (tuple, list)) or len(size) != 2:
+        raise TypeError(name + " should be a pair of the width and the height.")
+    if not isinstance(size[0], numbers.Number) or not isinstance(size[1], numbers.Number):
+        raise TypeError(name + " should contain numbers.")
+    if size[0] <= 0 or size[1] <= 0:
+        raise ValueError(name + " should contain positive values.")
+
+
+# convert points from tobii's normalized active display area coordinates ((0, 0) is the
+# upper left corner) to psychopy window coordinates in pixels ((0, 0) is the center),
+# windowSize is the window's width and height in pixels. Returns an integer array.
+def ada2PsychoPix(points, windowSize):
+
+    checkSize(windowSize, "windowSize")
+    pointArray = toPointArray(points)
+    if np.isnan(pointArray).any():
+        raise ValueError("The given coordinates should not be NaN.")
+    if (pointArray > 1.0).any() or (pointArray < 0.0).any():
+        raise ValueError("The given coordinates should be in normalized form ([0.0,1.0]).")
+
+    width, height = windowSize
+    pixels = np.empty(pointArray.shape)
+    pixels[:, 0] = (pointArray[:, 0] * width) - width / 2
+    pixels[:, 1] = ((pointArray[:, 1] * height) - height / 2) * -1
+    # truncate like int()
+    return np.trunc(pixels).astype(int)
+
+
+# convert points from the normalized trackbox coordinate system to the virtual trackbox
+# coordinates in pixels, virtualTrackBoxSize is the virtual trackbox's width and height
+def trackBox2VirtualTrackBox(points, virtualTrackBoxSize):
+
+    checkSize(virtualTrackBoxSize, "virtualTrackBoxSize")
+    pointArray = toPointArray(points)
+
+    size = np.array(virtualTrackBoxSize, dtype = float)
+    # scale up, move to the psychopy origin and mirror
+    return (pointArray * size - size / 2) * -1
+
+
+# average gaze position of the two eyes, NaN where there is no valid data of any eye
+def avgGazePos(leftPoints, rightPoints):
+
+    leftArray = toPointArray(leftPoints)
+    rightArray = toPointArray(rightPoints)
+    if leftArray.shape != rightArray.shape:
+        raise ValueError("Left and right points should have the same shape.")
+
+    stacked = np.stack([leftArray, rightArray])
+    with warnings.catch_warnings():
+        # mean of only NaN values
+        warnings.simplefilter("ignore", category = RuntimeWarning)
+        result = np.nanmean(stacked, axis = 0)
+    # no data on one of the axes hides the point
+    noData = np.isnan(result).any(axis = 1)
+    result[noData] = np.nan
+    return result
+
+
+# smooth a stream of samples like the trackbox screen does: the mean of the last valid
+# samples (at most maxLength of them) is taken, an invalid sample (containing NaN)
+# drops the oldest sample. Rows without valid data are NaN.
+def smoothing(samples, maxLength = 6):
+
+    if not isinstance(maxLength, numbers.Integral):
+        raise TypeError("maxLength should be an integer.")
+    if maxLength < 1:
+        raise ValueError("maxLength should be positive.")
+
+    sampleArray = np.array(samples, dtype = float)
+    oneDimensional = sampleArray.ndim == 1
+    if oneDimensional:
+        sampleArray = sampleArray.reshape((-1, 1))
+    if sampleArray.ndim != 2:
+        raise ValueError("samples should be a one or two dimensional array.")
+
+    invalid = np.isnan(sampleArray).any(axis = 1)
+
+    # the window is always a continuous range of the valid samples, only its bounds are
+    # simulated here, the means are taken from the cumulative sums
+    validSamples = sampleArray[~invalid]
+    cumulativeSums = np.zeros((len(validSamples) + 1, sampleArray.shape[1]))
+    np.cumsum(validSamples, axis = 0, out = cumulativeSums[1:])
+    starts = np.empty(len(sampleArray), dtype = int)
+    ends = np.empty(len(sampleArray), dtype = int)
+    start = 0
+    end = 0
+    for i in range(len(sampleArray)):
+        if invalid[i]:
+            if end > start:
+                start += 1
+        else:
+            end += 1
+        starts[i] = start
+        ends[i] = end
+        # the current sample is part of the window only once it's full
+        if end - start == maxLength:
+            start += 1
+
+    counts = ends - starts
+    result = np.full(sampleArray.shape, np.nan)
+    hasData = counts > 0
+    result[hasData] = (cumulativeSums[ends[hasData]] - cumulativeSums[starts[hasData]]) / counts[hasData, None]
+
+    if oneDimensional:
+        return result.reshape(-1)
+    return result
+
+
+# positions of the calibration points and the average positions of the left and right
+# eye samples at them, as (N, 2) arrays. The extra point added by the Tobii SDK at
+# (0.0, 0.0) is skipped.
+def calibrationResultToArrays(calibResult):
+
+    calibrationPoints = list(calibResult.calibration_points)
+    if len(calibrationPoints) > 0 and calibrationPoints[0].position_on_display_area == (0.0, 0.0):
+        calibrationPoints = calibrationPoints[1:]
+
+    positions = np.empty((len(calibrationPoints), 2))
+    leftMeans = np.empty((len(calibrationPoints), 2))
+    rightMeans = np.empty((len(calibrationPoints), 2))
+    for i in range(len(calibrationPoints)):
+        curPoint = calibrationPoints[i]
+        positions[i] = curPoint.position_on_display_area
+        samples = curPoint.calibration_samples
+        leftOutput = np.array([sample.left_eye.position_on_display_area for sample in samples],
+                              dtype = float).reshape((-1, 2))
+        rightOutput = np.array([sample.right_eye.position_on_display_area for sample in samples],
+                               dtype = float).reshape((-1, 2))
+        leftMeans[i] = np.mean(leftOutput, axis = 0)
+        rightMeans[i] = np.mean(rightOutput, axis = 0)
+    return positions, leftMeans, rightMeans
+
+
+# calibration points and average eye positions in psychopy pixels, as integer arrays
+# (point positions, left eye positions, right eye positions)
+def calculateCalibration(calibResult, windowSize):
+
+    positions, leftMeans, rightMeans = calibrationResultToArrays(calibResult)
+    return (ada2PsychoPix(positions, windowSize),
+            ada2PsychoPix(leftMeans, windowSize),
+            ada2PsychoPix(rightMeans, windowSize))
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+# Clocks driving the timing of the calibration sequence
+
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+# Summary: TobiiHelper does all of its waiting and frame flipping through a clock object.
+# PsychoPyClock uses PsychoPy's clock and really waits, VirtualClock only moves a virtual
+# time forward (by the waited time or by one frame duration at every flip), so tests and
+# simulations of the full calibration flow run without the real delays. Both clocks can
+# call scheduled callbacks (e.g. simulated key presses) in time order while waiting.
+
+import heapq
+import itertools
+import numbers
+import threading
+
+try:
+    from .lazy_import import LazyModule
+    from .profiling import NullSpan
+except ImportError:
+    from lazy_import import LazyModule
+    from profiling import NullSpan
+
+pcore = LazyModule('psychopy.core')
+
+# Base class of the clocks, keeps the scheduled callbacks
+class Clock:
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        # (time, order, callback) items
+        self.scheduled = []
+        self.order = itertools.count()
+        # TraceRecorder of the waits and the frames (None: no tracing)
+        self.tracer = None
+
+    # current time in seconds
+    def getTime(self):
+        raise NotImplementedError()
+
+    # wait for the given seconds, calling the callbacks scheduled to this period
+    def wait(self, seconds):
+        raise NotImplementedError()
+
+    # show the drawings of the window, calling the callbacks scheduled to this frame
+    def flip(self, window):
+        raise NotImplementedError()
+
+    # call callback() at the given time, callbacks of the same time are called in the
+    # order they were scheduled
+    def callAt(self, time, callback):
+        if not isinstance(time, numbers.Number):
+            raise TypeError("time should be a number.")
+        if not callable(callback):
+            raise TypeError("callback should be a callable object.")
+        with self.lock:
+            heapq.heappush(self.scheduled, (time, next(self.order), callback))
+
+    # call callback() delay seconds later
+    def callLater(self, delay, callback):
+        if not isinstance(delay, numbers.Number):
+            raise TypeError("delay should be a number.")
+        if delay < 0:
+            raise ValueError("delay can't be negative.")
+        self.callAt(self.getTime() + delay, callback)
+
+    # time of the next scheduled callback, None if nothing is scheduled
+    def getNextScheduledTime(self):
+        with self.lock:
+            if len(self.scheduled) == 0:
+                return None
+            return self.scheduled[0][0]
+
+    # call the callbacks scheduled until the given time (the current time by default)
+    def runScheduled(self, untilTime = None):
+        if untilTime is None:
+            untilTime = self.getTime()
+        while True:
+            with self.lock:
+                if len(self.scheduled) == 0 or self.scheduled[0][0] > untilTime:
+                    return
+                callback = heapq.heappop(self.scheduled)[2]
+            callback()
+
+    # trace span of a wait or a frame, if tracing is enabled
+    def traceSpan(self, name, **args):
+        if self.tracer is None:
+            return NullSpan()
+        return self.tracer.span(name, 'clock', **args)
+
+    def checkSeconds(self, seconds):
+        if not isinstance(seconds, numbers.Number):
+            raise TypeError("seconds should be a number.")
+        if seconds < 0:
+            raise ValueError("seconds can't be negative.")
+
+
+# Real time clock of PsychoPy, used by default
+class PsychoPyClock(Clock):
+
+    def getTime(self):
+        return pcore.getTime()
+
+    def wait(self, seconds):
+        self.checkSeconds(seconds)
+        with self.traceSpan('wait', seconds = seconds):
+            endTime = self.getTime() + seconds
+            # wake up for the scheduled callbacks
+            while True:
+                nextTime = self.getNextScheduledTime()
+                if nextTime is None or nextTime > endTime:
+                    break
+                pcore.wait(max(nextTime - self.getTime(), 0.0))
+                self.runScheduled(nextTime)
+            pcore.wait(max(endTime - self.getTime(), 0.0))
+
+    def flip(self, window):
+        with self.traceSpan('frame'):
+            window.flip()
+        self.runScheduled()
+
+
+# Virtual time, waiting and flipping return immediately. The time is moved forward by
+# the waited seconds and by frameDuration at every flip. The callbacks are called at
+# their scheduled time, in order, so the sequence of the events stays the same as in
+# real time.
+class VirtualClock(Clock):
+
+    def __init__(self, startTime = 0.0, frameDuration = 1.0 / 60.0):
+        Clock.__init__(self)
+
+        if not isinstance(startTime, numbers.Number):
+            raise TypeError("startTime should be a number.")
+        if not isinstance(frameDuration, numbers.Number):
+            raise TypeError("frameDuration should be a number.")
+        if frameDuration < 0:
+            raise ValueError("frameDuration can't be negative.")
+
+        self.time = startTime
+        self.frameDuration = frameDuration
+        # statistics of the waits and the frames
+        self.waitCount = 0
+        self.waitedTime = 0.0
+        self.frameCount = 0
+
+    def getTime(self):
+        with self.lock:
+            return self.time
+
+    def wait(self, seconds):
+        self.checkSeconds(seconds)
+        with self.lock:
+            self.waitCount += 1
+            self.waitedTime += seconds
+        with self.traceSpan('wait', seconds = seconds):
+            self.advance(seconds)
+
+    def flip(self, window):
+        with self.traceSpan('frame'):
+            window.flip()
+        with self.lock:
+            self.frameCount += 1
+        self.advance(self.frameDuration)
+
+    # move the time forward, calling the scheduled callbacks at their time
+    def advance(self, seconds):
+        self.checkSeconds(seconds)
+        with self.lock:
+            endTime = self.time + seconds
+        while True:
+            with self.lock:
+                if len(self.scheduled) == 0 or self.scheduled[0][0] > endTime:
+                    # a callback might have moved the time further
+                    self.time = max(self.time, endTime)
+                    return
+                scheduledTime, order, callback = heapq.heappop(self.scheduled)
+                self.time = max(self.time, scheduledTime)
+            callback()
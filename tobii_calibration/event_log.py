@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+
+# Structured, non-blocking logging
+
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+# Summary: The diagnostics of the calibration code go to the 'tobii_calibration' logger
+# with a level and a set of fields (phase, point, status, timings...). The records are put
+# into a queue by the logging thread (e.g. the render thread) and the handlers (console,
+# JSON lines file) run on a separate listener thread, so slow console or file I/O does not
+# hold back the drawing. The queue is bounded, when it is full the new records are dropped
+# and counted instead of blocking.
+
+import atexit
+import json
+import logging
+import logging.handlers
+import numbers
+import queue
+import sys
+import threading
+
+LOGGER_NAME = 'tobii_calibration'
+
+# the logger used by all modules of the package
+logger = logging.getLogger(LOGGER_NAME)
+
+# keys of the structured records, the fields can't use them
+RESERVED_FIELDS = ['time', 'level', 'logger', 'thread', 'message', 'exception']
+
+# log a message with the given fields
+def logEvent(level, message, **fields):
+    for name in RESERVED_FIELDS:
+        if name in fields:
+            raise ValueError(name + " is a reserved field name.")
+    logger.log(level, message, extra = {'fields' : fields})
+
+
+# human readable output: the message, followed by the fields
+class ConsoleFormatter(logging.Formatter):
+
+    def format(self, record):
+        message = record.getMessage()
+        fields = getattr(record, 'fields', None)
+        if fields:
+            message += " [" + ", ".join(str(key) + "=" + str(value) for key, value in sorted(fields.items())) + "]"
+        return message
+
+
+# machine readable output: one JSON object per record
+class StructuredFormatter(logging.Formatter):
+
+    def format(self, record):
+        entry = {'time' : record.created,
+                 'level' : record.levelname,
+                 'logger' : record.name,
+                 'thread' : record.threadName,
+                 'message' : record.getMessage()}
+        fields = getattr(record, 'fields', None)
+        if fields:
+            # the fields never override the keys of the record
+            entry.update((key, value) for key, value in fields.items() if key not in RESERVED_FIELDS)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        # numpy numbers and tuples of them are fine, anything else is written as a string
+        return json.dumps(entry, default = str)
+
+
+# passes the records to the handlers of the root logger, so the queue keeps the logging
+# configuration of the application (e.g. logging.basicConfig())
+class RootLoggerHandler(logging.Handler):
+
+    def emit(self, record):
+        logging.getLogger().handle(record)
+
+
+# queue handler which never blocks the logging thread
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+
+    def __init__(self, logQueue):
+        logging.handlers.QueueHandler.__init__(self, logQueue)
+        self.droppedCount = 0
+
+    def prepare(self, record):
+        # the record is formatted by the handlers of the listener thread
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.droppedCount += 1
+
+
+# The queue between the logger and the handlers and the thread draining it
+class LogQueue:
+
+    def __init__(self, handlers = None, maxSize = 10000):
+
+        if not isinstance(maxSize, numbers.Integral):
+            raise TypeError("maxSize should be an integer.")
+        if maxSize < 1:
+            raise ValueError("maxSize should be positive.")
+
+        if handlers is None:
+            consoleHandler = logging.StreamHandler(sys.stdout)
+            consoleHandler.setFormatter(ConsoleFormatter())
+            handlers = [consoleHandler]
+        elif not isinstance(handlers, (list, tuple)):
+            raise TypeError("handlers should be a list of logging handlers.")
+
+        self.handlers = list(handlers)
+        self.queue = queue.Queue(maxSize)
+        self.queueHandler = DroppingQueueHandler(self.queue)
+        self.listener = logging.handlers.QueueListener(self.queue, *self.handlers, respect_handler_level = True)
+        self.running = False
+
+    def start(self):
+        if not self.running:
+            self.listener.start()
+            self.running = True
+
+    # stop the listener thread after handling all queued records
+    def stop(self):
+        if self.running:
+            self.listener.stop()
+            self.running = False
+            for handler in self.handlers:
+                handler.flush()
+
+    def isRunning(self):
+        return self.running
+
+    def getDroppedCount(self):
+        return self.queueHandler.droppedCount
+
+
+currentLogQueue = None
+logQueueLock = threading.RLock()
+
+# route the records of the package's logger through a new queue to the given handlers
+# (console output by default)
+def startLogQueue(handlers = None, maxSize = 10000, level = logging.INFO):
+    global currentLogQueue
+
+    logQueue = LogQueue(handlers, maxSize)
+    with logQueueLock:
+        stopLogQueue()
+        logger.addHandler(logQueue.queueHandler)
+        logger.setLevel(level)
+        # the records are handled here, the application's root handlers don't get them twice
+        logger.propagate = False
+        logQueue.start()
+        currentLogQueue = logQueue
+    return logQueue
+
+
+# handle the queued records and stop the listener thread
+def stopLogQueue():
+    global currentLogQueue
+
+    with logQueueLock:
+        logQueue = currentLogQueue
+        if logQueue is None:
+            return
+        logger.removeHandler(logQueue.queueHandler)
+        logger.setLevel(logging.NOTSET)
+        logger.propagate = True
+        currentLogQueue = None
+    logQueue.stop()
+
+
+def getLogQueue():
+    return currentLogQueue
+
+
+# start the default queue, unless the application configured the package's logger itself;
+# the handlers of the root logger are kept, but they run on the listener thread
+def ensureLogQueue():
+    if currentLogQueue is not None or logger.handlers:
+        return
+    with logQueueLock:
+        if currentLogQueue is not None or logger.handlers:
+            return
+        if logging.getLogger().handlers:
+            startLogQueue([RootLoggerHandler()], level = logger.getEffectiveLevel())
+        else:
+            startLogQueue()
+
+
+# handler writing JSON lines into the given file
+def createJsonFileHandler(filePath, level = logging.DEBUG):
+    if not isinstance(filePath, str):
+        raise TypeError("File path must be formatted as a string.")
+    handler = logging.FileHandler(filePath)
+    handler.setFormatter(StructuredFormatter())
+    handler.setLevel(level)
+    return handler
+
+
+# the queued records are written out before the interpreter exits
+atexit.register(stopLogQueue)
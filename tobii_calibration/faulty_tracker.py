@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+# Synthetic eyetracker injecting faults
+
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+# Summary: A SyntheticEyeTracker which drops samples, makes the eyes flicker between
+# valid and invalid, adds jitter to the time stamps, delays the callbacks and makes the
+# calibration calls (collect_data, compute_and_apply) fail at configurable rates. The
+# injected faults are counted, so the degradation of the calibration code can be
+# measured against them.
+
+import math
+import numbers
+import time
+
+import numpy as np
+
+try:
+    from .lazy_import import LazyModule
+    from .synthetic_tracker import SyntheticEyeTracker, SyntheticCalibration
+except ImportError:
+    from lazy_import import LazyModule
+    from synthetic_tracker import SyntheticEyeTracker, SyntheticCalibration
+
+tobii = LazyModule('tobii_research')
+
+FAULT_TYPES = ['dropped_sample', 'invalid_eye', 'delayed_callback',
+               'collect_data_failure', 'compute_and_apply_failure', 'compute_and_apply_error']
+
+# Calibration of the FaultInjectingEyeTracker
+class FaultInjectingCalibration(SyntheticCalibration):
+
+    def collect_data(self, x, y, eye = None):
+        # a failed collection doesn't add data to the calibration
+        if self.inCalibrationMode and \
+           self.eyetracker.injectFault('collect_data_failure', self.eyetracker.collectDataFailureRate):
+            self.eyetracker.sdkCallCount += 1
+            return tobii.CALIBRATION_STATUS_FAILURE
+        return SyntheticCalibration.collect_data(self, x, y, eye)
+
+    def compute_and_apply(self):
+        if self.eyetracker.injectFault('compute_and_apply_error', self.eyetracker.computeAndApplyErrorRate):
+            self.eyetracker.sdkCallCount += 1
+            raise RuntimeError("Injected compute_and_apply error.")
+        result = SyntheticCalibration.compute_and_apply(self)
+        if self.eyetracker.injectFault('compute_and_apply_failure', self.eyetracker.computeAndApplyFailureRate):
+            return tobii.CalibrationResult(tobii.CALIBRATION_STATUS_FAILURE, ())
+        return result
+
+
+class FaultInjectingEyeTracker(SyntheticEyeTracker):
+
+    # rates are probabilities between 0.0 and 1.0, timeStampJitter is the standard deviation
+    # of the time stamp noise in microseconds, callbackDelay is given in seconds
+    def __init__(self, frequency = 600, trajectory = None, dropRate = 0.0, validityFlickerRate = 0.0,
+                 timeStampJitter = 0.0, callbackDelayRate = 0.0, callbackDelay = 0.05,
+                 collectDataFailureRate = 0.0, computeAndApplyFailureRate = 0.0,
+                 computeAndApplyErrorRate = 0.0, seed = None, **kwargs):
+
+        SyntheticEyeTracker.__init__(self, frequency = frequency, trajectory = trajectory, seed = seed, **kwargs)
+
+        for name, rate in [('dropRate', dropRate), ('validityFlickerRate', validityFlickerRate),
+                           ('callbackDelayRate', callbackDelayRate),
+                           ('collectDataFailureRate', collectDataFailureRate),
+                           ('computeAndApplyFailureRate', computeAndApplyFailureRate),
+                           ('computeAndApplyErrorRate', computeAndApplyErrorRate)]:
+            if not isinstance(rate, numbers.Number):
+                raise TypeError(name + " should be a number.")
+            if rate < 0.0 or rate > 1.0:
+                raise ValueError(name + " should be between 0.0 and 1.0.")
+        for name, value in [('timeStampJitter', timeStampJitter), ('callbackDelay', callbackDelay)]:
+            if not isinstance(value, numbers.Number):
+                raise TypeError(name + " should be a number.")
+            if value < 0:
+                raise ValueError(name + " should not be negative.")
+
+        self.dropRate = dropRate
+        self.validityFlickerRate = validityFlickerRate
+        self.timeStampJitter = timeStampJitter
+        self.callbackDelayRate = callbackDelayRate
+        self.callbackDelay = callbackDelay
+        self.collectDataFailureRate = collectDataFailureRate
+        self.computeAndApplyFailureRate = computeAndApplyFailureRate
+        self.computeAndApplyErrorRate = computeAndApplyErrorRate
+
+        # the calibration calls are made on an other thread than the data emitting
+        self.callRandom = np.random.RandomState(None if seed is None else seed + 1)
+
+        # number of injected faults by fault type
+        self.faultCounts = {faultType : 0 for faultType in FAULT_TYPES}
+
+    # decide whether to inject a fault of the given type and count it
+    def injectFault(self, faultType, rate):
+        if rate <= 0.0:
+            return False
+        if faultType in ['collect_data_failure', 'compute_and_apply_failure', 'compute_and_apply_error']:
+            random = self.callRandom
+        else:
+            random = self.random
+        if random.random_sample() >= rate:
+            return False
+        with self.lock:
+            self.faultCounts[faultType] += 1
+        return True
+
+    def getFaultCounts(self):
+        with self.lock:
+            return dict(self.faultCounts)
+
+    def createCalibration(self, monocular = False):
+        return FaultInjectingCalibration(self, monocular)
+
+    def createGazeData(self, elapsed, systemTimeStamp):
+
+        if self.timeStampJitter > 0:
+            systemTimeStamp += int(round(self.random.normal(0.0, self.timeStampJitter)))
+        gazeData = SyntheticEyeTracker.createGazeData(self, elapsed, systemTimeStamp)
+
+        # the eyes are lost independently
+        for eye in ['left', 'right']:
+            if self.injectFault('invalid_eye', self.validityFlickerRate):
+                gazeData[eye + '_gaze_point_on_display_area'] = (math.nan, math.nan)
+                gazeData[eye + '_gaze_point_in_user_coordinate_system'] = (math.nan, math.nan, math.nan)
+                gazeData[eye + '_gaze_point_validity'] = 0
+                gazeData[eye + '_pupil_diameter'] = math.nan
+                gazeData[eye + '_pupil_validity'] = 0
+                gazeData[eye + '_gaze_origin_in_user_coordinate_system'] = (math.nan, math.nan, math.nan)
+                gazeData[eye + '_gaze_origin_in_trackbox_coordinate_system'] = (math.nan, math.nan, math.nan)
+                gazeData[eye + '_gaze_origin_validity'] = 0
+        return gazeData
+
+    def sendData(self, subscriptionType, data):
+        if subscriptionType == tobii.EYETRACKER_GAZE_DATA:
+            if self.injectFault('dropped_sample', self.dropRate):
+                return
+            # a late callback holds back the following samples too, like a busy SDK thread
+            if self.injectFault('delayed_callback', self.callbackDelayRate):
+                time.sleep(self.callbackDelay)
+        SyntheticEyeTracker.sendData(self, subscriptionType, data)
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+# Lazy loading of modules
+
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+# Summary: Importing PsychoPy, pyglet and the Tobii Pro SDK takes seconds, so they are
+# referenced through LazyModule objects, which import the module on the first access
+# of one of its attributes. Scripts using only the coordinate math or the offline
+# analysis don't pay for the GUI and the SDK.
+
+import importlib
+
+class LazyModule:
+
+    def __init__(self, moduleName):
+        # the attributes are stored directly, __setattr__ is forwarded to the module
+        self.__dict__['moduleName'] = moduleName
+        self.__dict__['module'] = None
+
+    def __load(self):
+        module = self.__dict__['module']
+        if module is None:
+            module = importlib.import_module(self.__dict__['moduleName'])
+            self.__dict__['module'] = module
+        return module
+
+    def isLoaded(self):
+        return self.__dict__['module'] is not None
+
+    def __getattr__(self, name):
+        return getattr(self.__load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.__load(), name, value)
+
+    def __repr__(self):
+        return "<lazy module '" + self.__dict__['moduleName'] + "'>"
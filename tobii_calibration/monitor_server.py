@@ -0,0 +1,476 @@
+# -*- coding: utf-8 -*-
+
+# Operator monitoring page of the calibration session
+
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+# Summary: MonitorServer serves a live operator view of the session over HTTP (standard library
+# only), so the experimenter can follow the trackbox, calibration and validation screens from
+# another device. The page gets its updates through server-sent events: downsampled gaze, the
+# eye positions in the trackbox, the per-point calibration accuracy, the acquisition health and
+# the events of the calibration sequence. One sampler thread builds the updates with a fixed
+# rate, independently of the sampling rate of the eyetracker, and every page gets the same
+# encoded message through a bounded queue. The number of pages is limited too, so the server
+# costs a bounded fraction of one core.
+
+import collections
+import http.server
+import json
+import math
+import numbers
+import socketserver
+import threading
+import time
+
+# number of messages kept for a page, the oldest ones are dropped if the page can't keep up
+CLIENT_QUEUE_SIZE = 100
+
+# seconds between two keep-alive comments of an idle event stream
+KEEP_ALIVE_INTERVAL = 15.0
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Tobii calibration monitor</title>
+<style>
+body { font-family: sans-serif; margin: 1em; background: #202020; color: #e0e0e0; }
+.panel { display: inline-block; vertical-align: top; margin: 0 1em 1em 0; }
+canvas { background: #000000; border: 1px solid #606060; }
+table { border-collapse: collapse; }
+td, th { border: 1px solid #606060; padding: 2px 8px; text-align: right; }
+.poor { color: #ff6060; }
+#status { margin-bottom: 1em; }
+</style>
+</head>
+<body>
+<div id="status">Connecting...</div>
+<div class="panel"><h3>Gaze</h3><canvas id="gaze" width="480" height="270"></canvas></div>
+<div class="panel"><h3>Trackbox</h3><canvas id="trackbox" width="270" height="270"></canvas><div id="distance"></div></div>
+<div class="panel"><h3>Calibration accuracy (pixels)</h3><table id="calibration"></table></div>
+<div class="panel"><h3>Acquisition health</h3><table id="health"></table></div>
+<script>
+var trail = [];
+function format(value) {
+  if (value === null || value === undefined) { return "-"; }
+  return typeof value === "number" ? (Math.round(value * 100) / 100).toString() : value;
+}
+function drawGaze() {
+  var canvas = document.getElementById("gaze"), context = canvas.getContext("2d");
+  context.clearRect(0, 0, canvas.width, canvas.height);
+  for (var i = 0; i < trail.length; i++) {
+    context.fillStyle = "rgba(255, 80, 80, " + ((i + 1) / trail.length) + ")";
+    context.beginPath();
+    context.arc(trail[i][0] * canvas.width, trail[i][1] * canvas.height, 4, 0, 2 * Math.PI);
+    context.fill();
+  }
+}
+function drawTrackBox(data) {
+  var canvas = document.getElementById("trackbox"), context = canvas.getContext("2d");
+  context.clearRect(0, 0, canvas.width, canvas.height);
+  context.strokeStyle = "#808080";
+  context.strokeRect(10, 10, canvas.width - 20, canvas.height - 20);
+  var distances = [];
+  ["left", "right"].forEach(function (eye) {
+    var position = data[eye];
+    if (position === null) { return; }
+    context.fillStyle = eye === "left" ? "#60a0ff" : "#60ff60";
+    context.beginPath();
+    // the trackbox x axis points to the left of the participant, the operator faces the participant
+    context.arc(10 + (1 - position[0]) * (canvas.width - 20), 10 + position[1] * (canvas.height - 20),
+                10, 0, 2 * Math.PI);
+    context.fill();
+    distances.push(eye + ": " + format(position[2]));
+  });
+  document.getElementById("distance").textContent = "Depth in the trackbox (0 - 1): " + distances.join(", ");
+}
+function fillTable(id, rows) {
+  var table = document.getElementById(id);
+  table.innerHTML = "";
+  rows.forEach(function (row) {
+    var tableRow = table.insertRow();
+    row.forEach(function (cell) {
+      var tableCell = tableRow.insertCell();
+      tableCell.textContent = format(cell.value);
+      if (cell.poor) { tableCell.className = "poor"; }
+    });
+  });
+}
+var source = new EventSource("events");
+source.onopen = function () { document.getElementById("status").textContent = "Connected."; };
+source.onerror = function () { document.getElementById("status").textContent = "Disconnected, reconnecting..."; };
+source.addEventListener("gaze", function (event) {
+  var data = JSON.parse(event.data);
+  if (data.point !== null) { trail.push(data.point); }
+  if (trail.length > 30) { trail.shift(); }
+  drawGaze();
+  drawTrackBox(data.trackbox);
+});
+source.addEventListener("calibration", function (event) {
+  var data = JSON.parse(event.data), rows = [[{value: "point"}, {value: "left"}, {value: "right"}]];
+  data.points.forEach(function (point) {
+    rows.push([{value: point.point},
+               {value: point.left, poor: !(point.left <= data.threshold)},
+               {value: point.right, poor: !(point.right <= data.threshold)}]);
+  });
+  fillTable("calibration", rows);
+});
+source.addEventListener("health", function (event) {
+  var data = JSON.parse(event.data), rows = [];
+  Object.keys(data).forEach(function (key) { rows.push([{value: key}, {value: data[key]}]); });
+  fillTable("health", rows);
+});
+source.addEventListener("status", function (event) {
+  var data = JSON.parse(event.data);
+  document.getElementById("status").textContent = (data.phase ? data.phase + ": " : "") + data.message;
+});
+</script>
+</body>
+</html>
+"""
+
+# encoded server-sent event
+def createEvent(eventType, data):
+    return ("event: " + eventType + "\ndata: " + json.dumps(data, default = str) + "\n\n").encode('utf-8')
+
+
+# number, or None for NaN (JSON has no NaN)
+def toJsonNumber(value):
+    if value is None or math.isnan(value):
+        return None
+    return float(value)
+
+
+# One page connected to the event stream
+class MonitorClient:
+
+    def __init__(self):
+        self.messages = collections.deque(maxlen = CLIENT_QUEUE_SIZE)
+        self.condition = threading.Condition()
+        self.closed = False
+        self.droppedCount = 0
+
+    def offer(self, message):
+        with self.condition:
+            if len(self.messages) == self.messages.maxlen:
+                self.droppedCount += 1
+            self.messages.append(message)
+            self.condition.notify()
+
+    # the queued messages, an empty list after timeout seconds, None if the client was closed
+    def take(self, timeout):
+        with self.condition:
+            if not self.closed and len(self.messages) == 0:
+                self.condition.wait(timeout)
+            if self.closed:
+                return None
+            messages = list(self.messages)
+            self.messages.clear()
+            return messages
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+
+
+class MonitorRequestHandler(http.server.BaseHTTPRequestHandler):
+
+    # the MonitorServer is set by the server
+    monitor = None
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path in ['/', '/index.html']:
+            self.__sendContent(PAGE.encode('utf-8'), 'text/html; charset=utf-8')
+        elif path == '/state':
+            self.__sendContent(json.dumps(self.monitor.getState(), default = str).encode('utf-8'),
+                               'application/json')
+        elif path == '/events':
+            self.__sendEvents()
+        else:
+            self.send_error(404)
+
+    # the requests are not written to the console
+    def log_message(self, format, *args):
+        pass
+
+    def __sendContent(self, content, contentType):
+        self.send_response(200)
+        self.send_header('Content-Type', contentType)
+        self.send_header('Content-Length', str(len(content)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(content)
+
+    def __sendEvents(self):
+        client = self.monitor.addClient()
+        if client is None:
+            self.send_error(503, "Too many monitoring pages are open.")
+            return
+
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            while True:
+                messages = client.take(KEEP_ALIVE_INTERVAL)
+                if messages is None:
+                    break
+                # a comment keeps the idle connection open
+                self.wfile.write(b''.join(messages) if messages else b': keep-alive\n\n')
+                self.wfile.flush()
+        except (OSError, ValueError):
+            # the page was closed
+            pass
+        finally:
+            self.monitor.removeClient(client)
+        self.close_connection = True
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+# Serves the operator monitoring page of a TobiiHelper session
+class MonitorServer:
+
+    def __init__(self, tobiiHelper, address = ('127.0.0.1', 0), gazeRate = 30.0, healthInterval = 1.0,
+                 maxClients = 4):
+
+        if tobiiHelper is None:
+            raise TypeError("tobiiHelper should be a TobiiHelper object.")
+        if not isinstance(address, tuple) or len(address) != 2:
+            raise TypeError("address should be a (host, port) tuple.")
+        if not isinstance(gazeRate, numbers.Number):
+            raise TypeError("gazeRate should be a number.")
+        if gazeRate <= 0 or gazeRate > 120:
+            raise ValueError("gazeRate should be between 0 and 120 Hz.")
+        if not isinstance(healthInterval, numbers.Number):
+            raise TypeError("healthInterval should be a number.")
+        if healthInterval <= 0:
+            raise ValueError("healthInterval should be positive.")
+        if not isinstance(maxClients, numbers.Integral):
+            raise TypeError("maxClients should be an integer.")
+        if maxClients < 1:
+            raise ValueError("maxClients should be positive.")
+
+        self.tobiiHelper = tobiiHelper
+        self.address = address
+        self.gazeRate = gazeRate
+        self.healthInterval = healthInterval
+        self.maxClients = maxClients
+
+        # the last gaze sample of the subscription, or the shared ring buffer it's read from
+        self.gazeData = None
+        self.ring = None
+        # held while an update is built, the ring is not closed meanwhile
+        self.sampleLock = threading.Lock()
+
+        self.clients = []
+        self.lock = threading.Lock()
+        # last sent values
+        self.state = {'gaze' : None, 'calibration' : None, 'health' : None, 'status' : None}
+        self.sentCalibrationAccuracy = None
+
+        self.httpServer = None
+        self.serverThread = None
+        self.samplerThread = None
+        self.stopEvent = threading.Event()
+
+        # statistics of the sampler thread
+        self.tickCount = 0
+        self.samplerTime = 0.0
+
+    def start(self):
+        if self.httpServer is not None:
+            raise RuntimeError("The monitor server is already running.")
+
+        handlerClass = type('BoundMonitorRequestHandler', (MonitorRequestHandler,), {'monitor' : self})
+        self.httpServer = ThreadingHTTPServer(self.address, handlerClass)
+        self.stopEvent.clear()
+        self.serverThread = threading.Thread(target = self.httpServer.serve_forever, name = 'monitor_server',
+                                             daemon = True)
+        self.samplerThread = threading.Thread(target = self.__sample, name = 'monitor_sampler', daemon = True)
+        self.serverThread.start()
+        self.samplerThread.start()
+
+    def stop(self):
+        if self.httpServer is None:
+            return
+        self.stopEvent.set()
+        self.samplerThread.join()
+        for client in self.getClients():
+            client.close()
+        self.httpServer.shutdown()
+        self.httpServer.server_close()
+        self.serverThread.join()
+        self.httpServer = None
+        self.serverThread = None
+        self.samplerThread = None
+
+    def isRunning(self):
+        return self.httpServer is not None
+
+    # address of the page (with the chosen port, if port 0 was given)
+    def getAddress(self):
+        if self.httpServer is None:
+            return None
+        return self.httpServer.server_address[:2]
+
+    def getUrl(self):
+        address = self.getAddress()
+        if address is None:
+            return None
+        return "http://" + str(address[0]) + ":" + str(address[1]) + "/"
+
+    def addClient(self):
+        with self.lock:
+            if len(self.clients) >= self.maxClients:
+                return None
+            client = MonitorClient()
+            self.clients.append(client)
+            state = dict(self.state)
+        # a new page starts with the last state
+        for eventType in ['status', 'calibration', 'health', 'gaze']:
+            if state[eventType] is not None:
+                client.offer(createEvent(eventType, state[eventType]))
+        return client
+
+    def removeClient(self, client):
+        with self.lock:
+            if client in self.clients:
+                self.clients.remove(client)
+
+    def getClients(self):
+        with self.lock:
+            return list(self.clients)
+
+    def getClientCount(self):
+        with self.lock:
+            return len(self.clients)
+
+    # last sent values of the page
+    def getState(self):
+        with self.lock:
+            return dict(self.state)
+
+    # store the last gaze sample, a listener of the gaze stream
+    def publishGaze(self, gazeData):
+        self.gazeData = gazeData
+
+    # read the gaze samples from a SharedGazeRing (the name is shared with GazeStreamServer)
+    def startRingForwarding(self, ring):
+        with self.sampleLock:
+            self.ring = ring
+
+    def stopRingForwarding(self):
+        with self.sampleLock:
+            self.ring = None
+            self.gazeData = None
+
+    # show the events of the calibration sequence, an event listener of TobiiHelper.
+    # The page shows the message and the phase only, the other fields might not be valid JSON (NaN).
+    def publishEvent(self, message, fields):
+        self.__broadcast('status', {'message' : message, 'phase' : fields.get('phase')})
+
+    # mean CPU time of building and queuing one update, in seconds
+    def getSamplerTime(self):
+        if self.tickCount == 0:
+            return 0.0
+        return self.samplerTime / self.tickCount
+
+    def __broadcast(self, eventType, data):
+        message = createEvent(eventType, data)
+        with self.lock:
+            self.state[eventType] = data
+            clients = list(self.clients)
+        for client in clients:
+            client.offer(message)
+
+    def __getGazeData(self):
+        ring = self.ring
+        if ring is not None:
+            return ring.latest()
+        return self.gazeData
+
+    # downsampled gaze and eye positions in the trackbox
+    def __getGazeUpdate(self):
+        gazeData = self.__getGazeData()
+        if gazeData is None:
+            return None
+
+        points = []
+        trackBox = {}
+        for eye in ['left', 'right']:
+            if gazeData.get(eye + '_gaze_point_validity'):
+                points.append(gazeData[eye + '_gaze_point_on_display_area'])
+            trackBox[eye] = None
+            if gazeData.get(eye + '_gaze_origin_validity'):
+                trackBox[eye] = [toJsonNumber(value) for value in
+                                 gazeData[eye + '_gaze_origin_in_trackbox_coordinate_system']]
+
+        point = None
+        if len(points) > 0:
+            point = [toJsonNumber(sum(coordinate) / len(points)) for coordinate in zip(*points)]
+        return {'time_stamp' : gazeData.get('system_time_stamp'), 'point' : point, 'trackbox' : trackBox}
+
+    def __getCalibrationUpdate(self, calibrationAccuracy):
+        points = [{'point' : str(key), 'left' : toJsonNumber(errors[0]), 'right' : toJsonNumber(errors[1])}
+                  for key, errors in calibrationAccuracy.items()]
+        return {'points' : points, 'threshold' : self.tobiiHelper.accuracyInPixel}
+
+    def __getHealth(self):
+        if self.ring is not None:
+            return self.ring.getHealth()
+        subscriptions = self.tobiiHelper.subscriptions
+        if subscriptions is None:
+            return None
+        return subscriptions.getHealth('gaze')
+
+    # sampler thread: builds the updates with a fixed rate
+    def __sample(self):
+        interval = 1.0 / self.gazeRate
+        nextHealthTime = 0.0
+        nextTime = time.perf_counter()
+        while True:
+            nextTime += interval
+            # don't try to catch up after a stall
+            nextTime = max(nextTime, time.perf_counter())
+            if self.stopEvent.wait(max(nextTime - time.perf_counter(), 0.0)):
+                return
+
+            tickStart = time.thread_time() if hasattr(time, 'thread_time') else time.process_time()
+            with self.sampleLock:
+                if self.getClientCount() > 0:
+                    gazeUpdate = self.__getGazeUpdate()
+                    if gazeUpdate is not None:
+                        self.__broadcast('gaze', gazeUpdate)
+
+                calibrationAccuracy = self.tobiiHelper.calibrationAccuracy
+                if calibrationAccuracy is not self.sentCalibrationAccuracy:
+                    self.sentCalibrationAccuracy = calibrationAccuracy
+                    if calibrationAccuracy is not None:
+                        self.__broadcast('calibration', self.__getCalibrationUpdate(calibrationAccuracy))
+
+                if time.perf_counter() >= nextHealthTime:
+                    nextHealthTime = time.perf_counter() + self.healthInterval
+                    health = self.__getHealth()
+                    if health is not None:
+                        self.__broadcast('health', health)
+
+            tickEnd = time.thread_time() if hasattr(time, 'thread_time') else time.process_time()
+            self.tickCount += 1
+            self.samplerTime += tickEnd - tickStart
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.stop()
+        return False
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+
+# Phase level profiling of the calibration sequence
+
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+# Summary: PhaseProfiler records a timing span for every phase of the calibration
+# sequence (trackbox, calibration rounds, computing the calibration, results screen,
+# validation) with its wall time and CPU time. Wall time not spent on the CPU is time
+# spent sleeping or blocked (waits, SDK calls, vsync). Optionally every phase is
+# profiled with cProfile: the statistics are saved as .pstats files and the time is split
+# into sleeping, SDK calls, rendering and the rest (Python code) in the summary.
+# cProfile sees only the thread running the phase (the render thread), the time of the
+# worker threads shows up as waiting for them.
+
+import collections
+import cProfile
+import json
+import os
+import pstats
+import re
+import threading
+import time
+
+# functions of the categories in the cProfile statistics
+SLEEP_FUNCTIONS = ['sleep', 'wait', 'join', 'acquire']
+SDK_FUNCTIONS = ['enter_calibration_mode', 'leave_calibration_mode', 'collect_data', 'discard_data',
+                 'compute_and_apply', 'subscribe_to', 'unsubscribe_from', 'unsubscribe_all']
+RENDER_FUNCTIONS = ['flip', 'draw']
+
+SUMMARY_COLUMNS = ['count', 'wall_time', 'cpu_time', 'idle_time', 'sleep_time', 'sdk_time', 'render_time', 'python_time']
+
+# Span used when profiling is disabled
+class NullSpan:
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, excType, excValue, traceback):
+        return False
+
+
+# One timed phase, created by PhaseProfiler.phase()
+class Span:
+
+    def __init__(self, profiler, name, fields):
+        self.profiler = profiler
+        self.name = name
+        self.fields = fields
+        self.index = None
+        self.depth = 0
+        self.parent = None
+        self.startTime = None
+        self.startCpuTime = None
+        self.wallTime = None
+        self.cpuTime = None
+        self.profile = None
+        self.categories = None
+
+    def __enter__(self):
+        self.profiler.enterSpan(self)
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.profiler.exitSpan(self, excType is not None)
+        return False
+
+    def asDict(self):
+        result = collections.OrderedDict()
+        result['index'] = self.index
+        result['name'] = self.name
+        result['depth'] = self.depth
+        result['parent'] = None if self.parent is None else self.parent.index
+        result['start'] = self.startTime
+        result['wall_time'] = self.wallTime
+        result['cpu_time'] = self.cpuTime
+        result['idle_time'] = None if self.wallTime is None else max(self.wallTime - self.cpuTime, 0.0)
+        if self.categories is not None:
+            result.update(self.categories)
+        result['fields'] = self.fields
+        return result
+
+
+# Records the timing spans of the phases, phases can be nested
+class PhaseProfiler:
+
+    # outputDir is the folder of the summary and the .pstats files (None: nothing is written),
+    # useCProfile enables cProfile for every phase
+    def __init__(self, outputDir = None, useCProfile = False):
+
+        if outputDir is not None and not isinstance(outputDir, str):
+            raise TypeError("outputDir must be formatted as a string.")
+        if not isinstance(useCProfile, bool):
+            raise TypeError("useCProfile should be a boolean.")
+
+        self.outputDir = outputDir
+        self.useCProfile = useCProfile
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.spans = []
+            self.openSpans = []
+            self.startTime = time.perf_counter()
+
+    # context manager timing one phase, fields are stored with the span (e.g. round = 2)
+    def phase(self, name, **fields):
+        if not isinstance(name, str):
+            raise TypeError("name must be formatted as a string.")
+        return Span(self, name, fields)
+
+    def enterSpan(self, span):
+        with self.lock:
+            span.index = len(self.spans)
+            span.depth = len(self.openSpans)
+            if len(self.openSpans) > 0:
+                span.parent = self.openSpans[-1]
+            self.spans.append(span)
+            self.openSpans.append(span)
+
+        # only one profiler can be active, the outer phase is paused
+        if self.useCProfile:
+            if span.parent is not None and span.parent.profile is not None:
+                span.parent.profile.disable()
+            span.profile = cProfile.Profile()
+
+        span.startTime = time.perf_counter() - self.startTime
+        span.startCpuTime = time.process_time()
+        if span.profile is not None:
+            span.profile.enable()
+
+    def exitSpan(self, span, failed):
+        if span.profile is not None:
+            span.profile.disable()
+        span.wallTime = time.perf_counter() - self.startTime - span.startTime
+        span.cpuTime = time.process_time() - span.startCpuTime
+        if failed:
+            span.fields['failed'] = True
+
+        with self.lock:
+            if span in self.openSpans:
+                self.openSpans.remove(span)
+
+        if span.profile is not None:
+            span.categories = categorizeProfile(span.profile)
+            if span.parent is not None and span.parent.profile is not None:
+                span.parent.profile.enable()
+
+    def getSpans(self):
+        with self.lock:
+            return [span.asDict() for span in self.spans if span.wallTime is not None]
+
+    # statistics of the spans by phase name
+    def getSummary(self):
+        summary = collections.OrderedDict()
+        for span in self.getSpans():
+            item = summary.get(span['name'])
+            if item is None:
+                item = collections.OrderedDict((column, 0.0) for column in SUMMARY_COLUMNS)
+                item['count'] = 0
+                summary[span['name']] = item
+            item['count'] += 1
+            for column in SUMMARY_COLUMNS[1:]:
+                if span.get(column) is not None:
+                    item[column] += span[column]
+        return summary
+
+    def formatSummary(self):
+        summary = self.getSummary()
+        nameWidth = max([len('phase')] + [len(name) for name in summary.keys()])
+        lines = ["phase".ljust(nameWidth) + "".join(column.rjust(13) for column in SUMMARY_COLUMNS)]
+        for name, item in summary.items():
+            line = name.ljust(nameWidth) + str(item['count']).rjust(13)
+            for column in SUMMARY_COLUMNS[1:]:
+                line += "{0:.3f}".format(item[column]).rjust(13)
+            lines.append(line)
+        return "\n".join(lines)
+
+    # write the summary (summary.txt, summary.json) and the .pstats file of every phase
+    # into the output folder. Returns the list of the written files.
+    def write(self, outputDir = None):
+        if outputDir is None:
+            outputDir = self.outputDir
+        if outputDir is None:
+            raise RuntimeError("No output folder is specified.")
+        if not os.path.isdir(outputDir):
+            os.makedirs(outputDir)
+
+        writtenFiles = []
+        with self.lock:
+            spans = [span for span in self.spans if span.wallTime is not None]
+        for span in spans:
+            if span.profile is None:
+                continue
+            fileName = "{0:02d}_{1}.pstats".format(span.index, re.sub(r'[^\w\-]+', '_', span.name))
+            span.profile.dump_stats(os.path.join(outputDir, fileName))
+            writtenFiles.append(os.path.join(outputDir, fileName))
+
+        summaryPath = os.path.join(outputDir, "summary.txt")
+        with open(summaryPath, 'w') as summaryFile:
+            summaryFile.write(self.formatSummary() + "\n")
+        writtenFiles.append(summaryPath)
+
+        jsonPath = os.path.join(outputDir, "summary.json")
+        with open(jsonPath, 'w') as jsonFile:
+            json.dump({'summary' : self.getSummary(), 'spans' : self.getSpans()}, jsonFile, indent = 2, default = str)
+        writtenFiles.append(jsonPath)
+        return writtenFiles
+
+
+# name of a function in the cProfile statistics, built-in functions look like
+# "<built-in method time.sleep>" or "<method 'acquire' of '_thread.lock' objects>"
+def getFunctionName(functionName):
+    if not functionName.startswith("<"):
+        return functionName
+    words = re.findall(r"\w+", functionName)
+    if len(words) == 0:
+        return functionName
+    if " of " in functionName:
+        return words[1]
+    return words[-1]
+
+
+# split the time of a profile into sleeping, SDK calls, rendering and the rest (Python code).
+# The categories are estimates: SDK calls and rendering are counted with all of their
+# callees, so e.g. a flip waiting for the vertical sync might be counted as sleeping too.
+def categorizeProfile(profile):
+    stats = pstats.Stats(profile).stats
+    totalTime = 0.0
+    result = collections.OrderedDict([('sleep_time', 0.0), ('sdk_time', 0.0), ('render_time', 0.0)])
+    for (fileName, line, functionName), (primitiveCalls, calls, ownTime, cumulativeTime, callers) in stats.items():
+        totalTime += ownTime
+        name = getFunctionName(functionName)
+        if fileName == '~' and name in SLEEP_FUNCTIONS:
+            result['sleep_time'] += ownTime
+        elif name in SDK_FUNCTIONS:
+            result['sdk_time'] += cumulativeTime
+        elif name in RENDER_FUNCTIONS:
+            result['render_time'] += cumulativeTime
+
+    result['python_time'] = max(totalTime - result['sleep_time'] - result['sdk_time'] - result['render_time'], 0.0)
+    return result
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+
+# Recording and replaying raw eyetracker sessions
+
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+# Summary: SessionRecorder wraps a connected eyetracker and writes every callback payload
+# and the results of the calibration calls (calibration status, CalibrationResult) into
+# a file, one JSON object per line. ReplayEyeTracker is a stand-in eyetracker which plays
+# back such a file with the original or with accelerated timing, so field problems can be
+# reproduced and the calibration code can be benchmarked on real data offline.
+
+import json
+import numbers
+import threading
+import time
+
+try:
+    from .lazy_import import LazyModule
+    from .synthetic_tracker import SyntheticEyeTracker
+except ImportError:
+    from lazy_import import LazyModule
+    from synthetic_tracker import SyntheticEyeTracker
+
+tobii = LazyModule('tobii_research')
+
+TRACK_BOX_CORNERS = ['front_lower_left', 'front_lower_right', 'front_upper_left', 'front_upper_right',
+                     'back_lower_left', 'back_lower_right', 'back_upper_left', 'back_upper_right']
+
+DISPLAY_AREA_FIELDS = ['top_left', 'top_right', 'bottom_left', 'bottom_right', 'width', 'height']
+
+# JSON gives lists, the SDK gives tuples
+def toTuples(value):
+    if isinstance(value, list):
+        return tuple(toTuples(item) for item in value)
+    if isinstance(value, dict):
+        return {key : toTuples(item) for key, item in value.items()}
+    return value
+
+
+def calibrationResultToDict(calibResult):
+    points = []
+    for point in calibResult.calibration_points:
+        samples = []
+        for sample in point.calibration_samples:
+            samples.append([sample.left_eye.position_on_display_area, sample.left_eye.validity,
+                            sample.right_eye.position_on_display_area, sample.right_eye.validity])
+        points.append({'position' : point.position_on_display_area, 'samples' : samples})
+    return {'status' : calibResult.status, 'points' : points}
+
+
+def dictToCalibrationResult(resultDict):
+    points = []
+    for point in resultDict['points']:
+        samples = []
+        for sample in point['samples']:
+            samples.append(tobii.CalibrationSample(tobii.CalibrationEyeData(toTuples(sample[0]), sample[1]),
+                                                   tobii.CalibrationEyeData(toTuples(sample[2]), sample[3])))
+        points.append(tobii.CalibrationPoint(toTuples(point['position']), tuple(samples)))
+    return tobii.CalibrationResult(resultDict['status'], tuple(points))
+
+
+# Records the calls of a calibration object
+class RecordingCalibration:
+
+    def __init__(self, recorder, calibration):
+        self.recorder = recorder
+        self.calibration = calibration
+
+    def enter_calibration_mode(self):
+        return self.__call('enter_calibration_mode')
+
+    def leave_calibration_mode(self):
+        return self.__call('leave_calibration_mode')
+
+    def collect_data(self, *args):
+        return self.__call('collect_data', *args)
+
+    def discard_data(self, *args):
+        return self.__call('discard_data', *args)
+
+    def compute_and_apply(self):
+        return self.__call('compute_and_apply')
+
+    def __call(self, method, *args):
+        try:
+            result = getattr(self.calibration, method)(*args)
+        except Exception as error:
+            self.recorder.writeEvent({'kind' : 'call', 'method' : method, 'args' : list(args),
+                                      'error' : str(error)})
+            raise
+
+        recordedResult = result
+        if isinstance(result, tobii.CalibrationResult):
+            recordedResult = calibrationResultToDict(result)
+        self.recorder.writeEvent({'kind' : 'call', 'method' : method, 'args' : list(args),
+                                  'result' : recordedResult})
+        return result
+
+
+# Wraps an eyetracker and records its data and calibration results, use it with TobiiHelper.useEyeTracker()
+class SessionRecorder:
+
+    def __init__(self, eyetracker, filePath):
+
+        if eyetracker is None:
+            raise RuntimeError("There is no eyetracker.")
+        if not isinstance(filePath, str):
+            raise TypeError("File path must be formatted as a string.")
+
+        self.eyetracker = eyetracker
+        self.filePath = filePath
+        self.lock = threading.Lock()
+        # wrapped callbacks by subscription type and original callback
+        self.callbacks = {}
+        self.startTime = time.perf_counter()
+        self.eventCount = 0
+
+        self.file = open(filePath, 'w')
+        self.writeEvent(self.__createHeader())
+
+    def __getattr__(self, name):
+        if name == 'eyetracker':
+            raise AttributeError(name)
+        # everything else (e.g. device information) comes from the wrapped eyetracker
+        return getattr(self.eyetracker, name)
+
+    def subscribe_to(self, subscription_type, callback, as_dictionary = False):
+
+        def recordingCallback(data):
+            if isinstance(data, dict):
+                self.writeEvent({'kind' : 'data', 'stream' : subscription_type, 'data' : data})
+            callback(data)
+
+        with self.lock:
+            self.callbacks[(subscription_type, callback)] = recordingCallback
+        self.eyetracker.subscribe_to(subscription_type, recordingCallback, as_dictionary = as_dictionary)
+
+    def unsubscribe_from(self, subscription_type, callback = None):
+        with self.lock:
+            recordingCallback = self.callbacks.pop((subscription_type, callback), None)
+        if recordingCallback is None:
+            self.eyetracker.unsubscribe_from(subscription_type, callback)
+        else:
+            self.eyetracker.unsubscribe_from(subscription_type, recordingCallback)
+
+    def createCalibration(self, monocular = False):
+        if hasattr(self.eyetracker, 'createCalibration'):
+            calibration = self.eyetracker.createCalibration(monocular)
+        elif monocular:
+            calibration = tobii.ScreenBasedMonocularCalibration(self.eyetracker)
+        else:
+            calibration = tobii.ScreenBasedCalibration(self.eyetracker)
+        return RecordingCalibration(self, calibration)
+
+    # write an event with its time (in seconds from the start of the recording)
+    def writeEvent(self, event):
+        event['time'] = time.perf_counter() - self.startTime
+        line = json.dumps(event)
+        with self.lock:
+            if self.file is None:
+                return
+            self.file.write(line + '\n')
+            self.eventCount += 1
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    def __createHeader(self):
+        trackBox = self.eyetracker.get_track_box()
+        displayArea = self.eyetracker.get_display_area()
+        return {'kind' : 'header',
+                'address' : self.eyetracker.address,
+                'serial_number' : self.eyetracker.serial_number,
+                'model' : self.eyetracker.model,
+                'device_name' : self.eyetracker.device_name,
+                'gaze_output_frequency' : self.eyetracker.get_gaze_output_frequency(),
+                'track_box' : {corner : getattr(trackBox, corner) for corner in TRACK_BOX_CORNERS},
+                'display_area' : {field : getattr(displayArea, field) for field in DISPLAY_AREA_FIELDS}}
+
+
+# Gives back the recorded results of the calibration calls in order
+class ReplayCalibration:
+
+    def __init__(self, eyetracker):
+        self.eyetracker = eyetracker
+
+    def enter_calibration_mode(self):
+        return self.eyetracker.nextCallResult('enter_calibration_mode')
+
+    def leave_calibration_mode(self):
+        return self.eyetracker.nextCallResult('leave_calibration_mode')
+
+    def collect_data(self, *args):
+        return self.eyetracker.nextCallResult('collect_data')
+
+    def discard_data(self, *args):
+        return self.eyetracker.nextCallResult('discard_data')
+
+    def compute_and_apply(self):
+        return self.eyetracker.nextCallResult('compute_and_apply')
+
+
+# Stand-in eyetracker playing back a recorded session. speed = 2.0 plays it twice as fast,
+# speed = None plays it as fast as possible.
+class ReplayEyeTracker(SyntheticEyeTracker):
+
+    def __init__(self, filePath, speed = 1.0):
+
+        if not isinstance(filePath, str):
+            raise TypeError("File path must be formatted as a string.")
+        if speed is not None:
+            if not isinstance(speed, numbers.Number):
+                raise TypeError("speed should be a number.")
+            if speed <= 0:
+                raise ValueError("speed should be positive.")
+
+        header = None
+        self.events = []
+        # recorded results by calibration method
+        self.callResults = {}
+        with open(filePath, 'r') as sessionFile:
+            for line in sessionFile:
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if event['kind'] == 'header':
+                    header = event
+                elif event['kind'] == 'data':
+                    self.events.append((event['time'], event['stream'], toTuples(event['data'])))
+                elif event['kind'] == 'call':
+                    self.callResults.setdefault(event['method'], []).append(event)
+        if header is None:
+            raise ValueError("The file is not a recorded session: " + filePath)
+
+        SyntheticEyeTracker.__init__(self, serialNumber = header['serial_number'])
+        self.address = header['address']
+        self.model = header['model']
+        self.device_name = header['device_name']
+        # the gaps of the replayed stream are measured with the recorded frequency
+        if 'gaze_output_frequency' in header:
+            self.frequency = header['gaze_output_frequency']
+        self.trackBox = toTuples(header['track_box'])
+        self.displayArea = toTuples(header['display_area'])
+
+        self.speed = speed
+        # index of the next event to play
+        self.replayIndex = 0
+        self.finished = threading.Event()
+        if len(self.events) == 0:
+            self.finished.set()
+
+    def get_track_box(self):
+        return tobii.TrackBox(dict(self.trackBox))
+
+    def get_display_area(self):
+        return tobii.DisplayArea(dict(self.displayArea))
+
+    def createCalibration(self, monocular = False):
+        return ReplayCalibration(self)
+
+    # recorded result of the next call of a calibration method
+    def nextCallResult(self, method):
+        self.sdkCallCount += 1
+        results = self.callResults.get(method, [])
+        if len(results) == 0:
+            if method in ['collect_data', 'compute_and_apply']:
+                raise RuntimeError("No more recorded results for " + method + ".")
+            return None
+
+        event = results.pop(0)
+        if 'error' in event:
+            raise RuntimeError(event['error'])
+        result = event['result']
+        if method == 'compute_and_apply':
+            return dictToCalibrationResult(result)
+        return result
+
+    # wait until all recorded data is played
+    def waitUntilFinished(self, timeout = None):
+        return self.finished.wait(timeout)
+
+    # play the recorded data of the subscribed streams, a new subscription continues from
+    # the last played event
+    def emitData(self):
+
+        startTime = time.perf_counter()
+        startRecordTime = None
+
+        while not self.stopEvent.is_set() and self.replayIndex < len(self.events):
+            recordTime, stream, data = self.events[self.replayIndex]
+
+            with self.lock:
+                subscribed = stream in self.callbacks
+            if not subscribed:
+                self.replayIndex += 1
+                continue
+
+            # the first played event is sent immediately
+            if startRecordTime is None:
+                startRecordTime = recordTime
+            if self.speed is not None:
+                delay = startTime + (recordTime - startRecordTime) / self.speed - time.perf_counter()
+                if delay > 0:
+                    self.stopEvent.wait(delay)
+                    if self.stopEvent.is_set():
+                        break
+
+            self.sendData(stream, data)
+            if stream == tobii.EYETRACKER_GAZE_DATA:
+                self.sampleCount += 1
+            self.replayIndex += 1
+
+        if self.replayIndex >= len(self.events):
+            self.finished.set()
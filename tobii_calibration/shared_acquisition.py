@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+
+# Gaze data acquisition in a separate process, shared through shared memory
+
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+# Summary: The SDK callbacks and the render loop of PsychoPy share one interpreter (and the
+# GIL), so heavy drawing delays the callbacks and heavy callbacks drop frames. AcquisitionProcess
+# runs the gaze data subscription in a child process, which writes every sample into a
+# SharedGazeRing: a ring buffer of fixed size records in a multiprocessing.shared_memory
+# block. TobiiHelper and any number of other processes attach to the ring by its name and
+# read the samples directly from the shared memory. There is only one writer, readers
+# detect the records overwritten while reading them by the write counters.
+
+import collections
+import math
+import multiprocessing
+import numbers
+import os
+
+import numpy as np
+
+try:
+    from .lazy_import import LazyModule
+    from .subscriptions import SubscriptionManager
+except ImportError:
+    from lazy_import import LazyModule
+    from subscriptions import SubscriptionManager
+
+tobii = LazyModule('tobii_research')
+# added in Python 3.8
+shared_memory = LazyModule('multiprocessing.shared_memory')
+
+# fields of a gaze data dictionary stored in a record, with their number of values
+GAZE_FIELDS = [('system_time_stamp', 1), ('device_time_stamp', 1)]
+for eye in ['left', 'right']:
+    GAZE_FIELDS += [(eye + '_gaze_point_on_display_area', 2),
+                    (eye + '_gaze_point_in_user_coordinate_system', 3),
+                    (eye + '_gaze_point_validity', 1),
+                    (eye + '_pupil_diameter', 1),
+                    (eye + '_pupil_validity', 1),
+                    (eye + '_gaze_origin_in_user_coordinate_system', 3),
+                    (eye + '_gaze_origin_in_trackbox_coordinate_system', 3),
+                    (eye + '_gaze_origin_validity', 1)]
+
+# column slices of the fields in a record
+FIELD_COLUMNS = collections.OrderedDict()
+RECORD_SIZE = 0
+for field, size in GAZE_FIELDS:
+    FIELD_COLUMNS[field] = slice(RECORD_SIZE, RECORD_SIZE + size)
+    RECORD_SIZE += size
+
+# fields given as integers by the SDK
+INTEGER_FIELDS = {field for field, size in GAZE_FIELDS if field.endswith('time_stamp') or field.endswith('validity')}
+
+# acquisition health published by the writer (see StreamHealth.snapshot())
+HEALTH_FIELDS = ['records', 'nominal_rate', 'rate', 'gaps', 'missed_samples', 'disordered',
+                 'left_invalid', 'left_validity', 'right_invalid', 'right_validity',
+                 'callback_time_mean_ms', 'callback_time_max_ms', 'latency_mean_ms', 'latency_max_ms']
+HEALTH_COUNTS = {'records', 'gaps', 'missed_samples', 'disordered', 'left_invalid', 'right_invalid'}
+
+# int64 values of the header: the number of the written records and the number of
+# the records started to write, which is one more while a record is written
+WRITE_COUNT = 0
+WRITE_STARTED = 1
+CAPACITY = 2
+RECORD_FIELDS = 3
+WRITER_PID = 4
+HEADER_SIZE = 8
+
+# Ring buffer of gaze samples in shared memory, written by one process and read by any number of processes
+class SharedGazeRing:
+
+    def __init__(self, sharedMemory, owner):
+        self.sharedMemory = sharedMemory
+        self.name = sharedMemory.name
+        # the owner unlinks the shared memory
+        self.owner = owner
+
+        self.header = np.ndarray((HEADER_SIZE,), dtype = np.int64, buffer = sharedMemory.buf)
+        capacity = int(self.header[CAPACITY])
+        if self.header[RECORD_FIELDS] != RECORD_SIZE:
+            raise ValueError("The shared memory has a different record layout: " + self.name)
+
+        self.capacity = capacity
+        offset = HEADER_SIZE * 8
+        self.health = np.ndarray((len(HEALTH_FIELDS),), dtype = np.float64, buffer = sharedMemory.buf, offset = offset)
+        offset += len(HEALTH_FIELDS) * 8
+        # the records directly in the shared memory, no copy
+        self.records = np.ndarray((capacity, RECORD_SIZE), dtype = np.float64, buffer = sharedMemory.buf,
+                                  offset = offset)
+
+    # create a new ring buffer of capacity records, with a generated name by default
+    @staticmethod
+    def create(capacity = 12000, name = None):
+
+        if not isinstance(capacity, numbers.Integral):
+            raise TypeError("capacity should be an integer.")
+        if capacity < 1:
+            raise ValueError("capacity should be positive.")
+        if name is not None and not isinstance(name, str):
+            raise TypeError("Shared memory name must be formatted as a string.")
+
+        size = (HEADER_SIZE + len(HEALTH_FIELDS) + capacity * RECORD_SIZE) * 8
+        sharedMemory = shared_memory.SharedMemory(name = name, create = True, size = size)
+        header = np.ndarray((HEADER_SIZE,), dtype = np.int64, buffer = sharedMemory.buf)
+        header[:] = 0
+        header[CAPACITY] = capacity
+        header[RECORD_FIELDS] = RECORD_SIZE
+        ring = SharedGazeRing(sharedMemory, owner = True)
+        ring.health[:] = math.nan
+        return ring
+
+    # attach to an existing ring buffer by its name. The shared memory is not removed when the
+    # process exits. Processes started by the owner share its resource tracker, they keep the
+    # registration (untrack = False).
+    @staticmethod
+    def attach(name, untrack = True):
+
+        if not isinstance(name, str):
+            raise TypeError("Shared memory name must be formatted as a string.")
+
+        if not untrack:
+            return SharedGazeRing(shared_memory.SharedMemory(name = name), owner = False)
+        try:
+            sharedMemory = shared_memory.SharedMemory(name = name, track = False)
+        except TypeError:
+            # before Python 3.13 attaching registers the shared memory, which would be unlinked at exit
+            sharedMemory = shared_memory.SharedMemory(name = name)
+            if os.name == 'posix':
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(getattr(sharedMemory, '_name', '/' + name), 'shared_memory')
+        return SharedGazeRing(sharedMemory, owner = False)
+
+    # store a gaze data dictionary, called by the writer process only
+    def append(self, gazeData):
+        values = gazeDataToRecord(gazeData)
+        position = int(self.header[WRITE_COUNT])
+        self.header[WRITE_STARTED] = position + 1
+        self.records[position % self.capacity] = values
+        # the record is visible for the readers after the counter is increased
+        self.header[WRITE_COUNT] = position + 1
+
+    # number of records written since the ring was created
+    def getWriteCount(self):
+        return int(self.header[WRITE_COUNT])
+
+    # records not read yet since position (a write count): returns a copy of the records,
+    # the position of the next read and the number of records lost (overwritten) since position
+    def read(self, position = 0):
+
+        views, start, writeCount = self.readViews(position)
+        records = views[0].copy() if len(views) == 1 else np.concatenate(views)
+        # the oldest records might have been overwritten while copying them,
+        # including the one being written now
+        overwritten = self.getOverwrittenCount(start, writeCount)
+        if overwritten > 0:
+            records = records[overwritten:]
+        return records, writeCount, start + overwritten - position
+
+    # records not read yet since position (a write count) without copying: returns one or two
+    # views of the shared memory (split where the ring wraps around), the write count of the
+    # first record and the position of the next read. The writer keeps overwriting the oldest
+    # records, call getOverwrittenCount() after using the views to know how many of them are valid.
+    def readViews(self, position = 0):
+
+        if not isinstance(position, numbers.Integral):
+            raise TypeError("position should be an integer.")
+
+        writeCount = self.getWriteCount()
+        start = max(position, writeCount - self.capacity)
+        first = start % self.capacity
+        end = first + writeCount - start
+        if end <= self.capacity:
+            views = [self.records[first:end]]
+        else:
+            views = [self.records[first:], self.records[:end - self.capacity]]
+        return views, start, writeCount
+
+    # number of the records between the start and end write counts which were overwritten
+    # (or are being overwritten now) by the writer
+    def getOverwrittenCount(self, start, end):
+        writeStarted = int(self.header[WRITE_STARTED])
+        return min(max(0, writeStarted - self.capacity - start), end - start)
+
+    # last sample as a gaze data dictionary, or None
+    def latest(self):
+        writeCount = self.getWriteCount()
+        if writeCount == 0:
+            return None
+        return recordToDict(self.records[(writeCount - 1) % self.capacity].copy())
+
+    # values of a field in the given records (by default all records of the ring, without copy)
+    def getColumn(self, field, records = None):
+        if field not in FIELD_COLUMNS:
+            raise ValueError("Unknown gaze data field: " + str(field))
+        if records is None:
+            records = self.records
+        return records[:, FIELD_COLUMNS[field]]
+
+    # acquisition health published by the writer, see SubscriptionManager.getHealth()
+    def getHealth(self):
+        result = collections.OrderedDict()
+        result['stream'] = 'gaze'
+        for field, value in zip(HEALTH_FIELDS, self.health.tolist()):
+            if math.isnan(value):
+                result[field] = None
+            elif field in HEALTH_COUNTS:
+                result[field] = int(value)
+            else:
+                result[field] = value
+        result['buffer_dropped'] = 0
+        return result
+
+    # store a health snapshot, called by the writer process only
+    def setHealth(self, snapshot):
+        self.health[:] = [math.nan if snapshot.get(field) is None else snapshot[field] for field in HEALTH_FIELDS]
+
+    def getWriterPid(self):
+        return int(self.header[WRITER_PID])
+
+    def close(self):
+        # the numpy views have to be released before closing the shared memory
+        self.header = None
+        self.health = None
+        self.records = None
+        self.sharedMemory.close()
+
+    def unlink(self):
+        if self.owner:
+            self.sharedMemory.unlink()
+
+
+# values of a record of a gaze data dictionary, missing values are NaN
+def gazeDataToRecord(gazeData):
+    values = []
+    for field, size in GAZE_FIELDS:
+        value = gazeData.get(field)
+        if value is None:
+            values.extend([math.nan] * size)
+        elif size == 1:
+            values.append(value)
+        else:
+            values.extend(value)
+    return values
+
+
+# gaze data dictionary of a record, with the types given by the SDK
+def recordToDict(record):
+    gazeData = {}
+    for field, size in GAZE_FIELDS:
+        values = record[FIELD_COLUMNS[field]].tolist()
+        if size > 1:
+            gazeData[field] = tuple(values)
+        elif field in INTEGER_FIELDS and not math.isnan(values[0]):
+            gazeData[field] = int(values[0])
+        else:
+            gazeData[field] = values[0]
+    return gazeData
+
+
+# body of the acquisition process: subscribes to the gaze data and writes it into the ring
+# until stopEvent is set. Sends None or the error message through the connection after starting.
+def runAcquisition(ringName, address, eyeTrackerFactory, stopEvent, connection, healthInterval):
+
+    ring = None
+    subscriptions = None
+    try:
+        ring = SharedGazeRing.attach(ringName, untrack = False)
+        ring.header[WRITER_PID] = os.getpid()
+        if eyeTrackerFactory is not None:
+            eyetracker = eyeTrackerFactory()
+        else:
+            eyetracker = tobii.EyeTracker(address)
+        # the samples are read from the shared ring
+        subscriptions = SubscriptionManager(eyetracker, capacities = {'gaze' : 1})
+        subscriptions.subscribe('gaze', ring.append)
+    except Exception as error:
+        connection.send(type(error).__name__ + ": " + str(error))
+        if ring is not None:
+            ring.close()
+        return
+
+    connection.send(None)
+    try:
+        while not stopEvent.wait(healthInterval):
+            ring.setHealth(subscriptions.getHealth('gaze'))
+    finally:
+        subscriptions.unsubscribeAll()
+        ring.setHealth(subscriptions.getHealth('gaze'))
+        ring.close()
+
+
+# Runs the gaze data subscription of an eyetracker in a child process writing into a SharedGazeRing
+class AcquisitionProcess:
+
+    def __init__(self, address = None, eyeTrackerFactory = None, capacity = 12000, name = None,
+                 healthInterval = 0.5):
+
+        if address is None and eyeTrackerFactory is None:
+            raise RuntimeError("There is no eyetracker address or factory.")
+        if address is not None and not isinstance(address, str):
+            raise TypeError("Eyetracker address must be formatted as a string.")
+        if eyeTrackerFactory is not None and not callable(eyeTrackerFactory):
+            raise TypeError("eyeTrackerFactory should be a callable object.")
+        if not isinstance(capacity, numbers.Integral):
+            raise TypeError("capacity should be an integer.")
+        if capacity < 1:
+            raise ValueError("capacity should be positive.")
+        if name is not None and not isinstance(name, str):
+            raise TypeError("Shared memory name must be formatted as a string.")
+        if not isinstance(healthInterval, numbers.Number):
+            raise TypeError("healthInterval should be a number.")
+        if healthInterval <= 0:
+            raise ValueError("healthInterval should be positive.")
+
+        self.address = address
+        # called in the child process to create the eyetracker object (tobii_research.EyeTracker(address)
+        # by default), it's passed to the child process so it should be picklable
+        self.eyeTrackerFactory = eyeTrackerFactory
+        self.capacity = capacity
+        self.name = name
+        self.healthInterval = healthInterval
+
+        self.ring = None
+        self.process = None
+        self.stopEvent = None
+
+    # start the child process and wait until it's subscribed to the gaze data
+    def start(self, timeout = 10.0):
+
+        if not isinstance(timeout, numbers.Number):
+            raise TypeError("timeout should be a number.")
+        if self.process is not None:
+            raise RuntimeError("The acquisition process is already running.")
+
+        # a forked child would inherit the threads and the connections of the SDK
+        context = multiprocessing.get_context('spawn')
+        self.ring = SharedGazeRing.create(self.capacity, self.name)
+        receiver, sender = context.Pipe(duplex = False)
+        self.stopEvent = context.Event()
+        self.process = context.Process(target = runAcquisition, name = 'gaze_acquisition', daemon = True,
+                                       args = (self.ring.name, self.address, self.eyeTrackerFactory,
+                                               self.stopEvent, sender, self.healthInterval))
+        try:
+            self.process.start()
+            sender.close()
+            if not receiver.poll(timeout):
+                raise RuntimeError("The acquisition process did not start in " + str(timeout) + " seconds.")
+            try:
+                error = receiver.recv()
+            except EOFError:
+                error = "the process exited with code " + str(self.process.exitcode)
+            if error is not None:
+                raise RuntimeError("The acquisition process failed: " + error)
+        except Exception:
+            self.stop()
+            raise
+        finally:
+            receiver.close()
+        return self.ring
+
+    # stop the child process and remove the shared memory
+    def stop(self, timeout = 5.0):
+
+        if self.process is not None:
+            self.stopEvent.set()
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+            self.process = None
+            self.stopEvent = None
+
+        if self.ring is not None:
+            self.ring.close()
+            self.ring.unlink()
+            self.ring = None
+
+    def isRunning(self):
+        return self.process is not None and self.process.is_alive()
+
+    def getRing(self):
+        return self.ring
+
+    # name of the shared memory, other processes can attach to the ring with it
+    def getName(self):
+        if self.ring is None:
+            return None
+        return self.ring.name
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.stop()
+        return False
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+
+# Health statistics of the eyetracker data streams
+
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+# Summary: StreamHealth is updated by the subscription layer with every received record.
+# It counts the records, the gaps in the device time stamps (samples lost by the
+# eyetracker, the SDK or an overloaded host), the invalid samples of the eyes and keeps
+# rolling statistics of the effective sampling rate, the execution time of the callback
+# and the arrival latency (time of the callback minus the system time stamp of the data).
+# HealthDump writes snapshots of the statistics periodically through the package's logger.
+
+import collections
+import logging
+import numbers
+import threading
+
+import numpy as np
+
+try:
+    from .event_log import logEvent, ensureLogQueue
+except ImportError:
+    from event_log import logEvent, ensureLogQueue
+
+# number of intervals used to guess the sampling interval if the nominal frequency is not known
+INTERVAL_ESTIMATE_COUNT = 20
+
+# an interval is a gap if it's longer than this times the sampling interval
+GAP_FACTOR = 1.5
+
+# Counters and rolling statistics of one stream
+class StreamHealth:
+
+    # windowSize is the number of the last records used for the rolling statistics,
+    # nominalFrequency is the sampling frequency of the stream in Hz (None if unknown),
+    # gaps are detected only in periodic streams (not in e.g. notifications)
+    def __init__(self, stream, windowSize = 1000, nominalFrequency = None, periodic = True):
+
+        if not isinstance(windowSize, numbers.Integral):
+            raise TypeError("windowSize should be an integer.")
+        if windowSize < 2:
+            raise ValueError("windowSize should be at least 2.")
+
+        self.stream = stream
+        self.windowSize = windowSize
+        self.periodic = periodic
+        self.lock = threading.Lock()
+        self.nominalFrequency = None
+        self.setNominalFrequency(nominalFrequency)
+        self.reset()
+
+    def setNominalFrequency(self, nominalFrequency):
+        if nominalFrequency is not None:
+            if not isinstance(nominalFrequency, numbers.Number):
+                raise TypeError("nominalFrequency should be a number.")
+            if nominalFrequency <= 0:
+                raise ValueError("nominalFrequency should be positive.")
+        with self.lock:
+            self.nominalFrequency = nominalFrequency
+
+    # forget all counters and statistics
+    def reset(self):
+        with self.lock:
+            self.recordCount = 0
+            self.gapCount = 0
+            self.missedCount = 0
+            # intervals which are not positive (repeated or reordered time stamps)
+            self.disorderCount = 0
+            self.invalidCounts = {'left' : 0, 'right' : 0}
+            self.maxCallbackTime = 0.0
+            self.maxLatency = None
+            # rolling windows
+            self.timeStamps = collections.deque(maxlen = self.windowSize)
+            self.validities = {'left' : collections.deque(maxlen = self.windowSize),
+                               'right' : collections.deque(maxlen = self.windowSize)}
+            self.callbackTimes = collections.deque(maxlen = self.windowSize)
+            self.latencies = collections.deque(maxlen = self.windowSize)
+            self.estimateIntervals = []
+            self.estimatedInterval = None
+            self.lastTimeStamp = None
+
+    # a new subscription starts, the time since the last record is not a gap
+    def restart(self):
+        with self.lock:
+            self.lastTimeStamp = None
+            self.timeStamps.clear()
+
+    # update the statistics with a received record, arrivalTimeStamp is the system time stamp
+    # of the callback and callbackTime is its execution time in seconds
+    def update(self, data, systemTimeStamp, arrivalTimeStamp, callbackTime):
+
+        deviceTimeStamp = None
+        if isinstance(data, dict):
+            deviceTimeStamp = data.get('device_time_stamp')
+        timeStamp = deviceTimeStamp if deviceTimeStamp is not None else systemTimeStamp
+
+        with self.lock:
+            self.recordCount += 1
+            self.callbackTimes.append(callbackTime)
+            if callbackTime > self.maxCallbackTime:
+                self.maxCallbackTime = callbackTime
+
+            if systemTimeStamp is not None and arrivalTimeStamp is not None:
+                latency = arrivalTimeStamp - systemTimeStamp
+                self.latencies.append(latency)
+                if self.maxLatency is None or latency > self.maxLatency:
+                    self.maxLatency = latency
+
+            if timeStamp is not None:
+                if self.lastTimeStamp is not None:
+                    self.__checkInterval(timeStamp - self.lastTimeStamp)
+                self.lastTimeStamp = timeStamp
+                self.timeStamps.append(timeStamp)
+
+            if isinstance(data, dict):
+                for eye in ['left', 'right']:
+                    validity = data.get(eye + '_gaze_point_validity')
+                    if validity is None:
+                        continue
+                    valid = bool(validity)
+                    if not valid:
+                        self.invalidCounts[eye] += 1
+                    self.validities[eye].append(valid)
+
+    def __checkInterval(self, interval):
+
+        if interval <= 0:
+            self.disorderCount += 1
+            return
+        if not self.periodic:
+            return
+
+        expectedInterval = self.__expectedInterval()
+        if expectedInterval is None:
+            # learn the sampling interval from the first intervals
+            self.estimateIntervals.append(interval)
+            if len(self.estimateIntervals) == INTERVAL_ESTIMATE_COUNT:
+                self.estimatedInterval = float(np.median(self.estimateIntervals))
+                self.estimateIntervals = []
+            return
+
+        if interval > expectedInterval * GAP_FACTOR:
+            self.gapCount += 1
+            self.missedCount += max(int(round(interval / expectedInterval)) - 1, 1)
+
+    # sampling interval in microseconds
+    def __expectedInterval(self):
+        if self.nominalFrequency is not None:
+            return 1000000.0 / self.nominalFrequency
+        return self.estimatedInterval
+
+    # the current statistics as a dictionary, times are given in milliseconds
+    def snapshot(self):
+        with self.lock:
+            result = collections.OrderedDict()
+            result['stream'] = self.stream
+            result['records'] = self.recordCount
+            result['nominal_rate'] = self.nominalFrequency
+            result['rate'] = None
+            if len(self.timeStamps) > 1 and self.timeStamps[-1] > self.timeStamps[0]:
+                result['rate'] = (len(self.timeStamps) - 1) * 1000000.0 / (self.timeStamps[-1] - self.timeStamps[0])
+            result['gaps'] = self.gapCount
+            result['missed_samples'] = self.missedCount
+            result['disordered'] = self.disorderCount
+            for eye in ['left', 'right']:
+                result[eye + '_invalid'] = self.invalidCounts[eye]
+                result[eye + '_validity'] = None
+                if len(self.validities[eye]) > 0:
+                    result[eye + '_validity'] = sum(self.validities[eye]) / len(self.validities[eye])
+            result['callback_time_mean_ms'] = None
+            if len(self.callbackTimes) > 0:
+                result['callback_time_mean_ms'] = sum(self.callbackTimes) / len(self.callbackTimes) * 1000.0
+            result['callback_time_max_ms'] = self.maxCallbackTime * 1000.0
+            result['latency_mean_ms'] = None
+            result['latency_max_ms'] = None
+            if len(self.latencies) > 0:
+                result['latency_mean_ms'] = sum(self.latencies) / len(self.latencies) / 1000.0
+                result['latency_max_ms'] = self.maxLatency / 1000.0
+            return result
+
+
+# Writes the health snapshots of the subscribed streams periodically on a background thread.
+# The snapshots are logged, or passed to the callback if it's given.
+class HealthDump:
+
+    def __init__(self, subscriptions, interval = 10.0, callback = None):
+
+        if not isinstance(interval, numbers.Number):
+            raise TypeError("interval should be a number.")
+        if interval <= 0:
+            raise ValueError("interval should be positive.")
+        if callback is not None and not callable(callback):
+            raise TypeError("callback should be a callable object.")
+
+        self.subscriptions = subscriptions
+        self.interval = interval
+        self.callback = callback
+        self.stopEvent = threading.Event()
+        self.thread = None
+        # missed samples at the last dump by stream name
+        self.lastMissedCounts = {}
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.stopEvent.clear()
+        self.thread = threading.Thread(target = self.__run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.stopEvent.set()
+        self.thread.join()
+        self.thread = None
+
+    def isRunning(self):
+        return self.thread is not None
+
+    # dump the snapshots of the subscribed streams now
+    def dump(self):
+        snapshots = self.subscriptions.getHealth()
+        for stream, snapshot in snapshots.items():
+            if not self.subscriptions.isSubscribed(stream):
+                continue
+            if self.callback is not None:
+                self.callback(snapshot)
+                continue
+
+            # lost samples since the last dump show an overloaded host or a bad connection
+            level = logging.INFO
+            if snapshot['missed_samples'] > self.lastMissedCounts.get(stream, 0):
+                level = logging.WARNING
+            self.lastMissedCounts[stream] = snapshot['missed_samples']
+            ensureLogQueue()
+            logEvent(level, "Acquisition health of " + stream + ".", phase = 'acquisition', **snapshot)
+
+    def __run(self):
+        while not self.stopEvent.wait(self.interval):
+            self.dump()
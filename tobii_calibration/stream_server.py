@@ -0,0 +1,512 @@
+# -*- coding: utf-8 -*-
+
+# Streaming the gaze data and the calibration events to other local programs
+
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+# Summary: GazeStreamServer publishes the live gaze stream and the events of the calibration
+# sequence over a local TCP or Unix socket, so dashboards and secondary stimulus programs can
+# use the eyetracker connected by TobiiHelper. Every message is a frame of a 5 byte header
+# (payload length, message type) and a payload: the gaze samples are sent in batches of
+# float64 records (the layout of SharedGazeRing), the events as JSON. Every client has its own
+# sending thread and bounded queue, the oldest samples are dropped if a client can't keep up,
+# so a slow client never holds back the eyetracker's callback or the other clients. Clients
+# can ask for a lower sampling rate. GazeStreamClient receives and decodes the messages.
+
+import collections
+import json
+import math
+import numbers
+import os
+import socket
+import stat
+import struct
+import threading
+import time
+
+import numpy as np
+
+try:
+    from .shared_acquisition import GAZE_FIELDS, RECORD_SIZE, gazeDataToRecord
+except ImportError:
+    from shared_acquisition import GAZE_FIELDS, RECORD_SIZE, gazeDataToRecord
+
+PROTOCOL_VERSION = 1
+
+# frame header: payload length and message type
+FRAME_HEADER = struct.Struct('<IB')
+
+# server -> client: protocol version and record layout (JSON)
+MESSAGE_HELLO = 1
+# server -> client: number of samples dropped since the last batch (uint32) and float64 records
+MESSAGE_GAZE = 2
+# server -> client: a calibration event (JSON)
+MESSAGE_EVENT = 3
+# client -> server: maximum sampling rate in Hz (float64, 0 means all samples, negative keeps
+# the default rate of the server) and streams (uint8)
+MESSAGE_SUBSCRIBE = 4
+
+DROPPED_COUNT = struct.Struct('<I')
+SUBSCRIPTION = struct.Struct('<dB')
+RECORD = struct.Struct('<' + str(RECORD_SIZE) + 'd')
+
+# stream flags of a subscription
+STREAM_GAZE = 1
+STREAM_EVENTS = 2
+
+# sampling rate of a subscription keeping the default rate of the server
+DEFAULT_RATE = -1.0
+
+# column of the system time stamp in a record, used for downsampling
+TIME_STAMP_COLUMN = 0
+
+# number of events kept for a client
+EVENT_QUEUE_SIZE = 100
+
+def createFrame(messageType, payload):
+    return FRAME_HEADER.pack(len(payload), messageType) + payload
+
+
+# read exactly size bytes from a socket, None if the connection is closed
+def receiveExactly(connection, size):
+    chunks = []
+    while size > 0:
+        chunk = connection.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+# message type and payload of the next frame, None if the connection is closed
+def receiveFrame(connection):
+    header = receiveExactly(connection, FRAME_HEADER.size)
+    if header is None:
+        return None
+    length, messageType = FRAME_HEADER.unpack(header)
+    payload = receiveExactly(connection, length)
+    if payload is None:
+        return None
+    return messageType, payload
+
+
+# remove the socket file of a Unix socket server, other files at the path are kept
+def removeSocketFile(path):
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise ValueError(path + " is not a socket, it's not removed.")
+    os.unlink(path)
+
+
+# One connected client: its queues, subscription and threads
+class StreamClient:
+
+    def __init__(self, server, connection, address, maxRate, queueSize):
+        self.server = server
+        self.connection = connection
+        self.address = address
+        self.streams = STREAM_GAZE | STREAM_EVENTS
+        self.minInterval = 0.0
+        self.nextTimeStamp = -math.inf
+        self.setMaxRate(maxRate)
+
+        # packed records, the oldest ones are dropped from a full queue
+        self.samples = collections.deque(maxlen = queueSize)
+        self.events = collections.deque(maxlen = EVENT_QUEUE_SIZE)
+        self.condition = threading.Condition()
+        self.closed = False
+
+        # statistics
+        self.sentCount = 0
+        self.droppedCount = 0
+        self.reportedDroppedCount = 0
+        self.droppedEventCount = 0
+
+        self.sender = threading.Thread(target = self.__send, name = 'stream_sender', daemon = True)
+        self.receiver = threading.Thread(target = self.__receive, name = 'stream_receiver', daemon = True)
+
+    def start(self):
+        self.sender.start()
+        self.receiver.start()
+
+    def setMaxRate(self, maxRate):
+        # system time stamps are in microseconds
+        self.minInterval = 0.0 if maxRate is None or maxRate <= 0 else 1000000.0 / maxRate
+        self.maxRate = None if self.minInterval == 0.0 else maxRate
+        self.nextTimeStamp = -math.inf
+
+    # queue a packed record, if it's due for the sampling rate of the client
+    def offerSample(self, timeStamp, record):
+        with self.condition:
+            if self.closed or not self.streams & STREAM_GAZE:
+                return
+            if self.minInterval > 0.0 and not math.isnan(timeStamp):
+                if timeStamp < self.nextTimeStamp:
+                    return
+                # keep the schedule after a late sample, restart it after a gap
+                self.nextTimeStamp += self.minInterval
+                if self.nextTimeStamp <= timeStamp:
+                    self.nextTimeStamp = timeStamp + self.minInterval
+            if len(self.samples) == self.samples.maxlen:
+                self.droppedCount += 1
+            self.samples.append(record)
+            self.condition.notify()
+
+    # count samples lost before reaching the server, they're reported with the next batch
+    def addDropped(self, count):
+        with self.condition:
+            if self.closed or not self.streams & STREAM_GAZE:
+                return
+            self.droppedCount += count
+
+    def offerEvent(self, frame):
+        with self.condition:
+            if self.closed or not self.streams & STREAM_EVENTS:
+                return
+            if len(self.events) == self.events.maxlen:
+                self.droppedEventCount += 1
+            self.events.append(frame)
+            self.condition.notify()
+
+    def close(self):
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+            self.condition.notify()
+        try:
+            self.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.connection.close()
+        self.server.removeClient(self)
+
+    def getStats(self):
+        with self.condition:
+            return collections.OrderedDict([('address', str(self.address)), ('max_rate', self.maxRate),
+                                            ('streams', self.streams), ('sent', self.sentCount),
+                                            ('dropped', self.droppedCount), ('dropped_events', self.droppedEventCount),
+                                            ('queued', len(self.samples))])
+
+    # sending thread: sends the queued events and a batch of all queued samples at once
+    def __send(self):
+        try:
+            self.connection.sendall(createFrame(MESSAGE_HELLO, self.server.getHello()))
+            while True:
+                with self.condition:
+                    while not self.closed and len(self.samples) == 0 and len(self.events) == 0:
+                        self.condition.wait()
+                    if self.closed:
+                        return
+                    events = list(self.events)
+                    self.events.clear()
+                    samples = list(self.samples)
+                    self.samples.clear()
+                    dropped = self.droppedCount - self.reportedDroppedCount
+                    self.reportedDroppedCount = self.droppedCount
+
+                data = b''.join(events)
+                if len(samples) > 0:
+                    data += createFrame(MESSAGE_GAZE, DROPPED_COUNT.pack(dropped) + b''.join(samples))
+                self.connection.sendall(data)
+                with self.condition:
+                    self.sentCount += len(samples)
+        except OSError:
+            pass
+        finally:
+            self.close()
+
+    # receiving thread: handles the subscription messages until the client disconnects
+    def __receive(self):
+        try:
+            while True:
+                frame = receiveFrame(self.connection)
+                if frame is None:
+                    break
+                messageType, payload = frame
+                if messageType == MESSAGE_SUBSCRIBE and len(payload) == SUBSCRIPTION.size:
+                    maxRate, streams = SUBSCRIPTION.unpack(payload)
+                    with self.condition:
+                        if maxRate >= 0.0:
+                            self.setMaxRate(maxRate)
+                        self.streams = streams
+        except OSError:
+            pass
+        finally:
+            self.close()
+
+
+# Publishes the gaze samples and the calibration events to the connected clients
+class GazeStreamServer:
+
+    def __init__(self, address = ('127.0.0.1', 0), queueSize = 1000, maxRate = None):
+
+        if isinstance(address, str):
+            if not hasattr(socket, 'AF_UNIX'):
+                raise ValueError("Unix sockets are not supported on this platform.")
+            self.family = socket.AF_UNIX
+        elif isinstance(address, tuple) and len(address) == 2:
+            self.family = socket.AF_INET
+        else:
+            raise TypeError("address should be a (host, port) tuple or the path of a Unix socket.")
+        if not isinstance(queueSize, numbers.Integral):
+            raise TypeError("queueSize should be an integer.")
+        if queueSize < 1:
+            raise ValueError("queueSize should be positive.")
+        if maxRate is not None and not isinstance(maxRate, numbers.Number):
+            raise TypeError("maxRate should be a number.")
+        if maxRate is not None and maxRate <= 0:
+            raise ValueError("maxRate should be positive.")
+
+        self.address = address
+        self.queueSize = queueSize
+        # default sampling rate of the clients (None: all samples)
+        self.maxRate = maxRate
+
+        self.socket = None
+        self.acceptThread = None
+        self.clients = []
+        self.lock = threading.Lock()
+
+        # forwarding the samples of a SharedGazeRing
+        self.forwardThread = None
+        self.forwardStopEvent = threading.Event()
+
+    def start(self):
+        if self.socket is not None:
+            raise RuntimeError("The stream server is already running.")
+
+        serverSocket = socket.socket(self.family, socket.SOCK_STREAM)
+        try:
+            if self.family == socket.AF_UNIX:
+                # socket file of an earlier server
+                removeSocketFile(self.address)
+            else:
+                serverSocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            serverSocket.bind(self.address)
+            serverSocket.listen(8)
+        except Exception:
+            serverSocket.close()
+            raise
+        # the accepting thread checks regularly whether the server was stopped
+        serverSocket.settimeout(0.2)
+        self.socket = serverSocket
+        self.acceptThread = threading.Thread(target = self.__accept, name = 'stream_server', daemon = True)
+        self.acceptThread.start()
+
+    def stop(self):
+        self.stopRingForwarding()
+        serverSocket = self.socket
+        if serverSocket is None:
+            return
+        self.socket = None
+        self.acceptThread.join()
+        self.acceptThread = None
+        serverSocket.close()
+
+        for client in self.getClients():
+            client.close()
+        if self.family == socket.AF_UNIX:
+            removeSocketFile(self.address)
+
+    def isRunning(self):
+        return self.socket is not None
+
+    # address the clients can connect to (with the chosen port, if port 0 was given)
+    def getAddress(self):
+        if self.socket is None:
+            return None
+        return self.socket.getsockname()
+
+    def getClients(self):
+        with self.lock:
+            return list(self.clients)
+
+    def getClientCount(self):
+        with self.lock:
+            return len(self.clients)
+
+    # statistics of the clients: sent, dropped and queued samples
+    def getClientStats(self):
+        return [client.getStats() for client in self.getClients()]
+
+    def removeClient(self, client):
+        with self.lock:
+            if client in self.clients:
+                self.clients.remove(client)
+
+    def getHello(self):
+        return json.dumps({'version' : PROTOCOL_VERSION, 'record_size' : RECORD_SIZE,
+                           'fields' : GAZE_FIELDS}).encode('utf-8')
+
+    # publish a gaze data dictionary, can be used as a listener of the gaze stream
+    def publishGaze(self, gazeData):
+        clients = self.getClients()
+        if len(clients) == 0:
+            return
+        values = gazeDataToRecord(gazeData)
+        record = RECORD.pack(*values)
+        for client in clients:
+            client.offerSample(values[TIME_STAMP_COLUMN], record)
+
+    # publish records of the SharedGazeRing layout (a 2D float64 array)
+    def publishRecords(self, records):
+        clients = self.getClients()
+        if len(clients) == 0:
+            return
+        records = np.ascontiguousarray(records, dtype = '<f8')
+        for row in records:
+            record = row.tobytes()
+            for client in clients:
+                client.offerSample(row[TIME_STAMP_COLUMN], record)
+
+    # publish a calibration event, can be used as an event listener of TobiiHelper
+    def publishEvent(self, message, fields):
+        clients = self.getClients()
+        if len(clients) == 0:
+            return
+        event = {'time' : time.time(), 'message' : message, 'fields' : fields}
+        frame = createFrame(MESSAGE_EVENT, json.dumps(event, default = str).encode('utf-8'))
+        for client in clients:
+            client.offerEvent(frame)
+
+    # publish the new samples of a SharedGazeRing every interval seconds
+    def startRingForwarding(self, ring, interval = 0.01):
+        if not isinstance(interval, numbers.Number):
+            raise TypeError("interval should be a number.")
+        if interval <= 0:
+            raise ValueError("interval should be positive.")
+
+        self.stopRingForwarding()
+        self.forwardStopEvent.clear()
+        self.forwardThread = threading.Thread(target = self.__forward, args = (ring, interval),
+                                              name = 'stream_forwarder', daemon = True)
+        self.forwardThread.start()
+
+    def stopRingForwarding(self):
+        if self.forwardThread is not None:
+            self.forwardStopEvent.set()
+            self.forwardThread.join()
+            self.forwardThread = None
+
+    def __forward(self, ring, interval):
+        # only the new samples are sent
+        position = ring.getWriteCount()
+        while not self.forwardStopEvent.wait(interval):
+            records, position, lost = ring.read(position)
+            # samples overwritten in the ring before forwarding them
+            if lost > 0:
+                for client in self.getClients():
+                    client.addDropped(lost)
+            if len(records) > 0:
+                self.publishRecords(records)
+
+    def __accept(self):
+        while True:
+            # stop() can clear the attribute at any time
+            serverSocket = self.socket
+            if serverSocket is None:
+                break
+            try:
+                connection, address = serverSocket.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            connection.settimeout(None)
+            if self.family != socket.AF_UNIX:
+                connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            client = StreamClient(self, connection, address, self.maxRate, self.queueSize)
+            with self.lock:
+                self.clients.append(client)
+            client.start()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.stop()
+        return False
+
+
+# Connects to a GazeStreamServer and decodes its messages
+class GazeStreamClient:
+
+    def __init__(self, address, maxRate = None, gaze = True, events = True, timeout = 5.0):
+
+        if isinstance(address, str):
+            family = socket.AF_UNIX
+        elif isinstance(address, tuple) and len(address) == 2:
+            family = socket.AF_INET
+        else:
+            raise TypeError("address should be a (host, port) tuple or the path of a Unix socket.")
+        if maxRate is not None and not isinstance(maxRate, numbers.Number):
+            raise TypeError("maxRate should be a number.")
+        if maxRate is not None and maxRate < 0:
+            raise ValueError("maxRate should not be negative.")
+
+        self.socket = socket.socket(family, socket.SOCK_STREAM)
+        self.socket.settimeout(timeout)
+        try:
+            self.socket.connect(address)
+            frame = receiveFrame(self.socket)
+            if frame is None or frame[0] != MESSAGE_HELLO:
+                raise RuntimeError("The server did not send the stream description.")
+            self.hello = json.loads(frame[1].decode('utf-8'))
+            if self.hello['version'] != PROTOCOL_VERSION or self.hello['record_size'] != RECORD_SIZE:
+                raise RuntimeError("Incompatible stream protocol version: " + str(self.hello['version']))
+            # the server sends all streams with its default rate without a subscription
+            if maxRate is not None or not gaze or not events:
+                self.subscribe(maxRate, gaze, events)
+        except Exception:
+            self.socket.close()
+            raise
+
+        # number of samples dropped by the server for this client
+        self.droppedCount = 0
+
+    # change the sampling rate (None: the default rate of the server, 0: all samples)
+    # and the streams sent by the server
+    def subscribe(self, maxRate = None, gaze = True, events = True):
+        if maxRate is not None and not isinstance(maxRate, numbers.Number):
+            raise TypeError("maxRate should be a number.")
+        if maxRate is not None and maxRate < 0:
+            raise ValueError("maxRate should not be negative.")
+
+        streams = (STREAM_GAZE if gaze else 0) | (STREAM_EVENTS if events else 0)
+        payload = SUBSCRIPTION.pack(DEFAULT_RATE if maxRate is None else float(maxRate), streams)
+        self.socket.sendall(createFrame(MESSAGE_SUBSCRIBE, payload))
+
+    # next message: ('gaze', records as a 2D float64 array, number of dropped samples) or
+    # ('event', event dictionary), None if the server closed the connection
+    def receive(self):
+        frame = receiveFrame(self.socket)
+        if frame is None:
+            return None
+        messageType, payload = frame
+        if messageType == MESSAGE_GAZE:
+            dropped = DROPPED_COUNT.unpack_from(payload)[0]
+            self.droppedCount += dropped
+            records = np.frombuffer(payload, dtype = '<f8', offset = DROPPED_COUNT.size).reshape(-1, RECORD_SIZE)
+            return 'gaze', records, dropped
+        if messageType == MESSAGE_EVENT:
+            return 'event', json.loads(payload.decode('utf-8'))
+        raise RuntimeError("Unknown message type: " + str(messageType))
+
+    def close(self):
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+        return False
@@ -0,0 +1,374 @@
+# -*- coding: utf-8 -*-
+
+# Subscription layer for the data streams of a Tobii eyetracker
+
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+# Summary: One registration point for the data streams of the Tobii Pro SDK (gaze data,
+# user position guide, external signal, time synchronization, notifications and eye
+# openness). Every stream is routed into its own bounded ring buffer. The records of
+# all streams are stamped with system time stamps, so they can be merged or compared.
+# The health of the streams (rate, gaps, validity, callback time and latency) is tracked
+# by StreamHealth objects.
+
+import collections
+import numbers
+import threading
+import time
+
+try:
+    from .lazy_import import LazyModule
+    from .stream_health import StreamHealth, HealthDump
+except ImportError:
+    from lazy_import import LazyModule
+    from stream_health import StreamHealth, HealthDump
+
+tobii = LazyModule('tobii_research')
+
+# SDK subscription types of the streams, given by the name of the constants in tobii_research.
+# Constants missing from the installed SDK version are skipped.
+STREAM_TYPES = collections.OrderedDict([
+    ('gaze', ['EYETRACKER_GAZE_DATA']),
+    ('user_position', ['EYETRACKER_USER_POSITION_GUIDE']),
+    ('external_signal', ['EYETRACKER_EXTERNAL_SIGNAL']),
+    ('time_sync', ['EYETRACKER_TIME_SYNCHRONIZATION_DATA']),
+    ('eye_openness', ['EYETRACKER_EYE_OPENNESS_DATA']),
+    ('notification', ['EYETRACKER_NOTIFICATION_CONNECTION_LOST',
+                      'EYETRACKER_NOTIFICATION_CONNECTION_RESTORED',
+                      'EYETRACKER_NOTIFICATION_CALIBRATION_MODE_ENTERED',
+                      'EYETRACKER_NOTIFICATION_CALIBRATION_MODE_LEFT',
+                      'EYETRACKER_NOTIFICATION_CALIBRATION_CHANGED',
+                      'EYETRACKER_NOTIFICATION_TRACK_BOX_CHANGED',
+                      'EYETRACKER_NOTIFICATION_DISPLAY_AREA_CHANGED',
+                      'EYETRACKER_NOTIFICATION_GAZE_OUTPUT_FREQUENCY_CHANGED',
+                      'EYETRACKER_NOTIFICATION_EYE_TRACKING_MODE_CHANGED',
+                      'EYETRACKER_NOTIFICATION_DEVICE_FAULTS',
+                      'EYETRACKER_NOTIFICATION_DEVICE_WARNINGS'])])
+
+# default number of records kept for the streams
+DEFAULT_CAPACITIES = {'gaze' : 12000,
+                      'user_position' : 1200,
+                      'external_signal' : 1000,
+                      'time_sync' : 1000,
+                      'eye_openness' : 12000,
+                      'notification' : 100}
+
+# streams sent with a fixed frequency, gaps are detected in them
+PERIODIC_STREAMS = ['gaze', 'user_position', 'eye_openness']
+
+# one record of a stream, the time stamp is a system time stamp in microseconds
+StreamRecord = collections.namedtuple('StreamRecord', ['timeStamp', 'stream', 'data'])
+
+# Bounded buffer of stream records, the oldest records are dropped when it's full
+class RingBuffer:
+
+    def __init__(self, stream, capacity):
+
+        if not isinstance(capacity, numbers.Integral):
+            raise TypeError("capacity should be an integer.")
+        if capacity < 1:
+            raise ValueError("capacity should be positive.")
+
+        self.stream = stream
+        self.capacity = capacity
+        self.records = collections.deque(maxlen = capacity)
+        # number of records dropped because the buffer was full
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    def append(self, timeStamp, data):
+        with self.lock:
+            if len(self.records) == self.capacity:
+                self.dropped += 1
+            self.records.append(StreamRecord(timeStamp, self.stream, data))
+
+    # get and remove all records
+    def read(self):
+        with self.lock:
+            records = list(self.records)
+            self.records.clear()
+        return records
+
+    # get all records without removing them
+    def peek(self):
+        with self.lock:
+            return list(self.records)
+
+    def latest(self):
+        with self.lock:
+            if len(self.records) == 0:
+                return None
+            return self.records[-1]
+
+    def clear(self):
+        with self.lock:
+            self.records.clear()
+
+    def __len__(self):
+        with self.lock:
+            return len(self.records)
+
+
+# Subscribes to the streams of one eyetracker and routes them into ring buffers and listeners
+class SubscriptionManager:
+
+    def __init__(self, eyetracker, capacities = None):
+
+        if eyetracker is None:
+            raise RuntimeError("There is no eyetracker.")
+        if capacities is not None and not isinstance(capacities, dict):
+            raise TypeError("capacities should be a dictionary of stream names and buffer sizes.")
+
+        self.eyetracker = eyetracker
+
+        self.buffers = collections.OrderedDict()
+        for stream in STREAM_TYPES.keys():
+            capacity = DEFAULT_CAPACITIES[stream]
+            if capacities is not None and stream in capacities:
+                capacity = capacities[stream]
+            self.buffers[stream] = RingBuffer(stream, capacity)
+
+        if capacities is not None:
+            for stream in capacities.keys():
+                self.__checkStream(stream)
+
+        # listeners called with the data of every record, by stream name
+        self.listeners = {stream : [] for stream in STREAM_TYPES.keys()}
+
+        # number of active subscriptions by stream name, and the number of them without listener
+        self.subscriptionCounts = {stream : 0 for stream in STREAM_TYPES.keys()}
+        self.anonymousCounts = {stream : 0 for stream in STREAM_TYPES.keys()}
+
+        # streams whose SDK subscription is being made by a thread
+        self.pendingStreams = set()
+
+        # callbacks given to the SDK by stream name, as (subscription type, callback) pairs
+        self.sdkCallbacks = {}
+
+        # acquisition statistics by stream name
+        self.health = collections.OrderedDict((stream, StreamHealth(stream, periodic = stream in PERIODIC_STREAMS))
+                                              for stream in STREAM_TYPES.keys())
+        self.healthDump = None
+
+        self.lock = threading.Lock()
+        # notified when the SDK subscription of a pending stream is made or failed
+        self.subscribed = threading.Condition(self.lock)
+
+    def __checkStream(self, stream):
+        if not isinstance(stream, str):
+            raise TypeError("Stream name must be formatted as a string.")
+        if stream not in STREAM_TYPES:
+            raise ValueError("Unknown stream: " + stream)
+
+    # subscribe to a stream, the optional listener is called with the data of every record
+    # (on the SDK's thread). The SDK subscription is shared by all subscribers of the stream.
+    def subscribe(self, stream, listener = None):
+
+        self.__checkStream(stream)
+        if listener is not None and not callable(listener):
+            raise TypeError("listener should be a callable object.")
+
+        with self.lock:
+            # the subscription is shared only after the SDK call of an other thread returned
+            while stream in self.pendingStreams:
+                self.subscribed.wait()
+            if listener is not None:
+                self.listeners[stream] = self.listeners[stream] + [listener]
+            else:
+                self.anonymousCounts[stream] += 1
+            self.subscriptionCounts[stream] += 1
+            if self.subscriptionCounts[stream] > 1:
+                return
+
+            sdkCallbacks = []
+            for constantName in STREAM_TYPES[stream]:
+                subscriptionType = getattr(tobii, constantName, None)
+                if subscriptionType is None:
+                    continue
+                sdkCallbacks.append((subscriptionType, self.__createCallback(stream, subscriptionType)))
+            if len(sdkCallbacks) == 0:
+                self.__clearStream(stream)
+                raise RuntimeError("The installed SDK does not support the stream: " + stream)
+            self.sdkCallbacks[stream] = sdkCallbacks
+            self.pendingStreams.add(stream)
+
+        self.health[stream].restart()
+        if stream == 'gaze':
+            self.__updateNominalFrequency()
+
+        subscribed = []
+        try:
+            for subscriptionType, callback in sdkCallbacks:
+                self.eyetracker.subscribe_to(subscriptionType, callback, as_dictionary = True)
+                subscribed.append((subscriptionType, callback))
+        except Exception:
+            # e.g. the eyetracker does not support the stream, leave it unsubscribed
+            for subscriptionType, callback in subscribed:
+                self.eyetracker.unsubscribe_from(subscriptionType, callback)
+            with self.lock:
+                self.__clearStream(stream)
+                self.pendingStreams.discard(stream)
+                self.subscribed.notify_all()
+            raise
+
+        with self.lock:
+            self.pendingStreams.discard(stream)
+            self.subscribed.notify_all()
+
+    # remove a subscription of a stream (and its listener), the SDK subscription
+    # is stopped when the last subscriber is removed. Removing a listener which is not
+    # subscribed (e.g. for the second time) doesn't change the other subscriptions.
+    def unsubscribe(self, stream, listener = None):
+
+        self.__checkStream(stream)
+
+        with self.lock:
+            while stream in self.pendingStreams:
+                self.subscribed.wait()
+            if listener is None:
+                if self.anonymousCounts[stream] == 0:
+                    return
+                self.anonymousCounts[stream] -= 1
+            elif listener in self.listeners[stream]:
+                listeners = list(self.listeners[stream])
+                listeners.remove(listener)
+                self.listeners[stream] = listeners
+            else:
+                return
+            self.subscriptionCounts[stream] -= 1
+            if self.subscriptionCounts[stream] > 0:
+                return
+            sdkCallbacks = self.__clearStream(stream)
+
+        for subscriptionType, callback in sdkCallbacks:
+            self.eyetracker.unsubscribe_from(subscriptionType, callback)
+
+    # stop all SDK subscriptions
+    def unsubscribeAll(self):
+        for stream in STREAM_TYPES.keys():
+            with self.lock:
+                while stream in self.pendingStreams:
+                    self.subscribed.wait()
+                if self.subscriptionCounts[stream] == 0:
+                    continue
+                sdkCallbacks = self.__clearStream(stream)
+
+            for subscriptionType, callback in sdkCallbacks:
+                self.eyetracker.unsubscribe_from(subscriptionType, callback)
+
+    # remove all subscriptions of a stream, returns its SDK callbacks (called with the lock held)
+    def __clearStream(self, stream):
+        self.subscriptionCounts[stream] = 0
+        self.anonymousCounts[stream] = 0
+        self.listeners[stream] = []
+        return self.sdkCallbacks.pop(stream, [])
+
+    def isSubscribed(self, stream):
+        self.__checkStream(stream)
+        return self.subscriptionCounts[stream] > 0
+
+    def getBuffer(self, stream):
+        self.__checkStream(stream)
+        return self.buffers[stream]
+
+    # get and remove the buffered records of a stream
+    def read(self, stream):
+        return self.getBuffer(stream).read()
+
+    # last record of a stream, or None
+    def latest(self, stream):
+        return self.getBuffer(stream).latest()
+
+    # get and remove the buffered records of more streams, ordered by time stamp
+    def readMerged(self, streams = None):
+        if streams is None:
+            streams = list(STREAM_TYPES.keys())
+        if not isinstance(streams, list):
+            raise TypeError("streams should be a list of stream names.")
+
+        records = []
+        for stream in streams:
+            records.extend(self.read(stream))
+        records.sort(key = lambda record : record.timeStamp)
+        return records
+
+    # health snapshot of a stream, or of all streams by stream name
+    def getHealth(self, stream = None):
+        if stream is None:
+            return collections.OrderedDict((name, self.getHealth(name)) for name in STREAM_TYPES.keys())
+
+        self.__checkStream(stream)
+        snapshot = self.health[stream].snapshot()
+        # records lost because nobody read the buffer
+        snapshot['buffer_dropped'] = self.buffers[stream].dropped
+        return snapshot
+
+    # reset the health statistics of a stream, or of all streams
+    def resetHealth(self, stream = None):
+        if stream is None:
+            for health in self.health.values():
+                health.reset()
+            return
+        self.__checkStream(stream)
+        self.health[stream].reset()
+
+    # write the health snapshots of the subscribed streams every interval seconds
+    # (logged, or passed to the callback)
+    def startHealthDump(self, interval = 10.0, callback = None):
+        healthDump = HealthDump(self, interval, callback)
+        self.stopHealthDump()
+        self.healthDump = healthDump
+        healthDump.start()
+        return healthDump
+
+    def stopHealthDump(self):
+        if self.healthDump is not None:
+            self.healthDump.stop()
+            self.healthDump = None
+
+    # the gaps of the gaze stream are measured with the eyetracker's output frequency
+    def __updateNominalFrequency(self):
+        try:
+            frequency = self.eyetracker.get_gaze_output_frequency()
+        except Exception:
+            return
+        if isinstance(frequency, numbers.Number) and frequency > 0:
+            self.health['gaze'].setNominalFrequency(frequency)
+
+    def __createCallback(self, stream, subscriptionType):
+
+        buffer = self.buffers[stream]
+        health = self.health[stream]
+
+        def streamCallback(data):
+            arrivalTimeStamp = tobii.get_system_time_stamp()
+            callbackStart = time.perf_counter()
+
+            # notifications of all types use the same buffer
+            if stream == 'notification' and isinstance(data, dict) and 'notification_type' not in data:
+                data = dict(data)
+                data['notification_type'] = subscriptionType
+
+            timeStamp = self.__getTimeStamp(data)
+            try:
+                buffer.append(arrivalTimeStamp if timeStamp is None else timeStamp, data)
+
+                for listener in self.listeners[stream]:
+                    listener(data)
+            finally:
+                systemTimeStamp = data.get('system_time_stamp') if isinstance(data, dict) else None
+                health.update(data, systemTimeStamp, arrivalTimeStamp, time.perf_counter() - callbackStart)
+
+        return streamCallback
+
+    # system time stamp of the data, or None
+    def __getTimeStamp(self, data):
+        if isinstance(data, dict):
+            if 'system_time_stamp' in data:
+                return data['system_time_stamp']
+            if 'system_request_time_stamp' in data:
+                return data['system_request_time_stamp']
+        return None
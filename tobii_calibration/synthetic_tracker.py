@@ -0,0 +1,428 @@
+# -*- coding: utf-8 -*-
+
+# Synthetic stand-in for a Tobii eyetracker
+
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+# Summary: Implements the part of the tobii_research.EyeTracker API used by TobiiHelper
+# (device information, trackbox, display area, gaze output frequency, subscriptions and
+# screen based calibration). Gaze data is emitted from a background thread at the set
+# frequency (60 - 1200 Hz) along a scripted trajectory, so the whole pipeline can be run
+# and load tested without eyetracker hardware.
+
+import math
+import numbers
+import threading
+import time
+
+import numpy as np
+
+try:
+    from .lazy_import import LazyModule
+except ImportError:
+    from lazy_import import LazyModule
+
+tobii = LazyModule('tobii_research')
+
+# ----- Scripted trajectories -----
+# A trajectory is a function getting the elapsed time in seconds and returning the gaze
+# position in normalized display area coordinates ((0, 0) is the upper left corner), or
+# None when the eyes are not found (e.g. blink).
+
+# gaze fixed at one point
+def fixationTrajectory(point = (0.5, 0.5)):
+
+    if not isinstance(point, tuple) or len(point) != 2:
+        raise TypeError("point should be a tuple of two coordinates.")
+
+    def trajectory(elapsed):
+        return point
+    return trajectory
+
+
+# gaze jumps between the given points, staying on every point for fixationDuration seconds
+def saccadeTrajectory(pointList, fixationDuration = 1.0, loop = True):
+
+    if not isinstance(pointList, list) or len(pointList) == 0:
+        raise TypeError("pointList should be a non-empty list of points.")
+    if not isinstance(fixationDuration, numbers.Number):
+        raise TypeError("fixationDuration should be a number.")
+    if fixationDuration <= 0:
+        raise ValueError("fixationDuration should be positive.")
+
+    def trajectory(elapsed):
+        index = int(elapsed / fixationDuration)
+        if loop:
+            index %= len(pointList)
+        else:
+            index = min(index, len(pointList) - 1)
+        return pointList[index]
+    return trajectory
+
+
+# gaze moves along a circle with the given period in seconds
+def circleTrajectory(center = (0.5, 0.5), radius = 0.3, period = 2.0):
+
+    if not isinstance(period, numbers.Number):
+        raise TypeError("period should be a number.")
+    if period <= 0:
+        raise ValueError("period should be positive.")
+
+    def trajectory(elapsed):
+        angle = 2.0 * math.pi * elapsed / period
+        return (center[0] + radius * math.cos(angle),
+                center[1] + radius * math.sin(angle))
+    return trajectory
+
+
+# Screen based calibration of the SyntheticEyeTracker, the collected samples are the
+# calibration points with the eyetracker's calibration error and noise
+class SyntheticCalibration:
+
+    def __init__(self, eyetracker, monocular = False):
+        self.eyetracker = eyetracker
+        self.monocular = monocular
+        self.inCalibrationMode = False
+        # collected eyes by calibration points
+        self.collectedPoints = []
+        self.collectedEyes = {}
+
+    def enter_calibration_mode(self):
+        if self.inCalibrationMode:
+            raise RuntimeError("The eyetracker is already in calibration mode.")
+        self.inCalibrationMode = True
+
+    def leave_calibration_mode(self):
+        self.inCalibrationMode = False
+
+    def collect_data(self, x, y, eye = None):
+        if not self.inCalibrationMode:
+            raise RuntimeError("The eyetracker is not in calibration mode.")
+
+        eyes = self.__getEyes(eye)
+        point = (x, y)
+        if point not in self.collectedEyes:
+            self.collectedPoints.append(point)
+            self.collectedEyes[point] = set()
+        self.collectedEyes[point].update(eyes)
+
+        self.eyetracker.sdkCallCount += 1
+        if self.monocular and eye is not None:
+            if eye == tobii.SELECTED_EYE_LEFT:
+                return tobii.CALIBRATION_STATUS_SUCCESS_LEFT_EYE
+            if eye == tobii.SELECTED_EYE_RIGHT:
+                return tobii.CALIBRATION_STATUS_SUCCESS_RIGHT_EYE
+        return tobii.CALIBRATION_STATUS_SUCCESS
+
+    def discard_data(self, x, y, eye = None):
+        if not self.inCalibrationMode:
+            raise RuntimeError("The eyetracker is not in calibration mode.")
+
+        point = (x, y)
+        if point not in self.collectedEyes:
+            return
+        self.collectedEyes[point].difference_update(self.__getEyes(eye))
+        if len(self.collectedEyes[point]) == 0:
+            self.collectedPoints.remove(point)
+            del self.collectedEyes[point]
+
+    def compute_and_apply(self):
+        if not self.inCalibrationMode:
+            raise RuntimeError("The eyetracker is not in calibration mode.")
+
+        self.eyetracker.sdkCallCount += 1
+        if len(self.collectedPoints) == 0:
+            return tobii.CalibrationResult(tobii.CALIBRATION_STATUS_FAILURE, ())
+
+        calibrationPoints = []
+        for point in self.collectedPoints:
+            samples = []
+            for i in range(self.eyetracker.calibrationSampleCount):
+                eyeData = []
+                for eye in ['left', 'right']:
+                    if eye in self.collectedEyes[point]:
+                        position = self.eyetracker.distortGazePoint(point)
+                        eyeData.append(tobii.CalibrationEyeData(position, tobii.VALIDITY_VALID_AND_USED))
+                    else:
+                        eyeData.append(tobii.CalibrationEyeData((math.nan, math.nan),
+                                                                tobii.VALIDITY_INVALID_AND_NOT_USED))
+                samples.append(tobii.CalibrationSample(eyeData[0], eyeData[1]))
+            calibrationPoints.append(tobii.CalibrationPoint(point, tuple(samples)))
+
+        return tobii.CalibrationResult(tobii.CALIBRATION_STATUS_SUCCESS, tuple(calibrationPoints))
+
+    def __getEyes(self, eye):
+        if eye is None or eye == tobii.SELECTED_EYE_BOTH:
+            return {'left', 'right'}
+        if eye == tobii.SELECTED_EYE_LEFT:
+            return {'left'}
+        if eye == tobii.SELECTED_EYE_RIGHT:
+            return {'right'}
+        raise ValueError("Invalid eye: " + str(eye))
+
+
+class SyntheticEyeTracker:
+
+    def __init__(self, frequency = 600, trajectory = None, eyePosition = (0.0, 0.0, 650.0),
+                 calibrationError = (0.0, 0.0), noise = 0.0, seed = None,
+                 serialNumber = 'SYNTHETIC-0001'):
+
+        self.__checkFrequency(frequency)
+        if trajectory is not None and not callable(trajectory):
+            raise TypeError("trajectory should be a callable object.")
+        if not isinstance(eyePosition, tuple) or len(eyePosition) != 3:
+            raise TypeError("eyePosition should be a tuple of three coordinates.")
+        if not isinstance(calibrationError, tuple) or len(calibrationError) != 2:
+            raise TypeError("calibrationError should be a tuple of two coordinates.")
+        if not isinstance(noise, numbers.Number):
+            raise TypeError("noise should be a number.")
+        if noise < 0:
+            raise ValueError("noise should not be negative.")
+        if not isinstance(serialNumber, str):
+            raise TypeError("Serial number must be formatted as a string.")
+
+        # device information
+        self.address = 'tobii-synthetic://' + serialNumber
+        self.serial_number = serialNumber
+        self.model = 'Synthetic eyetracker'
+        self.device_name = 'synthetic'
+        self.firmware_version = '0.0.0'
+
+        self.frequency = frequency
+        if trajectory is None:
+            trajectory = fixationTrajectory()
+        self.trajectory = trajectory
+        # center of the eyes in the user coordinate system (mm)
+        self.eyePosition = eyePosition
+        # offset and standard deviation of the gaze points, in normalized display area units
+        self.calibrationError = calibrationError
+        self.noise = noise
+        self.random = np.random.RandomState(seed)
+        # distance of the eyes in mm
+        self.interocularDistance = 64.0
+        # number of samples per eye of one calibration point
+        self.calibrationSampleCount = 8
+        # time between two time synchronization data in seconds
+        self.timeSyncInterval = 0.5
+        # device clock = system clock + offset
+        self.deviceClockOffset = 1000000
+
+        # callbacks by subscription types
+        self.callbacks = {}
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stopEvent = threading.Event()
+
+        # statistics of the emitted data
+        self.sampleCount = 0
+        self.sdkCallCount = 0
+
+# ----- Parts of the tobii_research.EyeTracker API -----
+
+    def get_track_box(self):
+        track_box_dict = {}
+        track_box_dict['front_lower_left'] = (-150.0, -121.0, 500.0)
+        track_box_dict['front_lower_right'] = (150.0, -121.0, 500.0)
+        track_box_dict['front_upper_left'] = (-150.0, 121.0, 500.0)
+        track_box_dict['front_upper_right'] = (150.0, 121.0, 500.0)
+        track_box_dict['back_lower_left'] = (-150.0, -121.0, 800.0)
+        track_box_dict['back_lower_right'] = (150.0, -121.0, 800.0)
+        track_box_dict['back_upper_left'] = (-150.0, 121.0, 800.0)
+        track_box_dict['back_upper_right'] = (150.0, 121.0, 800.0)
+        return tobii.TrackBox(track_box_dict)
+
+    def get_display_area(self):
+        display_area_dict = {}
+        display_area_dict['top_left'] = (-237.45, 259.32, 93.58)
+        display_area_dict['top_right'] = (239.19, 259.32, 93.58)
+        display_area_dict['bottom_right'] = (239.19, 13.21, -10.88)
+        display_area_dict['bottom_left'] = (-237.45, 13.21, -10.88)
+        display_area_dict['width'] = 267.36
+        display_area_dict['height'] = 476.64
+        return tobii.DisplayArea(display_area_dict)
+
+    def get_all_gaze_output_frequencies(self):
+        return (60.0, 120.0, 300.0, 600.0, 1200.0)
+
+    def get_gaze_output_frequency(self):
+        return self.frequency
+
+    def set_gaze_output_frequency(self, frequency):
+        self.__checkFrequency(frequency)
+        self.frequency = frequency
+
+    # data is always given as dictionaries
+    def subscribe_to(self, subscription_type, callback, as_dictionary = False):
+        if not callable(callback):
+            raise TypeError("callback should be a callable object.")
+
+        with self.lock:
+            self.callbacks[subscription_type] = self.callbacks.get(subscription_type, []) + [callback]
+            startThread = self.thread is None
+            if startThread:
+                self.stopEvent.clear()
+                self.thread = threading.Thread(target = self.emitData, daemon = True)
+        if startThread:
+            self.thread.start()
+
+    def unsubscribe_from(self, subscription_type, callback = None):
+        with self.lock:
+            callbacks = list(self.callbacks.get(subscription_type, []))
+            if callback is None:
+                callbacks = []
+            elif callback in callbacks:
+                callbacks.remove(callback)
+            if len(callbacks) > 0:
+                self.callbacks[subscription_type] = callbacks
+            else:
+                self.callbacks.pop(subscription_type, None)
+
+            thread = None
+            if len(self.callbacks) == 0 and self.thread is not None:
+                thread = self.thread
+                self.thread = None
+                self.stopEvent.set()
+
+        # the last callback can be removed from a callback too
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def unsubscribe_all(self):
+        with self.lock:
+            subscriptionTypes = list(self.callbacks.keys())
+        for subscriptionType in subscriptionTypes:
+            self.unsubscribe_from(subscriptionType)
+
+# ----- Data generation, can be overridden -----
+
+    # gaze data dictionary of the given time (in seconds from the start of the stream)
+    def createGazeData(self, elapsed, systemTimeStamp):
+
+        gazePoint = self.trajectory(elapsed)
+        valid = gazePoint is not None and not math.isnan(gazePoint[0]) and not math.isnan(gazePoint[1])
+
+        gazeData = {}
+        for eye, sign in [('left', -1.0), ('right', 1.0)]:
+            if valid:
+                eyePoint = self.distortGazePoint(gazePoint)
+                userPoint = self.displayAreaToUser(eyePoint)
+                origin = (self.eyePosition[0] + sign * self.interocularDistance / 2,
+                          self.eyePosition[1], self.eyePosition[2])
+                trackBoxOrigin = self.userToTrackBox(origin)
+                pupil = 3.0
+            else:
+                eyePoint = (math.nan, math.nan)
+                userPoint = (math.nan, math.nan, math.nan)
+                origin = (math.nan, math.nan, math.nan)
+                trackBoxOrigin = (math.nan, math.nan, math.nan)
+                pupil = math.nan
+            gazeData[eye + '_gaze_point_on_display_area'] = eyePoint
+            gazeData[eye + '_gaze_point_in_user_coordinate_system'] = userPoint
+            gazeData[eye + '_gaze_point_validity'] = int(valid)
+            gazeData[eye + '_pupil_diameter'] = pupil
+            gazeData[eye + '_pupil_validity'] = int(valid)
+            gazeData[eye + '_gaze_origin_in_user_coordinate_system'] = origin
+            gazeData[eye + '_gaze_origin_in_trackbox_coordinate_system'] = trackBoxOrigin
+            gazeData[eye + '_gaze_origin_validity'] = int(valid)
+
+        gazeData['device_time_stamp'] = systemTimeStamp + self.deviceClockOffset
+        gazeData['system_time_stamp'] = systemTimeStamp
+        return gazeData
+
+    # user position guide data derived from a gaze data dictionary
+    def createUserPositionData(self, gazeData):
+        userPositionData = {}
+        for eye in ['left', 'right']:
+            userPositionData[eye + '_user_position'] = gazeData[eye + '_gaze_origin_in_trackbox_coordinate_system']
+            userPositionData[eye + '_user_position_validity'] = gazeData[eye + '_gaze_origin_validity']
+        return userPositionData
+
+    # time synchronization data of the given system time stamp
+    def createTimeSyncData(self, systemTimeStamp):
+        return {'system_request_time_stamp' : systemTimeStamp,
+                'device_time_stamp' : systemTimeStamp + self.deviceClockOffset + 50,
+                'system_response_time_stamp' : systemTimeStamp + 100}
+
+    # call the callbacks of a subscription type with the data
+    def sendData(self, subscriptionType, data):
+        with self.lock:
+            callbacks = self.callbacks.get(subscriptionType, [])
+        for callback in callbacks:
+            callback(data)
+
+    # gaze point with calibration error and noise
+    def distortGazePoint(self, point):
+        x = point[0] + self.calibrationError[0]
+        y = point[1] + self.calibrationError[1]
+        if self.noise > 0:
+            x += self.random.normal(0.0, self.noise)
+            y += self.random.normal(0.0, self.noise)
+        return (x, y)
+
+    # emit data on the background thread until the last callback is unsubscribed (stopEvent is set)
+    def emitData(self):
+
+        startTime = time.perf_counter()
+        startTimeStamp = tobii.get_system_time_stamp()
+        nextSample = 0.0
+        nextTimeSync = 0.0
+
+        while not self.stopEvent.is_set():
+            delay = startTime + nextSample - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            systemTimeStamp = startTimeStamp + int(round(nextSample * 1000000))
+            gazeData = None
+            if tobii.EYETRACKER_GAZE_DATA in self.callbacks or \
+               tobii.EYETRACKER_USER_POSITION_GUIDE in self.callbacks:
+                gazeData = self.createGazeData(nextSample, systemTimeStamp)
+                self.sendData(tobii.EYETRACKER_GAZE_DATA, gazeData)
+                if tobii.EYETRACKER_USER_POSITION_GUIDE in self.callbacks:
+                    self.sendData(tobii.EYETRACKER_USER_POSITION_GUIDE, self.createUserPositionData(gazeData))
+                self.sampleCount += 1
+
+            if nextSample >= nextTimeSync:
+                self.sendData(tobii.EYETRACKER_TIME_SYNCHRONIZATION_DATA, self.createTimeSyncData(systemTimeStamp))
+                nextTimeSync += self.timeSyncInterval
+
+            nextSample += 1.0 / self.frequency
+
+# ----- Coordinate conversions -----
+
+    # normalized trackbox coordinates of a point given in the user coordinate system (mm)
+    def userToTrackBox(self, point):
+        trackBox = self.get_track_box()
+        width = trackBox.front_lower_right[0] - trackBox.front_lower_left[0]
+        height = trackBox.front_upper_left[1] - trackBox.front_lower_left[1]
+        depth = trackBox.back_lower_left[2] - trackBox.front_lower_left[2]
+        return ((trackBox.front_lower_right[0] - point[0]) / width,
+                (trackBox.front_upper_left[1] - point[1]) / height,
+                (point[2] - trackBox.front_lower_left[2]) / depth)
+
+    # position in the user coordinate system (mm) of a point given in normalized display area coordinates
+    def displayAreaToUser(self, point):
+        displayArea = self.get_display_area()
+        topLeft = np.array(displayArea.top_left)
+        topRight = np.array(displayArea.top_right)
+        bottomLeft = np.array(displayArea.bottom_left)
+        position = topLeft + (topRight - topLeft) * point[0] + (bottomLeft - topLeft) * point[1]
+        return tuple(float(coordinate) for coordinate in position)
+
+# ----- Functions of the stand-in -----
+
+    # calibration object used by TobiiHelper instead of tobii.ScreenBasedCalibration
+    def createCalibration(self, monocular = False):
+        return SyntheticCalibration(self, monocular)
+
+    def isRunning(self):
+        return self.thread is not None
+
+    def __checkFrequency(self, frequency):
+        if not isinstance(frequency, numbers.Number):
+            raise TypeError("frequency should be a number.")
+        if frequency < 60 or frequency > 1200:
+            raise ValueError("frequency should be between 60 and 1200 Hz.")
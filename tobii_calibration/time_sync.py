@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+
+# Clock synchronisation between the eyetracker, the system and the experiment
+
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+# Summary: Subscribes to the time synchronisation stream of the Tobii Pro SDK and keeps
+# streaming linear regression estimates of the offset and the drift between the
+# eyetracker's clock (device time stamps), the system clock (system time stamps, both
+# in microseconds) and the experiment clock (PsychoPy's clock in seconds by default).
+# Any sample time stamp can be mapped into experiment time with these estimates.
+
+import collections
+import numbers
+import threading
+
+try:
+    from .lazy_import import LazyModule
+except ImportError:
+    from lazy_import import LazyModule
+
+tobii = LazyModule('tobii_research')
+
+# Streaming least squares fit of y = intercept + slope * x over the last windowSize points
+class StreamingLinearRegression:
+
+    def __init__(self, windowSize = 200, nominalSlope = 1.0):
+
+        if not isinstance(windowSize, numbers.Integral):
+            raise TypeError("windowSize should be an integer.")
+        if windowSize < 2:
+            raise ValueError("windowSize should be at least 2.")
+        if not isinstance(nominalSlope, numbers.Number):
+            raise TypeError("nominalSlope should be a number.")
+
+        self.windowSize = windowSize
+        # slope used while there are not enough points for the fit
+        self.nominalSlope = nominalSlope
+        self.points = collections.deque()
+        self.updateCount = 0
+        # the sums are calculated relative to an anchor point to keep the numbers small
+        self.anchor = None
+        self.__resetSums()
+
+    def __resetSums(self):
+        self.sumX = 0.0
+        self.sumY = 0.0
+        self.sumXX = 0.0
+        self.sumXY = 0.0
+
+    def __addToSums(self, x, y, sign):
+        dx = x - self.anchor[0]
+        dy = y - self.anchor[1]
+        self.sumX += sign * dx
+        self.sumY += sign * dy
+        self.sumXX += sign * dx * dx
+        self.sumXY += sign * dx * dy
+
+    # recalculate the sums from the window, to get rid of the accumulated rounding errors
+    def __recalculateSums(self):
+        self.anchor = self.points[0]
+        self.__resetSums()
+        for x, y in self.points:
+            self.__addToSums(x, y, 1.0)
+
+    def add(self, x, y):
+        if not isinstance(x, numbers.Number) or not isinstance(y, numbers.Number):
+            raise TypeError("x and y should be numbers.")
+
+        if self.anchor is None:
+            self.anchor = (x, y)
+
+        self.points.append((x, y))
+        self.__addToSums(x, y, 1.0)
+
+        if len(self.points) > self.windowSize:
+            oldX, oldY = self.points.popleft()
+            self.__addToSums(oldX, oldY, -1.0)
+
+        self.updateCount += 1
+        if self.updateCount % self.windowSize == 0:
+            self.__recalculateSums()
+
+    def count(self):
+        return len(self.points)
+
+    def reset(self):
+        self.points.clear()
+        self.updateCount = 0
+        self.anchor = None
+        self.__resetSums()
+
+    # returns the fitted (slope, intercept) with the intercept given at the anchor point:
+    # y = anchorY + intercept + slope * (x - anchorX)
+    def __fit(self):
+        count = len(self.points)
+        if count == 0:
+            raise RuntimeError("No data for the linear regression.")
+
+        meanX = self.sumX / count
+        meanY = self.sumY / count
+        varianceX = self.sumXX - count * meanX * meanX
+        if count < 2 or varianceX <= 0.0:
+            slope = self.nominalSlope
+        else:
+            slope = (self.sumXY - count * meanX * meanY) / varianceX
+        return slope, meanY - slope * meanX
+
+    def slope(self):
+        return self.__fit()[0]
+
+    def estimate(self, x):
+        if not isinstance(x, numbers.Number):
+            raise TypeError("x should be a number.")
+
+        slope, intercept = self.__fit()
+        return self.anchor[1] + intercept + slope * (x - self.anchor[0])
+
+    # relative difference of the fitted and the nominal slope, in parts per million
+    def drift(self):
+        return (self.slope() / self.nominalSlope - 1.0) * 1e6
+
+
+# Maps device, system and experiment time stamps into each other
+class TimeSynchronizer:
+
+    def __init__(self, eyetracker = None, experimentClock = None, windowSize = 200, maxRoundTripFactor = 2.0,
+                 subscriptions = None):
+
+        if experimentClock is not None and not callable(experimentClock):
+            raise TypeError("experimentClock should be a callable returning the time in seconds.")
+        if not isinstance(maxRoundTripFactor, numbers.Number):
+            raise TypeError("maxRoundTripFactor should be a number.")
+        if maxRoundTripFactor < 1.0:
+            raise ValueError("maxRoundTripFactor should be at least 1.0.")
+
+        self.eyetracker = eyetracker
+
+        # subscription layer (SubscriptionManager) used instead of subscribing directly
+        self.subscriptions = subscriptions
+
+        # the PsychoPy clock is used by default
+        if experimentClock is None:
+            from psychopy import core as pcore
+            experimentClock = pcore.getTime
+        self.experimentClock = experimentClock
+
+        # device time stamp (us) -> system time stamp (us)
+        self.deviceToSystemFit = StreamingLinearRegression(windowSize, 1.0)
+        # system time stamp (us) -> experiment time (s)
+        self.systemToExperimentFit = StreamingLinearRegression(windowSize, 1e-6)
+
+        # time sync data with a round trip longer than this factor times the
+        # shortest recent round trip is not accurate enough to be used
+        self.maxRoundTripFactor = maxRoundTripFactor
+        self.roundTrips = collections.deque(maxlen = windowSize)
+
+        self.lock = threading.Lock()
+        self.subscribed = False
+
+    # subscribe to the time synchronisation data of the eyetracker
+    def start(self):
+        if self.eyetracker is None and self.subscriptions is None:
+            raise RuntimeError("There is no eyetracker.")
+        if self.subscribed:
+            return
+
+        # have a first estimate of the experiment clock before the first callback
+        self.sampleExperimentClock()
+        if self.subscriptions is not None:
+            self.subscriptions.subscribe('time_sync', self.addTimeSyncData)
+        else:
+            self.eyetracker.subscribe_to(tobii.EYETRACKER_TIME_SYNCHRONIZATION_DATA,
+                                         self.addTimeSyncData,
+                                         as_dictionary = True)
+        self.subscribed = True
+
+    def stop(self):
+        if self.eyetracker is None and self.subscriptions is None:
+            raise RuntimeError("There is no eyetracker.")
+        if not self.subscribed:
+            return
+
+        if self.subscriptions is not None:
+            self.subscriptions.unsubscribe('time_sync', self.addTimeSyncData)
+        else:
+            self.eyetracker.unsubscribe_from(tobii.EYETRACKER_TIME_SYNCHRONIZATION_DATA,
+                                             self.addTimeSyncData)
+        self.subscribed = False
+
+    # callback of the time synchronisation stream
+    def addTimeSyncData(self, timeSyncData):
+        requestTime = timeSyncData['system_request_time_stamp']
+        responseTime = timeSyncData['system_response_time_stamp']
+        deviceTime = timeSyncData['device_time_stamp']
+
+        roundTrip = responseTime - requestTime
+        if roundTrip < 0:
+            return
+
+        with self.lock:
+            self.roundTrips.append(roundTrip)
+            # skip the delayed responses
+            if roundTrip <= self.maxRoundTripFactor * max(min(self.roundTrips), 1):
+                # the device time stamp is taken somewhere between the request and the response
+                self.deviceToSystemFit.add(deviceTime, (requestTime + responseTime) / 2.0)
+
+        self.sampleExperimentClock()
+
+    # pair the system clock with the experiment clock
+    def sampleExperimentClock(self):
+        beforeTime = tobii.get_system_time_stamp()
+        experimentTime = self.experimentClock()
+        afterTime = tobii.get_system_time_stamp()
+
+        with self.lock:
+            self.systemToExperimentFit.add((beforeTime + afterTime) / 2.0, experimentTime)
+
+    def deviceToSystem(self, deviceTimeStamp):
+        with self.lock:
+            return self.deviceToSystemFit.estimate(deviceTimeStamp)
+
+    def systemToExperiment(self, systemTimeStamp):
+        with self.lock:
+            return self.systemToExperimentFit.estimate(systemTimeStamp)
+
+    def deviceToExperiment(self, deviceTimeStamp):
+        with self.lock:
+            systemTimeStamp = self.deviceToSystemFit.estimate(deviceTimeStamp)
+            return self.systemToExperimentFit.estimate(systemTimeStamp)
+
+    # experiment time of a gaze sample (or any other sample given as a dictionary),
+    # the device time stamp is used when there is time sync data for it
+    def getSampleTime(self, sample):
+        with self.lock:
+            if 'device_time_stamp' in sample and self.deviceToSystemFit.count() > 0:
+                systemTimeStamp = self.deviceToSystemFit.estimate(sample['device_time_stamp'])
+            elif 'system_time_stamp' in sample:
+                systemTimeStamp = sample['system_time_stamp']
+            else:
+                raise ValueError("The sample has no time stamp.")
+            return self.systemToExperimentFit.estimate(systemTimeStamp)
+
+    # drift of the device clock relative to the system clock, in parts per million
+    def getDeviceDrift(self):
+        with self.lock:
+            return self.deviceToSystemFit.drift()
+
+    # drift of the system clock relative to the experiment clock, in parts per million
+    def getExperimentDrift(self):
+        with self.lock:
+            return self.systemToExperimentFit.drift()
+
+    # system time stamp minus device time stamp at the given device time, in microseconds
+    def getDeviceOffset(self, deviceTimeStamp):
+        return self.deviceToSystem(deviceTimeStamp) - deviceTimeStamp
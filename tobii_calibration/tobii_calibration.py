@@ -24,29 +24,241 @@
 # added.
 
 # -----Import Required Libraries-----
-import pyglet
-from psychopy import core as pcore
-from psychopy import monitors, visual, event
-
 import numpy as np
 import numbers
 import math
 import collections
 import os
+import threading
+import time
+import json
+import logging
+import contextlib
 
-import tobii_research as tobii
-
-# localization
+try:
+    from .lazy_import import LazyModule
+    from .time_sync import TimeSynchronizer
+    from .subscriptions import SubscriptionManager
+    from .analysis import ada2PsychoPix, calibrationResultToArrays
+    from .event_log import logEvent, ensureLogQueue
+    from .clock import Clock, PsychoPyClock, VirtualClock
+    from .profiling import PhaseProfiler, NullSpan
+    from .tracing import TraceRecorder, TracingProxy
+    from .shared_acquisition import AcquisitionProcess
+    from .stream_server import GazeStreamServer
+    from .monitor_server import MonitorServer
+except ImportError:
+    from lazy_import import LazyModule
+    from time_sync import TimeSynchronizer
+    from subscriptions import SubscriptionManager
+    from analysis import ada2PsychoPix, calibrationResultToArrays
+    from event_log import logEvent, ensureLogQueue
+    from clock import Clock, PsychoPyClock, VirtualClock
+    from profiling import PhaseProfiler, NullSpan
+    from tracing import TraceRecorder, TracingProxy
+    from shared_acquisition import AcquisitionProcess
+    from stream_server import GazeStreamServer
+    from monitor_server import MonitorServer
+
+# GUI and SDK modules are imported on first use
+pyglet = LazyModule('pyglet')
+pcore = LazyModule('psychopy.core')
+monitors = LazyModule('psychopy.monitors')
+visual = LazyModule('psychopy.visual')
+event = LazyModule('psychopy.event')
+tobii = LazyModule('tobii_research')
+
+# seconds between two checks of the keyboard or of a worker thread, waited through the clock
+POLL_INTERVAL = 0.01
+
+# localization, the catalog is loaded when the first message is translated
 import gettext
 
-try:
-    dir_path = os.path.dirname(os.path.realpath(__file__))
-    locales_dir_path = os.path.join(dir_path, "locales")
-    current_translation = gettext.translation("all_strings", localedir=locales_dir_path, languages=['hu'])
-    current_translation.install()
-    _ = current_translation.gettext
-except:
-    _ = gettext.gettext
+current_translation = None
+
+def _(message):
+    global current_translation
+    if current_translation is None:
+        try:
+            dir_path = os.path.dirname(os.path.realpath(__file__))
+            locales_dir_path = os.path.join(dir_path, "locales")
+            translation = gettext.translation("all_strings", localedir=locales_dir_path, languages=['hu'])
+            translation.install()
+        except:
+            translation = gettext.NullTranslations()
+        current_translation = translation
+    return current_translation.gettext(message)
+
+# ----- Timing profile of the calibration sequence -----
+# Holds every delay used between the phases of the calibration sequence (in seconds),
+# so the whole flow can be made faster or slower without touching the routines.
+class TimingProfile:
+
+    def __init__(self,
+                 warmUpDelay = 0.5,
+                 instructionTimeout = 10,
+                 instructionDelay = 3,
+                 trackBoxExitDelay = 2,
+                 pointMoveFrames = 50,
+                 pointSettleDelay = 0.5,
+                 pointFocusDelay = 0.5,
+                 pointCollectedDelay = 0.3,
+                 pointLeaveDelay = 0.2,
+                 pursuitSegmentDuration = 2.0,
+                 recalibrationDelay = 3,
+                 calibrationResultDelay = 3,
+                 validationDelay = 3,
+                 finishDelay = 3):
+
+        delays = collections.OrderedDict([('warmUpDelay', warmUpDelay),
+                                          ('instructionTimeout', instructionTimeout),
+                                          ('instructionDelay', instructionDelay),
+                                          ('trackBoxExitDelay', trackBoxExitDelay),
+                                          ('pointSettleDelay', pointSettleDelay),
+                                          ('pointFocusDelay', pointFocusDelay),
+                                          ('pointCollectedDelay', pointCollectedDelay),
+                                          ('pointLeaveDelay', pointLeaveDelay),
+                                          ('pursuitSegmentDuration', pursuitSegmentDuration),
+                                          ('recalibrationDelay', recalibrationDelay),
+                                          ('calibrationResultDelay', calibrationResultDelay),
+                                          ('validationDelay', validationDelay),
+                                          ('finishDelay', finishDelay)])
+        for name, value in delays.items():
+            if not isinstance(value, numbers.Number):
+                raise TypeError(name + " should be a number.")
+            if value < 0:
+                raise ValueError(name + " can't be negative.")
+
+        if not isinstance(pointMoveFrames, numbers.Integral):
+            raise TypeError("pointMoveFrames should be an integer.")
+        if pointMoveFrames < 1:
+            raise ValueError("pointMoveFrames should be positive.")
+
+        # waiting for the eye tracker to warm up after subscribing to the gaze data
+        self.warmUpDelay = warmUpDelay
+        # maximum time for reading an instruction screen
+        self.instructionTimeout = instructionTimeout
+        # pause after the instructions of the calibration
+        self.instructionDelay = instructionDelay
+        # pause after leaving the track box screen
+        self.trackBoxExitDelay = trackBoxExitDelay
+        # number of frames used for moving / resizing the calibration point
+        self.pointMoveFrames = pointMoveFrames
+        # let the eyes settle after the calibration point reached its position
+        self.pointSettleDelay = pointSettleDelay
+        # let the eyes focus after the calibration point was shrunk
+        self.pointFocusDelay = pointFocusDelay
+        # pause after collecting the data of a calibration point
+        self.pointCollectedDelay = pointCollectedDelay
+        # pause before moving to the next calibration point
+        self.pointLeaveDelay = pointLeaveDelay
+        # time of moving between two calibration points in smooth pursuit mode
+        self.pursuitSegmentDuration = pursuitSegmentDuration
+        # pauses before recalibrating some of the points
+        self.recalibrationDelay = recalibrationDelay
+        # showing the message about the success / failure of the calibration
+        self.calibrationResultDelay = calibrationResultDelay
+        # pause before starting the validation
+        self.validationDelay = validationDelay
+        # showing the closing message of the full calibration
+        self.finishDelay = finishDelay
+
+    # get one of the predefined profiles: 'default', 'fast' or 'accessibility'
+    @staticmethod
+    def named(profileName):
+        if not isinstance(profileName, str):
+            raise TypeError("Timing profile name must be formatted as a string.")
+
+        if profileName == 'default':
+            return TimingProfile()
+        # for experienced participants
+        elif profileName == 'fast':
+            return TimingProfile(warmUpDelay = 0.2,
+                                 instructionTimeout = 10,
+                                 instructionDelay = 0.5,
+                                 trackBoxExitDelay = 0.3,
+                                 pointMoveFrames = 30,
+                                 pointSettleDelay = 0.2,
+                                 pointFocusDelay = 0.2,
+                                 pointCollectedDelay = 0.1,
+                                 pointLeaveDelay = 0.1,
+                                 pursuitSegmentDuration = 1.5,
+                                 recalibrationDelay = 0.75,
+                                 calibrationResultDelay = 1,
+                                 validationDelay = 0.5,
+                                 finishDelay = 1)
+        # for participants who need more time to read and to follow the points
+        elif profileName == 'accessibility':
+            return TimingProfile(warmUpDelay = 0.5,
+                                 instructionTimeout = 30,
+                                 instructionDelay = 4,
+                                 trackBoxExitDelay = 3,
+                                 pointMoveFrames = 80,
+                                 pointSettleDelay = 1.0,
+                                 pointFocusDelay = 0.8,
+                                 pointCollectedDelay = 0.5,
+                                 pointLeaveDelay = 0.4,
+                                 pursuitSegmentDuration = 3.0,
+                                 recalibrationDelay = 5,
+                                 calibrationResultDelay = 5,
+                                 validationDelay = 4,
+                                 finishDelay = 5)
+        else:
+            raise ValueError("Unknown timing profile: " + profileName)
+
+# ----- Cache of the monitor profiles -----
+# Listing PsychoPy's monitor directory and saving a monitor profile is slow (e.g. on a
+# network mounted home directory), so the profiles are kept in the process, keyed by
+# name and dimensions, and a profile is only saved if its geometry changed.
+class MonitorProfileCache:
+
+    def __init__(self):
+        self.monitorNames = None
+        self.profiles = {}
+        # last saved dimensions by monitor names
+        self.savedSizes = {}
+        self.lock = threading.Lock()
+
+    # names of the monitors known by PsychoPy, the monitor directory is listed only once
+    def getMonitorNames(self):
+        with self.lock:
+            if self.monitorNames is None:
+                self.monitorNames = list(monitors.getAllMonitors())
+            return list(self.monitorNames)
+
+    # monitor object with the given dimensions
+    def getProfile(self, nameString, dimensions):
+        key = (nameString, tuple(dimensions))
+        with self.lock:
+            thisMon = self.profiles.get(key)
+
+        if thisMon is None:
+            thisMon = monitors.Monitor(nameString)
+            currentSize = thisMon.getSizePix()
+            savedSize = None if currentSize is None else tuple(currentSize)
+            # set monitor dimensions
+            thisMon.setSizePix(dimensions)
+        else:
+            savedSize = self.savedSizes.get(nameString)
+
+        # save monitor calibration only if the geometry changed
+        if savedSize != tuple(dimensions):
+            thisMon.saveMon()
+
+        with self.lock:
+            self.profiles[key] = thisMon
+            self.savedSizes[nameString] = tuple(dimensions)
+            if self.monitorNames is not None and nameString not in self.monitorNames:
+                self.monitorNames.append(nameString)
+        return thisMon
+
+    def clear(self):
+        with self.lock:
+            self.monitorNames = None
+            self.profiles = {}
+            self.savedSizes = {}
+
+monitorProfileCache = MonitorProfileCache()
 
 # -----Class for working with Tobii Eyetrackers -----
 class TobiiHelper:
@@ -55,6 +267,12 @@ class TobiiHelper:
 
         self.eyetracker = None
 
+        self.eyeTrackerCachePath = os.path.join(os.path.expanduser("~"), ".tobii_calibration", "eyetracker.json")
+
+        self.discoveryThread = None
+
+        self.discoveryError = None
+
         self.tbCoordinates = None
 
         self.virtual_trackbox_width = None
@@ -71,67 +289,247 @@ class TobiiHelper:
 
         self.gazeData = None
 
+        self.userPositionGuide = False
+
+        self.userPositionTracking = False
+
+        self.userPositionData = None
+
+        self.timeSync = None
+
+        self.subscriptions = None
+
+        # AcquisitionProcess writing the gaze data into shared memory (None: the gaze data
+        # is subscribed in this process)
+        self.sharedAcquisition = None
+
+        # GazeStreamServer publishing the gaze data and the events to other programs
+        self.streamServer = None
+
+        # MonitorServer serving the operator's monitoring page
+        self.monitor = None
+
+        # listeners called with the message and the fields of every event of the calibration sequence
+        self.eventListeners = []
+
         self.logging = True
 
         self.accuracyInPixel = 50
 
+        self.timing = TimingProfile()
+
+        self.clock = PsychoPyClock()
+
+        self.profiler = None
+
+        self.tracer = None
+
+        # flow ids of the last stored and the last read gaze sample in the trace
+        self.gazeDataFlowId = None
+
+        self.readGazeDataFlowId = None
+
+        self.calibrationMode = 'points'
+
+        self.monocularRecalibration = False
+
+        self.calibrationAccuracy = None
+
 # ----- Functions for initialzing the eyetracker and class attributes -----
 
     # find and connect to a tobii eyetracker
-    def setEyeTracker(self, serialString = None):
+    # The last connected eyetracker is cached, so it's connected directly by its address
+    # next time. If that fails, eyetrackers are searched on a background thread. With
+    # blocking = False the function returns while searching, use waitForEyeTracker() then.
+    # progressCallback(status, details) is called with the following statuses:
+    # 'cached' (details: address), 'searching' (details: number of attempt),
+    # 'connected' (details: serial number), 'failed' (details: error message).
+    def setEyeTracker(self, serialString = None, progressCallback = None, blocking = True):
 
         # if serial number is not given as a string
         if serialString is not None and not isinstance(serialString, str):
             raise TypeError("Serial number must be formatted as a string.")
-
-        # try to find all eyetrackers
-        # Sometimes the eyetracker is not identified for the first time. Try more times.
-        loopCount = 1
-        allTrackers = tobii.find_all_eyetrackers()
-        while not allTrackers and loopCount < 50:
-            allTrackers = tobii.find_all_eyetrackers()
-            pcore.wait(0.02)
-            loopCount += 1
-
-        # if there are no eyetrackers
-        if len(allTrackers) < 1:
-            raise RuntimeError("Cannot find any eyetrackers.")
-
-        # if there is no serialString specified, use first found eyetracker
-        if serialString is None:
-            # use first found eyetracker
-            eyetracker = allTrackers[0]
-            if self.logging:
-                print("Address: " + eyetracker.address)
-                print("Model: " + eyetracker.model)
-                print("Name: " + eyetracker.device_name)
-                print("Serial number: " + eyetracker.serial_number)
-            # create eyetracker object
-            self.eyetracker = eyetracker
-        # if serial number is given as a string
-        else:
-            # get information about available eyetrackers
-            for eyetracker in allTrackers:
-                if eyetracker.serial_number == serialString:
-                    if self.logging:
-                        print("Address: " + eyetracker.address)
-                        print("Model: " + eyetracker.model)
-                        # fine if name is empty
-                        print("Name: " + eyetracker.device_name)
-                        print("Serial number: " + eyetracker.serial_number)
-
-                    # create eyetracker object
-                    self.eyetracker = eyetracker
+        if progressCallback is not None and not callable(progressCallback):
+            raise TypeError("progressCallback should be a callable object.")
+        if not isinstance(blocking, bool):
+            raise TypeError("blocking should be a boolean value.")
+
+        if self.discoveryThread is not None and self.discoveryThread.is_alive():
+            raise RuntimeError("Searching for eyetrackers is already in progress.")
+
+        # try the cached address first
+        eyetracker = self.__connectCachedEyeTracker(serialString, progressCallback)
+        if eyetracker is not None:
+            self.__useEyeTracker(eyetracker)
+            if progressCallback is not None:
+                progressCallback('connected', eyetracker.serial_number)
+            return
+
+        # search for the eyetracker in the background
+        self.discoveryError = None
+        self.discoveryThread = threading.Thread(target = self.__discoverEyeTracker,
+                                                args = (serialString, progressCallback))
+        self.discoveryThread.daemon = True
+        self.discoveryThread.start()
+
+        if blocking:
+            self.waitForEyeTracker()
+
+
+    # wait for the eyetracker searching started by setEyeTracker(blocking = False)
+    def waitForEyeTracker(self, timeout = None):
+
+        if timeout is not None:
+            if not isinstance(timeout, numbers.Number):
+                raise TypeError("timeout should be a number.")
+            if timeout < 0:
+                raise ValueError("timeout can't be negative.")
+
+        if self.discoveryThread is not None:
+            self.discoveryThread.join(timeout)
+            if self.discoveryThread.is_alive():
+                raise RuntimeError("Searching for eyetrackers is still in progress.")
+
+        # raise the error of the searching on the caller's thread
+        if self.discoveryError is not None:
+            error = self.discoveryError
+            self.discoveryError = None
+            raise error
 
         # check to see that eyetracker is connected
         if self.eyetracker is None:
-            raise RuntimeError("Eyetracker did not connect. Check serial number?")
-        elif self.logging:
-            print("Eyetracker connected successfully.")
+            raise RuntimeError("There is no eyetracker.")
+
+        return self.eyetracker
+
+
+    # set the file used for caching the last connected eyetracker, None disables caching
+    def setEyeTrackerCache(self, cachePath):
+        if cachePath is not None and not isinstance(cachePath, str):
+            raise TypeError("Cache path must be formatted as a string.")
+
+        self.eyeTrackerCachePath = cachePath
+
+
+    # connect to the eyetracker stored in the cache, returns None if it's not possible
+    def __connectCachedEyeTracker(self, serialString, progressCallback):
+
+        if self.eyeTrackerCachePath is None or not os.path.isfile(self.eyeTrackerCachePath):
+            return None
+
+        try:
+            with open(self.eyeTrackerCachePath, 'r') as cacheFile:
+                cachedTracker = json.load(cacheFile)
+            address = cachedTracker['address']
+            cachedSerial = cachedTracker['serial_number']
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            self.__log(logging.INFO, "Eyetracker cache is invalid, searching for eyetrackers.",
+                       phase = 'connection', path = self.eyeTrackerCachePath)
+            return None
+
+        # an other eyetracker is requested
+        if serialString is not None and serialString != cachedSerial:
+            return None
+
+        if progressCallback is not None:
+            progressCallback('cached', address)
+
+        try:
+            eyetracker = tobii.EyeTracker(address)
+        except Exception:
+            self.__log(logging.WARNING, "Can't connect to the cached eyetracker: " + address,
+                       phase = 'connection', address = address)
+            return None
+
+        # an other device has this address now
+        if eyetracker.serial_number != cachedSerial:
+            return None
+
+        return eyetracker
+
+
+    # searching for the eyetracker, run on a background thread by setEyeTracker()
+    def __discoverEyeTracker(self, serialString, progressCallback):
+
+        try:
+            # try to find all eyetrackers
+            # Sometimes the eyetracker is not identified for the first time. Try more times.
+            allTrackers = []
+            loopCount = 0
+            while not allTrackers and loopCount < 50:
+                loopCount += 1
+                if progressCallback is not None:
+                    progressCallback('searching', loopCount)
+                allTrackers = tobii.find_all_eyetrackers()
+                # the clock is for the render thread, waiting on it would move the virtual
+                # time and run the scheduled callbacks on this thread
+                if not allTrackers:
+                    time.sleep(0.02)
+
+            # if there are no eyetrackers
+            if len(allTrackers) < 1:
+                raise RuntimeError("Cannot find any eyetrackers.")
+
+            # if there is no serialString specified, use first found eyetracker
+            foundTracker = None
+            if serialString is None:
+                foundTracker = allTrackers[0]
+            # if serial number is given as a string
+            else:
+                for eyetracker in allTrackers:
+                    if eyetracker.serial_number == serialString:
+                        foundTracker = eyetracker
+
+            # check to see that eyetracker is found
+            if foundTracker is None:
+                raise RuntimeError("Eyetracker did not connect. Check serial number?")
+
+            self.__useEyeTracker(foundTracker)
+            if progressCallback is not None:
+                progressCallback('connected', foundTracker.serial_number)
+
+        except Exception as error:
+            self.discoveryError = error
+            if progressCallback is not None:
+                progressCallback('failed', str(error))
+
+
+    # use an already created eyetracker object (e.g. a SyntheticEyeTracker), it's not cached
+    def useEyeTracker(self, eyetracker):
+
+        if eyetracker is None:
+            raise TypeError("eyetracker should be a valid eyetracker object.")
+
+        self.__useEyeTracker(eyetracker, cache = False)
+
+
+    # set the connected eyetracker and store it in the cache
+    def __useEyeTracker(self, eyetracker, cache = True):
+
+        # create eyetracker object
+        self.eyetracker = eyetracker
+
+        # fine if name is empty
+        self.__log(logging.INFO, "Eyetracker connected successfully.", phase = 'connection',
+                   address = eyetracker.address, model = eyetracker.model,
+                   name = eyetracker.device_name, serial_number = eyetracker.serial_number)
 
         # get track box and active display area coordinates
         self.__getTrackerSpace()
 
+        # cache the eyetracker for the next time
+        if cache and self.eyeTrackerCachePath is not None:
+            try:
+                cacheDir = os.path.dirname(self.eyeTrackerCachePath)
+                if cacheDir and not os.path.isdir(cacheDir):
+                    os.makedirs(cacheDir)
+                with open(self.eyeTrackerCachePath, 'w') as cacheFile:
+                    json.dump({'address' : eyetracker.address,
+                               'serial_number' : eyetracker.serial_number}, cacheFile)
+            except (IOError, OSError):
+                self.__log(logging.WARNING, "Can't write the eyetracker cache: " + self.eyeTrackerCachePath,
+                           phase = 'connection', path = self.eyeTrackerCachePath)
+
 
     # function for getting trackbox (tb) and active display area (ada)coordinates, returns
     # coordintes in two separate dictionaries with values in mm
@@ -165,7 +563,7 @@ class TobiiHelper:
     def setMonitor(self, nameString = None, dimensions = None):
 
         # find all connected monitors
-        allMonitors = monitors.getAllMonitors()
+        allMonitors = monitorProfileCache.getMonitorNames()
         if len(allMonitors) is 0:
             raise RuntimeError("Can't find any monitor.")
 
@@ -174,8 +572,8 @@ class TobiiHelper:
             # use current screen dimensions
             screen = pyglet.window.get_platform().get_default_display().get_default_screen()
             dimensions = (screen.width, screen.height)
-            if self.logging:
-                print ("Current screen size is: " + str(dimensions[0]) + "x" + str(dimensions[1]))
+            self.__log(logging.INFO, "Current screen size is: " + str(dimensions[0]) + "x" + str(dimensions[1]),
+                       phase = 'monitor', width = dimensions[0], height = dimensions[1])
         # if dimension not given as tuple
         elif not isinstance(dimensions, tuple):
             raise TypeError("Dimensions must be given as tuple.")
@@ -190,13 +588,9 @@ class TobiiHelper:
         if nameString is None:
             # create monitor calibration object
             self.monitorName = allMonitors[0]
-            thisMon = monitors.Monitor(self.monitorName)
-            if self.logging:
-                print ("Current monitor name is: " + self.monitorName)
-            # set monitor dimensions
-            thisMon.setSizePix(dimensions)
-            # save monitor
-            thisMon.saveMon()  # save monitor calibration
+            thisMon = monitorProfileCache.getProfile(self.monitorName, dimensions)
+            self.__log(logging.INFO, "Current monitor name is: " + self.monitorName,
+                       phase = 'monitor', monitor = self.monitorName)
             self.win = thisMon
         # if serial number is not given as a string
         elif not isinstance(nameString, str):
@@ -204,14 +598,10 @@ class TobiiHelper:
         # if serial number is given as a string
         else:
             # create monitor calibration object
-            thisMon = monitors.Monitor(nameString)
-            if self.logging:
-                print ("Current monitor name is: " + nameString)
+            thisMon = monitorProfileCache.getProfile(nameString, dimensions)
+            self.__log(logging.INFO, "Current monitor name is: " + nameString,
+                       phase = 'monitor', monitor = nameString)
             self.monitorName = nameString
-            # set monitor dimensions
-            thisMon.setSizePix(dimensions)
-            # save monitor
-            thisMon.saveMon()  # save monitor calibration
             self.win = thisMon
 
     def getMonitorName(self):
@@ -230,6 +620,29 @@ class TobiiHelper:
     def disableLogging(self):
         self.logging = False
 
+    # write a diagnostic message with its fields (phase, point, status, duration...) to the
+    # 'tobii_calibration' logger, the handlers run on the log queue's thread (see event_log)
+    def __log(self, level, message, **fields):
+        for listener in self.eventListeners:
+            listener(message, fields)
+        if not self.logging:
+            return
+        ensureLogQueue()
+        logEvent(level, message, **fields)
+
+    # call listener(message, fields) at every event of the calibration sequence (the messages
+    # written to the logger, also when logging is disabled)
+    def addEventListener(self, listener):
+        if not callable(listener):
+            raise TypeError("listener should be a callable object.")
+        self.eventListeners = self.eventListeners + [listener]
+
+    def removeEventListener(self, listener):
+        if listener in self.eventListeners:
+            listeners = list(self.eventListeners)
+            listeners.remove(listener)
+            self.eventListeners = listeners
+
     def setAccuracy(self, accuracyInPixel):
         if not isinstance(accuracyInPixel, numbers.Number):
             raise TypeError("A number is expected to be passed as accuracyInPixel parameter.")
@@ -239,11 +652,210 @@ class TobiiHelper:
 
         self.accuracyInPixel = accuracyInPixel
 
+    # set the delays of the calibration sequence, either a TimingProfile object
+    # or the name of a predefined profile ('default', 'fast' or 'accessibility')
+    def setTimingProfile(self, timingProfile):
+        if isinstance(timingProfile, str):
+            timingProfile = TimingProfile.named(timingProfile)
+        elif not isinstance(timingProfile, TimingProfile):
+            raise TypeError("timingProfile should be a TimingProfile object or a profile name.")
+
+        self.timing = timingProfile
+
+    def getTimingProfile(self):
+        return self.timing
+
+    # set the clock used for all waiting and frame flipping of the calibration sequence,
+    # e.g. a VirtualClock to run the sequence without the real delays
+    def setClock(self, clock):
+        if not isinstance(clock, Clock):
+            raise TypeError("clock should be a Clock object.")
+
+        # the new clock continues tracing
+        clock.tracer = self.clock.tracer
+        self.clock.tracer = None
+        self.clock = clock
+
+    def getClock(self):
+        return self.clock
+
+    # start recording the timing spans of the calibration phases. The summary and the
+    # .pstats files of the phases (with useCProfile = True) are written into outputDir
+    # by stopProfiling(). Returns the PhaseProfiler object.
+    def startProfiling(self, outputDir = None, useCProfile = False):
+        if self.profiler is not None:
+            raise RuntimeError("Profiling is already running.")
+
+        self.profiler = PhaseProfiler(outputDir, useCProfile)
+        return self.profiler
+
+    # stop profiling, write the results if an output folder was given, return the PhaseProfiler object
+    def stopProfiling(self):
+        profiler = self.profiler
+        if profiler is None:
+            return None
+        self.profiler = None
+
+        self.__log(logging.INFO, "Profiling summary:\n" + profiler.formatSummary(), phase = 'profiling')
+        if profiler.outputDir is not None:
+            writtenFiles = profiler.write()
+            self.__log(logging.INFO, "Profiling results are written to " + profiler.outputDir,
+                       phase = 'profiling', files = len(writtenFiles))
+        return profiler
+
+    # profile the calibration phases run inside a with block
+    @contextlib.contextmanager
+    def profiling(self, outputDir = None, useCProfile = False):
+        profiler = self.startProfiling(outputDir, useCProfile)
+        try:
+            yield profiler
+        finally:
+            self.stopProfiling()
+
+    # start recording the timeline of the session: frames, waits, SDK calls, key presses,
+    # phases and the hand-offs of the gaze samples between the threads. Returns the
+    # TraceRecorder object.
+    def startTracing(self, maxEvents = 1000000):
+        if self.tracer is not None:
+            raise RuntimeError("Tracing is already running.")
+
+        self.tracer = TraceRecorder(maxEvents)
+        self.clock.tracer = self.tracer
+        return self.tracer
+
+    # stop tracing, save the events as Chrome trace-event JSON if filePath is given,
+    # return the TraceRecorder object
+    def stopTracing(self, filePath = None):
+        tracer = self.tracer
+        if tracer is None:
+            return None
+        self.tracer = None
+        self.clock.tracer = None
+
+        if filePath is not None:
+            tracer.write(filePath)
+            self.__log(logging.INFO, "Trace is written to " + filePath, phase = 'tracing',
+                       events = len(tracer.getEvents()), dropped = tracer.getDroppedCount())
+        return tracer
+
+    # trace the session run inside a with block, the events are saved into filePath
+    @contextlib.contextmanager
+    def tracing(self, filePath = None, maxEvents = 1000000):
+        tracer = self.startTracing(maxEvents)
+        try:
+            yield tracer
+        finally:
+            self.stopTracing(filePath)
+
+    # timing span of a calibration phase, if profiling or tracing is running
+    def __phase(self, name, **fields):
+        if self.profiler is None and self.tracer is None:
+            return NullSpan()
+        spans = contextlib.ExitStack()
+        if self.profiler is not None:
+            spans.enter_context(self.profiler.phase(name, **fields))
+        if self.tracer is not None:
+            spans.enter_context(self.tracer.span(name, 'phase', **fields))
+        return spans
+
+    # trace span, if tracing is running
+    def __trace(self, name, category, **args):
+        if self.tracer is None:
+            return NullSpan()
+        return self.tracer.span(name, category, **args)
+
+    # event.getKeys() recording the pressed keys in the trace
+    def __getKeys(self, keyList = None):
+        keys = event.getKeys(keyList = keyList)
+        if keys and self.tracer is not None:
+            for key in keys:
+                self.tracer.instant('key_press', 'input', key = key)
+        return keys
+
+    # wait for one of the keys at most maxWait seconds, like event.waitKeys(), but the waiting
+    # goes through the clock; the pressed keys are recorded in the trace
+    def __waitKeys(self, maxWait, keyList):
+        with self.__trace('wait_keys', 'input', keys = keyList):
+            # keys pressed before are not counted
+            event.clearEvents(eventType='keyboard')
+            endTime = self.clock.getTime() + maxWait
+            while True:
+                keys = event.getKeys(keyList = keyList)
+                remaining = endTime - self.clock.getTime()
+                if keys or remaining <= 0:
+                    break
+                self.clock.wait(min(POLL_INTERVAL, remaining))
+        if not keys:
+            return None
+        if self.tracer is not None:
+            for key in keys:
+                self.tracer.instant('key_press', 'input', key = key)
+        return keys
+
+    # connect the gaze sample read by the render thread to its callback in the trace
+    def __traceGazeRead(self):
+        flowId = self.gazeDataFlowId
+        if self.tracer is None or flowId is None or flowId == self.readGazeDataFlowId:
+            return
+        self.readGazeDataFlowId = flowId
+        with self.tracer.span('gaze_read', 'gaze'):
+            self.tracer.flowEnd('gaze_handoff', 'gaze', flowId)
+
+    # set how calibration data is collected: 'points' collects data at the calibration
+    # points, 'pursuit' collects data continuously while the target moves between them
+    def setCalibrationMode(self, calibrationMode):
+        if not isinstance(calibrationMode, str):
+            raise TypeError("Calibration mode must be formatted as a string.")
+        if calibrationMode not in ['points', 'pursuit']:
+            raise ValueError("Only 'points' or 'pursuit' calibration mode is supported.")
+
+        self.calibrationMode = calibrationMode
+
+    def getCalibrationMode(self):
+        return self.calibrationMode
+
+    # recalibrate only the eye with the poor results on the selected points
+    def enableMonocularRecalibration(self):
+        self.monocularRecalibration = True
+
+    def disableMonocularRecalibration(self):
+        self.monocularRecalibration = False
+
+    # use the user position guide stream on the trackbox screen instead of the gaze data stream
+    # (if the eyetracker does not support it, gaze data is used)
+    def enableUserPositionGuide(self):
+        self.userPositionGuide = True
+
+    def disableUserPositionGuide(self):
+        self.userPositionGuide = False
+
+    # create the calibration object of the eyetracker, stand-in eyetrackers
+    # (e.g. SyntheticEyeTracker) provide their own calibration object
+    def __createCalibration(self):
+
+        if hasattr(self.eyetracker, 'createCalibration'):
+            calibration = self.eyetracker.createCalibration(self.monocularRecalibration)
+        elif self.monocularRecalibration:
+            # collects both eyes by default, but allows to redo only one of them
+            calibration = tobii.ScreenBasedMonocularCalibration(self.eyetracker)
+        else:
+            calibration = tobii.ScreenBasedCalibration(self.eyetracker)  # calib object
+
+        # record the SDK calls in the trace
+        if self.tracer is not None:
+            calibration = TracingProxy(calibration, self.tracer, 'sdk',
+                                       ['enter_calibration_mode', 'leave_calibration_mode', 'collect_data',
+                                        'discard_data', 'compute_and_apply'])
+        return calibration
+
 # ----- Functions for starting and stopping eyetracker data collection -----
 
     # function for broadcasting real time gaze data
     def __gazeDataCallback(self, gazeData):
         self.gazeData = gazeData
+        if self.tracer is not None:
+            with self.tracer.span('gaze_sample', 'gaze'):
+                self.gazeDataFlowId = self.tracer.flowStart('gaze_handoff', 'gaze')
 
 
     # function for subscribing to real time gaze data from eyetracker
@@ -254,11 +866,15 @@ class TobiiHelper:
             raise RuntimeError("There is no eyetracker.")
 
         # if it is, proceed
-        if self.logging:
-            print ("Subscribing to eyetracker.")
-        self.eyetracker.subscribe_to(tobii.EYETRACKER_GAZE_DATA,
-                                     self.__gazeDataCallback,
-                                     as_dictionary = True)
+        # the acquisition process is subscribed already
+        if self.sharedAcquisition is not None:
+            self.tracking = True
+            self.__readGazeData()
+            return
+
+        self.__log(logging.INFO, "Subscribing to eyetracker.", phase = 'subscription', stream = 'gaze')
+        with self.__trace('subscribe', 'sdk', stream = 'gaze'):
+            self.getSubscriptions().subscribe('gaze', self.__gazeDataCallback)
         self.tracking = True
 
 
@@ -268,13 +884,302 @@ class TobiiHelper:
         # check to see if eyetracker is there
         if self.eyetracker is None:
             raise RuntimeError("There is no eyetracker.")
+        if self.sharedAcquisition is not None:
+            self.tracking = False
+            return
+
         # if it is, proceed
-        if self.logging:
-            print ("Unsubscribing from eyetracker")
-        self.eyetracker.unsubscribe_from(tobii.EYETRACKER_GAZE_DATA,
-                                         self.__gazeDataCallback)
+        self.__log(logging.INFO, "Unsubscribing from eyetracker.", phase = 'subscription', stream = 'gaze')
+        with self.__trace('unsubscribe', 'sdk', stream = 'gaze'):
+            self.getSubscriptions().unsubscribe('gaze', self.__gazeDataCallback)
         self.tracking = False
 
+
+    # function for broadcasting real time user position data
+    def __userPositionCallback(self, userPositionData):
+        self.userPositionData = userPositionData
+
+
+    # function for subscribing to the user position guide stream,
+    # returns False if the eyetracker does not support it
+    def __startUserPositionData(self):
+
+        # check to see if eyetracker is there
+        if self.eyetracker is None:
+            raise RuntimeError("There is no eyetracker.")
+
+        self.__log(logging.INFO, "Subscribing to user position guide.", phase = 'subscription',
+                   stream = 'user_position')
+        try:
+            with self.__trace('subscribe', 'sdk', stream = 'user_position'):
+                self.getSubscriptions().subscribe('user_position', self.__userPositionCallback)
+        except (RuntimeError, getattr(tobii, 'EyeTrackerFeatureNotSupportedError', RuntimeError)) as error:
+            self.__log(logging.WARNING, "User position guide is not available: " + str(error),
+                       phase = 'subscription', stream = 'user_position')
+            return False
+        self.userPositionTracking = True
+        return True
+
+
+    # function for unsubscring from the user position guide stream
+    def __stopUserPositionData(self):
+
+        # check to see if eyetracker is there
+        if self.eyetracker is None:
+            raise RuntimeError("There is no eyetracker.")
+
+        self.__log(logging.INFO, "Unsubscribing from user position guide.", phase = 'subscription',
+                   stream = 'user_position')
+        with self.__trace('unsubscribe', 'sdk', stream = 'user_position'):
+            self.getSubscriptions().unsubscribe('user_position', self.__userPositionCallback)
+        self.userPositionTracking = False
+        self.userPositionData = None
+
+
+    # start the data needed by the trackbox screen, the user position guide
+    # carries much less data, fall back to gaze data if it's not available
+    def __startTrackBoxData(self):
+        if self.userPositionGuide and self.sharedAcquisition is None and self.__startUserPositionData():
+            return
+        self.__startGazeData()
+
+
+    def __stopTrackBoxData(self):
+        if self.userPositionTracking:
+            self.__stopUserPositionData()
+        else:
+            self.__stopGazeData()
+
+
+    # subscription layer of the eyetracker, it's the registration point for all data streams
+    # (gaze data, user position guide, external signal, time sync, notifications, eye openness)
+    def getSubscriptions(self):
+
+        # check to see if eyetracker is there
+        if self.eyetracker is None:
+            raise RuntimeError("There is no eyetracker.")
+
+        if self.subscriptions is None or self.subscriptions.eyetracker is not self.eyetracker:
+            self.subscriptions = SubscriptionManager(self.eyetracker)
+        return self.subscriptions
+
+
+    # subscribe to the gaze data outside of the calibration screens, the last sample is
+    # stored in gazeData (the screens start and stop the gaze data themselves)
+    def startGazeData(self):
+        self.__startGazeData()
+
+
+    def stopGazeData(self):
+        self.__stopGazeData()
+
+
+    # pass a sample received by another listener of the gaze stream (e.g. TobiiTrackerManager)
+    # through the gaze data path of the helper, it's stored in gazeData
+    def receiveGazeData(self, gazeData):
+        self.__gazeDataCallback(gazeData)
+
+
+    # run the gaze data subscription in a child process writing the samples into a shared memory
+    # ring buffer, so acquisition and rendering don't compete for the GIL. eyeTrackerFactory creates
+    # the eyetracker in the child process (tobii_research.EyeTracker(address) by default). Other
+    # processes can read the ring too, see SharedGazeRing.attach(). Returns the AcquisitionProcess.
+    def startSharedAcquisition(self, capacity = 12000, eyeTrackerFactory = None, timeout = 10.0):
+
+        # check to see if eyetracker is there
+        if self.eyetracker is None:
+            raise RuntimeError("There is no eyetracker.")
+        if self.sharedAcquisition is not None:
+            raise RuntimeError("Shared acquisition is already running.")
+        if self.tracking:
+            raise RuntimeError("Gaze data is subscribed in this process.")
+
+        acquisition = AcquisitionProcess(self.eyetracker.address, eyeTrackerFactory, capacity)
+        with self.__trace('start_shared_acquisition', 'sdk'):
+            acquisition.start(timeout)
+        self.__disconnectGazeConsumers()
+        self.sharedAcquisition = acquisition
+        self.__connectGazeConsumers()
+        self.__log(logging.INFO, "Shared acquisition started.", phase = 'subscription', stream = 'gaze',
+                   name = acquisition.getName(), pid = acquisition.process.pid)
+        return acquisition
+
+
+    # stop the acquisition process, return the AcquisitionProcess
+    def stopSharedAcquisition(self):
+        acquisition = self.sharedAcquisition
+        if acquisition is None:
+            return None
+        if self.tracking:
+            raise RuntimeError("The gaze data is still in use.")
+
+        self.__disconnectGazeConsumers()
+        self.sharedAcquisition = None
+        self.__connectGazeConsumers()
+        self.gazeData = None
+        acquisition.stop()
+        self.__log(logging.INFO, "Shared acquisition stopped.", phase = 'subscription', stream = 'gaze')
+        return acquisition
+
+
+    # publish the live gaze data and the calibration events on a local TCP socket (address is a
+    # (host, port) tuple, port 0 chooses a free port) or Unix socket (address is a path).
+    # Returns the GazeStreamServer, its getAddress() gives the address to connect to.
+    def startStreamServer(self, address = ('127.0.0.1', 0), queueSize = 1000, maxRate = None):
+
+        # check to see if eyetracker is there
+        if self.eyetracker is None:
+            raise RuntimeError("There is no eyetracker.")
+        if self.streamServer is not None:
+            raise RuntimeError("The stream server is already running.")
+
+        server = GazeStreamServer(address, queueSize, maxRate)
+        server.start()
+        try:
+            self.__connectGazeConsumer(server)
+        except Exception:
+            server.stop()
+            raise
+        self.streamServer = server
+        self.addEventListener(server.publishEvent)
+        self.__log(logging.INFO, "Stream server started.", phase = 'streaming', address = server.getAddress())
+        return server
+
+
+    # stop the stream server and disconnect its clients, return the GazeStreamServer
+    def stopStreamServer(self):
+        server = self.streamServer
+        if server is None:
+            return None
+
+        self.removeEventListener(server.publishEvent)
+        self.__disconnectGazeConsumer(server)
+        self.streamServer = None
+        server.stop()
+        self.__log(logging.INFO, "Stream server stopped.", phase = 'streaming')
+        return server
+
+
+    # serve a live operator view of the session over HTTP: downsampled gaze, eye positions in the
+    # trackbox, per-point calibration accuracy and acquisition health, updated gazeRate times a
+    # second. Use host '0.0.0.0' to open the page from another device. Returns the MonitorServer,
+    # its getUrl() gives the address of the page.
+    def startMonitor(self, address = ('127.0.0.1', 0), gazeRate = 30.0, maxClients = 4):
+
+        # check to see if eyetracker is there
+        if self.eyetracker is None:
+            raise RuntimeError("There is no eyetracker.")
+        if self.monitor is not None:
+            raise RuntimeError("The monitor server is already running.")
+
+        monitor = MonitorServer(self, address, gazeRate, maxClients = maxClients)
+        monitor.start()
+        try:
+            self.__connectGazeConsumer(monitor)
+        except Exception:
+            monitor.stop()
+            raise
+        self.monitor = monitor
+        self.addEventListener(monitor.publishEvent)
+        self.__log(logging.INFO, "Monitoring page: " + monitor.getUrl(), phase = 'monitoring')
+        return monitor
+
+
+    # stop the monitor server, return the MonitorServer
+    def stopMonitor(self):
+        monitor = self.monitor
+        if monitor is None:
+            return None
+
+        self.removeEventListener(monitor.publishEvent)
+        self.__disconnectGazeConsumer(monitor)
+        self.monitor = None
+        monitor.stop()
+        self.__log(logging.INFO, "Monitor server stopped.", phase = 'monitoring')
+        return monitor
+
+
+    # the servers get the samples from the shared ring buffer in shared acquisition mode,
+    # otherwise they are listeners of the gaze stream
+    def __connectGazeConsumer(self, consumer):
+        if self.sharedAcquisition is not None:
+            consumer.startRingForwarding(self.sharedAcquisition.getRing())
+        else:
+            with self.__trace('subscribe', 'sdk', stream = 'gaze'):
+                self.getSubscriptions().subscribe('gaze', consumer.publishGaze)
+
+
+    def __disconnectGazeConsumer(self, consumer):
+        if self.sharedAcquisition is not None:
+            consumer.stopRingForwarding()
+        else:
+            with self.__trace('unsubscribe', 'sdk', stream = 'gaze'):
+                self.getSubscriptions().unsubscribe('gaze', consumer.publishGaze)
+
+
+    def __connectGazeConsumers(self):
+        for consumer in [self.streamServer, self.monitor]:
+            if consumer is not None:
+                self.__connectGazeConsumer(consumer)
+
+
+    def __disconnectGazeConsumers(self):
+        for consumer in [self.streamServer, self.monitor]:
+            if consumer is not None:
+                self.__disconnectGazeConsumer(consumer)
+
+
+    # in shared acquisition mode the gaze data is the last sample of the shared ring buffer,
+    # read by the render thread before drawing a frame
+    def __readGazeData(self):
+        if self.sharedAcquisition is not None and self.tracking:
+            self.gazeData = self.sharedAcquisition.getRing().latest()
+
+
+    # start synchronising the clocks of the eyetracker, the system and the experiment,
+    # experimentClock is a function returning the experiment time in seconds (PsychoPy's clock by default)
+    def startTimeSync(self, experimentClock = None):
+
+        # check to see if eyetracker is there
+        if self.eyetracker is None:
+            raise RuntimeError("There is no eyetracker.")
+
+        if self.timeSync is None or self.timeSync.eyetracker is not self.eyetracker:
+            self.timeSync = TimeSynchronizer(self.eyetracker, experimentClock,
+                                             subscriptions = self.getSubscriptions())
+
+        self.__log(logging.INFO, "Subscribing to time synchronization data.", phase = 'subscription',
+                   stream = 'time_sync')
+        self.timeSync.start()
+        return self.timeSync
+
+
+    def stopTimeSync(self):
+
+        if self.timeSync is None:
+            raise RuntimeError("Time synchronization was not started.")
+
+        self.__log(logging.INFO, "Unsubscribing from time synchronization data.", phase = 'subscription',
+                   stream = 'time_sync')
+        self.timeSync.stop()
+
+
+    # experiment time of a gaze sample in seconds, by default of the last received one
+    def getGazeDataTime(self, gazeData = None):
+
+        if self.timeSync is None:
+            raise RuntimeError("Time synchronization was not started.")
+
+        if gazeData is None:
+            self.__readGazeData()
+            gazeData = self.gazeData
+        if gazeData is None:
+            raise RuntimeError("No recorded gaze data was found.")
+        if not isinstance(gazeData, dict):
+            raise TypeError("gazeData should be a dictionary.")
+
+        return self.timeSync.getSampleTime(gazeData)
+
 # ----- Functions for converting coordinates between different coordinate systems -----
 
     # function for converting normalized positions from trackbox coordinate system
@@ -375,20 +1280,30 @@ class TobiiHelper:
         # check to see if the eyetracker is connected and turned on
         if self.eyetracker is None:
             raise RuntimeError("There is no eyetracker.")
-        if self.tracking is False:
-            raise RuntimeError("The eyetracker is not turned on.")
-        if self.gazeData is None:
-            raise RuntimeError("No recorded gaze data was found.")
 
-        # access gaze data dictionary to get eye position tuples,
-        # in trackbox coordinate system
-        lelfTbXYZ = self.gazeData['left_gaze_origin_in_trackbox_coordinate_system']
-        rightTbXYZ = self.gazeData['right_gaze_origin_in_trackbox_coordinate_system']
+        # user position guide uses the same normalized coordinates as the trackbox
+        if self.userPositionTracking:
+            if self.userPositionData is None:
+                raise RuntimeError("No recorded user position data was found.")
+            lelfTbXYZ = self.userPositionData['left_user_position']
+            rightTbXYZ = self.userPositionData['right_user_position']
+            leftVal = self.userPositionData['left_user_position_validity']
+            rightVal = self.userPositionData['right_user_position_validity']
+        else:
+            if self.tracking is False:
+                raise RuntimeError("The eyetracker is not turned on.")
+            if self.gazeData is None:
+                raise RuntimeError("No recorded gaze data was found.")
+
+            # access gaze data dictionary to get eye position tuples,
+            # in trackbox coordinate system
+            lelfTbXYZ = self.gazeData['left_gaze_origin_in_trackbox_coordinate_system']
+            rightTbXYZ = self.gazeData['right_gaze_origin_in_trackbox_coordinate_system']
 
-        # left eye validity
-        leftVal = self.gazeData['left_gaze_origin_validity']
-        # right eye validity
-        rightVal = self.gazeData['right_gaze_origin_validity']
+            # left eye validity
+            leftVal = self.gazeData['left_gaze_origin_validity']
+            # right eye validity
+            rightVal = self.gazeData['right_gaze_origin_validity']
 
         # if left eye is found by the eyetracker
         if leftVal:
@@ -451,6 +1366,25 @@ class TobiiHelper:
         # check to see if the eyetracker is connected and turned on
         if self.eyetracker is None:
             raise RuntimeError("There is no eyetracker.")
+
+        # user position guide gives the distance normalized between the front and the back of the trackbox
+        if self.userPositionTracking:
+            if self.userPositionData is None:
+                raise RuntimeError("No recorded user position data was found.")
+            if self.tbCoordinates is None:
+                raise RuntimeError("Missing trackbox coordinates! Try running setEyeTracker().")
+
+            zs = []
+            for eye in ['left', 'right']:
+                if self.userPositionData[eye + '_user_position_validity']:
+                    zs.append(self.userPositionData[eye + '_user_position'][2])
+            zs = [z for z in zs if not math.isnan(z)]
+            if len(zs) == 0:
+                return 0
+            frontDistance = self.tbCoordinates.get('frontDistance')
+            backDistance = self.tbCoordinates.get('backDistance')
+            return frontDistance + np.mean(zs) * (backDistance - frontDistance)
+
         if self.tracking is False:
             raise RuntimeError("The eyetracker is not turned on.")
         if self.gazeData is None:
@@ -472,7 +1406,7 @@ class TobiiHelper:
                           width = 0.01,
                           height = 0.01)
         dummyRect.draw()
-        window.flip()
+        self.clock.flip(window)
 
     # calculate mean of a point list, handle x and y coordinates separately
     def __calcMeanOfPointList(self, pointList):
@@ -656,10 +1590,10 @@ class TobiiHelper:
                               "eye-tracker can locate your eyes." \
                               "\n\nPress 'c' to continue.")
         calibMessage.draw()
-        psychoWin.flip()
+        self.clock.flip(psychoWin)
 
         # turn keyboard reporting on and get subject response
-        event.waitKeys(maxWait = 10, keyList = ['c'])  # proceed with calibration
+        self.__waitKeys(self.timing.instructionTimeout, ['c'])  # proceed with calibration
         self.__clearScreen(psychoWin)   # clear previous text
 
         # Set default colors
@@ -719,6 +1653,8 @@ class TobiiHelper:
 
         # while tracking
         while True:
+            self.__readGazeData()
+            self.__traceGazeRead()
             # find and update eye positions
             leftEyePos, rightEyePos = self.__virtualTrackboxEyePos()
             eyeDist = self.__getAvgEyeDist()
@@ -803,17 +1739,16 @@ class TobiiHelper:
 
             findmsg.draw()
             self.__drawDistanceSlider(psychoWin, eyeDist)
-            psychoWin.flip()
+            self.clock.flip(psychoWin)
 
             # depending on response, either abort script or continue to calibration
-            if event.getKeys(keyList=['q']):
-                self.__stopGazeData()
+            if self.__getKeys(keyList = ['q']):
+                self.__stopTrackBoxData()
                 psychoWin.close()
                 pcore.quit()
-            elif event.getKeys(keyList=['c']):
-                if self.logging:
-                    print("Proceeding to calibration.")
-                self.__stopGazeData()
+            elif self.__getKeys(keyList = ['c']):
+                self.__log(logging.INFO, "Proceeding to calibration.", phase = 'trackbox')
+                self.__stopTrackBoxData()
                 self.__clearScreen(psychoWin)
                 return
 
@@ -861,6 +1796,8 @@ class TobiiHelper:
 
         # while tracking
         while True:
+            self.__readGazeData()
+            self.__traceGazeRead()
 
             avgGazePos = self.__getAvgGazePos()
 
@@ -879,15 +1816,14 @@ class TobiiHelper:
 
             # text
             valMsg.draw()
-            valWin.flip()
+            self.clock.flip(valWin)
 
             # depending on response, either abort script or continue to calibration
-            if event.getKeys(keyList=['q']):
+            if self.__getKeys(keyList = ['q']):
                 self.__stopGazeData()
                 pcore.quit()
-            elif event.getKeys(keyList=['c']):
-                if self.logging:
-                    print ("Exiting calibration validation.")
+            elif self.__getKeys(keyList = ['c']):
+                self.__log(logging.INFO, "Exiting calibration validation.", phase = 'validation')
                 self.__stopGazeData()
                 return
 
@@ -903,45 +1839,87 @@ class TobiiHelper:
         if not isinstance(calibResult, tobii.CalibrationResult):
             raise TypeError("Argument should be a valid tobii_research.CalibResult object")
 
+        # average eye positions at the calibration points, the math is done in the analysis module
+        positions, leftMeans, rightMeans = calibrationResultToArrays(calibResult)
+        if len(positions) == 0:
+            return []
+        if self.win is None:
+            raise RuntimeError("No monitor was set.")
+
+        # convert to psychopy window coordinates in pix
+        windowSize = tuple(self.win.getSizePix())
+        pointPix = ada2PsychoPix(positions, windowSize)
+        leftPix = ada2PsychoPix(leftMeans, windowSize)
+        rightPix = ada2PsychoPix(rightMeans, windowSize)
+
         #create an empty list to hold values
         calibDrawCoor = []
-
-        # iterate through calibration points
-        startindex = 0
-        if len(calibResult.calibration_points) > 0 and \
-            calibResult.calibration_points[0].position_on_display_area == (0.0, 0.0): # Tobii SDK adds an extra calib point
-            startindex = 1
-        for i in range(startindex, len(calibResult.calibration_points)):
-            # current point
-            curPoint = calibResult.calibration_points[i]
-            pointPosition = curPoint.position_on_display_area  # point position
-            pointSamples = curPoint.calibration_samples  # samples at point
-            # empty arrays for holding left and right eye gaze coordinates
-            leftOutput = np.zeros((len(pointSamples), 2))
-            rightOutput = np.zeros((len(pointSamples), 2))
-
-            # find left and right gaze coordinates for all samples in point
-            for j in range(len(pointSamples)):
-                curSample = pointSamples[j]
-                leftEye = curSample.left_eye
-                rightEye = curSample.right_eye
-                leftOutput[j] = leftEye.position_on_display_area
-                rightOutput[j] = rightEye.position_on_display_area
-
-            # get average x and y coordinates using all samples in point
-            leftXY = tuple(np.mean(leftOutput, axis = 0))
-            rightXY = tuple(np.mean(rightOutput, axis = 0))
-            point = tuple((pointPosition[0], pointPosition[1]))
-            # put current calibration point coordinates , l and r eye coordinates
-            # into list, and convert to psychopy window coordinates in pix
-            newList = [self.__ada2PsychoPix(point), self.__ada2PsychoPix(leftXY),
-                       self.__ada2PsychoPix(rightXY), pointPosition]
-            calibDrawCoor.insert(i, newList)
+        calibrationPoints = calibResult.calibration_points[len(calibResult.calibration_points) - len(positions):]
+        for i in range(len(positions)):
+            # put current calibration point coordinates , l and r eye coordinates into list
+            newList = [tuple(int(value) for value in pointPix[i]), tuple(int(value) for value in leftPix[i]),
+                       tuple(int(value) for value in rightPix[i]), calibrationPoints[i].position_on_display_area]
+            calibDrawCoor.append(newList)
 
         # return as list
         return calibDrawCoor
 
 
+    # collect calibration data at the given point, for the given eye in monocular mode
+    def __collectCalibrationData(self, xCoord, yCoord, eye = None):
+        if self.monocularRecalibration:
+            if eye is None:
+                eye = tobii.SELECTED_EYE_BOTH
+            status = self.calibration.collect_data(xCoord, yCoord, eye)
+            # monocular calibration reports the success of one eye with its own status
+            if (eye == tobii.SELECTED_EYE_LEFT and status == tobii.CALIBRATION_STATUS_SUCCESS_LEFT_EYE) or \
+               (eye == tobii.SELECTED_EYE_RIGHT and status == tobii.CALIBRATION_STATUS_SUCCESS_RIGHT_EYE):
+                status = tobii.CALIBRATION_STATUS_SUCCESS
+            return status
+        else:
+            return self.calibration.collect_data(xCoord, yCoord)
+
+
+    # function for calculating the distance of the left and right eye gaze positions
+    # from the calibration points, in pixels, returns an ordered dictionary
+    # with the keys of curDict and (left error, right error) values
+    def __calculateEyeAccuracy(self, calibResult, curDict):
+
+        # check the values of the point dictionary
+        if not isinstance(curDict, dict):
+            raise TypeError("curDict must be a dictionary with number " +\
+                            "keys and coordinate values.")
+
+        eyeAccuracy = collections.OrderedDict()
+        for point in self.__calculateCalibration(calibResult):
+            startCoor, leftCoor, rightCoor, pointPos = point[0], point[1], point[2], point[3]
+            for key, value in curDict.items():
+                if value == pointPos:
+                    eyeAccuracy[key] = (math.hypot(leftCoor[0] - startCoor[0], leftCoor[1] - startCoor[1]),
+                                        math.hypot(rightCoor[0] - startCoor[0], rightCoor[1] - startCoor[1]))
+
+        return eyeAccuracy
+
+
+    # select the eye to recalibrate on a point based on the per-eye accuracy:
+    # if only one of the eyes is out of the accuracy circle, then only that eye is redone
+    def __selectEyeToRecalibrate(self, pointKey):
+
+        if self.calibrationAccuracy is None or pointKey not in self.calibrationAccuracy:
+            return tobii.SELECTED_EYE_BOTH
+
+        leftError, rightError = self.calibrationAccuracy[pointKey]
+        leftPoor = not leftError <= self.accuracyInPixel
+        rightPoor = not rightError <= self.accuracyInPixel
+
+        if leftPoor and not rightPoor:
+            return tobii.SELECTED_EYE_LEFT
+        elif rightPoor and not leftPoor:
+            return tobii.SELECTED_EYE_RIGHT
+        else:
+            return tobii.SELECTED_EYE_BOTH
+
+
     # function for drawing the results of the calibration
     def __drawCalibrationResults(self, calibResult, calibWin, curDict):
 
@@ -1061,14 +2039,14 @@ class TobiiHelper:
             checkMsg.draw()
 
             # show points and lines on window
-            calibWin.flip()
+            self.clock.flip(calibWin)
 
             # add the label of calib points to the accepted key list
             keyList = ['c', 'q']
             for key in curDict.keys():
                 keyList.append(key)
 
-            pressedKeys = event.getKeys(keyList)
+            pressedKeys = self.__getKeys(keyList)
 
             # depending on response, either...
             # abort script
@@ -1095,12 +2073,11 @@ class TobiiHelper:
 
                 # continue with calibration procedure
                 elif key in ['c']:
-                    if self.logging:
-                        print ("Finished checking. Resuming calibration.")
+                    self.__log(logging.INFO, "Finished checking. Resuming calibration.", phase = 'calibration')
                     checkMsg.pos = (0.0, 0.0)
                     checkMsg.text = _("Finished checking. Resuming calibration.")
                     checkMsg.draw()
-                    calibWin.flip()
+                    self.clock.flip(calibWin)
 
                     # return dictionary of points to be recalibration
                     redoDict = collections.OrderedDict([])  # empty dictionary for holding unique values
@@ -1119,7 +2096,7 @@ class TobiiHelper:
 
     # function for drawing calibration points, collecting and applying
     # calibration data
-    def __getCalibrationData(self, calibWin, pointList):
+    def __getCalibrationData(self, calibWin, pointList, eyeList = None):
 
         # check argument values
         if self.calibration is None:
@@ -1130,11 +2107,17 @@ class TobiiHelper:
         # check the values of the point dictionary
         if not isinstance(pointList, list):
             raise TypeError("pointList must be a list of coordinate tuples.")
+        # check the eyes to calibrate at the points
+        if eyeList is not None:
+            if not isinstance(eyeList, list):
+                raise TypeError("eyeList must be a list of the eyes to calibrate.")
+            if len(eyeList) != len(pointList):
+                raise ValueError("eyeList and pointList have different amount of items.")
 
         # defaults
         pointSmallRadius = 5.0  # point radius
         pointLargeRadius = pointSmallRadius * 10.0
-        moveFrames = 50 # number of frames to draw between points
+        moveFrames = self.timing.pointMoveFrames # number of frames to draw between points
         # starter point for animation
         if len(pointList) > 0 and pointList[0] != (0.9, 0.9):
             startPoint = (0.9, 0.9)
@@ -1172,9 +2155,9 @@ class TobiiHelper:
                 # draw & flip
                 calibPoint.pos = self.__ada2PsychoPix(tuple(firstPoint))
                 calibPoint.draw()
-                calibWin.flip()
+                self.clock.flip(calibWin)
             # wait to let eyes settle
-            pcore.wait(0.5)
+            self.clock.wait(self.timing.pointSettleDelay)
 
             # allow the eye to focus before beginning calibration
             # point size change step
@@ -1185,35 +2168,40 @@ class TobiiHelper:
                 pointLargeRadius -= radiusStep
                 calibPoint.radius = pointLargeRadius
                 calibPoint.draw()
-                calibWin.flip()
+                self.clock.flip(calibWin)
             # first wait to let the eyes settle
-            pcore.wait(0.5)
+            self.clock.wait(self.timing.pointFocusDelay)
 
             # conduct calibration of point
-            if self.logging:
-                print ("Collecting data at {0}." .format(i + 1))
+            self.__log(logging.INFO, "Collecting data at {0}.".format(i + 1), phase = 'calibration',
+                       point = i + 1, position = pointList[i])
+            collectStart = time.perf_counter()
             collecting_status = None
             while collecting_status != tobii.CALIBRATION_STATUS_SUCCESS:
-                collecting_status = self.calibration.collect_data(pointList[i][0], pointList[i][1])
+                if eyeList is None:
+                    collecting_status = self.__collectCalibrationData(pointList[i][0], pointList[i][1])
+                else:
+                    collecting_status = self.__collectCalibrationData(pointList[i][0], pointList[i][1], eyeList[i])
 
             # feedback from calibration
-            if self.logging:
-                print ("{0} for data at point {1}."
-                       .format(collecting_status, i + 1))
-            pcore.wait(0.3)  # wait before continuing
+            self.__log(logging.INFO, "{0} for data at point {1}.".format(collecting_status, i + 1),
+                       phase = 'calibration', point = i + 1, status = collecting_status,
+                       eye = None if eyeList is None else eyeList[i],
+                       duration = time.perf_counter() - collectStart)
+            self.clock.wait(self.timing.pointCollectedDelay)  # wait before continuing
 
             # Return point to original size
             for frame in range(moveFrames):
                 pointLargeRadius += radiusStep
                 calibPoint.radius = pointLargeRadius
                 calibPoint.draw()
-                calibWin.flip()
+                self.clock.flip(calibWin)
             # let the eyes settle and move to the next point
-            pcore.wait(0.2)
+            self.clock.wait(self.timing.pointLeaveDelay)
 
             # check to quit
             # depending on response, either abort script or continue to calibration
-            if event.getKeys(keyList=['q']):
+            if self.__getKeys(keyList = ['q']):
                 calibWin.close()
                 self.calibration.leave_calibration_mode()
                 pcore.quit()
@@ -1224,14 +2212,221 @@ class TobiiHelper:
         # clear screen
         self.__clearScreen(calibWin)
         # print feedback
-        if self.logging:
-            print ("Computing and applying calibration.")
+        self.__log(logging.INFO, "Computing and applying calibration.", phase = 'calibration')
+        # compute and apply calibration to get calibration result object
+        with self.__phase('compute_and_apply'):
+            calibResult = self.__computeAndApplyCalibration(calibWin)
+        # return calibration result
+        return calibResult
+
+
+    # function for moving the calibration point continuously through all calibration
+    # points and collecting calibration data along the whole trajectory (smooth pursuit)
+    def __getPursuitCalibrationData(self, calibWin, pointList):
+
+        # check argument values
+        if self.calibration is None:
+            raise RuntimeError("No calibration object exists")
+        # check value of calibration window
+        if not isinstance(calibWin, visual.Window):
+            raise TypeError("calibWin should be a visual.Window object.")
+        # check the values of the point dictionary
+        if not isinstance(pointList, list):
+            raise TypeError("pointList must be a list of coordinate tuples.")
+
+        # defaults
+        pointRadius = 15.0
+        # collected positions closer to each other than this are skipped (normalized units)
+        minSampleSpacing = 0.02
+        # starter point for animation
+        if len(pointList) > 0 and pointList[0] != (0.9, 0.9):
+            startPoint = (0.9, 0.9)
+        else:
+            startPoint = (0.1, 0.1)
+
+        # the target moves with constant speed on the segments between the points
+        waypoints = [startPoint] + [(point[0], point[1]) for point in pointList]
+        segmentDuration = self.timing.pursuitSegmentDuration
+        totalDuration = segmentDuration * (len(waypoints) - 1)
+
+        # position of the target at the given time from the start of the animation
+        def targetPosAt(elapsed):
+            if elapsed >= totalDuration or segmentDuration == 0:
+                return waypoints[-1]
+            segment = int(elapsed / segmentDuration)
+            ratio = (elapsed - segment * segmentDuration) / segmentDuration
+            firstPoint = waypoints[segment]
+            secondPoint = waypoints[segment + 1]
+            return (firstPoint[0] + (secondPoint[0] - firstPoint[0]) * ratio,
+                    firstPoint[1] + (secondPoint[1] - firstPoint[1]) * ratio)
+
+        # calibraiton point visual object
+        calibPoint = visual.Circle(calibWin,
+                                   radius = pointRadius,
+                                   lineColor = [1.0, -1.0, -1.0],  # red
+                                   fillColor = [1.0, -1.0, -1.0],
+                                   units = 'pix',
+                                   pos = self.__ada2PsychoPix(startPoint))
+
+        # let the eyes find the target before it starts to move
+        calibPoint.draw()
+        self.clock.flip(calibWin)
+        self.clock.wait(self.timing.pointSettleDelay)
+
+        collectedPoints = []
+        collectOutput = {}
+        stopCollecting = threading.Event()
+        startTime = self.clock.getTime()
+
+        # collect_data() blocks while the SDK records samples, so we ask for the
+        # target position in the middle of the expected collection time
+        def collectWorker():
+            expectedDuration = 0.0
+            try:
+                while not stopCollecting.is_set():
+                    collectStart = self.clock.getTime() - startTime
+                    if collectStart >= totalDuration:
+                        break
+                    targetPos = targetPosAt(min(collectStart + expectedDuration / 2, totalDuration))
+
+                    # don't collect the same place again
+                    if len(collectedPoints) > 0 and \
+                       math.hypot(targetPos[0] - collectedPoints[-1][0],
+                                  targetPos[1] - collectedPoints[-1][1]) < minSampleSpacing:
+                        stopCollecting.wait(0.01)
+                        continue
+
+                    collectingStatus = self.__collectCalibrationData(targetPos[0], targetPos[1])
+                    collectDuration = self.clock.getTime() - startTime - collectStart
+                    if expectedDuration == 0.0:
+                        expectedDuration = collectDuration
+                    else:
+                        expectedDuration = (expectedDuration + collectDuration) / 2
+                    if collectingStatus == tobii.CALIBRATION_STATUS_SUCCESS:
+                        collectedPoints.append(targetPos)
+            except Exception as error:
+                collectOutput['error'] = error
+
+        worker = threading.Thread(target = collectWorker, name = 'pursuit_collect')
+        worker.daemon = True
+        worker.start()
+
+        self.__log(logging.INFO, "Collecting smooth pursuit data.", phase = 'calibration',
+                   mode = 'pursuit', duration = totalDuration)
+
+        # move the point through all calibration points
+        currentSegment = 0
+        while True:
+            elapsed = self.clock.getTime() - startTime
+            calibPoint.pos = self.__ada2PsychoPix(tuple(targetPosAt(elapsed)))
+            calibPoint.draw()
+            self.clock.flip(calibWin)
+
+            if elapsed >= totalDuration:
+                break
+
+            # check to quit when the target reaches a calibration point
+            if int(elapsed / segmentDuration) != currentSegment:
+                currentSegment = int(elapsed / segmentDuration)
+                if self.__getKeys(keyList = ['q']):
+                    stopCollecting.set()
+                    worker.join()
+                    calibWin.close()
+                    self.calibration.leave_calibration_mode()
+                    pcore.quit()
+
+                # clear events not accessed this iteration
+                event.clearEvents(eventType='keyboard')
+
+        # wait for the last collection to finish
+        stopCollecting.set()
+        worker.join()
+
+        # errors of the SDK call are raised on the caller's thread
+        if 'error' in collectOutput:
+            raise collectOutput['error']
+
+        self.__log(logging.INFO, "Collected data at {0} positions.".format(len(collectedPoints)),
+                   phase = 'calibration', mode = 'pursuit', points = len(collectedPoints),
+                   duration = self.clock.getTime() - startTime)
+
+        # clear screen
+        self.__clearScreen(calibWin)
+        # print feedback
+        self.__log(logging.INFO, "Computing and applying calibration.", phase = 'calibration')
         # compute and apply calibration to get calibration result object
-        calibResult = self.calibration.compute_and_apply()
+        with self.__phase('compute_and_apply'):
+            calibResult = self.__computeAndApplyCalibration(calibWin)
         # return calibration result
         return calibResult
 
 
+    # run the blocking compute_and_apply() call of the SDK on a worker thread,
+    # meanwhile keep the window animated and return as soon as the result is ready
+    def __computeAndApplyCalibration(self, calibWin):
+
+        # check argument values
+        if self.calibration is None:
+            raise RuntimeError("No calibration object exists")
+        if not isinstance(calibWin, visual.Window):
+            raise TypeError("calibWin should be a visual.Window object.")
+
+        # stimuli for holding text
+        calibMessage = visual.TextStim(calibWin,
+                                       color = [1.0, 1.0, 1.0],  # text
+                                       units = 'norm',
+                                       height = 0.08,
+                                       pos = (0.0, 0.1))
+        # pulsing point under the message, showing that we are still working
+        waitingPoint = visual.Circle(calibWin,
+                                     radius = 5.0,
+                                     lineColor = [1.0, -1.0, -1.0],  # red
+                                     fillColor = [1.0, -1.0, -1.0],
+                                     units = 'pix',
+                                     pos = (0.0, -50.0))
+
+        # the worker stores the result (or the error) here for the render thread
+        computeOutput = {}
+
+        def computeWorker():
+            try:
+                computeOutput['result'] = self.calibration.compute_and_apply()
+            except Exception as error:
+                computeOutput['error'] = error
+
+        computeStart = time.perf_counter()
+        worker = threading.Thread(target = computeWorker, name = 'compute_and_apply')
+        worker.daemon = True
+        worker.start()
+
+        # give feedback
+        calibMessage.text = _("Applying calibration...")
+        calibMessage.draw()
+        self.clock.flip(calibWin)
+
+        # animate until the SDK finishes, flip() keeps us in sync with the screen
+        frame = 0
+        self.clock.wait(POLL_INTERVAL)
+        while worker.is_alive():
+            frame += 1
+            waitingPoint.radius = 5.0 + 5.0 * abs(math.sin(frame / 10.0))
+            calibMessage.draw()
+            waitingPoint.draw()
+            self.clock.flip(calibWin)
+            self.clock.wait(POLL_INTERVAL)
+
+        # errors of the SDK call are raised on the caller's thread
+        if 'error' in computeOutput:
+            self.__log(logging.ERROR, "Computing the calibration failed: " + str(computeOutput['error']),
+                       phase = 'calibration', duration = time.perf_counter() - computeStart)
+            raise computeOutput['error']
+
+        self.__log(logging.INFO, "Calibration computed.", phase = 'calibration',
+                   status = getattr(computeOutput['result'], 'status', None), frames = frame,
+                   duration = time.perf_counter() - computeStart)
+        return computeOutput['result']
+
+
     def __drawCalibrationScreen(self, calibDict, calibWin):
 
         # check the values of the point dictionary
@@ -1253,7 +2448,7 @@ class TobiiHelper:
                                        pos = (0.0, 0.1))
 
         # initialize calibration
-        self.calibration = tobii.ScreenBasedCalibration(self.eyetracker)  # calib object
+        self.calibration = self.__createCalibration()
         # enter calibration mode
         self.calibration.enter_calibration_mode()
         # subject instructions
@@ -1261,49 +2456,62 @@ class TobiiHelper:
                               "and follow it with your eyes as closely as " \
                               "possible.\n\nPress 'c' to continue.")
         calibMessage.draw()
-        calibWin.flip()
+        self.clock.flip(calibWin)
 
         # turn keyboard reporting on and get subject response
-        event.waitKeys(maxWait = 10, keyList = ['c'])  # proceed with calibration
+        self.__waitKeys(self.timing.instructionTimeout, ['c'])  # proceed with calibration
         self.__clearScreen(calibWin)
-        pcore.wait(3)
+        self.clock.wait(self.timing.instructionDelay)
 
         # create dictionary for holding points to be recalibrated
         redoCalDict = calibDict
+        # eyes to recalibrate on the points (None means both eyes)
+        redoEyes = None
+        self.calibrationAccuracy = None
+        calibrationRound = 0
 
         # loop through calibration process until calibration is complete
         while True:
 
             # create point order form randomized dictionary values
             pointOrder = list(redoCalDict.values())
+            calibrationRound += 1
             # perform calibration
-            calibResult = self.__getCalibrationData(calibWin, pointOrder)
+            with self.__phase('calibration_round_' + str(calibrationRound), points = len(pointOrder)):
+                if self.calibrationMode == 'pursuit':
+                    calibResult = self.__getPursuitCalibrationData(calibWin, pointOrder)
+                else:
+                    calibResult = self.__getCalibrationData(calibWin, pointOrder, redoEyes)
 
             # Check status of calibration result
             # if calibration was successful, check calibration results
             if calibResult.status == tobii.CALIBRATION_STATUS_SUCCESS:
-                # give feedback
-                calibMessage.text = _("Applying calibration...")
-                calibMessage.draw()
-                calibWin.flip()
-                pcore.wait(2)
-                # moving on to accuracy plot
-                calibMessage.text = _("Calculating calibration accuracy...")
-                calibMessage.draw()
-                calibWin.flip()
-                pcore.wait(2)
-
-                # check calibration for poorly calibrated points
-                redoCalDict = self.__drawCalibrationResults(calibResult,
-                                                          calibWin,
-                                                          calibDict)
+                # pursuit data is not bound to the calibration points,
+                # so there are no points to select for recalibration
+                if self.calibrationMode == 'pursuit':
+                    redoCalDict = collections.OrderedDict()
+                else:
+                    # calibration is already applied, moving on to accuracy plot
+                    calibMessage.text = _("Calculating calibration accuracy...")
+                    calibMessage.draw()
+                    self.clock.flip(calibWin)
+
+                    # check calibration for poorly calibrated points
+                    with self.__phase('calibration_results', round = calibrationRound):
+                        redoCalDict = self.__drawCalibrationResults(calibResult,
+                                                                  calibWin,
+                                                                  calibDict)
+                    # per-eye accuracy of the calibration points
+                    self.calibrationAccuracy = self.__calculateEyeAccuracy(calibResult, calibDict)
+                    self.__log(logging.DEBUG, "Calibration accuracy calculated.", phase = 'calibration',
+                               round = calibrationRound, accuracy = self.calibrationAccuracy)
 
             else:  # if calibration was not successful, leave and abort
                 calibMessage.text = _("Calibration was not successful.\n\n" \
                                       "Closing the calibration window.")
                 calibMessage.draw()
-                calibWin.flip()
-                pcore.wait(3)
+                self.clock.flip(calibWin)
+                self.clock.wait(self.timing.calibrationResultDelay)
                 calibWin.close()
                 self.calibration.leave_calibration_mode()
                 return
@@ -1311,13 +2519,13 @@ class TobiiHelper:
             # Redo calibration for specific points if necessary
             if not redoCalDict:  # if no points to redo
             # finish calibration
-                if self.logging:
-                    print ("Calibration successful. Moving on to validation mode.")
+                self.__log(logging.INFO, "Calibration successful. Moving on to validation mode.",
+                           phase = 'calibration', status = 'success')
                 calibMessage.text = _("Calibration was successful.\n\n" \
                                       "Moving on to validation.")
                 calibMessage.draw()
-                calibWin.flip()
-                pcore.wait(3)
+                self.clock.flip(calibWin)
+                self.clock.wait(self.timing.calibrationResultDelay)
                 self.calibration.leave_calibration_mode()
                 # break loop to proceed with validation
                 break
@@ -1326,26 +2534,37 @@ class TobiiHelper:
                 # convert list to string for feedback
                 printString = " ".join(str(x) for x in redoCalDict.keys())
                 # feedback
-                if self.logging:
-                    print ("Still need to calibrate the following points: %s"
-                            % printString)
+                self.__log(logging.INFO, "Still need to calibrate the following points: %s" % printString,
+                           phase = 'recalibration', points = list(redoCalDict.keys()))
                 calibMessage.text = _("Calibration is almost complete.\n\n" \
                                       "Prepare to recalibrate a few points.")
                 calibMessage.draw()
-                calibWin.flip()
-                pcore.wait(3)
+                self.clock.flip(calibWin)
+                self.clock.wait(self.timing.recalibrationDelay)
                 self.__clearScreen(calibWin)
-                pcore.wait(3)
+                self.clock.wait(self.timing.recalibrationDelay)
+
+                # decide which eye needs to be recalibrated on the points
+                if self.monocularRecalibration:
+                    redoEyes = [self.__selectEyeToRecalibrate(key) for key in redoCalDict.keys()]
+                else:
+                    redoEyes = None
 
                 # iterate through list of redo points and remove data from calibration
-                for newPoint in redoCalDict.values():
-                    if self.logging:
-                        print (newPoint)
-                    self.calibration.discard_data(newPoint[0], newPoint[1])
+                for i, (pointId, newPoint) in enumerate(redoCalDict.items()):
+                    if redoEyes is None:
+                        self.__log(logging.INFO, "Discarding data at point {0}.".format(pointId),
+                                   phase = 'recalibration', point = pointId, position = newPoint)
+                        self.calibration.discard_data(newPoint[0], newPoint[1])
+                    else:
+                        self.__log(logging.INFO, "Recalibrating eye: {0}".format(redoEyes[i]),
+                                   phase = 'recalibration', point = pointId, position = newPoint,
+                                   eye = redoEyes[i])
+                        self.calibration.discard_data(newPoint[0], newPoint[1], redoEyes[i])
 
         # Validate calibration
         self.__clearScreen(calibWin)
-        pcore.wait(3)
+        self.clock.wait(self.timing.validationDelay)
 
 # ----- Public calibration rutines -----
 
@@ -1364,32 +2583,33 @@ class TobiiHelper:
         if trackWin is not None and not isinstance(trackWin, visual.Window):
             raise TypeError("If trackWin parameter is set, then it should be valid visual.Window object")
 
-        # start the eyetracker
-        self.__startGazeData()
-        # wait for it ot warm up
-        pcore.wait(0.5)
-
-        # use the existing window
-        if trackWin is not None:
-            # feedback about eye position
-            self.__drawEyePositions(trackWin)
-            pcore.wait(2)
-        else: # use an own window
-            # create window for visualizing eye position and text
-            with visual.Window(size = [self.win.getSizePix()[0],
-                                       self.win.getSizePix()[1]],
-                                       pos = [0, 0],
-                                       units = 'pix',
-                                       fullscr = True,
-                                       allowGUI = True,
-                                       monitor = self.win,
-                                       winType = 'pyglet',
-                                       color = [0.4, 0.4, 0.4]) as ownTrackWin:
-                ownTrackWin.mouseVisible = False
+        with self.__phase('trackbox'):
+            # start the eyetracker
+            self.__startTrackBoxData()
+            # wait for it ot warm up
+            self.clock.wait(self.timing.warmUpDelay)
 
+            # use the existing window
+            if trackWin is not None:
                 # feedback about eye position
-                self.__drawEyePositions(ownTrackWin)
-                pcore.wait(2)
+                self.__drawEyePositions(trackWin)
+                self.clock.wait(self.timing.trackBoxExitDelay)
+            else: # use an own window
+                # create window for visualizing eye position and text
+                with visual.Window(size = [self.win.getSizePix()[0],
+                                           self.win.getSizePix()[1]],
+                                           pos = [0, 0],
+                                           units = 'pix',
+                                           fullscr = True,
+                                           allowGUI = True,
+                                           monitor = self.win,
+                                           winType = 'pyglet',
+                                           color = [0.4, 0.4, 0.4]) as ownTrackWin:
+                    ownTrackWin.mouseVisible = False
+
+                    # feedback about eye position
+                    self.__drawEyePositions(ownTrackWin)
+                    self.clock.wait(self.timing.trackBoxExitDelay)
 
     # function for running a complete calibration routine
     def runFullCalibration(self, numCalibPoints = None, calibWin = None):
@@ -1449,20 +2669,21 @@ class TobiiHelper:
                                        height = 0.08,
                                        pos = (0.0, 0.1))
 
-        self.runTrackBox(calibWin)
+        with self.__phase('full_calibration', points = len(calibDict)):
+            self.runTrackBox(calibWin)
 
-        # run calibration rutine
-        self.__drawCalibrationScreen(calibDict, calibWin)
+            # run calibration rutine
+            self.__drawCalibrationScreen(calibDict, calibWin)
 
-        # run validation
-        self.runValidation(calibDict, calibWin)
-        # close window
-        calibMessage.text = _("Finished validating the calibration.\n\n" \
-                              "Calibration is complete. Closing window.")
-        calibMessage.draw()
-        calibWin.flip()
-        pcore.wait(3)
-        calibWin.close()
+            # run validation
+            self.runValidation(calibDict, calibWin)
+            # close window
+            calibMessage.text = _("Finished validating the calibration.\n\n" \
+                                  "Calibration is complete. Closing window.")
+            calibMessage.draw()
+            self.clock.flip(calibWin)
+            self.clock.wait(self.timing.finishDelay)
+            calibWin.close()
 
 
     # function for running validation routine post calibration to check
@@ -1471,8 +2692,7 @@ class TobiiHelper:
 
         # check the values of the point dictionary
         if pointDict is None:
-            if self.logging:
-                print("pointDict has no value. Using 5 point default.")
+            self.__log(logging.INFO, "pointDict has no value. Using 5 point default.", phase = 'validation')
             pointList = [('1',(0.1, 0.1)), ('2',(0.9, 0.1)), ('3',(0.5, 0.5)),
                          ('4',(0.1, 0.9)), ('5',(0.9, 0.9))]
             pointDict = collections.OrderedDict(pointList)
@@ -1485,24 +2705,25 @@ class TobiiHelper:
         if self.win is None:
             raise RuntimeError("No experimental monitor has been specified.\n" +\
                                "Try running setMonitor().")
-        # start eyetracker
-        self.__startGazeData()
-        # let it warm up briefly
-        pcore.wait(0.5)
-
-        # use existing window
-        if valWin is not None:
-            self.__drawValidationScreen(pointDict, valWin)
-        else:
-            # window stimuli
-            with visual.Window(size = [self.win.getSizePix()[0],
-                                       self.win.getSizePix()[1]],
-                                       pos = [0, 0],
-                                       units = 'pix',
-                                       fullscr = True,
-                                       allowGUI = True,
-                                       monitor = self.win,
-                                       winType = 'pyglet',
-                                       color = [0.4, 0.4, 0.4]) as ownValWin:
-                ownValWin.mouseVisible = False
-                self.__drawValidationScreen(pointDict, ownValWin)
\ No newline at end of file
+        with self.__phase('validation', points = len(pointDict)):
+            # start eyetracker
+            self.__startGazeData()
+            # let it warm up briefly
+            self.clock.wait(self.timing.warmUpDelay)
+
+            # use existing window
+            if valWin is not None:
+                self.__drawValidationScreen(pointDict, valWin)
+            else:
+                # window stimuli
+                with visual.Window(size = [self.win.getSizePix()[0],
+                                           self.win.getSizePix()[1]],
+                                           pos = [0, 0],
+                                           units = 'pix',
+                                           fullscr = True,
+                                           allowGUI = True,
+                                           monitor = self.win,
+                                           winType = 'pyglet',
+                                           color = [0.4, 0.4, 0.4]) as ownValWin:
+                    ownValWin.mouseVisible = False
+                    self.__drawValidationScreen(pointDict, ownValWin)
\ No newline at end of file
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+# Timeline of the calibration session in Chrome trace-event format
+
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+# Summary: TraceRecorder collects trace events from all threads: spans (frames, waits,
+# SDK calls, phases), instant events (key presses) and flow events connecting a gaze
+# sample stored by the callback thread with the frame of the render thread reading it.
+# The events are saved as Chrome trace-event JSON, which can be opened in a trace viewer
+# (chrome://tracing, Perfetto), showing the stalls and the contention of the threads.
+
+import itertools
+import json
+import numbers
+import os
+import threading
+import time
+
+# Context manager recording a complete event ('X') of the time spent in the with block
+class TraceSpan:
+
+    def __init__(self, recorder, name, category, args):
+        self.recorder = recorder
+        self.name = name
+        self.category = category
+        self.args = args
+        self.startTime = None
+
+    def __enter__(self):
+        self.startTime = self.recorder.getTimeStamp()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        duration = self.recorder.getTimeStamp() - self.startTime
+        if excType is not None:
+            self.args['error'] = excType.__name__
+        self.recorder.addEvent({'name' : self.name, 'cat' : self.category, 'ph' : 'X',
+                                'ts' : self.startTime, 'dur' : duration, 'args' : self.args})
+        return False
+
+
+# Forwards the calls to the target object (e.g. a calibration object of the SDK),
+# recording a span for the calls of the given methods
+class TracingProxy:
+
+    def __init__(self, target, recorder, category, methodNames):
+        self.__dict__['target'] = target
+        self.__dict__['recorder'] = recorder
+        self.__dict__['category'] = category
+        self.__dict__['methodNames'] = methodNames
+
+    def __getattr__(self, name):
+        attribute = getattr(self.target, name)
+        if name not in self.methodNames or not callable(attribute):
+            return attribute
+
+        def tracedCall(*args, **kwargs):
+            with self.recorder.span(name, self.category):
+                return attribute(*args, **kwargs)
+        return tracedCall
+
+    def __setattr__(self, name, value):
+        setattr(self.target, name, value)
+
+
+# Collects the trace events of all threads, at most maxEvents of them
+class TraceRecorder:
+
+    def __init__(self, maxEvents = 1000000):
+
+        if not isinstance(maxEvents, numbers.Integral):
+            raise TypeError("maxEvents should be an integer.")
+        if maxEvents < 1:
+            raise ValueError("maxEvents should be positive.")
+
+        self.maxEvents = maxEvents
+        self.lock = threading.Lock()
+        self.flowIds = itertools.count(1)
+        # thread ids can be reused by new threads, so every thread gets its own id
+        self.threadIds = itertools.count(1)
+        self.processId = os.getpid()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.events = []
+            self.threadNames = {}
+            self.threadData = threading.local()
+            self.droppedCount = 0
+            self.startTime = time.perf_counter()
+
+    # microseconds since the start of the recording
+    def getTimeStamp(self):
+        return (time.perf_counter() - self.startTime) * 1000000.0
+
+    def addEvent(self, event):
+        with self.lock:
+            threadId = getattr(self.threadData, 'threadId', None)
+            if threadId is None:
+                threadId = next(self.threadIds)
+                self.threadData.threadId = threadId
+                self.threadNames[threadId] = threading.current_thread().name
+            event['pid'] = self.processId
+            event['tid'] = threadId
+            if len(self.events) >= self.maxEvents:
+                self.droppedCount += 1
+                return
+            self.events.append(event)
+
+    # context manager recording the time spent in the with block
+    def span(self, name, category, **args):
+        return TraceSpan(self, name, category, args)
+
+    # an event without duration, e.g. a key press
+    def instant(self, name, category, **args):
+        self.addEvent({'name' : name, 'cat' : category, 'ph' : 'i', 's' : 't',
+                       'ts' : self.getTimeStamp(), 'args' : args})
+
+    # counter values shown as a graph, e.g. the size of a buffer
+    def counter(self, name, **values):
+        self.addEvent({'name' : name, 'ph' : 'C', 'ts' : self.getTimeStamp(), 'args' : values})
+
+    # start of an arrow to an other thread, should be called inside a span.
+    # Returns the id used for finishing it with flowEnd().
+    def flowStart(self, name, category):
+        flowId = next(self.flowIds)
+        self.addEvent({'name' : name, 'cat' : category, 'ph' : 's', 'id' : flowId, 'ts' : self.getTimeStamp()})
+        return flowId
+
+    # end of an arrow started by flowStart(), should be called inside a span
+    def flowEnd(self, name, category, flowId):
+        self.addEvent({'name' : name, 'cat' : category, 'ph' : 'f', 'bp' : 'e', 'id' : flowId,
+                       'ts' : self.getTimeStamp()})
+
+    def getDroppedCount(self):
+        with self.lock:
+            return self.droppedCount
+
+    # the recorded events with the names of the threads
+    def getEvents(self):
+        with self.lock:
+            events = [{'name' : 'thread_name', 'ph' : 'M', 'pid' : self.processId, 'tid' : threadId,
+                       'args' : {'name' : threadName}} for threadId, threadName in self.threadNames.items()]
+            return events + list(self.events)
+
+    # save the events as Chrome trace-event JSON
+    def write(self, filePath):
+        with open(filePath, 'w') as traceFile:
+            json.dump({'traceEvents' : self.getEvents(), 'displayTimeUnit' : 'ms',
+                       'otherData' : {'dropped_events' : self.getDroppedCount()}}, traceFile, default = str)
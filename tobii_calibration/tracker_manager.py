@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+
+# Manager for using more Tobii eyetrackers from the same process
+
+# Authors:
+# Tamás Zolnai (zolnaitamas2000@gmail.com)
+
+# License: Apache License 2.0, see LICENSE.txt for more details.
+
+# Summary: Connects to more eyetrackers by their serial numbers, subscribes to their
+# gaze data at the same time and provides a combined, timestamp-aligned stream of the
+# samples. Every eyetracker has its own TobiiHelper object, so calibration of the
+# trackers is independent.
+
+import collections
+import heapq
+import logging
+import numbers
+import os
+import threading
+import time
+
+try:
+    from .tobii_calibration import TobiiHelper
+    from .event_log import logEvent, ensureLogQueue
+except ImportError:
+    from tobii_calibration import TobiiHelper
+    from event_log import logEvent, ensureLogQueue
+
+class TobiiTrackerManager:
+
+    def __init__(self, bufferSize = 12000, staleTimeout = 1.0):
+
+        if not isinstance(bufferSize, numbers.Integral):
+            raise TypeError("bufferSize should be an integer.")
+        if bufferSize < 1:
+            raise ValueError("bufferSize should be positive.")
+        if not isinstance(staleTimeout, numbers.Number):
+            raise TypeError("staleTimeout should be a number.")
+        if staleTimeout <= 0:
+            raise ValueError("staleTimeout should be positive.")
+
+        # maximum number of samples kept for one eyetracker
+        self.bufferSize = bufferSize
+
+        # an eyetracker sending nothing for this long (s) doesn't hold back the aligned stream
+        self.staleTimeout = staleTimeout
+
+        # TobiiHelper objects by serial numbers
+        self.helpers = collections.OrderedDict()
+
+        # gaze data buffers by serial numbers
+        self.buffers = {}
+
+        # subscribed callbacks by serial numbers
+        self.callbacks = {}
+
+        # system time stamp of the last received sample by serial numbers
+        self.latestTimeStamps = {}
+
+        # time.monotonic() of the subscription or the last received sample by serial numbers
+        self.receiveTimes = {}
+
+        # number of samples dropped from the full buffers by serial numbers
+        self.droppedCounts = {}
+
+        # serial numbers of the eyetrackers left out of the aligned stream
+        self.staleSerials = set()
+
+        self.lock = threading.Lock()
+
+        self.logging = True
+
+    def enableLogging(self):
+        self.logging = True
+        for helper in self.helpers.values():
+            helper.enableLogging()
+
+    def disableLogging(self):
+        self.logging = False
+        for helper in self.helpers.values():
+            helper.disableLogging()
+
+    def __log(self, level, message, **fields):
+        if not self.logging:
+            return
+        ensureLogQueue()
+        logEvent(level, message, phase = 'subscription', **fields)
+
+    # connect to the eyetrackers with the given serial numbers, searching is done concurrently
+    def connect(self, serialStrings):
+
+        if not isinstance(serialStrings, list):
+            raise TypeError("serialStrings must be a list of serial numbers.")
+        for serialString in serialStrings:
+            if not isinstance(serialString, str):
+                raise TypeError("Serial number must be formatted as a string.")
+            if serialString in self.helpers:
+                raise ValueError("Eyetracker is already connected: " + serialString)
+        if len(set(serialStrings)) != len(serialStrings):
+            raise ValueError("serialStrings contains the same serial number more times.")
+
+        newHelpers = collections.OrderedDict()
+        try:
+            for serialString in serialStrings:
+                helper = TobiiHelper()
+                newHelpers[serialString] = helper
+                if not self.logging:
+                    helper.disableLogging()
+                # every eyetracker has its own cache file
+                if helper.eyeTrackerCachePath is not None:
+                    cacheDir = os.path.dirname(helper.eyeTrackerCachePath)
+                    helper.setEyeTrackerCache(os.path.join(cacheDir, "eyetracker_" + serialString + ".json"))
+                helper.setEyeTracker(serialString, blocking = False)
+
+            for helper in newHelpers.values():
+                helper.waitForEyeTracker()
+        except Exception:
+            # the helpers of the other eyetrackers are not kept
+            for helper in newHelpers.values():
+                self.__closeHelper(helper)
+            raise
+
+        self.helpers.update(newHelpers)
+
+    # TobiiHelper object of the given eyetracker, e.g. for running its calibration
+    def getHelper(self, serialString):
+        if serialString not in self.helpers:
+            raise ValueError("No connected eyetracker with serial number: " + str(serialString))
+        return self.helpers[serialString]
+
+    def getSerialNumbers(self):
+        return list(self.helpers.keys())
+
+    # subscribe to the gaze data of the given eyetracker, or to all of them
+    def subscribe(self, serialString = None):
+
+        for serial in self.__selectSerials(serialString):
+            if serial in self.callbacks:
+                continue
+
+            with self.lock:
+                self.buffers[serial] = collections.deque(maxlen = self.bufferSize)
+                self.latestTimeStamps.pop(serial, None)
+                self.receiveTimes[serial] = time.monotonic()
+                self.droppedCounts[serial] = 0
+                self.staleSerials.discard(serial)
+
+            # the listener of the manager feeds the helper too, it's independent
+            # of the gaze data the screens of the helper start and stop
+            callback = self.__createGazeDataCallback(serial)
+            self.callbacks[serial] = callback
+            self.__log(logging.INFO, "Subscribing to eyetracker: " + serial, serial_number = serial)
+            self.helpers[serial].getSubscriptions().subscribe('gaze', callback)
+
+    # unsubscribe from the gaze data of the given eyetracker, or from all of them
+    def unsubscribe(self, serialString = None):
+
+        for serial in self.__selectSerials(serialString):
+            if serial not in self.callbacks:
+                continue
+
+            self.__log(logging.INFO, "Unsubscribing from eyetracker: " + serial, serial_number = serial)
+            self.helpers[serial].getSubscriptions().unsubscribe('gaze', self.callbacks[serial])
+            del self.callbacks[serial]
+
+    # unsubscribe from all eyetrackers and forget them
+    def disconnect(self):
+        self.unsubscribe()
+        with self.lock:
+            self.buffers.clear()
+            self.latestTimeStamps.clear()
+            self.receiveTimes.clear()
+            self.droppedCounts.clear()
+            self.staleSerials.clear()
+        self.helpers.clear()
+
+    # get and remove the buffered samples of one eyetracker
+    def readSamples(self, serialString):
+        if serialString not in self.buffers:
+            raise ValueError("Not subscribed to eyetracker: " + str(serialString))
+
+        with self.lock:
+            buffer = self.buffers[serialString]
+            samples = list(buffer)
+            buffer.clear()
+        return samples
+
+    # last received sample of one eyetracker, or None
+    def getLatestSample(self, serialString):
+        if serialString not in self.buffers:
+            raise ValueError("Not subscribed to eyetracker: " + str(serialString))
+
+        with self.lock:
+            buffer = self.buffers[serialString]
+            if len(buffer) == 0:
+                return None
+            return buffer[-1]
+
+    # number of samples of one eyetracker dropped from its full buffer since subscribing
+    def getDroppedCount(self, serialString):
+        if serialString not in self.buffers:
+            raise ValueError("Not subscribed to eyetracker: " + str(serialString))
+
+        with self.lock:
+            return self.droppedCounts[serialString]
+
+    # get and remove the buffered samples of all subscribed eyetrackers as a list of
+    # (serial number, sample) pairs ordered by system time stamp. Only samples older than
+    # the last sample of every eyetracker are returned, so a later call never returns a
+    # sample older than the ones already returned. An eyetracker sending nothing for
+    # staleTimeout seconds is left out until it sends again, its late samples can be older
+    # than the ones already returned. flush = True returns all samples.
+    def readAlignedSamples(self, flush = False):
+
+        if not isinstance(flush, bool):
+            raise TypeError("flush should be a boolean value.")
+
+        newStaleSerials = []
+        with self.lock:
+            serials = [serial for serial in self.callbacks.keys() if serial in self.buffers]
+            if len(serials) == 0:
+                return []
+
+            if flush:
+                watermark = None
+            else:
+                now = time.monotonic()
+                activeSerials = []
+                for serial in serials:
+                    if now - self.receiveTimes[serial] < self.staleTimeout:
+                        activeSerials.append(serial)
+                        self.staleSerials.discard(serial)
+                    elif serial not in self.staleSerials:
+                        self.staleSerials.add(serial)
+                        newStaleSerials.append(serial)
+
+                # wait until every eyetracker sent something
+                for serial in activeSerials:
+                    if serial not in self.latestTimeStamps:
+                        return []
+                # all eyetrackers are silent, nothing holds back their samples
+                if len(activeSerials) == 0:
+                    watermark = None
+                else:
+                    watermark = min([self.latestTimeStamps[serial] for serial in activeSerials])
+
+            samplesByTracker = []
+            for serial in serials:
+                buffer = self.buffers[serial]
+                samples = []
+                while len(buffer) > 0 and (watermark is None or buffer[0]['system_time_stamp'] <= watermark):
+                    sample = buffer.popleft()
+                    samples.append((sample['system_time_stamp'], serial, sample))
+                samplesByTracker.append(samples)
+
+        for serial in newStaleSerials:
+            self.__log(logging.WARNING, "Eyetracker sends no gaze data, it's left out of the aligned samples: "
+                       + serial, serial_number = serial, dropped = self.getDroppedCount(serial))
+
+        mergedSamples = heapq.merge(*samplesByTracker, key = lambda item : item[0])
+        return [(serial, sample) for timeStamp, serial, sample in mergedSamples]
+
+    def __selectSerials(self, serialString):
+        if serialString is None:
+            return list(self.helpers.keys())
+        if serialString not in self.helpers:
+            raise ValueError("No connected eyetracker with serial number: " + str(serialString))
+        return [serialString]
+
+    def __createGazeDataCallback(self, serial):
+        helper = self.helpers[serial]
+
+        def gazeDataCallback(gazeData):
+            with self.lock:
+                buffer = self.buffers.get(serial)
+                if buffer is None:
+                    return
+                if len(buffer) == buffer.maxlen:
+                    self.droppedCounts[serial] += 1
+                buffer.append(gazeData)
+                self.latestTimeStamps[serial] = gazeData['system_time_stamp']
+                self.receiveTimes[serial] = time.monotonic()
+            # while a screen of the helper runs, its own subscription feeds it
+            if not helper.tracking:
+                helper.receiveGazeData(gazeData)
+
+        return gazeDataCallback
+
+    # release a helper which is not kept: wait for its searching and stop its subscriptions
+    def __closeHelper(self, helper):
+        try:
+            helper.waitForEyeTracker()
+        except Exception:
+            pass
+        if helper.eyetracker is None:
+            return
+        if helper.tracking:
+            helper.stopGazeData()
+        if helper.subscriptions is not None:
+            helper.subscriptions.unsubscribeAll()